@@ -68,9 +68,11 @@ class ClientConfig:
 
     mic_seg_duration = 60       # 麦克风听写时分段长度：60秒
     mic_seg_overlap = 4         # 麦克风听写时分段重叠：4秒
+    mic_partial_result = False  # 麦克风听写时请求逐 Token 的临时结果（LLM 类模型边生成边推送，可用于实时显示）
 
     file_seg_duration = 60      # 转录文件时分段长度
     file_seg_overlap = 4        # 转录文件时分段重叠
+    file_delta_result = True    # 转录文件时请求增量结果（中间结果只传变化部分，长文件省流量）
 
     file_save_srt = True        # 转录文件时是否保存 srt 字幕
     file_save_txt = True        # 转录文件时是否保存 txt 文本（按标点切分后的）
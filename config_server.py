@@ -13,9 +13,18 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # master 主线一份代码同时支持 Win/Linux/Mac 多平台、多部署实例：部署差异（引擎、
 # 端口、GPU 开关）一律通过环境变量切换，无需改动源码，避免代码漂移。可用变量：
 #   --- 部署标识（区分同机多实例）---
-#   CW_MODEL_TYPE             ASR 引擎：qwen_asr(默认)/qwen_asr_mlx/fun_asr_nano/sensevoice/paraformer
+#   CW_MODEL_TYPE             ASR 引擎：qwen_asr(默认)/qwen_asr_mlx/fun_asr_nano/sensevoice/paraformer/synthetic
 #   CW_PORT                   WebSocket 监听端口：6016(默认)
 #   CW_ADDR                   WebSocket 监听地址：0.0.0.0(默认)
+#   CW_NUM_WORKERS            识别进程数：1(默认)，每个进程各加载一份模型
+#   CW_ASR_BATCH_SIZE         合批推理的最大切片数：1(默认，不合批)   —— SenseVoice/Paraformer/FunASR/synthetic
+#   CW_METRICS_PORT           本机指标端口（Prometheus /metrics）：0(默认，关闭)
+#   CW_FILE_VAD               文件任务按停顿切分（无重叠）：0(默认，固定时长+重叠)/1
+#   CW_SILENCE_SKIP           静音片段跳过引擎推理：1(默认)/0
+#   CW_MIC_EAGER              麦克风在停顿处提前切分提交：0(默认)/1
+#   CW_LLM_BYPASS             CTC 置信度高时跳过 LLM：0(默认)/1    —— FunASR
+#   CW_LLM_BYPASS_CONFIDENCE  跳过 LLM 的置信度阈值：0.9(默认)     —— FunASR
+#   CW_LLM_SPECULATIVE        以 CTC 文本为草稿投机解码：0(默认)/1 —— FunASR
 #   --- GPU/后端加速 ---
 #   CW_ONNX_PROVIDER          ONNX 后端：CPU(默认)/CUDA/DML/TRT   —— SenseVoice/FunASR/Qwen
 #   CW_LLM_USE_GPU            GGUF LLM 是否用 GPU：0(默认)/1       —— FunASR/Qwen
@@ -47,6 +56,7 @@ class ServerConfig:
 
     # 语音模型选择：'qwen_asr', 'qwen_asr_mlx', 'fun_asr_nano', 'sensevoice', 'paraformer'
     #   'qwen_asr_mlx' 为 Apple MLX 版 Qwen3-ASR，仅 Apple Silicon (arm64 macOS) 可用
+    #   'synthetic' 为不需要模型文件的合成引擎，仅用于基准测试（scripts/_bench_pipeline.py）
     #   部署时由 CW_MODEL_TYPE 覆盖，无需改源码
     model_type = _env_str('CW_MODEL_TYPE', 'qwen_asr')
 
@@ -66,6 +76,48 @@ class ServerConfig:
     gpu_unboost_cmd = 'nvidia-smi -rmc'         # GPU 取消预加速命令，恢复显存到默认频率
     gpu_unboost_timeout = 1                     # 空闲多少秒后取消加速
 
+    # 音频传输：开启后音频片段经共享内存交给识别进程，队列只传偏移/长度描述符，
+    # 省去每个片段的 pickle 与管道拷贝；共享内存写满时自动回退为队列内联传输
+    shm_transport = False
+    shm_arena_mb = 256                          # 共享内存区大小（MB）
+
+    # 识别进程数：每个进程各自加载一份模型（内存/显存占用成倍增加），
+    # 同一会话固定由一个进程处理，新会话分给负载最轻的进程；多核 CPU 部署可调大
+    num_workers = int(_env_str('CW_NUM_WORKERS', '1'))
+
+    # 识别进程调度：麦克风片段优先于文件片段（在两个片段之间抢占），同类会话间轮转。
+    # 片段提交后若干秒为其截止时间：超时片段最先处理；0 表示不设截止时间。
+    # 给文件片段设截止时间可防止持续的麦克风负载把文件转录饿死
+    mic_deadline = 1.0
+    file_deadline = 0
+
+    # 合批推理：引擎支持合批时（见各引擎的 batch_size），识别进程以首个片段为准，
+    # 在此时间窗内凑齐同类片段一起推理（秒）
+    batch_window = 0.01
+    batch_max_seconds = 1.0     # 文件片段整批的预计识别耗时上限（秒），限制随后的麦克风片段的等待；0 表示不限
+
+    # 文件切分：默认按客户端给的固定时长 + 重叠切分，重叠部分识别两遍、再按文本对齐去重；
+    # 开启后服务端用能量/过零率 VAD 在停顿处切分，片段之间无重叠，拼接即首尾相连
+    file_vad = _env_bool('CW_FILE_VAD', False)
+    vad_min_segment = 20.0      # 片段最短时长（秒），在 [最短, 最长] 区间内找停顿
+    vad_max_segment = 60.0      # 片段最长时长（秒），不应超过引擎单段上限
+    vad_min_pause = 0.3         # 视为停顿的最短静音（秒），找不到时在能量最低处切开
+
+    # 麦克风提前切分：说话中一出现停顿就把停顿之前的音频作为片段提交识别（片段间无重叠），
+    # 松开按键时只需识别最后一次停顿之后的短尾巴，降低出字延迟
+    mic_eager = _env_bool('CW_MIC_EAGER', False)
+    mic_eager_min_segment = 2.0     # 提前切分的最短片段（秒），过短的片段缺少上下文
+
+    # 静音跳过（默认关闭）：开启后整段最响的一帧（30ms）仍低于阈值的片段不送入引擎，直接按空结果拼接（时长照常累计）
+    silence_skip = _env_bool('CW_SILENCE_SKIP', False)
+    silence_threshold_db = -50.0    # dBFS，语音帧通常在 -40 以上
+
+    # 运行指标：以 Prometheus 文本格式在本机 http://metrics_addr:metrics_port/metrics 暴露
+    # 队列深度、会话数、各阶段耗时直方图、RTF、对齐器加载/卸载次数、识别进程内存
+    metrics_port = int(_env_str('CW_METRICS_PORT', '0'))   # 0 表示关闭
+    metrics_addr = '127.0.0.1'                  # 只监听本机
+    metrics_interval = 1.0                      # 识别进程上报指标快照的最短间隔（秒）
+
     # 集成显卡兼容性补丁
     # os.environ["GGML_VK_DISABLE_COOPMAT"] = "1"   # AMD集显无法加载 GGUF 模型时尝试
     # os.environ["GGML_VK_DISABLE_F16"] = "1"       # 集成显卡解码有误，强制熔断时尝试
@@ -133,6 +185,7 @@ class ParaformerArgs:
     decoding_method = 'greedy_search'
     provider = 'cpu'            # Paraformer 不支持 GPU 加速，固定 CPU（不随 CW_ONNX_PROVIDER 变化）
     debug = False
+    batch_size = int(_env_str('CW_ASR_BATCH_SIZE', '1'))  # 合批推理：多个片段一次 decode_streams，1 表示不合批
 
 
 class SenseVoiceArgs:
@@ -145,6 +198,7 @@ class SenseVoiceArgs:
     onnx_provider = _env_str('CW_ONNX_PROVIDER', 'CPU')  # ONNX 推理后端 (CPU/CUDA/DML)，环境变量可覆盖
     top_k = 8                   # 热词检索的 CTC 空间大小
     dml_pad_to = 30             # 开启 DirectML 加速时，短音频统一填充到指定长度，有加速效果
+    batch_size = int(_env_str('CW_ASR_BATCH_SIZE', '1'))  # 合批推理：多个片段的切片一起过 Encoder，1 表示不合批
 
 
 class FunASRNanoGGUFArgs:
@@ -168,6 +222,16 @@ class FunASRNanoGGUFArgs:
     similar_threshold = 0.6     # 热词相似度阈值，超过阈值的热词会被传入 llm decoder 的上下文
     max_hotwords = 20           # 传入上下文的热词数量上限
     dml_pad_to = 30             # 开启 DirectML 加速时，短音频统一填充到指定长度，有加速效果
+
+    # CTC 置信度足够高、且没有热词命中的短音频，直接采用 CTC 文本而跳过 LLM 解码（结果不含标点）
+    llm_bypass = _env_bool('CW_LLM_BYPASS', False)
+    bypass_confidence = float(_env_str('CW_LLM_BYPASS_CONFIDENCE', '0.9'))  # 最低 CTC 置信度（0~1）
+    bypass_max_seconds = 10.0   # 只对不长于此时长（秒）的音频跳过 LLM
+
+    # 投机解码：以 CTC 文本为草稿，一次前向验证多个 Token（输出与逐 Token 生成一致，只是更快）
+    speculative = _env_bool('CW_LLM_SPECULATIVE', False)
+    draft_max = 8               # 每次验证的最大草稿 Token 数
+    batch_size = int(_env_str('CW_ASR_BATCH_SIZE', '1'))  # 合批解码：多个片段在同一 LLM 上下文的不同序列中同步生成，1 表示不合批
     verbose = False
 
 class Qwen3ASRGGUFArgs:
@@ -188,6 +252,7 @@ class Qwen3ASRGGUFArgs:
     chunk_size = 80.0           # 分段长度（秒）
     memory_num = 1              # 记忆段数
     dml_pad_to = 30             # 开启 DirectML 加速时，短音频统一填充到指定长度，有加速效果
+    batch_size = int(_env_str('CW_ASR_BATCH_SIZE', '1'))  # 合批解码：多个片段在同一 LLM 上下文的不同序列中同步生成，1 表示不合批
     verbose = False
 
 
@@ -204,6 +269,20 @@ class QwenASRMLXArgs:
     verbose = False
 
 
+class SyntheticArgs:
+    """合成引擎参数配置（基准测试用，字段名须与 SyntheticConfig 一致）"""
+    tokens_per_second = 4.0                 # 每秒音频产出的 token 数
+    vocabulary = '甲乙丙丁戊己庚辛壬癸子丑寅卯辰巳午未申酉戌亥'  # token 字表
+    silence_threshold = 0.0                 # 采样绝对值不超过此值视为静音
+    latency_base = float(_env_str('CW_SYNTH_LATENCY_BASE', '0.02'))         # 每次解码固定耗时（秒）
+    latency_per_second = float(_env_str('CW_SYNTH_LATENCY_PER_SEC', '0.005'))  # 每秒音频额外耗时（秒）
+    latency_jitter = float(_env_str('CW_SYNTH_LATENCY_JITTER', '0'))        # 耗时抖动比例
+    timestamps = True                       # 声明自带时间戳，不挂载对齐器
+    seed = 0
+    batch_size = int(_env_str('CW_ASR_BATCH_SIZE', '1'))  # 合批上限：一批只计一次固定耗时
+    continuous = _env_bool('CW_SYNTH_CONTINUOUS', False)   # 合批时模拟连续批处理（解码中途接纳新的流）
+
+
 class ForceAlignerGGUFArgs:
     """Force-Aligner-GGUF 模型参数配置"""
 
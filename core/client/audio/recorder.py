@@ -9,9 +9,8 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import uuid
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, Union
 
 import numpy as np
 import websockets
@@ -20,7 +19,7 @@ from config_client import ClientConfig as Config
 from core.client.state import console
 from core.client.audio.file_manager import AudioFileManager
 from core.client.connection import WebSocketManager
-from core.protocol import AudioMessage
+from core.protocol import AudioMessage, AudioFrame
 from . import logger
 
 if TYPE_CHECKING:
@@ -64,7 +63,7 @@ class AudioRecorder:
         """快捷访问桥接到 app.ws"""
         return self.app.ws
     
-    async def _send_message(self, message: AudioMessage) -> None:
+    async def _send_message(self, message: Union[AudioMessage, AudioFrame]) -> None:
         """发送消息到服务端"""
         if not self._ws_manager.is_connected:
             if message.is_final:
@@ -136,18 +135,17 @@ class AudioRecorder:
                         self._file_manager.write(data)
                     
                     # 发送音频数据用于识别
-                    message = AudioMessage(
+                    message = self._ws_manager.build_audio_message(
+                        pcm=np.mean(data[::3], axis=1).tobytes(),
                         task_id=self.task_id,
                         source='mic',
-                        data=base64.b64encode(
-                            np.mean(data[::3], axis=1).tobytes()
-                        ).decode('utf-8'),
                         is_final=False,
                         time_start=self._start_time,
                         seg_duration=Config.mic_seg_duration,
                         seg_overlap=Config.mic_seg_overlap,
                         context=Config.context,
                         language=Config.language,
+                        partial=Config.mic_partial_result,
                     )
                     asyncio.create_task(self._send_message(message))
                     
@@ -161,18 +159,17 @@ class AudioRecorder:
                         if Config.save_audio and self._file_manager:
                             self._file_manager.write(data)
 
-                        message = AudioMessage(
+                        message = self._ws_manager.build_audio_message(
+                            pcm=np.mean(data[::3], axis=1).tobytes(),
                             task_id=self.task_id,
                             source='mic',
-                            data=base64.b64encode(
-                                np.mean(data[::3], axis=1).tobytes()
-                            ).decode('utf-8'),
                             is_final=False,
                             time_start=self._start_time,
                             seg_duration=Config.mic_seg_duration,
                             seg_overlap=Config.mic_seg_overlap,
                             context=Config.context,
                             language=Config.language,
+                            partial=Config.mic_partial_result,
                         )
                         asyncio.create_task(self._send_message(message))
 
@@ -186,16 +183,17 @@ class AudioRecorder:
                     logger.info(f"录音任务完成，任务ID: {self.task_id}, 时长: {self._duration:.2f}s")
                     
                     # 告诉服务端音频片段结束了
-                    message = AudioMessage(
+                    message = self._ws_manager.build_audio_message(
+                        pcm=b'',
                         task_id=self.task_id,
                         source='mic',
-                        data='',
                         is_final=True,
                         time_start=self._start_time,
                         seg_duration=Config.mic_seg_duration,
                         seg_overlap=Config.mic_seg_overlap,
                         context=Config.context,
                         language=Config.language,
+                        partial=Config.mic_partial_result,
                     )
                     asyncio.create_task(self._send_message(message))
                     break
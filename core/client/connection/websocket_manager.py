@@ -8,14 +8,16 @@ WebSocket 连接管理模块
 
 from __future__ import annotations
 
+import base64
 import json
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, Union
 
 import websockets
 from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
 
 from config_client import ClientConfig as Config
-from core.protocol import AudioMessage, RecognitionMessage
+from core.protocol import (AudioMessage, AudioFrame, RecognitionMessage, PartialMessage,
+                           AUDIO_FRAME_SUBPROTOCOL, parse_server_message)
 from ..state import console
 from .. import logger
 import asyncio
@@ -52,6 +54,7 @@ class WebSocketManager:
         """
         self.app = app
         self._connect_fail_logged = False  # 断联后只记一次失败日志
+        self.binary_audio = False           # 服务端是否协商了二进制音频帧
 
     @property
     def state(self) -> ClientState:
@@ -88,7 +91,7 @@ class WebSocketManager:
 
             kwargs = dict(
                 uri=url,
-                subprotocols=["binary"],
+                subprotocols=[AUDIO_FRAME_SUBPROTOCOL, "binary"],
                 max_size=None,
                 max_queue=None,  # 防止文件过大时，只发送，来不及消费结果，接收队列填满导致 pause_reading
             )
@@ -98,9 +101,10 @@ class WebSocketManager:
                 kwargs["proxy"] = None  
             
             self.state.websocket = await websockets.connect(**kwargs)
+            self.binary_audio = self.state.websocket.subprotocol == AUDIO_FRAME_SUBPROTOCOL
 
             console.print(f'[bold green]已连接服务端: {url}[/bold green]\n')
-            logger.info(f"WebSocket 建立成功: {url}")
+            logger.info(f"WebSocket 建立成功: {url}, 二进制音频帧: {self.binary_audio}")
             self._connect_fail_logged = False
             return True
 
@@ -115,12 +119,27 @@ class WebSocketManager:
         
         return False
     
-    async def send(self, message: AudioMessage) -> bool:
+    def build_audio_message(self, pcm: bytes, **fields) -> Union[AudioMessage, AudioFrame]:
+        """
+        按协商结果构造音频消息
+
+        服务端支持二进制音频帧时返回 AudioFrame（原始 PCM），
+        否则返回 base64 编码的 AudioMessage，兼容旧服务端。
+
+        Args:
+            pcm: float32, 16kHz, mono 音频数据
+            **fields: AudioMessage 的其余字段（task_id, source, is_final 等）
+        """
+        if self.binary_audio:
+            return AudioFrame(pcm=pcm, **fields)
+        return AudioMessage(data=base64.b64encode(pcm).decode('utf-8'), **fields)
+
+    async def send(self, message: Union[AudioMessage, AudioFrame]) -> bool:
         """
         发送消息到服务端
         
         Args:
-            message: 要发送的 AudioMessage 对象
+            message: 要发送的 AudioMessage 或 AudioFrame 对象
             
         Returns:
             发送是否成功
@@ -130,7 +149,10 @@ class WebSocketManager:
             return False
         
         try:
-            await self.state.websocket.send(message.to_json())
+            if isinstance(message, AudioFrame):
+                await self.state.websocket.send(message.to_bytes())
+            else:
+                await self.state.websocket.send(message.to_json())
             return True
             
         except (websockets.exceptions.ConnectionClosedError, websockets.exceptions.ConnectionClosedOK):
@@ -140,12 +162,12 @@ class WebSocketManager:
         except Exception as e:
             raise CommunicationError(f"发送消息时发生未知错误: {e}")
     
-    async def receive(self) -> Optional[RecognitionMessage]:
+    async def receive(self) -> Optional[Union[RecognitionMessage, PartialMessage]]:
         """
         接收服务端消息
         
         Returns:
-            解析后的 RecognitionMessage 对象，如果失败返回 None
+            解析后的 RecognitionMessage（请求了临时结果时也可能是 PartialMessage）对象，如果失败返回 None
         """
         if not self.is_connected:
             logger.warning("无法接收消息：WebSocket 未连接")
@@ -154,7 +176,7 @@ class WebSocketManager:
         try:
             raw_message = await self.state.websocket.recv()
             data = json.loads(raw_message)
-            return RecognitionMessage.from_dict(data)
+            return parse_server_message(data)
             
         except (websockets.exceptions.ConnectionClosedError, websockets.exceptions.ConnectionClosedOK):
             self.state.websocket = None
@@ -9,11 +9,11 @@ from __future__ import annotations
 
 import asyncio
 import time
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Optional, Union
 
 from config_client import ClientConfig as Config
 from core.client.state import console
-from core.protocol import RecognitionMessage
+from core.protocol import RecognitionMessage, PartialMessage
 
 from core.client.output.text_output import TextOutput
 from core.tools.window_detector import get_active_window_info
@@ -178,11 +178,16 @@ class ResultProcessor:
             self._cleanup()
             
 
-    async def _handle_message(self, message: Optional[RecognitionMessage]) -> None:
+    async def _handle_message(self, message: Optional[Union[RecognitionMessage, PartialMessage]]) -> None:
         """处理接收到的消息"""
         if message is None:
             return
 
+        # 临时结果：仅用于显示进度，由后续识别结果取代
+        if isinstance(message, PartialMessage):
+            logger.debug(f"临时结果: {message.text[-50:]}")
+            return
+
 
         # 使用 text 字段（简单拼接结果，用于语音输入）
         text = message.text
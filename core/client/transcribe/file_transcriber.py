@@ -8,7 +8,6 @@
 from __future__ import annotations
 
 import asyncio
-import base64
 import json
 import time
 import uuid
@@ -18,7 +17,7 @@ from typing import TYPE_CHECKING, Optional
 from config_client import ClientConfig as Config
 from core.client.state import console
 from core.client.connection import WebSocketManager
-from core.protocol import AudioMessage, RecognitionMessage
+from core.protocol import RecognitionMessage
 from .media_tool import MediaTool
 from .result_handler import ResultHandler
 from . import logger
@@ -123,31 +122,33 @@ class FileTranscriber:
                     prog_str = f'    发送进度：{progress:.2f}s'
                 console.print(prog_str, end='\r')
 
-                message = AudioMessage(
+                message = self._ws_manager.build_audio_message(
+                    pcm=data,
                     task_id=self.task_id,
                     source='file',
-                    data=base64.b64encode(data).decode('utf-8'),
                     is_final=False,
                     time_start=time.time(),
                     seg_duration=Config.file_seg_duration,
                     seg_overlap=Config.file_seg_overlap,
                     context=Config.context,
                     language=Config.language,
+                    delta=Config.file_delta_result,
                 )
                 if not await self._ws_manager.send(message):
                     raise ConnectionError("消息发送失败，连接可能已断开")
 
             # 发送结束标志
-            final_message = AudioMessage(
+            final_message = self._ws_manager.build_audio_message(
+                pcm=b'',
                 task_id=self.task_id,
                 source='file',
-                data='',
                 is_final=True,
                 time_start=time.time(),
                 seg_duration=Config.file_seg_duration,
                 seg_overlap=Config.file_seg_overlap,
                 context=Config.context,
                 language=Config.language,
+                delta=Config.file_delta_result,
             )
             if not await self._ws_manager.send(final_message):
                 raise ConnectionError("结束标志发送失败")
@@ -173,15 +174,21 @@ class FileTranscriber:
     async def receive(self) -> None:
         """接收转录结果"""
         
+        # 本地重建的完整结果：增量消息在其基础上替换尾部，完整消息直接替换
+        transcript = RecognitionMessage(
+            task_id=self.task_id, is_final=False, duration=0.0,
+            time_start=0.0, time_submit=0.0, time_complete=0.0, text='',
+        )
         try:
             while True:
                 msg = await self._ws_manager.receive()
                 if not msg:
                     break
                 
+                transcript = transcript.apply(msg)
                 console.print(f'    转录进度: {msg.duration:.2f}s', end='\r')
                 if msg.is_final:
-                    message = msg # 保持变量名兼容后续调用
+                    message = transcript # 保持变量名兼容后续调用
                     break
         except ConnectionError as e:
             logger.error(f"{e}, 文件: {self.file}")
@@ -8,8 +8,14 @@
 
 from __future__ import annotations
 from dataclasses import dataclass, field, asdict
-from typing import List, Literal, Optional
+from enum import IntEnum
+from typing import List, Literal, Optional, Union
 import json
+import struct
+
+
+# 二进制音频帧的 WebSocket 子协议名：客户端握手时提出，服务端选中即表示支持 AudioFrame
+AUDIO_FRAME_SUBPROTOCOL = 'capswriter.audio.v1'
 
 
 @dataclass
@@ -25,6 +31,8 @@ class AudioMessage:
         time_start: 录音/音频开始时间戳
         seg_duration: 分段时长（秒）
         seg_overlap: 重叠时长（秒）
+        delta: 是否请求增量结果（非最终结果只携带相对上一修订的变化，见 RecognitionMessage）
+        partial: 是否请求逐 Token 的临时结果（见 PartialMessage，仅逐 Token 生成的引擎会发送）
     """
     task_id: str
     source: Literal['mic', 'file']
@@ -35,6 +43,8 @@ class AudioMessage:
     seg_overlap: float = 2.0
     context: str = ''
     language: str = 'auto'
+    delta: bool = False
+    partial: bool = False
 
     def to_json(self) -> str:
         """序列化为 JSON 字符串"""
@@ -53,6 +63,117 @@ class AudioMessage:
             seg_overlap=data.get('seg_overlap', 2.0),
             context=data.get('context', ''),
             language=data.get('language', 'auto'),
+            delta=data.get('delta', False),
+            partial=data.get('partial', False),
+        )
+
+
+class SampleFormat(IntEnum):
+    """二进制音频帧中的采样格式"""
+    FLOAT32 = 0     # little-endian float32
+    INT16 = 1       # little-endian int16
+
+
+@dataclass
+class AudioFrame:
+    """
+    客户端 -> 服务端：二进制音频帧
+
+    与 AudioMessage 字段一致，但以固定头部 + 原始 PCM 的二进制格式传输，
+    省去 base64 膨胀与 JSON 解析。仅在握手协商到 AUDIO_FRAME_SUBPROTOCOL 后使用。
+
+    帧布局（小端）：
+        固定头部 _HEADER（magic, version, flags, sample_format, reserved,
+                         seg_duration, seg_overlap, time_start,
+                         task_id 长度, language 长度, context 长度）
+        task_id (utf-8) | language (utf-8) | context (utf-8) | PCM
+
+    Attributes:
+        pcm: 原始音频数据，格式由 sample_format 指定（16kHz, mono）
+        sample_format: 采样格式，见 SampleFormat
+        其余字段含义同 AudioMessage
+    """
+    task_id: str
+    source: Literal['mic', 'file']
+    pcm: bytes
+    is_final: bool
+    time_start: float
+    seg_duration: float = 15.0
+    seg_overlap: float = 2.0
+    context: str = ''
+    language: str = 'auto'
+    delta: bool = False
+    partial: bool = False
+    sample_format: SampleFormat = SampleFormat.FLOAT32
+
+    MAGIC = b'CWAF'
+    VERSION = 1
+    FLAG_FINAL = 0x01
+    FLAG_FILE = 0x02
+    FLAG_DELTA = 0x04
+    FLAG_PARTIAL = 0x08
+    _HEADER = struct.Struct('<4sBBBBdddBBI')
+
+    def to_bytes(self) -> bytes:
+        """序列化为二进制帧"""
+        task_id = self.task_id.encode('utf-8')
+        language = self.language.encode('utf-8')
+        context = self.context.encode('utf-8')
+        flags = ((self.FLAG_FINAL if self.is_final else 0)
+                 | (self.FLAG_FILE if self.source == 'file' else 0)
+                 | (self.FLAG_DELTA if self.delta else 0)
+                 | (self.FLAG_PARTIAL if self.partial else 0))
+        header = self._HEADER.pack(
+            self.MAGIC, self.VERSION, flags, int(self.sample_format), 0,
+            self.seg_duration, self.seg_overlap, self.time_start,
+            len(task_id), len(language), len(context),
+        )
+        return b''.join((header, task_id, language, context, self.pcm))
+
+    @classmethod
+    def from_bytes(cls, buf: Union[bytes, bytearray, memoryview]) -> AudioFrame:
+        """
+        从二进制帧解析实例
+
+        返回的 pcm 是对 buf 的 memoryview 切片，不复制音频数据。
+
+        Raises:
+            ValueError: 帧格式不合法
+        """
+        view = memoryview(buf)
+        size = cls._HEADER.size
+        if len(view) < size:
+            raise ValueError(f"音频帧过短: {len(view)} bytes")
+
+        (magic, version, flags, sample_format, _,
+         seg_duration, seg_overlap, time_start,
+         task_id_len, language_len, context_len) = cls._HEADER.unpack_from(view)
+        if magic != cls.MAGIC:
+            raise ValueError(f"音频帧 magic 不匹配: {magic!r}")
+        if version != cls.VERSION:
+            raise ValueError(f"不支持的音频帧版本: {version}")
+
+        pos = size
+        end = pos + task_id_len + language_len + context_len
+        if len(view) < end:
+            raise ValueError("音频帧头部长度字段越界")
+        task_id = bytes(view[pos:pos + task_id_len]).decode('utf-8'); pos += task_id_len
+        language = bytes(view[pos:pos + language_len]).decode('utf-8'); pos += language_len
+        context = bytes(view[pos:end]).decode('utf-8')
+
+        return cls(
+            task_id=task_id,
+            source='file' if flags & cls.FLAG_FILE else 'mic',
+            pcm=view[end:],
+            is_final=bool(flags & cls.FLAG_FINAL),
+            time_start=time_start,
+            seg_duration=seg_duration,
+            seg_overlap=seg_overlap,
+            context=context,
+            language=language or 'auto',
+            delta=bool(flags & cls.FLAG_DELTA),
+            partial=bool(flags & cls.FLAG_PARTIAL),
+            sample_format=SampleFormat(sample_format),
         )
 
 
@@ -73,6 +194,13 @@ class RecognitionMessage:
         text_accu: 精确输出 - 基于时间戳去重的拼接结果（用于字幕生成）
         tokens: 字级 token 列表（与 timestamps 对应）
         timestamps: 字级时间戳列表（秒）
+
+        增量模式（AudioMessage.delta=True）下，非最终结果为增量消息：
+        revision: 本消息的修订号
+        base_revision: 本消息所基于的修订号，客户端当前修订号须与之相等
+        token_base: tokens/timestamps 从该下标起被替换为本消息携带的内容；-1 表示完整消息
+        text_base: text 从该下标起被替换为本消息携带的内容
+        增量消息不携带 text_accu，由 apply() 依据 tokens 重建。最终结果始终为完整消息。
     """
     task_id: str
     is_final: bool
@@ -88,6 +216,46 @@ class RecognitionMessage:
     text_accu: str = ''
     tokens: List[str] = field(default_factory=list)
     timestamps: List[float] = field(default_factory=list)
+
+    # 增量模式
+    revision: int = 0
+    base_revision: int = 0
+    token_base: int = -1
+    text_base: int = -1
+
+    @property
+    def is_delta(self) -> bool:
+        """是否为增量消息"""
+        return self.token_base >= 0
+
+    def apply(self, msg: RecognitionMessage) -> RecognitionMessage:
+        """
+        将新收到的消息应用到当前（完整）结果上，返回新的完整结果
+
+        完整消息直接替换当前结果；增量消息在当前结果的基础上替换尾部。
+
+        Raises:
+            ValueError: 增量消息的 base_revision 与当前修订号不符（中间消息丢失）
+        """
+        if not msg.is_delta:
+            return msg
+        if msg.base_revision != self.revision:
+            raise ValueError(f"增量消息修订号不连续: 当前 {self.revision}, 消息基于 {msg.base_revision}")
+
+        tokens = self.tokens[:msg.token_base] + msg.tokens
+        return RecognitionMessage(
+            task_id=msg.task_id,
+            is_final=msg.is_final,
+            duration=msg.duration,
+            time_start=msg.time_start,
+            time_submit=msg.time_submit,
+            time_complete=msg.time_complete,
+            text=self.text[:msg.text_base] + msg.text,
+            text_accu=''.join(tokens).replace('@@', ''),
+            tokens=tokens,
+            timestamps=self.timestamps[:msg.token_base] + msg.timestamps,
+            revision=msg.revision,
+        )
     
     def to_json(self) -> str:
         """序列化为 JSON 字符串"""
@@ -111,4 +279,48 @@ class RecognitionMessage:
             text_accu=data.get('text_accu', ''),
             tokens=data.get('tokens', []),
             timestamps=data.get('timestamps', []),
+            revision=data.get('revision', 0),
+            base_revision=data.get('base_revision', 0),
+            token_base=data.get('token_base', -1),
+            text_base=data.get('text_base', -1),
+        )
+
+
+@dataclass
+class PartialMessage:
+    """
+    服务端 -> 客户端：进行中片段的临时结果（AudioMessage.partial=True 时发送）
+
+    LLM 逐 Token 生成时随生成推送，后一条取代前一条；
+    该片段完成后由 RecognitionMessage 取代，临时结果不计入修订号。
+
+    Attributes:
+        task_id: 任务唯一标识
+        text: 进行中片段目前已生成的文本（未与之前的片段拼接，也未格式化）
+        time_submit: 该片段的提交时间戳
+        partial: 消息类型标记，恒为 True
+    """
+    task_id: str
+    text: str
+    time_submit: float = 0.0
+    partial: bool = True
+
+    def to_json(self) -> str:
+        """序列化为 JSON 字符串"""
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> PartialMessage:
+        """从字典创建实例"""
+        return cls(
+            task_id=data['task_id'],
+            text=data['text'],
+            time_submit=data.get('time_submit', 0.0),
         )
+
+
+def parse_server_message(data: dict) -> Union[RecognitionMessage, PartialMessage]:
+    """按类型标记解析服务端消息"""
+    if data.get('partial'):
+        return PartialMessage.from_dict(data)
+    return RecognitionMessage.from_dict(data)
@@ -16,6 +16,7 @@ from core.tools.signal_handler import register_signal
 from .worker.process_manager import ProcessManager
 from .connection.server_manager import SocketManager
 from .ui.tray_manager import TrayManager
+from .metrics import MetricsExporter
 from . import logger
 
 class CapsWriterServer:
@@ -40,6 +41,7 @@ class CapsWriterServer:
         self.process_manager = ProcessManager(self)
         self.socket_manager = SocketManager(self)
         self.tray_manager = TrayManager(self)
+        self.metrics_exporter = MetricsExporter(self.state, Config.metrics_addr, Config.metrics_port)
 
         self.version = __version__
         self.is_alive = False
@@ -73,8 +75,10 @@ class CapsWriterServer:
         # 2. 终止识别子进程
         self.process_manager.stop()
 
-        # 3. 停止托盘图标
+        # 3. 停止托盘图标与指标服务
         self.tray_manager.stop()
+        if Config.metrics_port:
+            self.metrics_exporter.stop()
 
         # 4. 最后停止协程（需在其他资源释放之后）
         self.loop.stop()
@@ -102,6 +106,10 @@ class CapsWriterServer:
 
         # 拉起识别子进程
         self.process_manager.start()
+
+        # 本机指标服务（可选）
+        if Config.metrics_port:
+            self.metrics_exporter.start()
         
         # 开启网络服务监听 (接管当前线程直至退出)
         try:
@@ -0,0 +1,123 @@
+# coding: utf-8
+"""
+共享内存音频区模块
+
+主进程把音频片段写入 multiprocessing.shared_memory 区域，
+队列中只传递 (offset, length) 描述符；识别进程按描述符零拷贝读取，
+处理完毕后归还槽位。
+
+内存布局：
+    [槽位标记区: n_slots 字节，按 64 字节对齐] [数据区: n_slots * slot_bytes]
+
+槽位标记只有两个写者：主进程把空闲槽位置 1（分配），识别进程把已用槽位置 0（归还），
+因此无需跨进程锁。
+"""
+
+from multiprocessing import shared_memory
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from core.constants import AudioFormat
+
+
+class AudioArena:
+    """
+    共享内存音频区
+
+    由主进程 create()，随 Process 参数传给识别进程（pickle 时按名称重新 attach）。
+    一个片段占用若干连续槽位；空间不足时 write() 返回 None，调用方回退为队列内联传输。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, n_slots: int, slot_bytes: int, owner: bool):
+        self._shm = shm
+        self.n_slots = n_slots
+        self.slot_bytes = slot_bytes
+        self._owner = owner
+        self._data_offset = -(-n_slots // 64) * 64
+        self._flags = np.ndarray((n_slots,), dtype=np.uint8, buffer=shm.buf)
+        self._cursor = 0    # 下次分配的起始搜索位置（next-fit，避免刚归还的槽位被立即复用）
+
+    @classmethod
+    def create(cls, size_mb: float, slot_seconds: float = 4.0) -> 'AudioArena':
+        """在主进程中创建共享内存区"""
+        slot_bytes = AudioFormat.seconds_to_bytes(slot_seconds)
+        n_slots = max(int(size_mb * 2**20) // slot_bytes, 1)
+        size = -(-n_slots // 64) * 64 + n_slots * slot_bytes
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        arena = cls(shm, n_slots, slot_bytes, owner=True)
+        arena._flags[:] = 0
+        return arena
+
+    @classmethod
+    def attach(cls, name: str, n_slots: int, slot_bytes: int) -> 'AudioArena':
+        """在识别进程中按名称挂载已有的共享内存区"""
+        return cls(shared_memory.SharedMemory(name=name), n_slots, slot_bytes, owner=False)
+
+    def __reduce__(self):
+        return AudioArena.attach, (self._shm.name, self.n_slots, self.slot_bytes)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def free_slots(self) -> int:
+        """当前空闲槽位数"""
+        return int(np.count_nonzero(self._flags == 0))
+
+    def _slots_for(self, length: int) -> int:
+        return -(-length // self.slot_bytes)
+
+    def _find_run(self, k: int) -> int:
+        """寻找 k 个连续空闲槽位，优先从 cursor 之后找；找不到返回 -1"""
+        if k > self.n_slots:
+            return -1
+        free = np.concatenate(([0], np.cumsum(self._flags == 0, dtype=np.int32)))
+        starts = np.flatnonzero(free[k:] - free[:-k] == k)
+        if not len(starts):
+            return -1
+        after = starts[starts >= self._cursor]
+        return int(after[0] if len(after) else starts[0])
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> Optional[Tuple[int, int]]:
+        """
+        写入一个音频片段（仅主进程调用）
+
+        Returns:
+            (offset, length) 描述符；片段为空或空间不足时返回 None
+        """
+        data = memoryview(data).cast('B')
+        length = len(data)
+        if not length:
+            return None
+        k = self._slots_for(length)
+        slot = self._find_run(k)
+        if slot < 0:
+            return None
+
+        offset = self._data_offset + slot * self.slot_bytes
+        self._shm.buf[offset:offset + length] = data
+        self._flags[slot:slot + k] = 1
+        self._cursor = (slot + k) % self.n_slots
+        return offset, length
+
+    def view(self, offset: int, length: int) -> memoryview:
+        """按描述符返回片段的零拷贝视图（归还前有效）"""
+        return self._shm.buf[offset:offset + length]
+
+    def release(self, offset: int, length: int) -> None:
+        """归还片段占用的槽位（仅识别进程调用）"""
+        slot = (offset - self._data_offset) // self.slot_bytes
+        self._flags[slot:slot + self._slots_for(length)] = 0
+
+    def close(self) -> None:
+        """断开映射；创建者同时销毁共享内存"""
+        self._flags = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # 仍有视图引用映射（如进程退出时未回收的 numpy 数组），交由进程退出释放
+            pass
+        if self._owner:
+            self._shm.unlink()
@@ -0,0 +1,100 @@
+# coding: utf-8
+"""
+音频环形缓冲模块
+
+为 ws_recv 提供 float32 采样的预分配缓冲区，替代 bytes 拼接与切片：
+追加只写入空闲区，切段返回零拷贝视图，前移只移动读指针。
+"""
+
+from typing import Union
+
+import numpy as np
+
+from core.constants import AudioFormat
+
+
+class AudioRingBuffer:
+    """
+    可增长的 float32 音频缓冲区
+
+    数据区 [start, end) 始终连续，因此任意长度的片段都能以零拷贝视图交出。
+    写满时先把未读数据搬回头部（搬运量不超过容量一半，均摊 O(1)），
+    仍不够才按倍数扩容；前移（advance）只动读指针，从不重新分配。
+
+    注意：peek / samples 返回的视图在下一次 append 之前有效。
+    """
+
+    def __init__(self, capacity: int = AudioFormat.SAMPLE_RATE * 30):
+        self._initial_capacity = max(int(capacity), 1)
+        self._buf: np.ndarray = np.empty(0, dtype=np.float32)
+        self._start = 0         # 读指针（采样点）
+        self._end = 0           # 写指针（采样点）
+        self._partial = b''     # 不足一个采样点的残余字节，等待下次拼齐
+
+    def __len__(self) -> int:
+        """缓冲区中的采样点数"""
+        return self._end - self._start
+
+    @property
+    def nbytes(self) -> int:
+        """缓冲区中的字节数"""
+        return len(self) * AudioFormat.BYTES_PER_SAMPLE
+
+    @property
+    def capacity(self) -> int:
+        """当前已分配的容量（采样点）"""
+        return len(self._buf)
+
+    def append(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        """追加 float32 原始字节；末尾不足一个采样点的字节留待下次拼齐"""
+        if self._partial:
+            data = self._partial + bytes(data)
+            self._partial = b''
+        data = memoryview(data).cast('B')
+        usable = len(data) - len(data) % AudioFormat.BYTES_PER_SAMPLE
+        if usable < len(data):
+            self._partial = bytes(data[usable:])
+        if not usable:
+            return
+
+        samples = np.frombuffer(data[:usable], dtype=np.float32)
+        n = len(samples)
+        if self._end + n > len(self._buf):
+            self._reserve(n)
+        self._buf[self._end:self._end + n] = samples
+        self._end += n
+
+    def _reserve(self, n: int) -> None:
+        """保证写指针后至少有 n 个空位：优先搬回头部，不够再扩容"""
+        size = len(self)
+        capacity = len(self._buf)
+        if size + n <= capacity // 2:
+            self._buf[:size] = self._buf[self._start:self._end]
+        else:
+            new_buf = np.empty(max(capacity * 2, size + n, self._initial_capacity), dtype=np.float32)
+            new_buf[:size] = self._buf[self._start:self._end]
+            self._buf = new_buf
+        self._start, self._end = 0, size
+
+    def samples(self, n: int = -1) -> np.ndarray:
+        """返回开头 n 个采样点的零拷贝数组视图（n < 0 表示全部）"""
+        if n < 0 or n > len(self):
+            n = len(self)
+        return self._buf[self._start:self._start + n]
+
+    def peek(self, nbytes: int = -1) -> memoryview:
+        """返回开头 nbytes 字节的零拷贝字节视图（nbytes < 0 表示全部）"""
+        n = -1 if nbytes < 0 else nbytes // AudioFormat.BYTES_PER_SAMPLE
+        return memoryview(self.samples(n)).cast('B')
+
+    def advance(self, nbytes: int) -> None:
+        """丢弃开头 nbytes 字节（按采样点取整），不移动数据"""
+        n = min(nbytes // AudioFormat.BYTES_PER_SAMPLE, len(self))
+        self._start += n
+        if self._start == self._end:
+            self._start = self._end = 0
+
+    def clear(self) -> None:
+        """清空数据，保留已分配的内存"""
+        self._start = self._end = 0
+        self._partial = b''
@@ -10,7 +10,7 @@ import asyncio
 import functools
 import websockets
 from config_server import ServerConfig as Config
-from .ws_recv import ws_recv
+from .ws_recv import ws_recv, select_subprotocol
 from .ws_send import ws_send
 from .. import logger # Server module logger
 
@@ -66,7 +66,8 @@ class SocketManager:
             handler,
             Config.addr,
             Config.port,
-            max_size=None
+            max_size=None,
+            select_subprotocol=select_subprotocol,
         ) as server:
             self._server = server  # 保存 server 引用，用于外部关闭
 
@@ -0,0 +1,93 @@
+# coding: utf-8
+"""
+按停顿切分音频的轻量 VAD
+
+基于短时能量与过零率（纯 numpy，无模型）：噪声底取窗口内能量的低分位数，
+能量低于「噪声底 + 余量」且过零率不高（排除 s/sh 等清擦音）的帧视为静音。
+在 [最短, 最长] 片段区间内选最长的静音段，在其中点切开；找不到足够长的停顿时退而在区间末尾附近能量最低处切开。
+麦克风提前切分则用 find_last_pause 取最近一次停顿。
+"""
+
+import numpy as np
+
+from core.constants import AudioFormat
+
+FRAME = int(AudioFormat.SAMPLE_RATE * 0.03)     # 30ms 一帧
+
+
+def frame_features(samples: np.ndarray, frame: int = FRAME):
+    """逐帧能量（dBFS）与过零率，不足一帧的尾部丢弃"""
+    n = len(samples) // frame
+    frames = samples[:n * frame].reshape(n, frame)
+    energy = 10 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame - 1)
+    return energy, zcr
+
+
+def silent_frames(energy: np.ndarray, zcr: np.ndarray, margin_db: float = 10.0, zcr_max: float = 0.3) -> np.ndarray:
+    """
+    静音帧掩码：能量低于噪声底 + 余量，且过零率低于 zcr_max（贴近噪声底的帧不看过零率）
+
+    噪声底取 1% 分位（停顿占比很小时也不会落到语音上），余量不超过动态范围的一半；
+    动态范围不足 margin_db 时视为没有停顿。
+    """
+    floor, peak = np.percentile(energy, [1, 95])
+    if peak - floor < margin_db:
+        return np.zeros(len(energy), dtype=bool)
+    quiet = energy < floor + min(margin_db, (peak - floor) / 2)
+    return quiet & ((zcr < zcr_max) | (energy < floor + 3.0))
+
+
+def silent_runs(silent: np.ndarray):
+    """连续静音段的 [start, end) 帧序号，以掩码的上升沿 / 下降沿界定"""
+    edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def find_pause_cut(samples: np.ndarray, min_samples: int, max_samples: int, min_pause: float = 0.3) -> int:
+    """
+    在 samples[min_samples:max_samples] 内寻找切分点，返回切点的采样点序号（帧边界）
+
+    Args:
+        samples: 从当前片段起点开始的音频（float32），长度不足 max_samples 时按实际长度搜索
+        min_samples / max_samples: 片段的最短 / 最长采样点数
+        min_pause: 视为停顿的最短静音时长（秒）
+    """
+    max_samples = min(max_samples, len(samples))
+    if max_samples <= min_samples:
+        return max_samples
+
+    energy, zcr = frame_features(samples[:max_samples])
+    lo, hi = max(-(-min_samples // FRAME), 1), len(energy)  # 切点所在帧的范围（不切出空片段）
+    if lo >= hi:
+        return max_samples
+    starts, ends = silent_runs(silent_frames(energy, zcr))
+    mids = (starts + ends) // 2
+    ok = (ends - starts >= min_pause * AudioFormat.SAMPLE_RATE / FRAME) & (mids >= lo) & (mids < hi)
+    if ok.any():
+        # 最长的停顿优先，等长时取靠后的（片段更长、切分更少）
+        lengths = np.where(ok, ends - starts, -1)
+        best = len(lengths) - 1 - np.argmax(lengths[::-1])
+        return int(mids[best]) * FRAME
+
+    # 兜底：在区间最后四分之一内能量最低的帧处切开，片段尽量长
+    lo = max(lo, hi - (hi - lo + 3) // 4)
+    return int(lo + np.argmin(energy[lo:hi])) * FRAME
+
+
+def find_last_pause(samples: np.ndarray, min_samples: int, min_pause: float = 0.3) -> int:
+    """
+    寻找最近一次停顿，返回其中点的采样点序号（帧边界）；没有满足条件的停顿时返回 0
+
+    停顿须长于 min_pause（可以仍在持续），且切点不早于 min_samples。
+    """
+    energy, zcr = frame_features(samples)
+    if not len(energy):
+        return 0
+    starts, ends = silent_runs(silent_frames(energy, zcr))
+    mids = (starts + ends) // 2
+    ok = (ends - starts >= min_pause * AudioFormat.SAMPLE_RATE / FRAME) & (mids * FRAME >= max(min_samples, 1))
+    if not ok.any():
+        return 0
+    return int(mids[np.flatnonzero(ok)[-1]]) * FRAME
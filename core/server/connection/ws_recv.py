@@ -8,15 +8,19 @@ WebSocket 接收处理模块
 import json
 import time
 from base64 import b64decode
+from typing import Optional, Tuple, Union
 
+import numpy as np
 import websockets
 
 from ..state import console
 from ..schema import Task
 from config_server import ServerConfig as Config
-from core.protocol import AudioMessage
+from core.protocol import AudioMessage, AudioFrame, SampleFormat, AUDIO_FRAME_SUBPROTOCOL
 from core.constants import AudioFormat
 from core.tools.my_status import Status
+from .audio_buffer import AudioRingBuffer
+from .vad import find_pause_cut, find_last_pause
 from .. import logger
 
 
@@ -31,14 +35,14 @@ class AudioCache:
     用于缓存接收到的音频数据，直到达到分段阈值后提交处理。
     """
     def __init__(self):
-        self.chunks: bytes = b''    # 音频数据缓冲
+        self.buffer = AudioRingBuffer()  # 音频数据缓冲（float32 环形缓冲）
         self.offset: float = 0.0    # 当前偏移时间（秒）
         self.byte_count: int = 0    # 累计接收字节数
 
     @property
     def duration(self) -> float:
         """缓冲区音频时长（秒）"""
-        return AudioFormat.bytes_to_seconds(len(self.chunks))
+        return AudioFormat.bytes_to_seconds(self.buffer.nbytes)
 
     @property
     def total_duration(self) -> float:
@@ -47,41 +51,153 @@ class AudioCache:
 
     def reset(self) -> None:
         """重置缓冲区"""
-        self.chunks = b''
+        self.buffer.clear()
         self.offset = 0.0
         self.byte_count = 0
 
 
-async def message_handler(websocket, msg: AudioMessage, cache: AudioCache, app) -> None:
+def select_subprotocol(connection, subprotocols):
+    """
+    握手时的子协议协商
+
+    客户端提出 AUDIO_FRAME_SUBPROTOCOL 时选中它（此后可发送二进制音频帧），
+    否则不选任何子协议，旧客户端照常走 JSON 路径。
+    """
+    if AUDIO_FRAME_SUBPROTOCOL in subprotocols:
+        return AUDIO_FRAME_SUBPROTOCOL
+    return None
+
+
+def parse_message(raw_message: Union[str, bytes]) -> Tuple[Union[AudioMessage, AudioFrame], bytes]:
+    """
+    解析客户端消息，返回 (消息对象, float32 音频数据)
+
+    - 文本帧：JSON AudioMessage，音频为 base64
+    - 二进制帧：AudioFrame，音频为原始 PCM
+    """
+    if isinstance(raw_message, str):
+        msg = AudioMessage.from_dict(json.loads(raw_message))
+        return msg, b64decode(msg.data)
+
+    frame = AudioFrame.from_bytes(raw_message)
+    if frame.sample_format == SampleFormat.INT16:
+        samples = np.frombuffer(frame.pcm, dtype='<i2').astype(np.float32) / 32768.0
+        return frame, samples.tobytes()
+    return frame, frame.pcm
+
+
+def audio_payload(app, data) -> dict:
+    """
+    将音频片段打包为 Task 的音频字段
+
+    开启共享内存传输时写入 AudioArena，任务只携带 (offset, length) 描述符；
+    未开启或空间不足时回退为随任务内联传输的 bytes。
+    """
+    arena = app.state.audio_arena
+    if arena is not None:
+        ref = arena.write(data)
+        if ref is not None:
+            return dict(data=b'', shm_offset=ref[0], shm_length=ref[1])
+    return dict(data=bytes(data))
+
+
+def task_deadline(source: str) -> float:
+    """按来源给片段设定调度截止时间（0 表示不设）"""
+    budget = Config.mic_deadline if source == 'mic' else Config.file_deadline
+    return time.time() + budget if budget > 0 else 0.0
+
+
+def audio_task(msg, socket_id: str, segment: dict, offset: float, overlap: float, is_final: bool) -> Task:
+    """由客户端消息与切出的音频片段构造识别任务"""
+    return Task(
+        type=msg.source,
+        **segment,
+        offset=offset,
+        task_id=msg.task_id,
+        socket_id=socket_id,
+        overlap=overlap,
+        is_final=is_final,
+        time_start=msg.time_start,
+        time_submit=time.time(),
+        deadline=task_deadline(msg.source),
+        context=msg.context,
+        language=msg.language,
+        delta=msg.delta,
+        partial=msg.partial,
+    )
+
+
+def pause_cut_bounds(msg) -> Optional[Tuple[float, float]]:
+    """
+    按停顿切分时片段的 (最短, 最长) 时长（秒）；按固定时长 + 重叠切分时返回 None
+
+    - 文件任务开启 file_vad：[vad_min_segment, vad_max_segment]
+    - 麦克风开启 mic_eager：一有停顿就切；长时间没有停顿时，按客户端给的分段长度强制切分
+    """
+    if msg.source == 'file' and Config.file_vad:
+        return Config.vad_min_segment, Config.vad_max_segment
+    if msg.source == 'mic' and Config.mic_eager:
+        return Config.mic_eager_min_segment, max(msg.seg_duration + msg.seg_overlap, Config.mic_eager_min_segment)
+    return None
+
+
+def submit_cut(app, msg, cache: AudioCache, socket_id: str, cut: int) -> None:
+    """切出缓冲区开头 cut 个采样点作为非最终片段提交（无重叠）"""
+    nbytes = cut * AudioFormat.BYTES_PER_SAMPLE
+    task = audio_task(msg, socket_id, audio_payload(app, cache.buffer.peek(nbytes)), cache.offset, 0, False)
+    cache.buffer.advance(nbytes)
+    app.state.router.put(task)
+    logger.debug(f"提交停顿切分片段，任务ID: {msg.task_id}, 偏移: {cache.offset:.2f}s, 时长: {cut / AudioFormat.SAMPLE_RATE:.2f}s")
+    cache.offset += cut / AudioFormat.SAMPLE_RATE
+
+
+def submit_pause_segments(app, msg, cache: AudioCache, socket_id: str, bounds: Tuple[float, float]) -> None:
+    """
+    按停顿切分：片段首尾相连、没有重叠，提交后缓冲区剩余不足最长片段
+
+    - 缓冲达到最长片段时，在 [最短, 最长] 区间内最长的停顿处切开
+    - 麦克风提前切分：缓冲中一出现停顿就在最近一次停顿处切开，最终片段只剩停顿后的短尾巴
+    """
+    sr = AudioFormat.SAMPLE_RATE
+    min_n, max_n = int(bounds[0] * sr), int(bounds[1] * sr)
+    while len(cache.buffer) >= max_n:
+        submit_cut(app, msg, cache, socket_id,
+                   find_pause_cut(cache.buffer.samples(max_n), min_n, max_n, Config.vad_min_pause))
+    if msg.source == 'mic' and not msg.is_final and len(cache.buffer) >= min_n:
+        cut = find_last_pause(cache.buffer.samples(), min_n, Config.vad_min_pause)
+        if cut:
+            submit_cut(app, msg, cache, socket_id, cut)
+
+
+async def message_handler(websocket, msg: Union[AudioMessage, AudioFrame], data: bytes, cache: AudioCache, app) -> None:
     """
     处理客户端发送的音频消息
 
-    根据消息中的分段参数，将音频数据分段后提交到识别队列。
+    根据消息中的分段参数，将音频数据（float32, 16kHz, mono）分段后提交到识别队列。
     """
-    queue_in = app.state.queue_in
+    router = app.state.router
 
     global status_mic
-    is_start = not bool(cache.chunks)
+    is_start = cache.byte_count == 0
     socket_id = str(websocket.id)
 
-    # 麦克风首次消息 → GPU 加速
+    # 麦克风首次消息 → GPU 加速（交给该会话的识别进程）
     if is_start and msg.source == 'mic' and Config.gpu_boost_enabled:
-        queue_in.put(Task(
+        router.command(Task(
             type='cmd',
             task_id='gpu_boost',
             data=b'', offset=0, overlap=0,
             socket_id=socket_id, is_final=False,
             time_start=0, time_submit=0,
             command='gpu_boost'
-        ))
+        ), msg.task_id)
 
     # 从消息中获取分段参数
     seg_threshold = msg.seg_duration + msg.seg_overlap * 2
+    bounds = pause_cut_bounds(msg)
 
     try:
-        # base64 解码音频数据（float32, 16kHz, mono）
-        data = b64decode(msg.data)
-        cache.chunks += data
+        cache.buffer.append(data)
         cache.byte_count += len(data)
 
         if not msg.is_final:
@@ -92,32 +208,26 @@ async def message_handler(websocket, msg: AudioMessage, cache: AudioCache, app)
                 console.print('正在接收音频文件...')
                 logger.info(f"开始接收音频文件，任务ID: {msg.task_id}")
 
+            # 可选按停顿切分（无重叠）：文件 VAD 切分 / 麦克风提前切分
+            if bounds:
+                submit_pause_segments(app, msg, cache, socket_id, bounds)
+                return
+
             # 若缓冲已达到分段阈值，将片段作为任务提交
             segment_bytes = AudioFormat.seconds_to_bytes(msg.seg_duration + msg.seg_overlap)
             stride_bytes = AudioFormat.seconds_to_bytes(msg.seg_duration)
 
             while cache.duration >= seg_threshold:
-                segment_data = cache.chunks[:segment_bytes]
-                cache.chunks = cache.chunks[stride_bytes:]
-
-                task = Task(
-                    type=msg.source,
-                    data=segment_data,
-                    offset=cache.offset,
-                    task_id=msg.task_id,
-                    socket_id=socket_id,
-                    overlap=msg.seg_overlap,
-                    is_final=False,
-                    time_start=msg.time_start,
-                    time_submit=time.time(),
-                    context=msg.context,
-                    language=msg.language,
-                )
+                # 只在提交给识别进程时复制一次片段，缓冲区本身仅前移读指针
+                segment = audio_payload(app, cache.buffer.peek(segment_bytes))
+                cache.buffer.advance(stride_bytes)
+
+                task = audio_task(msg, socket_id, segment, cache.offset, msg.seg_overlap, False)
                 cache.offset += msg.seg_duration
-                queue_in.put(task)
+                router.put(task)
                 logger.debug(
                     f"提交音频片段，任务ID: {msg.task_id}, "
-                    f"偏移: {cache.offset}s, 缓冲区: {len(cache.chunks)} bytes"
+                    f"偏移: {cache.offset}s, 缓冲区: {cache.buffer.nbytes} bytes"
                 )
 
         else:  # is_final
@@ -128,22 +238,14 @@ async def message_handler(websocket, msg: AudioMessage, cache: AudioCache, app)
                 print(f'音频文件接收完毕，时长 {cache.total_duration:.2f}s')
                 logger.info(f"音频文件接收完毕，任务ID: {msg.task_id}, 时长: {cache.total_duration:.2f}s")
 
-            # 提交最终片段
-            task = Task(
-                type=msg.source,
-                data=cache.chunks,
-                offset=cache.offset,
-                task_id=msg.task_id,
-                socket_id=socket_id,
-                overlap=msg.seg_overlap,
-                is_final=True,
-                time_start=msg.time_start,
-                time_submit=time.time(),
-                context=msg.context,
-                language=msg.language,
-            )
-            queue_in.put(task)
-            logger.debug(f"提交最终片段，任务ID: {msg.task_id}, 数据大小: {len(cache.chunks)} bytes")
+            # 提交最终片段（按停顿切分时先切出超长的部分）
+            if bounds:
+                submit_pause_segments(app, msg, cache, socket_id, bounds)
+            final_bytes = cache.buffer.nbytes
+            overlap = 0 if bounds else msg.seg_overlap
+            task = audio_task(msg, socket_id, audio_payload(app, cache.buffer.peek()), cache.offset, overlap, True)
+            router.put(task)
+            logger.debug(f"提交最终片段，任务ID: {msg.task_id}, 数据大小: {final_bytes} bytes")
 
             # 重置缓冲区
             cache.reset()
@@ -164,10 +266,9 @@ async def ws_recv(websocket, app) -> None:
     # 登记 socket 到连接池
     state = app.state
     sockets = state.sockets
-    sockets_id = state.sockets_id
     socket_id = str(websocket.id)
     sockets[socket_id] = websocket
-    sockets_id.append(socket_id)
+    state.router.connect(socket_id)
     remote = websocket.remote_address
     console.print(f'[bold green]客户端已连接: {remote[0]}:{remote[1]}[/bold green]\n')
     logger.info(f"新客户端连接: {websocket}, ID: {socket_id}")
@@ -178,12 +279,11 @@ async def ws_recv(websocket, app) -> None:
     # 接收并处理消息
     try:
         async for raw_message in websocket:
-            # 使用协议类解析消息
+            # 使用协议类解析消息（JSON 文本帧或二进制音频帧）
             try:
-                data = json.loads(raw_message)
-                msg = AudioMessage.from_dict(data)
+                msg, data = parse_message(raw_message)
                 # 处理音频数据
-                await message_handler(websocket, msg, cache, app)
+                await message_handler(websocket, msg, data, cache, app)
             except Exception as e:
                 logger.error(f"消息解析失败: {str(e)}")
                 continue
@@ -204,11 +304,10 @@ async def ws_recv(websocket, app) -> None:
         status_mic.stop()
         status_mic.on = False
         sockets.pop(socket_id, None)
-        if socket_id in sockets_id:
-            sockets_id.remove(socket_id)
+        state.router.disconnect(socket_id)
 
         console.print(f'[bold red]客户端已断开: {remote[0]}:{remote[1]}[/bold red]\n')
 
         # 注意：session 清理由 TaskHandler 在子进程中定期执行
-        # （通过检查 sockets_id 判断客户端是否已断开）
+        # （通过 queue_ctl 的断开消息得知客户端已断开）
         logger.debug(f"客户端资源已清理: {socket_id}")
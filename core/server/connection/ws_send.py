@@ -1,72 +1,184 @@
-import json
+# coding: utf-8
+"""
+WebSocket 发送处理模块
+
+由一个常驻读取线程批量取出识别进程的结果，投递到事件循环；
+事件循环侧合并同一任务的累积结果，按 socket_id 直接查表发送。
+
+临时结果（Partial）按任务累积成进行中片段的全文，每批只发最新一条；
+同一任务的识别结果到达后，之前的临时结果作废；连接断开后其任务的临时结果一并丢弃。
+"""
+
 import asyncio
+import queue
+import threading
 from multiprocessing import Queue
+from typing import Dict, List, Optional, Union
 
 from ..state import console
-from ..schema import Result
-from core.protocol import RecognitionMessage
-from core.tools.asyncio_to_thread import to_thread
+from ..schema import Result, Partial
+from core.protocol import RecognitionMessage, PartialMessage
+from ..merger import merge_delta
 from .. import logger
 
 
+# 单次从 queue_out 批量取出的最大结果数
+BATCH_SIZE = 64
+
+
+def read_results(queue_out: Queue, loop: asyncio.AbstractEventLoop, pending: asyncio.Queue) -> None:
+    """
+    结果读取线程主函数
+
+    阻塞等待第一条结果，再非阻塞地捎带取出已就绪的结果，整批投递到事件循环。
+    读到退出通知 (None) 或队列失效后投递 None 并结束。
+    """
+    while True:
+        try:
+            batch: List[Optional[Union[Result, Partial]]] = [queue_out.get()]
+            while batch[-1] is not None and len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(queue_out.get_nowait())
+                except queue.Empty:
+                    break
+        except (EOFError, OSError, ValueError) as e:
+            logger.warning(f"结果队列已失效，读取线程退出: {e}")
+            batch = [None]
+
+        loop.call_soon_threadsafe(pending.put_nowait, batch)
+        if batch[-1] is None:
+            return
+
+
+def coalesce(results: List[Union[Result, Partial]],
+             partials: Optional[Dict[str, Partial]] = None) -> List[Union[Result, Partial]]:
+    """
+    合并同一批次中同一任务的结果
+
+    识别结果是累积的（后一条包含前一条的全部内容），
+    因此每个 task_id 只需发送最新一条，最终结果自然保留；
+    增量结果则与之前的结果合并成等价的一条。
+
+    临时结果在 partials（task_id -> 进行中片段累积后的临时结果，跨批次保留）上累积，
+    每个任务只保留最新一条（text 为累积后的全文）；识别结果到达时丢弃该任务之前的临时结果。
+    """
+    partials = {} if partials is None else partials
+    latest = {}
+    for result in results:
+        if isinstance(result, Partial):
+            prev = partials.get(result.task_id)
+            text = (prev.text if prev else '')[:result.text_base] + result.text
+            partial = partials[result.task_id] = Partial(result.task_id, result.socket_id, 0, text,
+                                                         result.time_submit)
+            key = ('partial', result.task_id)
+            latest.pop(key, None)
+            latest[key] = partial
+            continue
+        partials.pop(result.task_id, None)
+        latest.pop(('partial', result.task_id), None)
+        prev = latest.pop(result.task_id, None)
+        if prev is not None:
+            result = merge_delta(prev, result)
+        latest[result.task_id] = result
+    return list(latest.values())
+
+
+def drop_partials(partials: Dict[str, Partial], sockets: dict) -> None:
+    """
+    丢弃已断开连接的临时结果
+
+    临时结果只在同一任务的识别结果到达时作废；连接断开后（或片段出错）不会再有识别结果，
+    因此按 socket 是否仍在连接表中清理，避免 partials 无限增长。
+    """
+    for task_id in [task_id for task_id, p in partials.items() if p.socket_id not in sockets]:
+        del partials[task_id]
+
+
+async def send_partial(sockets: dict, partial: Partial) -> None:
+    """将进行中片段的临时结果发送给对应客户端（客户端已断开时静默丢弃）"""
+    websocket = sockets.get(partial.socket_id)
+    if not websocket:
+        return
+    msg = PartialMessage(task_id=partial.task_id, text=partial.text, time_submit=partial.time_submit)
+    await websocket.send(msg.to_json())
+
+
+async def send_result(sockets: dict, result: Result) -> None:
+    """将单条识别结果发送给对应客户端"""
+    websocket = sockets.get(result.socket_id)
+    if not websocket:
+        logger.warning(f"客户端 {result.socket_id} 不存在，跳过发送结果，任务ID: {result.task_id}")
+        return
+
+    # 将内部 Result 转换为标准的协议消息对象
+    msg = RecognitionMessage(
+        task_id=result.task_id,
+        is_final=result.is_final,
+        duration=result.duration,
+        time_start=result.time_start,
+        time_submit=result.time_submit,
+        time_complete=result.time_complete,
+        text=result.text,
+        text_accu=result.text_accu,
+        tokens=result.tokens,
+        timestamps=result.timestamps,
+        revision=result.revision,
+        base_revision=result.base_revision,
+        token_base=result.token_base,
+        text_base=result.text_base,
+    )
+
+    # 发送消息
+    await websocket.send(msg.to_json())
+    logger.debug(f"发送识别结果，任务ID: {result.task_id}, 文本长度: {len(result.text)}")
+
+    if result.type == 'mic':
+        logger.info(f"麦克风识别结果: {result.text}")
+    elif result.type == 'file':
+        console.print(f'    转录进度：{result.duration:.2f}s', end='\r')
+        logger.debug(f"文件转录进度: {result.duration:.2f}s")
+        if result.is_final:
+            console.print('\n    [green]转录完成')
+            logger.info(f"文件转录完成，任务ID: {result.task_id}, 总时长: {result.duration:.2f}s")
+
 
 async def ws_send(app):
 
     state = app.state
-    queue_out = state.queue_out
     sockets = state.sockets
 
+    # 常驻读取线程：替代每次 to_thread(queue_out.get) 新建线程
+    pending: asyncio.Queue = asyncio.Queue()
+    partials: Dict[str, Partial] = {}   # task_id -> 进行中片段累积后的临时结果
+    reader = threading.Thread(
+        target=read_results,
+        args=(state.queue_out, asyncio.get_running_loop(), pending),
+        name='ResultReader',
+        daemon=True,
+    )
+    reader.start()
+
     logger.info("WebSocket 发送任务已启动")
 
     while True:
-        try:
-            # 获取识别结果（从多进程队列）
-            result: Result = await to_thread(queue_out.get)
-
-            # 得到退出的通知
-            if result is None:
-                logger.info("收到退出通知，停止发送任务")
-                return
-
-            # 1. 将内部 Result 转换为标准的协议消息对象
-            msg = RecognitionMessage(
-                task_id=result.task_id,
-                is_final=result.is_final,
-                duration=result.duration,
-                time_start=result.time_start,
-                time_submit=result.time_submit,
-                time_complete=result.time_complete,
-                text=result.text,
-                text_accu=result.text_accu,
-                tokens=result.tokens,
-                timestamps=result.timestamps
-            )
-
-            # 获得 socket
-            websocket = next(
-                (ws for ws in sockets.values() if str(ws.id) == result.socket_id),
-                None,
-            )
-
-            if not websocket:
-                logger.warning(f"客户端 {result.socket_id} 不存在，跳过发送结果，任务ID: {result.task_id}")
-                continue
-
-            # 发送消息
-            await websocket.send(msg.to_json())
-            logger.debug(f"发送识别结果，任务ID: {result.task_id}, 文本长度: {len(result.text)}")
-
-            if result.type == 'mic':
-                logger.info(f"麦克风识别结果: {result.text}")
-            elif result.type == 'file':
-                console.print(f'    转录进度：{result.duration:.2f}s', end='\r')
-                logger.debug(f"文件转录进度: {result.duration:.2f}s")
-                if result.is_final:
-                    console.print('\n    [green]转录完成')
-                    logger.info(f"文件转录完成，任务ID: {result.task_id}, 总时长: {result.duration:.2f}s")
-
-        except Exception as e:
-            logger.error(f"发送结果时发生错误: {e}", exc_info=True)
-            print(e)
-
-
+        batch = await pending.get()
+
+        # 得到退出的通知（先发完它之前的结果）
+        stop = batch[-1] is None
+        results = coalesce([r for r in batch if r is not None], partials)
+        if len(results) < len(batch) - stop:
+            logger.debug(f"合并累积结果: {len(batch) - stop} -> {len(results)}")
+
+        for result in results:
+            try:
+                if isinstance(result, Partial):
+                    await send_partial(sockets, result)
+                    continue
+                await send_result(sockets, result)
+            except Exception as e:
+                logger.error(f"发送结果时发生错误: {e}", exc_info=True)
+        drop_partials(partials, sockets)
+
+        if stop:
+            logger.info("收到退出通知，停止发送任务")
+            return
@@ -72,6 +72,42 @@ class BaseASREngine(ABC):
         """执行推理并更新 stream.result"""
         pass
 
+    @property
+    def max_batch_size(self) -> int:
+        """decode_streams 单次最多合批的识别流数，1 表示不合批"""
+        return 1
+
+    @property
+    def continuous_batching(self) -> bool:
+        """decode_streams 是否支持连续批处理（解码中途接纳新的流、每个流完成即交付，见 decode_streams）"""
+        return False
+
+    def decode_streams(
+        self,
+        streams: List[RecognitionStream],
+        contexts: Optional[List[Optional[str]]] = None,
+        languages: Optional[List[Optional[str]]] = None,
+        **kwargs
+    ):
+        """
+        批量推理多个识别流并各自更新 stream.result
+
+        默认逐个调用 decode_stream；支持合批推理的引擎覆盖此方法，
+        并把整批的阶段耗时写入每个流的 result.performance。
+
+        支持连续批处理的引擎还接受以下回调（流的下标 i 按 streams 之后依次接纳的顺序编号）：
+            admit(): 有空闲位置时调用，返回 (stream, context, language) 加入本批，None 表示暂无
+            on_done(i): 第 i 个流的结果就绪
+            on_partial(i, text_base, text): 第 i 个流逐 Token 生成的临时文本
+        """
+        for i, stream in enumerate(streams):
+            self.decode_stream(
+                stream,
+                context=contexts[i] if contexts else None,
+                language=languages[i] if languages else None,
+                **kwargs
+            )
+
     def update_hotwords(self, hotwords: List[str]):
         """更新引擎内部的热词表（如果支持）"""
         pass
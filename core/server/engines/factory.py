@@ -5,7 +5,7 @@ from config_server import (
     ServerConfig as Config,
     ParaformerArgs, SenseVoiceArgs,
     FunASRNanoGGUFArgs, Qwen3ASRGGUFArgs, QwenASRMLXArgs,
-    ModelPaths, ForceAlignerGGUFArgs
+    ModelPaths, ForceAlignerGGUFArgs, SyntheticArgs
 )
 
 
@@ -45,12 +45,18 @@ class EngineFactory:
         from .qwen_asr_mlx.asr_engine import QwenASRMLXEngine, MLXEngineConfig
         return QwenASRMLXEngine, MLXEngineConfig, QwenASRMLXArgs
 
+    @staticmethod
+    def _load_synthetic():
+        from .synthetic.asr_engine import SyntheticEngine, SyntheticConfig
+        return SyntheticEngine, SyntheticConfig, SyntheticArgs
+
     _ASR_LOADERS = {
         'sensevoice': _load_sensevoice,
         'paraformer': _load_paraformer,
         'fun_asr_nano': _load_fun_asr_nano,
         'qwen_asr': _load_qwen_asr,
-        'qwen_asr_mlx': _load_qwen_asr_mlx
+        'qwen_asr_mlx': _load_qwen_asr_mlx,
+        'synthetic': _load_synthetic,
     }
 
     @staticmethod
@@ -1,13 +1,14 @@
 # coding: utf-8
 import os
 import time
-from typing import Optional, List, Dict, Any
+from typing import Callable, Optional, List, Dict, Any
 
 from .inference.schema import ASREngineConfig, TranscriptionResult, RecognitionResult as InternalResult, DecodeResult, Statistics
 from .inference.models import Models
 from .inference.pipeline import InferencePipeline
 from .inference.transcriber import AudioTranscriber
 from ..base import BaseASREngine, RecognitionStream, EngineCapabilities, RecognitionResult
+from ...metrics import worker_metrics
 from ..language import get_language, ENGINE_FUN_ASR_NANO
 
 
@@ -37,6 +38,7 @@ class FunASREngine(BaseASREngine):
         # 初始化底层组件 (迁移自原本的 Facade)
         self.models = Models(self.config)
         self.pipeline = InferencePipeline(self.models)
+        self._cache_reported: Dict[str, int] = {}
 
     @property
     def capabilities(self) -> List[EngineCapabilities]:
@@ -57,19 +59,109 @@ class FunASREngine(BaseASREngine):
         stream: FunASRStream,
         context: Optional[str] = None,
         language: Optional[str] = None,
+        on_partial: Optional[Callable[[int, str], None]] = None,
         **kwargs
     ):
-        """解码识别流并同步结果"""
+        """解码识别流并同步结果；on_partial(text_base, text) 接收 LLM 逐 Token 生成的临时文本"""
         # 语言映射：统一代码 → FunASR 中文文本
         mapped_lang = get_language(ENGINE_FUN_ASR_NANO, language) if language else None
-        self.pipeline.decode_stream(stream.internal_stream, context=context, language=mapped_lang)
-        
+        decoded = self.pipeline.decode_stream(stream.internal_stream, context=context, language=mapped_lang,
+                                              on_partial=on_partial)
+        self._sync_result(stream, decoded)
+        self._report_cache_stats()
+
+    @property
+    def max_batch_size(self) -> int:
+        """LLM 上下文的序列数：多个片段在同一上下文中连续批处理解码"""
+        return max(self.config.batch_size, 1)
+
+    @property
+    def continuous_batching(self) -> bool:
+        """合批解码时 LLM 有空闲序列即可接纳新的片段"""
+        return self.max_batch_size > 1
+
+    def decode_streams(
+        self,
+        streams: List[FunASRStream],
+        contexts: Optional[List[Optional[str]]] = None,
+        languages: Optional[List[Optional[str]]] = None,
+        admit: Optional[Callable[[], Optional[tuple]]] = None,
+        on_done: Optional[Callable[[int], None]] = None,
+        on_partial: Optional[Callable[[int, int, str], None]] = None,
+        **kwargs
+    ):
+        """
+        合批解码：编码与 CTC 逐段进行，LLM 每一步为所有未结束的片段各生成一个 Token；
+        admit / on_done / on_partial 见 BaseASREngine.decode_streams
+        """
+        streams = list(streams)
+        mapped = [get_language(ENGINE_FUN_ASR_NANO, lang) if lang else None
+                  for lang in (languages or [None] * len(streams))]
+
+        def admit_stream():
+            item = admit()
+            if item is None:
+                return None
+            stream, context, language = item
+            streams.append(stream)
+            return (stream.internal_stream, get_language(ENGINE_FUN_ASR_NANO, language) if language else None,
+                    context)
+
+        def done(i: int, decoded):
+            self._sync_result(streams[i], decoded)
+            if on_done:
+                on_done(i)
+
+        self.pipeline.decode_streams(
+            [s.internal_stream for s in streams], languages=mapped, contexts=contexts,
+            admit=admit_stream if admit else None, on_done=done, on_partial=on_partial
+        )
+        self._report_cache_stats()
+
+    def _report_cache_stats(self):
+        """Prompt 缓存与 Embedding 行缓存的命中计数：累计值的增量计入指标（命中率 = hits / (hits + misses)）"""
+        builder, table = self.models.prompt_builder, self.models.embedding_table
+        totals = {
+            'prompt_cache_hits': builder.hits,
+            'prompt_cache_misses': builder.misses,
+            'embd_row_cache_hits': table.hits,
+            'embd_row_cache_misses': table.misses,
+        }
+        for name, value in totals.items():
+            delta = value - self._cache_reported.get(name, 0)
+            if delta:
+                worker_metrics.inc(name, delta)
+            self._cache_reported[name] = value
+
+    def _sync_result(self, stream: FunASRStream, decoded):
+        """同步内部结果与阶段耗时到标准 RecognitionResult"""
         # 2. 同步结果到标准 RecognitionResult
         res = stream.internal_stream.result
         stream.result.text = res.text
         stream.result.tokens = list(res.tokens)
         stream.result.timestamps = list(res.timestamps)
 
+        # 3. 各阶段耗时（秒），供服务端指标使用；跳过 LLM 的片段不计入 llm_decode 耗时
+        t = decoded.timings
+        stream.result.performance = {
+            'encode': t.encode,
+            'ctc': t.ctc,
+            'align': t.align,
+        }
+        if decoded.bypassed:
+            worker_metrics.inc('llm_bypassed')
+        else:
+            stream.result.performance['llm_decode'] = t.prepare + t.inject + t.llm_generate
+            stream.result.performance['llm_generate'] = t.llm_generate
+            worker_metrics.inc('llm_decoded')
+            # 生成速度 = llm_tokens_total / llm_generate 阶段耗时之和；草稿接受率 = accepted / drafted
+            worker_metrics.inc('llm_tokens', decoded.n_gen)
+            if decoded.n_drafted:
+                worker_metrics.inc('draft_tokens', decoded.n_drafted)
+                worker_metrics.inc('draft_accepted_tokens', decoded.n_accepted)
+            if decoded.n_retries:
+                worker_metrics.inc('llm_retries', decoded.n_retries)
+
     def update_hotwords(self, hotwords: List[str]):
         """更新热词（透传至模型层）"""
         self.models.ctc_decoder.update_hotwords(hotwords)
@@ -16,6 +16,7 @@ class Token:
     text: str
     timestamp: float
     is_hotword: bool = False
+    score: float = 1.0          # 该 token 所在帧段的 Top-1 后验峰值
 
 class CTCTokenizer:
     """
@@ -138,10 +139,10 @@ class CTCDecoder:
 
     # ================================================================
     # 对外唯一入口：decode()
-    # 返回三元组 (ctc_results, hotwords, t_stats)
+    # 返回四元组 (ctc_results, hotwords, t_stats, confidence)
     # ================================================================
 
-    def decode(self, enc_output: np.ndarray, enable_ctc: bool, max_hotwords: int = 10, top_k: int = 10) -> Tuple[List[Token], List[str], Dict[str, float]]:
+    def decode(self, enc_output: np.ndarray, enable_ctc: bool, max_hotwords: int = 10, top_k: int = 10) -> Tuple[List[Token], List[str], Dict[str, float], float]:
         """
         完整解码流水线（黑箱）。
         内部按顺序执行：ONNX推理 → 贪婪解码 → 雷达扫描 → 整合 → 拼音纠错
@@ -150,10 +151,11 @@ class CTCDecoder:
             ctc_results: 贪婪解码或整合后的 Token 列表
             hotwords:    综合检测到的热词文本列表
             t_stats:     各阶段耗时字典
+            confidence:  贪婪结果的置信度（见 ctc_confidence），未启用 CTC 时为 0
         """
         t_stats = {"infer": 0.0, "decode": 0.0, "radar": 0.0, "integrate": 0.0, "hotword": 0.0}
         if not enable_ctc or self.sess is None:
-            return [], [], t_stats
+            return [], [], t_stats, 0.0
 
         # ---- 阶段 1: ONNX 推理 (获取 Top-K) ----
         t0 = time.perf_counter()
@@ -164,12 +166,13 @@ class CTCDecoder:
         t0 = time.perf_counter()
         indices_2d = topk_indices[0]        # [T, K]
         top1_indices = indices_2d[:, 0]     # [T]
-        ctc_text, ctc_results = self._greedy_decode(top1_indices)
+        topk_probs = np.exp(topk_log_probs[0])
+        ctc_text, ctc_results = self._greedy_decode(top1_indices, topk_probs[:, 0])
+        confidence = ctc_confidence(top1_indices, topk_probs[:, 0], self.blank_id)
         t_stats["decode"] = time.perf_counter() - t0
         
         # ---- 阶段 3: 雷达扫描 (Top-K 空间) ----
         t0 = time.perf_counter()
-        topk_probs = np.exp(topk_log_probs[0])
         detected_hotwords = self.radar.scan(indices_2d, topk_probs, top_k=top_k, blank_id=self.blank_id)
         t_stats["radar"] = time.perf_counter() - t0
         
@@ -189,7 +192,7 @@ class CTCDecoder:
         else:
             t_stats["hotword"] = time.perf_counter() - t0
             
-        return ctc_results, hotwords, t_stats
+        return ctc_results, hotwords, t_stats, confidence
 
     # ================================================================
     # 内部阶段方法
@@ -200,9 +203,9 @@ class CTCDecoder:
         outputs = self.sess.run(None, {"enc_output": enc_output})
         return outputs[0], outputs[1]
 
-    def _greedy_decode(self, top1_indices: np.ndarray) -> Tuple[str, List[Token]]:
+    def _greedy_decode(self, top1_indices: np.ndarray, top1_probs: Optional[np.ndarray] = None) -> Tuple[str, List[Token]]:
         """阶段 2: 基于 Top-1 Index 的贪婪解码"""
-        ctc_text, ctc_results, _ = decode_ctc_indices(top1_indices, self.id2token)
+        ctc_text, ctc_results, _ = decode_ctc_indices(top1_indices, self.id2token, top1_probs)
         return ctc_text, ctc_results
 
 
@@ -257,9 +260,27 @@ def load_ctc_tokens(filename):
                 
     return id2token
 
-def decode_ctc_indices(indices, id2token):
+def ctc_confidence(indices, probs, blank_id) -> float:
+    """
+    贪婪结果的置信度：各输出 token 的后验峰值与各 blank 帧后验中的最小值
+
+    token 峰值低说明字本身没认准；blank 帧后验低说明有字险些被输出（可能漏字）。
+    """
+    if len(indices) == 0:
+        return 0.0
+    indices, probs = np.asarray(indices), np.asarray(probs, dtype=np.float32)
+    starts = np.flatnonzero(np.concatenate(([True], indices[1:] != indices[:-1])))
+    peaks = np.maximum.reduceat(probs, starts)
+    is_token = indices[starts] != blank_id
+    blank = probs[indices == blank_id]
+    return float(min(peaks[is_token].min(initial=1.0), blank.min(initial=1.0)))
+
+
+def decode_ctc_indices(indices, id2token, probs=None):
     """
     Greedy search 贪心解码 (直接基于 Indices)。
+
+    提供 probs（各帧 Top-1 后验）时，Token.score 为所在帧段的后验峰值。
     """
     t0 = time.perf_counter()
     blank_id = max(id2token.keys()) if id2token else 0
@@ -279,6 +300,7 @@ def decode_ctc_indices(indices, id2token):
         collapsed.append((current_id, start_idx))
 
     results = []
+    next_start = {s: e for (_, s), (_, e) in zip(collapsed, collapsed[1:])}
 
     # 2. Filter blanks and decode text
     for token_id, start in collapsed:
@@ -291,9 +313,13 @@ def decode_ctc_indices(indices, id2token):
         # Calculate time (只计算起始位置)
         t_timestamp = max((start * frame_shift_ms) / 1000.0, 0.0)
 
+        end = next_start.get(start, len(indices))
+        score = float(np.max(probs[start:end])) if probs is not None else 1.0
+
         results.append(Token(
             text=token_text,
-            timestamp=t_timestamp
+            timestamp=t_timestamp,
+            score=score
         ))
                 
     full_text = "".join([r.text for r in results])
@@ -2,7 +2,7 @@ import time
 import re
 import ctypes
 import numpy as np
-from typing import Optional
+from typing import Callable, List, Optional
 
 from . import llama
 from .schema import LLMDecodeResult
@@ -13,6 +13,8 @@ class LLMDecoder:
     def __init__(self, models):
         self.models = models
         self.stop_tokens = [151643, 151645]
+        self._draft_batch = None
+        self._step_batch = None
 
     def decode(
         self,
@@ -23,53 +25,373 @@ class LLMDecoder:
         reporter: Optional[DisplayReporter] = None,
         temperature: float = 0.3,
         top_p: float = 1.0,
-        top_k: int = 50
+        top_k: int = 50,
+        draft_text: Optional[str] = None,
+        draft_max: int = 8,
+        max_tries: int = 1,
+        on_partial: Optional[Callable[[int, str], None]] = None
     ) -> LLMDecodeResult:
+        """
+        注入 Embeddings 后逐 Token 生成
+
+        提供 draft_text（CTC 假设）时启用投机解码：把草稿中接下来的若干 Token 与当前 Token
+        合成一个 Batch 一次前向，逐位置用同一采样器验证，接受最长一致前缀；
+        首个不一致处采样得到的 Token 即为正确输出，回退其后的 KV 后继续。
+        草稿是确定的，逐位置按目标分布采样，因此输出分布与逐 Token 生成相同。
+
+        熔断（重复循环、长时间无标点）后不重新注入：KV 回退到退化开始之前，
+        温度加 0.3 从该处继续采样，Prompt 与此前正常的 Token 都保留（总共最多尝试 max_tries 次）。
+
+        on_partial(text_base, text)：每提交一个 Token 即推送文本增量（已生成文本从 text_base 起替换为 text），
+        熔断回退时推送截断。
+        """
         res = LLMDecodeResult()
         t_inject_start = time.perf_counter()
-        
+
         # 1. Inject (Context & Embeddings)
         self.models.ctx.clear_kv_cache()
-        batch_embd = llama.LlamaBatch(n_input_tokens, full_embd.shape[1], 1)
-        batch_embd.set_embd(full_embd)
-        batch_embd.struct.token = ctypes.cast(None, ctypes.POINTER(llama.llama_token))
-        
-        if self.models.ctx.decode(batch_embd) != 0: 
-            raise RuntimeError("Decode failed")
-            
+        self._inject(full_embd, n_input_tokens)
         res.t_inject = time.perf_counter() - t_inject_start
 
         # 2. Generation Loop
         t_gen_start = time.perf_counter()
-        asr_decoder = llama.ASRStreamDecoder(self.models.vocab, reporter if stream_output else None)
         seed = int(np.random.randint(0, 2**31 - 1))
-        
-        with llama.LlamaSampler(temperature=temperature, top_k=top_k, top_p=top_p, seed=seed) as smpl:
-            for _ in range(n_predict):
+        draft = llama.text_to_tokens(self.models.vocab, draft_text) if draft_text and draft_max > 0 else []
+        gen = _Generation(self, res, reporter if stream_output else None, draft, on_partial)
+        for attempt in range(max_tries):
+            with llama.LlamaSampler(temperature=temperature, top_k=top_k, top_p=top_p, seed=seed) as smpl:
+                self._generate(gen, smpl, n_input_tokens, n_predict, draft_max)
+            if not res.is_aborted or attempt == max_tries - 1:
+                break
+            n_keep = gen.degeneration_start()
+            temperature += 0.3
+            print(f"\033[0G[!] 解码有误，回退 {len(gen.ids) - n_keep} 个 Token 加温重试 "
+                  f"(温度设为 {temperature:.1f}, retry: {attempt + 1})")
+            gen.rollback(n_keep)
+            self._resume(full_embd, n_input_tokens, gen.ids)
+            res.n_retries += 1
+
+        gen.finish(t_gen_start)
+        return res
+
+    def _generate(self, gen: '_Generation', smpl, n_input_tokens: int, n_predict: int, draft_max: int):
+        """从 KV 末尾（Prompt 与 gen 已提交的 Token）的 Logits 开始生成，直到结束、熔断或达到 n_predict"""
+        res, asr_decoder, cursor, push = gen.res, gen.stream, gen.cursor, gen.push
+        n_past = n_input_tokens + len(gen.ids)
+        token_id = smpl.sample(self.models.ctx, -1)
+        while asr_decoder.tokens_generated < n_predict:
+            proposal = cursor.peek(token_id, min(draft_max, n_predict - asr_decoder.tokens_generated - 1))
+            if not proposal:
+                if self.models.ctx.decode_token(token_id) != 0:
+                    break
+                n_past += 1
+                if not push(token_id):
+                    break
                 token_id = smpl.sample(self.models.ctx, -1)
-                
-                if self.models.ctx.decode_token(token_id) != 0: 
+                continue
+
+            # 当前 Token + 草稿一次前向，第 i 个位置的 Logits 预测草稿第 i 个 Token
+            batch = self._get_draft_batch(draft_max + 1).set_tokens([token_id] + proposal, n_past)
+            if self.models.ctx.decode(batch) != 0:
+                break
+            n_past += 1
+            if not push(token_id):
+                break
+            res.n_drafted += len(proposal)
+            going = True
+            for i, draft_id in enumerate(proposal):
+                token_id = smpl.sample(self.models.ctx, i)
+                if token_id != draft_id:
+                    # 丢弃未被接受的草稿 KV，采样结果作为下一个待提交 Token
+                    self._truncate(n_past)
                     break
-                    
-                if token_id == self.models.eos_token or token_id in self.stop_tokens: 
+                res.n_accepted += 1
+                n_past += 1
+                going = push(draft_id) and asr_decoder.tokens_generated < n_predict
+                if not going:
                     break
-                
-                asr_decoder.push(token_id)
-                
-                # 熔断性检查
-                if len(asr_decoder.tokens) >= 30:
-                    # 长期重复熔断
-                    if len(set(asr_decoder.tokens[-30:])) <= 3:
-                        res.is_aborted = True
-                        break
-                    # 30个token无标点熔断
-                    if len(asr_decoder.tokens) == 30 and not re.search(r'[，。？！、；：,\.?!;:]', asr_decoder.generated_text):
-                        res.is_aborted = True
-                        break
-        
-        asr_decoder.flush()
-        res.text = asr_decoder.generated_text
-        res.n_gen = asr_decoder.tokens_generated
-        res.t_gen = time.perf_counter() - t_gen_start
-        
-        return res
+            else:
+                token_id = smpl.sample(self.models.ctx, len(proposal))
+            if not going:
+                break
+
+    def _inject(self, full_embd: np.ndarray, n_rows: int, pos: int = 0, seq_id: int = 0):
+        """把 full_embd 的前 n_rows 行从位置 pos 起注入序列 seq_id"""
+        batch_embd = llama.LlamaBatch(n_rows, full_embd.shape[1], 1)
+        batch_embd.set_embd(full_embd[:n_rows], pos=pos, seq_id=seq_id)
+        batch_embd.struct.token = ctypes.cast(None, ctypes.POINTER(llama.llama_token))
+        if self.models.ctx.decode(batch_embd) != 0:
+            raise RuntimeError("Decode failed")
+
+    def _resume(self, full_embd: np.ndarray, n_input_tokens: int, kept: List[int]):
+        """
+        回滚后恢复 KV：只保留 Prompt 与 kept，并重新计算最后一个位置的 Logits 供继续采样
+
+        删掉最后一个保留位置后重新前向这一行（Token 或 Prompt 末行 Embedding）；
+        KV 不支持部分删除时退回整体重新注入，再一次补回保留的 Token。
+        """
+        ctx = self.models.ctx
+        n_keep = n_input_tokens + len(kept)
+        if ctx.truncate_kv_cache(n_keep - 1):
+            if kept:
+                ok = ctx.decode_token(kept[-1]) == 0
+            else:
+                self._inject(full_embd[n_input_tokens - 1:], 1, pos=n_input_tokens - 1)
+                ok = True
+        else:
+            ctx.clear_kv_cache()
+            self._inject(full_embd, n_input_tokens)
+            ok = not kept or ctx.decode(
+                llama.LlamaBatch(len(kept), 0, 1).set_tokens(kept, n_input_tokens)) == 0
+        if not ok:
+            raise RuntimeError("Decode failed")
+
+    def decode_batch(
+        self,
+        embds: List[np.ndarray],
+        n_predict: int,
+        temperature: float = 0.3,
+        top_p: float = 1.0,
+        top_k: int = 50,
+        max_tries: int = 7,
+        n_seq: int = 0,
+        admit: Optional[Callable[[], Optional[np.ndarray]]] = None,
+        on_done: Optional[Callable[[int, LLMDecodeResult], None]] = None,
+        on_partial: Optional[Callable[[int, int, str], None]] = None
+    ) -> List[LLMDecodeResult]:
+        """
+        多序列连续批处理：每段 Prompt 预填充进一个空闲序列，
+        之后每一步把所有活跃序列的下一个 Token 合成一个 Batch 一次前向。
+
+        序列各自结束（结束符、n_predict）并释放 KV，空出的序列立即接纳下一段 Prompt：
+        先取 embds 中尚未开始的，再调用 admit() 取解码中途到达的（追加到 embds 之后，None 表示暂无）。
+        熔断的序列只把自己的 KV 回退到退化开始之前，加温后从该处继续（无可保留的 Token 时在原序列上重新预填充），
+        其余序列不受影响继续解码（与单序列解码一样最多尝试 max_tries 次）。
+
+        第 i 段结束时调用 on_done(i, result)，on_partial(i, text_base, text) 推送其逐 Token 的临时文本。
+        n_seq 为同时解码的序列数（默认 len(embds)），上下文须以 n_seq_max >= n_seq 创建。
+        """
+        ctx = self.models.ctx
+        ctx.clear_kv_cache()
+        embds = list(embds)
+        n_seq = n_seq or len(embds)
+        results = []
+        active = {}             # seq_id -> _Generation（gen.index 为所属片段的下标）
+        free = list(range(n_seq))
+
+        def fill():
+            # 空闲序列接纳下一段 Prompt
+            while free:
+                if len(results) == len(embds):
+                    embd = admit() if admit else None
+                    if embd is None:
+                        return
+                    embds.append(embd)
+                results.append(LLMDecodeResult())
+                start(free.pop(0), len(results) - 1, temperature, 1)
+
+        def start(seq: int, i: int, temperature: float, tries: int):
+            t = time.perf_counter()
+            ctx.remove_sequence(seq)
+            self._inject(embds[i], embds[i].shape[0], seq_id=seq)
+            results[i] = LLMDecodeResult(t_inject=results[i].t_inject + time.perf_counter() - t,
+                                         n_retries=tries - 1)
+            sink = (lambda text_base, text: on_partial(i, text_base, text)) if on_partial else None
+            if sink and tries > 1:
+                sink(0, "")         # 重新预填充：之前推送的临时文本作废
+            gen = _Generation(self, results[i], on_partial=sink)
+            gen.index, gen.sampler = i, new_sampler(temperature)
+            active[seq] = gen
+            gen.token = gen.sampler.sample(ctx, -1)
+            gen.pos, gen.temperature, gen.tries = embds[i].shape[0], temperature, tries
+            gen.replay = False
+            gen.t_start = time.perf_counter()
+
+        def new_sampler(temperature: float):
+            return llama.LlamaSampler(temperature=temperature, top_k=top_k, top_p=top_p,
+                                      seed=int(np.random.randint(0, 2**31 - 1)))
+
+        def retry(seq: int):
+            # 回退到退化开始之前：删掉最后一个保留 Token 的 KV，下一步把它重新前向以得到 Logits
+            gen = active[seq]
+            gen.sampler, sampler = None, gen.sampler
+            sampler.free()
+            n_keep = gen.degeneration_start()
+            temperature = gen.temperature + 0.3
+            print(f"\033[0G[!] 解码有误，回退 {len(gen.ids) - n_keep} 个 Token 加温重试 "
+                  f"(温度设为 {temperature:.1f}, retry: {gen.tries})")
+            pos = embds[gen.index].shape[0] + n_keep - 1
+            if not n_keep or not ctx.truncate_kv_cache(pos, seq):
+                start(seq, gen.index, temperature, gen.tries + 1)
+                return
+            gen.rollback(n_keep)
+            gen.res.n_retries += 1
+            gen.sampler = new_sampler(temperature)
+            gen.token, gen.pos, gen.replay = gen.ids[-1], pos, True
+            gen.temperature, gen.tries = temperature, gen.tries + 1
+
+        def finish(seq: int):
+            gen = active[seq]
+            if gen.res.is_aborted and gen.tries < max_tries:
+                retry(seq)
+                return
+            del active[seq]
+            gen.sampler.free()
+            gen.finish(gen.t_start)
+            ctx.remove_sequence(seq)
+            free.append(seq)
+            if gen.res.is_aborted:
+                gen.res.text += "====解码有误，强制熔断===="
+            if on_done:
+                on_done(gen.index, gen.res)
+
+        try:
+            while True:
+                fill()
+                if not active:
+                    break
+                # 提交各序列的待定 Token：结束的序列退出（熔断的回退重试），其余的合成一个 Batch
+                rows = []
+                for seq in list(active):
+                    gen = active[seq]
+                    if gen.push(gen.token) and gen.stream.tokens_generated < n_predict:
+                        rows.append(seq)
+                        continue
+                    finish(seq)
+                    gen = active.get(seq)
+                    if gen is not None and gen.replay:
+                        # 回退后最后一个保留的 Token 已提交过，只需重新前向补算其 KV 与 Logits
+                        gen.replay = False
+                        rows.append(seq)
+                if not rows:
+                    continue
+                batch = self._get_step_batch(n_seq).set_tokens(
+                    [active[seq].token for seq in rows], [active[seq].pos for seq in rows], rows)
+                if ctx.decode(batch) != 0:
+                    raise RuntimeError("Decode failed")
+                for j, seq in enumerate(rows):
+                    gen = active[seq]
+                    gen.pos += 1
+                    gen.token = gen.sampler.sample(ctx, j)
+        finally:
+            # 出错时释放仍在解码的序列的采样器
+            for gen in active.values():
+                if gen.sampler is not None:
+                    gen.sampler.free()
+
+        return results
+
+    def _get_draft_batch(self, n_tokens: int):
+        """草稿验证用的 Token Batch，复用同一块内存"""
+        if self._draft_batch is None or self._draft_batch.n_tokens_max < n_tokens:
+            self._draft_batch = llama.LlamaBatch(n_tokens, 0, 1)
+        return self._draft_batch
+
+    def _get_step_batch(self, n_tokens: int):
+        """多序列逐步解码用的 Token Batch，复用同一块内存"""
+        if self._step_batch is None or self._step_batch.n_tokens_max < n_tokens:
+            self._step_batch = llama.LlamaBatch(n_tokens, 0, 1)
+        return self._step_batch
+
+    def _truncate(self, n_keep: int):
+        if not self.models.ctx.truncate_kv_cache(n_keep):
+            raise RuntimeError("KV Cache 不支持部分删除，无法使用投机解码")
+
+
+class _Generation:
+    """一个生成中的序列：流式文本解码、结束与熔断检查、草稿游标、熔断回退"""
+    REPEAT_WINDOW = 30
+
+    def __init__(self, decoder: LLMDecoder, res: LLMDecodeResult, reporter=None, draft: List[int] = (),
+                 on_partial: Optional[Callable[[int, str], None]] = None):
+        self.decoder = decoder
+        self.res = res
+        self.stream = llama.ASRStreamDecoder(decoder.models.vocab, reporter)
+        self.cursor = _DraftCursor(list(draft))
+        self.ids = []           # 已提交的 Token
+        self.on_partial = on_partial
+
+    def push(self, token_id) -> bool:
+        """提交一个 Token，返回是否继续生成（遇到结束符或熔断时停止）"""
+        if token_id == self.decoder.models.eos_token or token_id in self.decoder.stop_tokens:
+            return False
+        asr_decoder = self.stream
+        n_text = len(asr_decoder.generated_text)
+        asr_decoder.push(token_id)
+        self.cursor.advance(token_id)
+        self.ids.append(token_id)
+        if self.on_partial and len(asr_decoder.generated_text) > n_text:
+            self.on_partial(n_text, asr_decoder.generated_text[n_text:])
+
+        # 熔断性检查
+        if len(asr_decoder.tokens) >= 30:
+            # 长期重复熔断
+            if len(set(asr_decoder.tokens[-self.REPEAT_WINDOW:])) <= 3:
+                self.res.is_aborted = True
+                return False
+            # 30个token无标点熔断
+            if len(asr_decoder.tokens) == 30 and not re.search(r'[，。？！、；：,\.?!;:]', asr_decoder.generated_text):
+                self.res.is_aborted = True
+                return False
+        return True
+
+    def degeneration_start(self) -> int:
+        """
+        熔断后应保留的 Token 数
+
+        重复熔断：从最近的重复窗口向前回溯到第一个不属于循环的 Token 之后；
+        无标点熔断：开头就已偏离，不保留
+        """
+        tokens = self.stream.tokens
+        loop = set(tokens[-self.REPEAT_WINDOW:])
+        if len(tokens) < self.REPEAT_WINDOW or len(loop) > 3:
+            return 0
+        n_keep = len(tokens) - self.REPEAT_WINDOW
+        while n_keep > 0 and tokens[n_keep - 1] in loop:
+            n_keep -= 1
+        return n_keep
+
+    def rollback(self, n_keep: int):
+        """只保留前 n_keep 个 Token：重建流式解码与草稿游标（不重复输出已显示的文字）"""
+        kept, reporter, on_partial = self.ids[:n_keep], self.stream.reporter, self.on_partial
+        self.stream = llama.ASRStreamDecoder(self.decoder.models.vocab, None)
+        self.cursor = _DraftCursor(self.cursor.draft)
+        self.ids, self.on_partial = [], None
+        for token_id in kept:
+            self.push(token_id)
+        self.stream.reporter, self.on_partial = reporter, on_partial
+        self.res.is_aborted = False
+        if on_partial:
+            on_partial(len(self.stream.generated_text), "")
+
+    def finish(self, t_gen_start: float):
+        self.stream.flush()
+        self.res.text = self.stream.generated_text
+        self.res.n_gen = self.stream.tokens_generated
+        self.res.t_gen = time.perf_counter() - t_gen_start
+
+
+class _DraftCursor:
+    """
+    草稿游标：跟踪已生成内容对应到草稿的位置
+
+    生成的 Token 与草稿当前位置一致时前进；LLM 插入标点等草稿中没有的 Token 时保持不动；
+    与草稿稍后位置一致（CTC 多识别了字）时跳过中间部分。
+    """
+    LOOKAHEAD = 4
+
+    def __init__(self, draft: List[int]):
+        self.draft = draft
+        self.pos = 0
+
+    def _next(self, token_id: int) -> int:
+        window = self.draft[self.pos:self.pos + self.LOOKAHEAD]
+        return self.pos + window.index(token_id) + 1 if token_id in window else self.pos
+
+    def advance(self, token_id: int):
+        self.pos = self._next(token_id)
+
+    def peek(self, token_id: int, n: int) -> List[int]:
+        """待提交的 token_id 之后的 n 个草稿 Token"""
+        pos = self._next(token_id)
+        return self.draft[pos:pos + n] if n > 0 else []
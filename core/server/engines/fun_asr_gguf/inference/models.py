@@ -75,12 +75,14 @@ class Models:
         vprint("[4/6] 加载 Embedding 权重...", verbose)
         self.embedding_table = llama.get_token_embeddings_gguf(self.config.decoder_gguf_path)
         
-        # 5. LLM Context
+        # 5. LLM Context（合批解码时每个序列各占 2048 的上下文）
         vprint("[5/6] 创建 LLM 上下文...", verbose)
+        n_seq = max(self.config.batch_size, 1)
         self.ctx = llama.LlamaContext(
             self.model,
-            n_ctx=2048,
+            n_ctx=2048 * n_seq,
             n_batch=2048,
+            n_seq_max=n_seq,
             n_ubatch=self.config.n_ubatch,
             n_threads=self.config.n_threads,
         )
@@ -2,7 +2,8 @@ import time
 import re
 import ctypes
 import numpy as np
-from typing import List, Tuple, Optional, Dict, Any
+from dataclasses import dataclass
+from typing import Callable, List, Tuple, Optional, Dict, Any, Union
 
 from . import logger
 from . import llama
@@ -17,6 +18,19 @@ from .llm_decoder import LLMDecoder
 # 全局静默 Reporter，用于默认参数，避免重复创建线程
 _SILENT_REPORTER = DisplayReporter(verbose=False)
 
+@dataclass
+class _Prepared:
+    """完成编码、CTC 与 Prompt 构建，等待 LLM 解码的片段"""
+    full_embd: np.ndarray
+    audio_embd: np.ndarray
+    ctc_results: List
+    hotwords: List[str]
+    confidence: float
+    n_prefix: int
+    n_suffix: int
+    timings: Timings
+
+
 class InferencePipeline:
     """ASR 核心指挥者 (Conductor)：负责调度音频编码、CTC 解码、Prompt 构建及 LLM 推理等细粒度组件"""
     def __init__(self, models: Models):
@@ -37,10 +51,111 @@ class InferencePipeline:
         temperature: float = 0.3,
         top_p: float = 1.0,
         top_k: int = 50,
-        timestamp_offset: float = -0.24
+        timestamp_offset: float = -0.24,
+        on_partial: Optional[Callable[[int, str], None]] = None
     ) -> DecodeResult:
         
         reporter = reporter or _SILENT_REPORTER
+        prep = self._prepare(stream, language, context, reporter, timestamp_offset)
+        if isinstance(prep, DecodeResult):
+            return prep
+        llm_res = self._generate(prep, verbose, reporter, temperature, top_p, top_k, on_partial)
+        return self._complete(stream, prep, llm_res, reporter, timestamp_offset)
+
+    def _generate(self, prep: '_Prepared', verbose: bool, reporter: DisplayReporter,
+                  temperature: float, top_p: float, top_k: int,
+                  on_partial: Optional[Callable[[int, str], None]] = None) -> LLMDecodeResult:
+        """单序列 LLM 解码（可投机解码），熔断时加温重试；on_partial 接收逐 Token 的临时文本"""
+        # 4. LLM Decoding Loop
+        reporter.print("\n[5] LLM 解码...")
+        reporter.print("=" * 70)
+
+        # 5. LLM 解码：若熔断则回退到退化之前加温重试（总共最多尝试7次，最后的温度是2.1）
+        config = self.models.config
+        draft_text = "".join(r.text for r in prep.ctc_results) if config.speculative else None
+        llm_res = self.llm_decoder.decode(
+            prep.full_embd, prep.full_embd.shape[0], self.models.config.n_predict, 
+            stream_output=verbose, reporter=reporter,
+            temperature=temperature, top_p=top_p, top_k=top_k,
+            draft_text=draft_text, draft_max=config.draft_max, max_tries=7, on_partial=on_partial
+        )
+        if llm_res.is_aborted:
+            llm_res.text += "====解码有误，强制熔断===="
+        
+        if reporter: reporter.print("\n" + "=" * 70)
+        return llm_res
+
+    def decode_streams(
+        self,
+        streams: List[RecognitionStream],
+        languages: Optional[List[Optional[str]]] = None,
+        contexts: Optional[List[Optional[str]]] = None,
+        temperature: float = 0.3,
+        top_p: float = 1.0,
+        top_k: int = 50,
+        timestamp_offset: float = -0.24,
+        admit: Optional[Callable[[], Optional[Tuple[RecognitionStream, Optional[str], Optional[str]]]]] = None,
+        on_done: Optional[Callable[[int, DecodeResult], None]] = None,
+        on_partial: Optional[Callable[[int, int, str], None]] = None
+    ) -> List[DecodeResult]:
+        """
+        多个识别流合批识别：各自编码、CTC 与构建 Prompt 后，
+        需要 LLM 的片段在同一上下文的不同序列中连续批处理解码（见 LLMDecoder.decode_batch）
+
+        传入 admit 时为连续批处理：LLM 有空闲序列时调用 admit() 取 (stream, language, context)
+        加入本批（追加到 streams 之后，None 表示暂无）；每个流完成即调用 on_done(i, result)，
+        on_partial(i, text_base, text) 推送 LLM 逐 Token 生成的临时文本。
+        """
+        reporter = _SILENT_REPORTER
+        streams = list(streams)
+        preps, pending = [], []     # pending: 需要 LLM 解码的流下标
+
+        def prepare(stream, language, context) -> bool:
+            """预处理一个流；不需要 LLM 时直接完成，返回是否待 LLM 解码"""
+            preps.append(self._prepare(stream, language, context, reporter, timestamp_offset))
+            if isinstance(preps[-1], DecodeResult):
+                if on_done:
+                    on_done(len(preps) - 1, preps[-1])
+                return False
+            pending.append(len(preps) - 1)
+            return True
+
+        def admit_embd():
+            while True:
+                item = admit()
+                if item is None:
+                    return None
+                streams.append(item[0])
+                if prepare(*item):
+                    return preps[-1].full_embd
+
+        def complete(j: int, llm_res: LLMDecodeResult):
+            i = pending[j]
+            preps[i] = self._complete(streams[i], preps[i], llm_res, reporter, timestamp_offset)
+            if on_done:
+                on_done(i, preps[i])
+
+        for i, stream in enumerate(streams):
+            prepare(stream, languages[i] if languages else None, contexts[i] if contexts else None)
+        if len(pending) == 1 and admit is None:
+            complete(0, self._generate(preps[pending[0]], False, reporter, temperature, top_p, top_k))
+        elif pending or admit:
+            self.llm_decoder.decode_batch(
+                [preps[i].full_embd for i in pending], self.models.config.n_predict,
+                temperature=temperature, top_p=top_p, top_k=top_k,
+                n_seq=max(self.models.config.batch_size, 1),
+                admit=admit_embd if admit else None, on_done=complete,
+                on_partial=(lambda j, text_base, text: on_partial(pending[j], text_base, text)) if on_partial else None
+            )
+        return preps
+
+    def _prepare(self, stream: RecognitionStream, language: Optional[str], context: Optional[str],
+                 reporter: DisplayReporter, timestamp_offset: float) -> Union[DecodeResult, '_Prepared']:
+        """
+        LLM 之前的阶段：编码、CTC 与 Prompt 构建
+
+        空音频与跳过 LLM 的片段直接返回完成的 DecodeResult，否则返回待 LLM 解码的 _Prepared
+        """
         timings = Timings()
 
         # 0. 检查原始音频数据长度，空音频防御
@@ -54,7 +169,7 @@ class InferencePipeline:
 
         # 2. CTC Decoding
         reporter.print("\n[3] CTC 解码...")
-        (ctc_results, hotwords, ctc_times), timings.ctc = timer(
+        (ctc_results, hotwords, ctc_times, confidence), timings.ctc = timer(
             self.models.ctc_decoder.decode,
             enc_output, 
             self.models.config.enable_ctc, 
@@ -63,9 +178,18 @@ class InferencePipeline:
         )
         reporter.print(f"    CTC: {''.join([r.text for r in ctc_results])}")
         reporter.print(f"    热词: {hotwords}")
+        reporter.print(f"    置信度: {confidence:.3f}")
         t_detail = " | ".join([f"{k}:{v*1000:.1f}ms" for k, v in ctc_times.items() if v > 0])
         reporter.print(f"    耗时: {timings.ctc*1000:.2f}ms ({t_detail})")
 
+        # CTC 足够可信时直接采用 CTC 文本，跳过 Prompt 构建与 LLM 解码
+        duration = len(stream.audio_data) / stream.sample_rate
+        if self._can_bypass(ctc_results, hotwords, confidence, duration):
+            reporter.print("\n[4] CTC 置信度达标，跳过 LLM 解码")
+            text = "".join(r.text for r in ctc_results).strip()
+            return self._finish(stream, text, ctc_results, timings, timestamp_offset, reporter,
+                                hotwords=hotwords, confidence=confidence, bypassed=True)
+
         # 3. Prompt Builder
         reporter.print("\n[4] 准备 Prompt...")
         (p_embd, s_embd, n_p, n_s, p_text), timings.prepare = timer(
@@ -76,32 +200,46 @@ class InferencePipeline:
         reporter.print(f"    Prefix: {n_p} tokens")
         reporter.print(f"    Suffix: {n_s} tokens")
 
-        # 4. LLM Decoding Loop
-        reporter.print("\n[5] LLM 解码...")
-        reporter.print("=" * 70)
         full_embd = np.concatenate([p_embd, audio_embd.astype(np.float32), s_embd], axis=0)
-        n_input_tokens = full_embd.shape[0]
-
-        # 5. LLM 解码循环：若熔断则加温重试（总共最多解码7次，最后的温度是2.1）
-        llm_res = None
-        current_temp = temperature
-        for retry_idx in range(7):
-            if retry_idx > 0:
-                print(f"\033[0G[!] 解码有误，熔断重试 (温度设为 {current_temp:.1f}, retry: {retry_idx})")
-            llm_res = self.llm_decoder.decode(
-                full_embd, n_input_tokens, self.models.config.n_predict, 
-                stream_output=verbose, reporter=reporter,
-                temperature=current_temp, top_p=top_p, top_k=top_k
-            )
-            if not llm_res.is_aborted: break    # 正常解码就跳出循环
-            llm_res.text += "====解码有误，强制熔断===="
-            current_temp += 0.3
-        text = llm_res.text.strip()
+        return _Prepared(full_embd, audio_embd, ctc_results, hotwords, confidence, n_p, n_s, timings)
+
+    def _complete(self, stream: RecognitionStream, prep: '_Prepared', llm_res: LLMDecodeResult,
+                  reporter: DisplayReporter, timestamp_offset: float) -> DecodeResult:
+        """LLM 之后的阶段：统计耗时并对齐时间戳"""
+        timings = prep.timings
         timings.inject = llm_res.t_inject
         timings.llm_generate = llm_res.t_gen
-        
-        if reporter: reporter.print("\n" + "=" * 70)
+        if llm_res.t_gen > 0:
+            reporter.print(f"    生成: {llm_res.n_gen} tokens, {llm_res.n_gen / llm_res.t_gen:.1f} tokens/s")
+        if llm_res.n_drafted:
+            reporter.print(f"    草稿接受率: {llm_res.n_accepted}/{llm_res.n_drafted} "
+                           f"({llm_res.n_accepted / llm_res.n_drafted:.0%})")
+
+        return self._finish(
+            stream, llm_res.text.strip(), prep.ctc_results, timings, timestamp_offset, reporter,
+            audio_embd=prep.audio_embd, n_prefix=prep.n_prefix, n_suffix=prep.n_suffix,
+            n_gen=llm_res.n_gen, hotwords=prep.hotwords,
+            is_aborted=llm_res.is_aborted, confidence=prep.confidence,
+            n_drafted=llm_res.n_drafted, n_accepted=llm_res.n_accepted, n_retries=llm_res.n_retries
+        )
 
+    def _can_bypass(self, ctc_results, hotwords: List[str], confidence: float, duration: float) -> bool:
+        """
+        是否可以跳过 LLM 直接采用 CTC 文本
+
+        要求：开启 llm_bypass、短音频、没有热词命中（热词需要 LLM 结合上下文纠正）、
+        CTC 置信度达到阈值，且结果中没有特殊符号。注意 CTC 文本不含标点与 ITN。
+        """
+        config = self.models.config
+        if not (config.llm_bypass and ctc_results) or hotwords:
+            return False
+        if duration > config.bypass_max_seconds or confidence < config.bypass_confidence:
+            return False
+        return not any(r.text.startswith('<') and r.text.endswith('>') for r in ctc_results)
+
+    def _finish(self, stream: RecognitionStream, text: str, ctc_results, timings: Timings,
+                timestamp_offset: float, reporter: DisplayReporter, **fields) -> DecodeResult:
+        """时间戳对齐，写入流结果并组装 DecodeResult"""
         # 6. Timestamp Alignment
         reporter.print("\n[6] 时间戳对齐")
         aligned, timings.align = timer(CTCAligner.align, ctc_results, text, timestamp_offset=timestamp_offset)
@@ -115,12 +253,7 @@ class InferencePipeline:
 
         # Set stream result
         stream.set_result(text=text, timestamps=timestamps, tokens=tokens)
-        
-        return DecodeResult(
-            text=text, ctc_results=ctc_results, aligned=aligned,
-            audio_embd=audio_embd, n_prefix=n_p, n_suffix=n_s,
-            n_gen=llm_res.n_gen, timings=timings, hotwords=hotwords,
-            is_aborted=llm_res.is_aborted
-        )
+
+        return DecodeResult(text=text, ctc_results=ctc_results, aligned=aligned, timings=timings, **fields)
 
 
@@ -2,16 +2,26 @@
 FunASR-GGUF Prompt 构建工具
 """
 
+from collections import OrderedDict
 from typing import List, Optional, Tuple
 import numpy as np
 from . import llama, logger
 
 class PromptBuilder:
-    """负责构建 LLM 的 Prompt Embeddings"""
+    """
+    负责构建 LLM 的 Prompt Embeddings
+
+    构建结果按 (热词, 语言, 上下文) 缓存（LRU，最多 max_cached 条）：
+    相同条件下的片段不再重复分词与查表。hits / misses 为累计命中 / 构建次数。
+    """
     
-    def __init__(self, vocab: any, embedding_table: np.ndarray):
+    def __init__(self, vocab: any, embedding_table: np.ndarray, max_cached: int = 64):
         self.vocab = vocab
         self.embedding_table = embedding_table
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
 
     def build_prompt(
         self,
@@ -23,8 +33,24 @@ class PromptBuilder:
         构建 Prompt Embeddings
         
         Returns:
-            (prefix_embd, suffix_embd, n_prefix, n_suffix, prefix_prompt_text)
+            (prefix_embd, suffix_embd, n_prefix, n_suffix, prefix_prompt_text)，
+            两个 Embedding 数组为只读的缓存，调用方需拷贝后再修改
         """
+        key = (tuple(hotwords or ()), language, context)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+        self.misses += 1
+        built = self._build(hotwords, language, context)
+        if self.max_cached > 0:
+            self._cache[key] = built
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return built
+
+    def _build(self, hotwords, language, context):
         # 构建 Prompt
         prefix_prompt = "<|im_start|>system\nYou are a helpful assistant.<|im_end|>\n<|im_start|>user\n"
 
@@ -54,6 +80,8 @@ class PromptBuilder:
 
         prefix_embd = self.embedding_table[prefix_tokens].astype(np.float32)
         suffix_embd = self.embedding_table[suffix_tokens].astype(np.float32)
+        prefix_embd.setflags(write=False)
+        suffix_embd.setflags(write=False)
 
         return prefix_embd, suffix_embd, len(prefix_tokens), len(suffix_tokens), prefix_prompt
 
@@ -150,6 +150,12 @@ class ASREngineConfig:
         onnx_provider: 推理后端 (CPU, CUDA, DML, TensorRT)
         ctc_topk: CTC 解码时的 Top-K 深度
         dml_pad_to: DML 专用填充长度（秒）
+        llm_bypass: CTC 置信度足够高时直接返回 CTC 文本，跳过 LLM 解码
+        speculative: 以 CTC 文本为草稿进行投机解码
+        draft_max: 投机解码每次验证的最大草稿 Token 数
+        batch_size: 合批解码的最大片段数（LLM 上下文的序列数），1 表示不合批
+        bypass_confidence: 跳过 LLM 所需的最低 CTC 置信度
+        bypass_max_seconds: 只对不长于此时长（秒）的音频跳过 LLM
         verbose: 是否打印详细加载日志
     """
     encoder_onnx_path: str
@@ -170,6 +176,12 @@ class ASREngineConfig:
     llm_use_gpu: bool = True
     vulkan_force_fp32: bool = False
     hotwords: List[str] = field(default_factory=list)
+    llm_bypass: bool = False
+    bypass_confidence: float = 0.9
+    bypass_max_seconds: float = 10.0
+    speculative: bool = False
+    draft_max: int = 8
+    batch_size: int = 1
     verbose: bool = True
 
 
@@ -242,6 +254,11 @@ class DecodeResult:
         n_gen: 生成 token 数
         timings: 各阶段耗时
         hotwords: 热词列表
+        confidence: CTC 置信度
+        bypassed: 是否跳过了 LLM 解码（直接采用 CTC 文本）
+        n_drafted: 投机解码提交验证的草稿 Token 数
+        n_accepted: 投机解码被接受的草稿 Token 数
+        n_retries: LLM 熔断后回退重试的次数
     """
     text: str = ""
     ctc_results: List = field(default_factory=list)
@@ -253,6 +270,11 @@ class DecodeResult:
     timings: Timings = field(default_factory=Timings)
     hotwords: List[str] = field(default_factory=list)
     is_aborted: bool = False
+    confidence: float = 0.0
+    bypassed: bool = False
+    n_drafted: int = 0
+    n_accepted: int = 0
+    n_retries: int = 0
 
 @dataclass
 class LLMDecodeResult:
@@ -265,12 +287,18 @@ class LLMDecodeResult:
         t_inject: 注入耗时
         t_gen: 生成耗时
         is_aborted: 是否触发熔断
+        n_drafted: 投机解码提交验证的草稿 Token 数
+        n_accepted: 投机解码被接受的草稿 Token 数
+        n_retries: 熔断后回退重试的次数
     """
     text: str = ""
     n_gen: int = 0
     t_inject: float = 0.0
     t_gen: float = 0.0
     is_aborted: bool = False
+    n_drafted: int = 0
+    n_accepted: int = 0
+    n_retries: int = 0
 
 
 # ==================== 导出列表 ====================
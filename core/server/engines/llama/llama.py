@@ -4,7 +4,7 @@ import ctypes
 import codecs
 import struct
 import time
-from collections import deque, Counter
+from collections import deque, Counter, OrderedDict
 import numpy as np
 import gguf
 from gguf.constants import GGML_QUANT_SIZES, GGMLQuantizationType
@@ -137,6 +137,8 @@ llama_vocab_eos = None
 llama_token_to_piece = None
 llama_get_memory = None
 llama_memory_clear = None
+llama_memory_seq_rm = None
+llama_memory_seq_cp = None
 llama_model_n_embd = None
 
 # Sampler
@@ -189,7 +191,7 @@ def bind_llama_lib():
     global llama_context_default_params, llama_init_from_model, llama_free
     global llama_batch_init, llama_batch_free, llama_batch_get_one
     global llama_decode, llama_get_logits, llama_get_logits_ith, llama_get_embeddings, llama_tokenize
-    global llama_get_memory, llama_memory_clear, llama_model_n_embd
+    global llama_get_memory, llama_memory_clear, llama_memory_seq_rm, llama_memory_seq_cp, llama_model_n_embd
     global llama_vocab_n_tokens, llama_vocab_eos, llama_token_to_piece
     global llama_sampler_chain_default_params, llama_sampler_chain_init, llama_sampler_chain_add
     global llama_sampler_init_greedy, llama_sampler_init_dist, llama_sampler_init_temp
@@ -340,6 +342,14 @@ def bind_llama_lib():
     llama_memory_clear.argtypes = [ctypes.c_void_p, ctypes.c_bool]
     llama_memory_clear.restype = None
 
+    llama_memory_seq_rm = llama.llama_memory_seq_rm
+    llama_memory_seq_rm.argtypes = [ctypes.c_void_p, ctypes.c_int32, ctypes.c_int32, ctypes.c_int32]
+    llama_memory_seq_rm.restype = ctypes.c_bool
+
+    llama_memory_seq_cp = llama.llama_memory_seq_cp
+    llama_memory_seq_cp.argtypes = [ctypes.c_void_p, ctypes.c_int32, ctypes.c_int32, ctypes.c_int32, ctypes.c_int32]
+    llama_memory_seq_cp.restype = None
+
     # Sampler
     llama_sampler_chain_default_params = llama.llama_sampler_chain_default_params
     llama_sampler_chain_default_params.argtypes = []
@@ -561,6 +571,30 @@ class LlamaContext:
         mem = llama_get_memory(self.ptr)
         llama_memory_clear(mem, True)
 
+    def truncate_kv_cache(self, n_keep: int, seq_id: int = 0) -> bool:
+        """
+        丢弃序列中位置 >= n_keep 的 KV，保留前缀
+        
+        Returns:
+            False 表示后端不支持部分删除（如循环结构记忆），调用方需整体清空
+        """
+        mem = llama_get_memory(self.ptr)
+        return bool(llama_memory_seq_rm(mem, seq_id, n_keep, -1))
+
+    def remove_sequence(self, seq_id: int) -> bool:
+        """丢弃一个序列的全部 KV（多序列合批时序列结束或重试）"""
+        mem = llama_get_memory(self.ptr)
+        return bool(llama_memory_seq_rm(mem, seq_id, -1, -1))
+
+    def copy_sequence(self, src: int, dst: int):
+        """
+        把序列 src 的全部 KV 复制给序列 dst（多序列共享 Prompt 前缀）
+
+        各序列分开缓存时 llama.cpp 只支持整段复制，只需要前缀时复制后再用 truncate_kv_cache 截断
+        """
+        mem = llama_get_memory(self.ptr)
+        llama_memory_seq_cp(mem, src, dst, -1, -1)
+
     def __del__(self):
         if hasattr(self, 'ptr') and self.ptr:
             llama_free(self.ptr)
@@ -638,6 +672,26 @@ class LlamaBatch:
         
         return self
 
+    def set_tokens(self, tokens: List[int], pos: Union[List[int], int], seq_id: Union[List[int], int] = 0):
+        """
+        高阶接口：填入 Token，每个 Token 都输出 Logits（用于草稿验证、多序列逐步解码）
+
+        Args:
+            pos: 若为 int，则位置从 pos 起连续；若为列表，则逐个指定
+            seq_id: 若为 int，则全部属于同一序列；若为列表，则逐个指定（多序列合批）
+        """
+        n_tokens = len(tokens)
+        if n_tokens > self.n_tokens_max:
+            raise ValueError(f"Batch 空间不足: {n_tokens} > {self.n_tokens_max}")
+        for i, token_id in enumerate(tokens):
+            self.token[i] = token_id
+            self.pos[i] = pos + i if isinstance(pos, int) else pos[i]
+            self.n_seq_id[i] = 1
+            self.seq_id[i][0] = seq_id if isinstance(seq_id, int) else seq_id[i]
+            self.logits[i] = 1
+        self.n_tokens = n_tokens
+        return self
+
     def __del__(self):
         if hasattr(self, 'struct'):
             llama_batch_free(self.struct)
@@ -798,10 +852,20 @@ class ASRStreamDecoder:
 
 
 class LlamaEmbeddingTable:
-    """动态反量化 Embedding 表，支持 table[ids] 语法"""
-    def __init__(self, raw_data, qtype):
+    """
+    动态反量化 Embedding 表，支持 table[ids] 语法
+
+    量化表按 Token 缓存反量化后的行（LRU，最多 max_cached_rows 行）：
+    每段 Prompt 中的系统提示、指令等 Token 反复出现，只需反量化一次。
+    hits / misses 为累计的行命中 / 反量化次数。
+    """
+    def __init__(self, raw_data, qtype, max_cached_rows: int = 4096):
         self.raw_data = raw_data
         self.qtype = qtype
+        self.max_cached_rows = max_cached_rows
+        self._rows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
         
     def __len__(self):
         return self.raw_data.shape[0]
@@ -812,9 +876,30 @@ class LlamaEmbeddingTable:
         # 如果是原生 float 类型，直接返回
         if self.raw_data.dtype in (np.float32, np.float16):
             return self.raw_data[tokens].astype(np.float32)
-            
-        # 调用官方库进行高性能反量化
-        return dequantize(self.raw_data[tokens], self.qtype.value)
+
+        ids = np.asarray(tokens, dtype=np.int64)
+        flat = ids.reshape(-1).tolist()
+        if not flat or self.max_cached_rows <= 0:
+            return dequantize(self.raw_data[tokens], self.qtype.value)
+
+        # 只反量化缓存中没有的行（调用官方库批量反量化）
+        rows = self._rows
+        missing = [t for t in dict.fromkeys(flat) if t not in rows]
+        fresh = dict(zip(missing, dequantize(self.raw_data[missing], self.qtype.value))) if missing else {}
+        out = []
+        for t in flat:
+            row = fresh.get(t)
+            if row is None:
+                row = rows[t]
+                rows.move_to_end(t)
+            out.append(row)
+        self.misses += len(missing)
+        self.hits += len(flat) - len(missing)
+
+        rows.update(fresh)
+        while len(rows) > self.max_cached_rows:
+            rows.popitem(last=False)
+        return np.stack(out).reshape(ids.shape + (-1,))
 
 def _skip_gguf_value(mm, offs, v_type):
     # UINT8=0, INT8=1, UINT16=2, INT16=3, UINT32=4, INT32=5, FLOAT32=6, BOOL=7, STRING=8, ARRAY=9, UINT64=10, INT64=11, FLOAT64=12
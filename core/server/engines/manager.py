@@ -1,6 +1,7 @@
 import time
 from .factory import EngineFactory
 from .base import BaseAlignEngine
+from ..metrics import worker_metrics
 from . import logger
 
 class ManagedAlignerProxy(BaseAlignEngine):
@@ -22,6 +23,7 @@ class ManagedAlignerProxy(BaseAlignEngine):
         if self.engine is None:
             logger.info("🚩 [AlignerProxy] 检测到文件任务需求，正在即时加载对齐引擎...")
             self.engine = EngineFactory.create_align_engine()
+            worker_metrics.inc('aligner_loads')
         
         # 2. 标记运行并执行
         self.is_processing = True
@@ -42,6 +44,7 @@ class ManagedAlignerProxy(BaseAlignEngine):
             logger.info(f"🚩 [AlignerProxy] 对齐引擎已闲置 {idle_time:.0f}s，正在自动卸载以释放显存...")
             self.engine.cleanup()
             self.engine = None
+            worker_metrics.inc('aligner_unloads')
 
     def cleanup(self):
         if self.engine:
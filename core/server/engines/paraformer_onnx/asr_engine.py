@@ -20,6 +20,7 @@ class ParaformerConfig:
     decoding_method: str = 'greedy_search'
     provider: str = 'cpu'
     debug: bool = False
+    batch_size: int = 1         # decode_streams 合批上限
 
 
 class ParaformerStream(RecognitionStream):
@@ -170,6 +171,30 @@ class ParaformerEngine(BaseASREngine):
         self.recognizer.decode_stream(stream.internal_stream)
         
         # 2. 将 sherpa-onnx 的结果同步回标准结果结构
+        self._sync_result(stream)
+
+    @property
+    def max_batch_size(self) -> int:
+        """按配置合批（sherpa-onnx 的 Paraformer 模型原生支持动态 batch）"""
+        return max(self.config.batch_size, 1)
+
+    def decode_streams(
+        self,
+        streams: List[ParaformerStream],
+        contexts: Optional[List[Optional[str]]] = None,
+        languages: Optional[List[Optional[str]]] = None,
+        **kwargs
+    ):
+        """合批解码：sherpa-onnx 将各流特征补齐后一次推理（使用配置的 num_threads）"""
+        if languages and any(lang and lang != 'auto' for lang in languages):
+            logger.debug("ParaformerEngine 是中文专用模型，语言设置已忽略")
+
+        self.recognizer.decode_streams([s.internal_stream for s in streams])
+        for stream in streams:
+            self._sync_result(stream)
+
+    def _sync_result(self, stream: ParaformerStream):
+        """将 sherpa-onnx 流的识别结果写入标准结果结构"""
         res = stream.internal_stream.result
         stream.result.text = res.text
         # 后处理 BPE 子词为单词级，空格独立 token
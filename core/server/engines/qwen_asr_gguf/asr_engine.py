@@ -1,7 +1,10 @@
 # coding=utf-8
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-from typing import Optional, List
+from typing import Callable, Optional, List
 from .inference.asr import QwenASREngine as QwenInternalEngine
 from .inference.schema import ASREngineConfig, MsgType, StreamingMessage
 from ..base import BaseASREngine, RecognitionStream, EngineCapabilities, RecognitionResult
@@ -44,14 +47,37 @@ class QwenASREngine(BaseASREngine):
         context: Optional[str] = None,
         language: Optional[str] = None,
         temperature: float = 0.4,
+        on_partial: Optional[Callable[[int, str], None]] = None,
         **kwargs
     ):
         """
-        解码识别流
+        解码识别流；on_partial(text_base, text) 接收逐 Token 生成的临时文本
         """
         if stream.audio_data is None:
             return
 
+        audio_embd, enc_time = self._encode(stream)
+        full_embd = self._prompt_embd(audio_embd, context, language)
+
+        # 4. 执行解码
+        res = self.engine._safe_decode(
+            full_embd, 
+            prefix_text="", 
+            rollback_num=5, 
+            is_last_chunk=True, 
+            temperature=temperature, 
+            streaming=False, 
+            prefix_tokens=self.engine._prompt_prefix(context),
+            on_partial=on_partial,
+        )
+
+        # 5. 更新结果
+        stream.result.text = res.text
+        stream.result.performance = {'encode': enc_time, 'llm_decode': res.t_prefill + res.t_generate}
+        # Qwen 纯 ASR 模式下暂不支持 token 级时间戳，由 server_recognize 自动补齐
+
+    def _encode(self, stream: QwenASRStream):
+        """编码音频，返回 (audio_embd, 编码耗时)"""
         sr = 16000
         audio_data = stream.audio_data
         
@@ -61,9 +87,10 @@ class QwenASREngine(BaseASREngine):
             audio_data = audio_data[:max_samples]
 
         # 1. 提交编码任务（同步调用）
-        audio_embd, enc_time = self.engine.encoder.encode(audio_data)
-        
-        # 3. 构造 Prompt 并解码（语言映射：统一代码 → Qwen3 英文明称）
+        return self.engine.encoder.encode(audio_data)
+
+    def _prompt_embd(self, audio_embd: np.ndarray, context: Optional[str], language: Optional[str]) -> np.ndarray:
+        """构造 Prompt Embedding（语言映射：统一代码 → Qwen3 英文明称）"""
         mapped_lang = get_language(ENGINE_QWEN_ASR, language) if language else None
         full_embd = self.engine._build_prompt_embd(
             audio_embd=audio_embd,
@@ -71,20 +98,96 @@ class QwenASREngine(BaseASREngine):
             context=context,
             language=mapped_lang
         )
+        return full_embd
 
-        # 4. 执行解码
-        res = self.engine._safe_decode(
-            full_embd, 
-            prefix_text="", 
-            rollback_num=5, 
-            is_last_chunk=True, 
-            temperature=temperature, 
-            streaming=False, 
-        )
+    @property
+    def max_batch_size(self) -> int:
+        """LLM 上下文的解码序列数：多个片段在同一上下文中连续批处理解码"""
+        return max(self.config.batch_size, 1)
 
-        # 5. 更新结果
-        stream.result.text = res.text
-        # Qwen 纯 ASR 模式下暂不支持 token 级时间戳，由 server_recognize 自动补齐
+    @property
+    def continuous_batching(self) -> bool:
+        """合批解码时 LLM 有空闲序列即可接纳新的片段"""
+        return self.max_batch_size > 1
+
+    def decode_streams(
+        self,
+        streams: List[QwenASRStream],
+        contexts: Optional[List[Optional[str]]] = None,
+        languages: Optional[List[Optional[str]]] = None,
+        temperature: float = 0.4,
+        admit: Optional[Callable[[], Optional[tuple]]] = None,
+        on_done: Optional[Callable[[int], None]] = None,
+        on_partial: Optional[Callable[[int, int, str], None]] = None,
+        **kwargs
+    ):
+        """
+        合批解码：各片段编码并构造 Prompt，LLM 每一步为所有未结束的片段各生成一个 Token
+        （见 QwenInternalEngine._decode_batch）；admit / on_done / on_partial 见 BaseASREngine.decode_streams
+
+        解码中途接纳的流交给编码线程（与 asr() 的编码线程相同），编码完成后才加入解码，
+        编码期间其他序列照常生成。
+        """
+        if self.max_batch_size <= 1:
+            super().decode_streams(streams, contexts, languages, temperature=temperature, **kwargs)
+            return
+        streams = list(streams)
+        index = []              # LLM 解码的第 j 段 -> 流下标
+        encoding = deque()      # 编码中的接纳流 (流下标, context, language, future)，按接纳顺序
+
+        def ready(i: int, context: Optional[str], language: Optional[str], encoded: tuple):
+            """编码完成的流：构造其 (Prompt, 前缀) 交给 LLM"""
+            audio_embd, enc_time = encoded
+            streams[i].result.performance = {'encode': enc_time}
+            index.append(i)
+            return self._prompt_embd(audio_embd, context, language), self.engine._prompt_prefix(context)
+
+        def has_audio(i: int) -> bool:
+            # 没有音频的流直接完成
+            if streams[i].audio_data is None:
+                if on_done:
+                    on_done(i)
+                return False
+            return True
+
+        def admit_item(wait: bool):
+            # 收取新接纳的流提交编码（至多 max_batch_size 个在编码），返回最早一个编码完成的
+            while len(encoding) < self.max_batch_size:
+                item = admit()
+                if item is None:
+                    break
+                stream, context, language = item
+                streams.append(stream)
+                if has_audio(len(streams) - 1):
+                    encoding.append((len(streams) - 1, context, language, enc_pool.submit(self._encode, stream)))
+            if encoding and (wait or encoding[0][3].done()):
+                i, context, language, future = encoding.popleft()
+                return ready(i, context, language, future.result())
+            return None
+
+        def done(j: int, res):
+            stream = streams[index[j]]
+            stream.result.text = res.text
+            stream.result.performance['llm_decode'] = res.t_prefill + res.t_generate
+            if on_done:
+                on_done(index[j])
+
+        items = []
+        for i in range(len(streams)):
+            if has_audio(i):
+                items.append(ready(i, contexts[i] if contexts else None, languages[i] if languages else None,
+                                   self._encode(streams[i])))
+        if not (items or admit):
+            return
+        enc_pool = ThreadPoolExecutor(1, thread_name_prefix='QwenEncode') if admit else None
+        try:
+            self.engine._decode_batch(
+                items, temperature=temperature, admit=admit_item if admit else None, on_done=done,
+                on_partial=(lambda j, text_base, text: on_partial(index[j], text_base, text)) if on_partial else None
+            )
+        finally:
+            if enc_pool:
+                enc_pool.shutdown(wait=True, cancel_futures=True)
 
     def update_hotwords(self, hotwords: List[str]):
         """Qwen 暂不支持热词动态更新"""
@@ -1,6 +1,7 @@
 # coding=utf-8
 import os
 import time
+import bisect
 import unicodedata
 import numpy as np
 import onnxruntime as ort
@@ -96,19 +97,42 @@ class AlignerProcessor:
             # 所有的其他语种均使用通用分词逻辑
             return self.tokenize_general(text)
 
+    @staticmethod
+    def longest_non_decreasing(data_list: List[int]) -> List[int]:
+        """
+        最长非递减子序列的下标（耐心排序，O(n log n)）
+
+        与逐对比较的 O(n²) DP 选出同一条子序列：终点取长度最大的最小下标，
+        每一步的前驱取「长度恰好少一且值不大于当前值」的最小下标。
+        同一长度层内，下标递增时值严格递减，因此该前驱可在层内二分得到。
+        """
+        tails: List[int] = []               # tails[k]: 长度 k+1 的层中最后加入（值最小）的元素值
+        layer_neg: List[List[int]] = []     # 每层元素值取负（层内递增，便于 bisect）
+        layer_idx: List[List[int]] = []     # 每层元素下标
+        parent = [-1] * len(data_list)
+        best_len, best_idx = 0, -1
+        for i, v in enumerate(data_list):
+            k = bisect.bisect_right(tails, v)
+            if k:
+                prev = layer_neg[k - 1]
+                parent[i] = layer_idx[k - 1][bisect.bisect_left(prev, -v)]
+            if k == len(tails):
+                tails.append(v); layer_neg.append([]); layer_idx.append([])
+            else:
+                tails[k] = v
+            layer_neg[k].append(-v); layer_idx[k].append(i)
+            if k + 1 > best_len:
+                best_len, best_idx = k + 1, i
+        lis_indices, idx = [], best_idx
+        while idx != -1: lis_indices.append(idx); idx = parent[idx]
+        lis_indices.reverse()
+        return lis_indices
+
     def fix_timestamps(self, data: np.ndarray) -> List[int]:
         data_list = data.tolist()
         n = len(data_list)
         if n == 0: return []
-        dp, parent = [1] * n, [-1] * n
-        for i in range(1, n):
-            for j in range(i):
-                if data_list[j] <= data_list[i] and dp[j] + 1 > dp[i]:
-                    dp[i] = dp[j] + 1; parent[i] = j
-        max_idx = dp.index(max(dp))
-        lis_indices, idx = [], max_idx
-        while idx != -1: lis_indices.append(idx); idx = parent[idx]
-        lis_indices.reverse()
+        lis_indices = self.longest_non_decreasing(data_list)
         is_normal = [False] * n
         for idx in lis_indices: is_normal[idx] = True
         result = data_list.copy()
@@ -8,7 +8,8 @@ import numpy as np
 import multiprocessing as mp
 from pathlib import Path
 from collections import deque
-from typing import Optional, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, List
 
 from .schema import MsgType, StreamingMessage, DecodeResult, ASREngineConfig, TranscribeResult, ForcedAlignItem, ForcedAlignResult
 from .utils import normalize_language_name, validate_language
@@ -24,6 +25,88 @@ class ASRS_Segment:
     text: str = ""
     items: List[ForcedAlignItem] = None   
 
+class _StableText:
+    """
+    生成 Token 的显示队列：最后 rollback_num 个 Token 待定，更早的解码为稳定文本
+
+    on_partial(text_base, text)：稳定文本每增长一段即推送增量
+    """
+    def __init__(self, model, rollback_num: int, streaming: bool,
+                 on_partial: Optional[Callable[[int, str], None]] = None):
+        self.model = model
+        self.rollback_num = rollback_num
+        self.streaming = streaming
+        self.on_partial = on_partial
+        self.queue = deque()
+        self.tokens = []
+        self.text = ""
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def push(self, token: int):
+        self.queue.append(token)
+        if len(self.queue) > self.rollback_num:
+            self._emit(self.queue.popleft())
+
+    def flush(self):
+        """末段：待定 Token 全部转为稳定文本"""
+        while self.queue:
+            self._emit(self.queue.popleft())
+        final_p = self.decoder.decode(b"", final=True)
+        if final_p:
+            if self.streaming: print(final_p, end='', flush=True)
+            self._append(final_p)
+
+    def _emit(self, token: int):
+        self.tokens.append(token)
+        piece = self.decoder.decode(self.model.token_to_bytes(token))
+        if piece:
+            if self.streaming: print(re.sub(r'([，。？！：,\.])', r'\1\n', piece), end='', flush=True)
+            self._append(piece)
+
+    def _append(self, piece: str):
+        if self.on_partial:
+            self.on_partial(len(self.text), piece)
+        self.text += piece
+
+    def replay(self, tokens: List[int]) -> '_StableText':
+        """熔断回退：只保留 tokens 重建显示队列（不重复输出已显示的文字），并推送截断"""
+        out = _StableText(self.model, self.rollback_num, False)
+        for t in tokens:
+            out.push(t)
+        out.streaming, out.on_partial = self.streaming, self.on_partial
+        if out.on_partial: out.on_partial(len(out.text), "")
+        return out
+
+
+def _repeat_start(stable: List[int], generated: List[int]) -> int:
+    """熔断检查：稳定 Token 末尾陷入重复循环时返回应保留的 Token 数（回溯到循环开始之前），否则返回 -1"""
+    if len(stable) <= 15 or len(set(stable[-15:])) > 3:
+        return -1
+    loop = set(stable[-15:])
+    n_keep = len(stable) - 15
+    while n_keep > 0 and generated[n_keep - 1] in loop:
+        n_keep -= 1
+    return n_keep
+
+
+@dataclasses.dataclass
+class _Sequence:
+    """多序列解码中的一个片段（见 QwenASREngine._decode_batch）"""
+    index: int                      # 片段下标
+    full_embd: np.ndarray
+    prefix_tokens: Optional[List[int]]
+    out: _StableText
+    result: DecodeResult
+    temperature: float
+    seed: int
+    sampler: object = None
+    token: int = -1                 # 待提交的 Token
+    pos: int = 0                    # 待提交 Token 前向时的位置
+    replay: bool = False            # 回退后需要重新前向最后一个保留的 Token
+    generated: List[int] = dataclasses.field(default_factory=list)
+    t_start: float = 0.0
+
+
 class QwenASREngine:
     """Qwen3-ASR 流式转录引擎 (GGUF 后端) - 统一辅助进程架构"""
     def __init__(self, config: ASREngineConfig):
@@ -51,10 +134,12 @@ class QwenASREngine:
             from .aligner import QwenForcedAligner
             self.aligner = QwenForcedAligner(config.align_config)
         
-        # 3. 加载识别 LLM
+        # 3. 加载识别 LLM（合批解码时序列 0 只存放常驻前缀，序列 1..batch_size 各解码一个片段，每个序列各占 n_ctx）
         self.model = llama.LlamaModel(llm_gguf, use_gpu=config.llm_use_gpu)
         self.embedding_table = llama.get_token_embeddings_gguf(llm_gguf)
-        self.ctx = llama.LlamaContext(self.model, n_ctx=config.n_ctx, n_batch=4096, embeddings=False)
+        n_seq = config.batch_size + 1 if config.batch_size > 1 else 1
+        self.ctx = llama.LlamaContext(self.model, n_ctx=config.n_ctx * n_seq, n_batch=4096, n_seq_max=n_seq,
+                                      embeddings=False)
 
         # 缓存 Token ID
         self.ID_IM_START = self.model.token_to_id("<|im_start|>")
@@ -63,17 +148,33 @@ class QwenASREngine:
         self.ID_AUDIO_END = self.model.token_to_id("<|audio_end|>")
         self.ID_ASR_TEXT = self.model.token_to_id("<asr_text>")
 
+        # 前缀 KV 缓存：System + User Header 常驻 KV，每段只预填充音频及其后的部分
+        self._prefix_cache = {}         # context -> 前缀 Token ID
+        self._kv_prefix = None          # 当前 KV 中常驻的前缀 Token ID
+        self._kv_reuse = True           # 后端不支持部分删除 KV 时关闭
+        self._batch = None              # 复用的预填充 Batch
+        self._step_batch = None         # 复用的多序列逐步解码 Batch
+
     def shutdown(self):
         if self.verbose: print("--- [QwenASR] 引擎已关闭 ---")
 
+    def _prompt_prefix(self, context: Optional[str]) -> List[int]:
+        """音频之前的 Prompt 前缀 Token (System + User Header)，按 context 缓存"""
+        prefix_tokens = self._prefix_cache.get(context)
+        if prefix_tokens is None:
+            if len(self._prefix_cache) >= 64: self._prefix_cache.clear()
+            prefix_str = f"system\n{context or 'You are a helpful assistant.'}"
+            prefix_tokens = [self.ID_IM_START] + self.model.tokenize(prefix_str) + [self.ID_IM_END] + \
+                            [self.ID_IM_START] + self.model.tokenize("user\n") + [self.ID_AUDIO_START]
+            self._prefix_cache[context] = prefix_tokens
+        return prefix_tokens
+
     def _build_prompt_embd(self, audio_embd: np.ndarray, prefix_text: str, context: Optional[str], language: Optional[str]):
         """构造用于 LLM 输入的 Embedding 序列 (区块化打包模式)"""
         def tk(t): return self.model.tokenize(t)
 
         # 1. 区块 A: 音频之前的所有内容 (System + User Header)
-        prefix_str = f"system\n{context or 'You are a helpful assistant.'}"
-        prefix_tokens = [self.ID_IM_START] + tk(prefix_str) + [self.ID_IM_END] + \
-                        [self.ID_IM_START] + tk("user\n") + [self.ID_AUDIO_START]
+        prefix_tokens = self._prompt_prefix(context)
         
         # 2. 区块 B: 音频之后的所有内容 (Instruction + Assistant Header + History)
         suffix_head = f"assistant\n"
@@ -92,6 +193,64 @@ class QwenASREngine:
         
         return total_embd
 
+    def _prefill(self, embd: np.ndarray, pos_start: int, seq_id: int = 0):
+        """把一段 Embedding 预填充进序列 seq_id 的 KV，位置从 pos_start 开始 (M-RoPE 文本位置三平面相同)"""
+        n = embd.shape[0]
+        pos = np.arange(pos_start, pos_start + n, dtype=np.int32)
+        pos_arr = np.concatenate([pos, pos, pos, np.zeros(n, dtype=np.int32)])
+        if self._batch is None or self._batch.n_tokens_max < n * 4:
+            self._batch = llama.LlamaBatch(max(n * 4, 8192), self.model.n_embd, 1)
+        self._batch.set_embd(embd, pos=pos_arr, seq_id=seq_id)
+        if self.ctx.decode(self._batch) != 0:
+            raise RuntimeError("Decode failed")
+
+    def _prefill_prompt(self, full_embd: np.ndarray, prefix_tokens: Optional[List[int]]) -> int:
+        """
+        预填充完整 Prompt，返回实际预填充的 Token 数
+
+        full_embd 的前 len(prefix_tokens) 行须为 prefix_tokens 的 Embedding。
+        KV 中常驻的前缀与之相同时只截掉前缀之后的 KV，从前缀末尾续填；
+        否则清空 KV，先单独预填充前缀使其常驻，再填充其余部分。
+        """
+        n_pre = len(prefix_tokens) if (prefix_tokens and self._kv_reuse) else 0
+        if n_pre and prefix_tokens == self._kv_prefix:
+            if self.ctx.truncate_kv_cache(n_pre):
+                self._prefill(full_embd[n_pre:], n_pre)
+                return full_embd.shape[0] - n_pre
+            self._kv_reuse = False
+            n_pre = 0
+
+        self.ctx.clear_kv_cache()
+        self._kv_prefix = None
+        if n_pre:
+            self._prefill(full_embd[:n_pre], 0)
+            self._kv_prefix = list(prefix_tokens)
+        self._prefill(full_embd[n_pre:], n_pre)
+        return full_embd.shape[0]
+
+    def _prefill_seq(self, full_embd: np.ndarray, prefix_tokens: Optional[List[int]], seq_id: int) -> int:
+        """
+        多序列解码：把完整 Prompt 预填充进序列 seq_id (>= 1)，返回实际预填充的 Token 数
+
+        前缀常驻在序列 0：与常驻前缀不同时先在序列 0 重建，再复制其 KV 并截断到前缀末尾，
+        只预填充前缀之后的部分；后端不支持部分删除 KV 时整段预填充。
+        """
+        self.ctx.remove_sequence(seq_id)
+        n_pre = len(prefix_tokens) if (prefix_tokens and self._kv_reuse) else 0
+        if n_pre and prefix_tokens != self._kv_prefix:
+            self.ctx.remove_sequence(0)
+            self._kv_prefix = None
+            self._prefill(full_embd[:n_pre], 0)
+            self._kv_prefix = list(prefix_tokens)
+        if n_pre:
+            self.ctx.copy_sequence(0, seq_id)
+            if not self.ctx.truncate_kv_cache(n_pre, seq_id):
+                self._kv_reuse = False
+                self.ctx.remove_sequence(seq_id)
+                n_pre = 0
+        self._prefill(full_embd[n_pre:], n_pre, seq_id)
+        return full_embd.shape[0] - n_pre
+
     def _decode(
         self, 
         full_embd: np.ndarray,
@@ -100,86 +259,97 @@ class QwenASREngine:
         is_last_chunk: bool = False, 
         temperature: float = 0.4, 
         streaming: bool = True, 
+        prefix_tokens: Optional[List[int]] = None,
+        max_tries: int = 1,
+        on_partial: Optional[Callable[[int, str], None]] = None,
     ) -> DecodeResult:
-        """底层方法：执行单次 LLM 生成循环（物理推理）"""
+        """
+        底层方法：执行单次 LLM 生成循环（物理推理）
+
+        检测到重复循环时不重新预填充：KV 回退到循环开始之前，温度加 0.3 后从该处继续采样，
+        总共最多尝试 max_tries 次。on_partial 接收稳定文本的增量（见 _StableText），回退时推送截断。
+        生成上限按保留的 Token 计，回退丢弃的 Token 不占用额度
+        """
         result = DecodeResult()
         
-        total_len = full_embd.shape[0]
-        pos_base = np.arange(0, total_len, dtype=np.int32)
-        pos_arr = np.concatenate([pos_base, pos_base, pos_base, np.zeros(total_len, dtype=np.int32)])
-        batch = llama.LlamaBatch(max(total_len * 4, 8192), self.model.n_embd, 1)
-        batch.set_embd(full_embd, pos=pos_arr)
-        
-        # 1. Prefill
-        self.ctx.clear_kv_cache()
+        # 1. Prefill（传入 prefix_tokens 时复用 KV 中常驻的前缀）
         t_pre_start = time.time()
-        self.ctx.decode(batch)
+        n_prefill = self._prefill_prompt(full_embd, prefix_tokens)
         prefill_time = time.time() - t_pre_start
         
         # 2. Generation Loop（使用新采样器和随机种子）
         t_gen_start = time.time()
         n_gen_tokens = 0
-        display_queue = deque()
-        stable_tokens = []
-        stable_text_acc = ""
-        text_decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        generated = []          # 已前向进 KV 的 Token
+        out = _StableText(self.model, rollback_num, streaming, on_partial)
         
         # 每次解码使用新的随机种子
         seed = int(np.random.randint(0, 2**31 - 1))
         sampler = llama.LlamaSampler(temperature=temperature, seed=seed)
         last_sampled_token = sampler.sample(self.ctx.ptr)
-        for _ in range(512): # Max new tokens per chunk
+        while len(generated) < 512: # 每片最多保留 512 个新 Token（回退丢弃的不计入）
             if last_sampled_token in [self.model.eos_token, self.ID_IM_END]:
                 break
             
             if self.ctx.decode_token(last_sampled_token) != 0:
                     break
             
-            display_queue.append(last_sampled_token)
-            if len(display_queue) > rollback_num:
-                ready_token = display_queue.popleft()
-                stable_tokens.append(ready_token)
-                piece = text_decoder.decode(self.model.token_to_bytes(ready_token))
-                if piece:
-                    if streaming: print(re.sub(r'([，。？！：,\.])', r'\1\n', piece), end='', flush=True)
-                    stable_text_acc += piece
+            generated.append(last_sampled_token)
+            out.push(last_sampled_token)
             
             # 熔断检查：检测重复循环
-            if len(stable_tokens) > 15:
-                if len(set(stable_tokens[-15:])) <= 3:
+            n_keep = _repeat_start(out.tokens, generated)
+            if n_keep >= 0:
+                if result.n_retries + 1 >= max_tries:
                     result.is_aborted = True
                     break
+                # 回退到循环开始之前，加温后继续
+                temperature += 0.3
+                result.n_retries += 1
+                print(f"\n\n[!] 触发重试 (Temp -> {temperature:.1f})，回退 {len(generated) - n_keep} 个 Token\n")
+                generated = generated[:n_keep]
+                self._resume(full_embd, generated, prefix_tokens)
+                out = out.replay(generated)
+                del sampler
+                sampler = llama.LlamaSampler(temperature=temperature, seed=seed)
             
             last_sampled_token = sampler.sample(self.ctx.ptr)
             n_gen_tokens += 1
             
         gen_time = time.time() - t_gen_start
         del sampler  # 释放采样器资源
-        del batch
             
         if is_last_chunk and not result.is_aborted:
-            while display_queue:
-                t = display_queue.popleft()
-                stable_tokens.append(t)
-                piece = text_decoder.decode(self.model.token_to_bytes(t))
-                if piece:
-                    if streaming: print(re.sub(r'([，。？！：,\.])', r'\1\n', piece), end="", flush=True)
-                    stable_text_acc += piece
-            final_p = text_decoder.decode(b"", final=True)
-            if final_p: 
-                if streaming: print(final_p, end='', flush=True)
-                stable_text_acc += final_p
+            out.flush()
         
         # 填充结果（内核输出标准化）
-        result.text = stable_text_acc
-        result.stable_tokens = stable_tokens
+        result.text = out.text
+        result.stable_tokens = out.tokens
         result.t_prefill = prefill_time
         result.t_generate = gen_time
-        result.n_prefill = total_len
-        result.n_generate = n_gen_tokens
+        result.n_prefill = n_prefill
         result.n_generate = n_gen_tokens
         return result
 
+    def _resume(self, full_embd: np.ndarray, kept: List[int], prefix_tokens: Optional[List[int]]):
+        """
+        熔断回退：KV 只保留 Prompt 与 kept，并重新前向最后一个保留位置以得到继续采样的 Logits
+
+        后端不支持部分删除时整体重新预填充，再逐个补回 kept
+        """
+        n = full_embd.shape[0]
+        if self.ctx.truncate_kv_cache(n + len(kept) - 1):
+            if kept:
+                ok = self.ctx.decode_token(kept[-1]) == 0
+            else:
+                self._prefill(full_embd[n - 1:], n - 1)
+                ok = True
+        else:
+            self._prefill_prompt(full_embd, prefix_tokens)
+            ok = all(self.ctx.decode_token(t) == 0 for t in kept)
+        if not ok:
+            raise RuntimeError("Decode failed")
+
     def _safe_decode(
         self, 
         full_embd: np.ndarray, 
@@ -188,17 +358,167 @@ class QwenASREngine:
         is_last_chunk: bool, 
         temperature: float, 
         streaming: bool = True, 
+        prefix_tokens: Optional[List[int]] = None,
+        on_partial: Optional[Callable[[int, str], None]] = None,
     ) -> DecodeResult:
-        """带熔断加温重试的高层推理封装"""
-        for i in range(4):
-            res = self._decode(full_embd, prefix_text, rollback_num, is_last_chunk, temperature, streaming=streaming)
-            if not res.is_aborted:
-                break
-            temperature += 0.3
+        """带熔断加温重试的高层推理封装（重试回退到重复之前续写，不重新预填充）"""
+        res = self._decode(full_embd, prefix_text, rollback_num, is_last_chunk, temperature,
+                           streaming=streaming, prefix_tokens=prefix_tokens, max_tries=4, on_partial=on_partial)
+        if res.is_aborted:
             res.text += "====解码有误，强制熔断===="
-            print(f"\n\n[!] 触发重试 (Temp -> {temperature:.1f})\n")
         return res 
 
+    def _decode_batch(
+        self,
+        items: List[tuple],
+        temperature: float = 0.4,
+        rollback_num: int = 5,
+        max_tries: int = 4,
+        admit: Optional[Callable[[bool], Optional[tuple]]] = None,
+        on_done: Optional[Callable[[int, DecodeResult], None]] = None,
+        on_partial: Optional[Callable[[int, int, str], None]] = None,
+    ) -> List[DecodeResult]:
+        """
+        多序列连续批处理（服务端逐段识别用，每段等同一次末段模式的 _safe_decode）
+
+        items 为各段的 (full_embd, prefix_tokens)。每段预填充进一个空闲序列（前缀 KV 复制自序列 0，见 _prefill_seq），
+        之后每一步把所有活跃序列的下一个 Token 合成一个 Batch 一次前向；序列各自结束并释放 KV，
+        空出的序列接纳 items 中尚未开始的或 admit(wait) 返回的新片段（追加到 items 之后，None 表示暂无）。
+        admit 只交出已编码好的片段，不在此做编码；没有活跃序列时 wait 为 True，可阻塞等待编码完成。
+        熔断回退与 _decode 相同，只影响该序列。第 i 段结束时调用 on_done(i, result)，
+        on_partial(i, text_base, text) 推送其稳定文本的增量。
+        """
+        ctx = self.ctx
+        items = list(items)
+        n_seq = max(self.config.batch_size, 1)
+        results = []
+        active = {}             # seq_id -> _Sequence
+        free = list(range(1, n_seq + 1))
+        stop_tokens = (self.model.eos_token, self.ID_IM_END)
+
+        def fill():
+            # 空闲序列接纳下一段
+            while free:
+                if len(results) == len(items):
+                    item = admit(not active) if admit else None
+                    if item is None:
+                        return
+                    items.append(item)
+                results.append(DecodeResult())
+                start(free.pop(0), len(results) - 1)
+
+        def start(seq_id: int, i: int):
+            full_embd, prefix_tokens = items[i]
+            res = results[i]
+            t = time.time()
+            res.n_prefill = self._prefill_seq(full_embd, prefix_tokens, seq_id)
+            res.t_prefill = time.time() - t
+            sink = (lambda text_base, text: on_partial(i, text_base, text)) if on_partial else None
+            seq = _Sequence(i, full_embd, prefix_tokens, _StableText(self.model, rollback_num, False, sink), res,
+                            temperature, int(np.random.randint(0, 2**31 - 1)))
+            seq.sampler = llama.LlamaSampler(temperature=temperature, seed=seq.seed)
+            active[seq_id] = seq
+            seq.token, seq.pos, seq.t_start = seq.sampler.sample(ctx, -1), full_embd.shape[0], time.time()
+
+        def rollback(seq_id: int, n_keep: int):
+            # 回退到循环开始之前，加温后继续
+            seq = active[seq_id]
+            seq.temperature += 0.3
+            seq.result.n_retries += 1
+            print(f"\n\n[!] 触发重试 (Temp -> {seq.temperature:.1f})，回退 {len(seq.generated) - n_keep} 个 Token\n")
+            seq.generated = seq.generated[:n_keep]
+            seq.out = seq.out.replay(seq.generated)
+            seq.sampler, sampler = None, seq.sampler
+            sampler.free()
+            seq.sampler = llama.LlamaSampler(temperature=seq.temperature, seed=seq.seed)
+            self._resume_seq(seq_id, seq)
+
+        def finish(seq_id: int):
+            seq = active.pop(seq_id)
+            seq.sampler.free()
+            res = seq.result
+            if not res.is_aborted:
+                seq.out.flush()
+            res.text, res.stable_tokens = seq.out.text, seq.out.tokens
+            res.t_generate = time.time() - seq.t_start
+            if res.is_aborted:
+                res.text += "====解码有误，强制熔断===="
+            ctx.remove_sequence(seq_id)
+            free.append(seq_id)
+            if on_done:
+                on_done(seq.index, res)
+
+        for seq_id in free:
+            ctx.remove_sequence(seq_id)
+        try:
+            while True:
+                fill()
+                if not active:
+                    break
+                # 提交各序列的待定 Token：结束的序列退出，熔断的回退重试，其余的合成一个 Batch
+                rows = []
+                for seq_id in list(active):
+                    seq = active[seq_id]
+                    if seq.token in stop_tokens or len(seq.generated) >= 512:
+                        finish(seq_id)
+                        continue
+                    seq.generated.append(seq.token)
+                    seq.out.push(seq.token)
+                    n_keep = _repeat_start(seq.out.tokens, seq.generated)
+                    if n_keep < 0:
+                        rows.append(seq_id)
+                        continue
+                    if seq.result.n_retries + 1 >= max_tries:
+                        seq.result.is_aborted = True
+                        finish(seq_id)
+                        continue
+                    rollback(seq_id, n_keep)
+                    if seq.replay:
+                        # 最后一个保留的 Token 已提交过，只需重新前向补算其 KV 与 Logits
+                        seq.replay = False
+                        rows.append(seq_id)
+                if not rows:
+                    continue
+                batch = self._get_step_batch(n_seq).set_tokens(
+                    [active[s].token for s in rows], [active[s].pos for s in rows], rows)
+                if ctx.decode(batch) != 0:
+                    raise RuntimeError("Decode failed")
+                for j, seq_id in enumerate(rows):
+                    seq = active[seq_id]
+                    seq.pos += 1
+                    seq.token = seq.sampler.sample(ctx, j)
+                    seq.result.n_generate += 1
+        finally:
+            # 出错时释放仍在解码的序列的采样器
+            for seq in active.values():
+                if seq.sampler is not None:
+                    seq.sampler.free()
+        return results
+
+    def _resume_seq(self, seq_id: int, seq: '_Sequence'):
+        """
+        多序列解码的熔断回退：与 _resume 相同，只作用于序列 seq_id
+
+        有保留 Token 时只截断到最后一个保留位置，由下一步把该 Token 与其他序列一起重新前向
+        """
+        n, kept = seq.full_embd.shape[0], seq.generated
+        if self.ctx.truncate_kv_cache(n + len(kept) - 1, seq_id):
+            if kept:
+                seq.token, seq.pos, seq.replay = kept[-1], n + len(kept) - 1, True
+                return
+            self._prefill(seq.full_embd[n - 1:], n - 1, seq_id)
+        else:
+            self._prefill_seq(seq.full_embd, seq.prefix_tokens, seq_id)
+            if kept and self.ctx.decode(llama.LlamaBatch(len(kept), 0, 1).set_tokens(kept, n, seq_id)) != 0:
+                raise RuntimeError("Decode failed")
+        seq.token, seq.pos = seq.sampler.sample(self.ctx, -1), n + len(kept)
+
+    def _get_step_batch(self, n_tokens: int):
+        """多序列逐步解码用的 Token Batch，复用同一块内存"""
+        if self._step_batch is None or self._step_batch.n_tokens_max < n_tokens:
+            self._step_batch = llama.LlamaBatch(n_tokens, 0, 1)
+        return self._step_batch
+
     def _print_stats(self, stats: dict, audio_duration: float, t_total: float):
         """打印转录过程的性能统计指标"""
         rtf = t_total / audio_duration if audio_duration > 0 else 0
@@ -249,7 +569,13 @@ class QwenASREngine:
         temperature: float = 0.4,
         rollback_num: int = 5
     ) -> TranscribeResult:
-        """运行完整转录流水线 (三级流水线：i+1 预取, i 识别, i-1 对齐)"""
+        """
+        运行完整转录流水线 (三级流水线：i+1.. 预取编码, i 识别, i-1.. 对齐)
+
+        ONNX Encoder 与 Aligner 各在一个辅助线程中执行（onnxruntime / llama.cpp 调用期间释放 GIL），
+        与主线程的 LLM 解码重叠。编码最多提前 pipeline_depth 片，待对齐任务最多积压 pipeline_depth 片，
+        结果按片段序号重组；pipeline_depth=0 时退化为顺序执行。
+        """
         # 语言归一化与校验
         if language:
             language = normalize_language_name(language)
@@ -260,6 +586,7 @@ class QwenASREngine:
         total_len = len(audio)
         num_chunks = int(np.ceil(total_len / samples_per_chunk))
         total_duration = total_len / sr
+        depth = max(self.config.pipeline_depth, 0)
         
         # 记忆管理 (预定义所有分片的物理边界)
         all_segments: List[ASRS_Segment] = [
@@ -271,7 +598,6 @@ class QwenASREngine:
         ]
         asr_memory = deque(maxlen=memory_chunks) # 存储 (embd, text)
         total_full_text = ""
-        all_aligned_items: List[ForcedAlignItem] = []
         
         # 统计指标
         stats = {
@@ -281,51 +607,68 @@ class QwenASREngine:
         }
         t_main_start = time.time()
 
-        # --- 顺序同步处理循环 ---
-        for i in range(num_chunks):
-            # 1. 编码第 i 片段
+        def encode(i):
             s, e = i * samples_per_chunk, min((i + 1) * samples_per_chunk, total_len)
             chunk_data = audio[s:e]
             if len(chunk_data) < samples_per_chunk: 
                 chunk_data = np.pad(chunk_data, (0, samples_per_chunk - len(chunk_data)))
-            
-            audio_feature, enc_time = self.encoder.encode(chunk_data)
-            stats["encode_time"] += enc_time
-            was_last = (i == num_chunks - 1)
-
-            # 2. 识别第 i 片段文字
-            prefix_text = "".join([m[1] for m in asr_memory])
-            combined_audio = np.concatenate([m[0] for m in asr_memory] + [audio_feature], axis=0)
-            full_embd = self._build_prompt_embd(combined_audio, prefix_text, context, language)
-            
-            # 带熔断加温重试的解码调用
-            res = self._safe_decode(full_embd, prefix_text, rollback_num, was_last, temperature)
+            return self.encoder.encode(chunk_data)
 
-            # 更新记忆与统计
-            all_segments[i].text = res.text
-            asr_memory.append((audio_feature, res.text))
-            
-            total_full_text += res.text
-            stats["prefill_tokens"] += res.n_prefill; stats["prefill_time"] += res.t_prefill
-            stats["decode_tokens"] += res.n_generate; stats["decode_time"] += res.t_generate
-
-            # 3. 对齐第 i 片段 (同步)
-            if self.aligner and res.text.strip():
-                t_align_start = time.time()
-                # 计算偏移（同步版本逻辑简化：直接使用片起点，不考虑前片动态边界）
-                offset_sec = all_segments[i].audio_start
-                s_smpl, e_smpl = int(offset_sec * sr), int(all_segments[i].audio_end * sr)
-                audio_slice = audio[s_smpl:e_smpl]
+        def align(seg: ASRS_Segment):
+            # 偏移直接使用片起点，不考虑前片动态边界
+            t_align_start = time.time()
+            audio_slice = audio[int(seg.audio_start * sr):int(seg.audio_end * sr)]
+            align_res = self.aligner.align(audio_slice, seg.text, language=language, offset_sec=float(seg.audio_start))
+            seg.items = align_res.items
+            return time.time() - t_align_start
+
+        enc_pool = ThreadPoolExecutor(1, thread_name_prefix='QwenEncode')
+        align_pool = ThreadPoolExecutor(1, thread_name_prefix='QwenAlign') if self.aligner else None
+        enc_futures = deque()           # 按片段顺序排列的编码任务
+        align_futures = deque()         # 按片段顺序排列的对齐任务
+        try:
+            for i in range(num_chunks):
+                # 1. 提交第 i..i+depth 片段的编码，取回第 i 片段的特征
+                while len(enc_futures) <= depth and i + len(enc_futures) < num_chunks:
+                    enc_futures.append(enc_pool.submit(encode, i + len(enc_futures)))
+                audio_feature, enc_time = enc_futures.popleft().result()
+                stats["encode_time"] += enc_time
+                was_last = (i == num_chunks - 1)
+
+                # 2. 识别第 i 片段文字（与后续片段的编码、前序片段的对齐并行）
+                prefix_text = "".join([m[1] for m in asr_memory])
+                combined_audio = np.concatenate([m[0] for m in asr_memory] + [audio_feature], axis=0)
+                full_embd = self._build_prompt_embd(combined_audio, prefix_text, context, language)
                 
-                align_res = self.aligner.align(
-                    audio_slice, 
-                    res.text, 
-                    language=language, 
-                    offset_sec=float(offset_sec)
-                )
-                all_segments[i].items = align_res.items
-                all_aligned_items.extend(align_res.items)
-                stats["align_time"] += (time.time() - t_align_start)
+                # 带熔断加温重试的解码调用
+                res = self._safe_decode(full_embd, prefix_text, rollback_num, was_last, temperature,
+                                        prefix_tokens=self._prompt_prefix(context))
+
+                # 更新记忆与统计
+                all_segments[i].text = res.text
+                asr_memory.append((audio_feature, res.text))
+                
+                total_full_text += res.text
+                stats["prefill_tokens"] += res.n_prefill; stats["prefill_time"] += res.t_prefill
+                stats["decode_tokens"] += res.n_generate; stats["decode_time"] += res.t_generate
+
+                # 3. 提交第 i 片段的对齐，积压超过 depth 时等待最早的一片
+                if align_pool and res.text.strip():
+                    align_futures.append(align_pool.submit(align, all_segments[i]))
+                    while len(align_futures) > depth:
+                        stats["align_time"] += align_futures.popleft().result()
+
+            while align_futures:
+                stats["align_time"] += align_futures.popleft().result()
+        finally:
+            enc_pool.shutdown(wait=True, cancel_futures=True)
+            if align_pool:
+                align_pool.shutdown(wait=True, cancel_futures=True)
+
+        # 按片段顺序重组对齐结果
+        all_aligned_items: List[ForcedAlignItem] = [
+            item for seg in all_segments if seg.items for item in seg.items
+        ]
 
         # 4. 结果整理
         all_aligned_items.sort(key=lambda x: x.start_time)
@@ -167,6 +167,18 @@ class QwenAudioEncoder:
         except:
             self.input_dtype = np.float32
 
+        # 前端 batch 维为动态轴时，多个 100 帧块合成一次推理 (DML 保持 Batch=1)
+        try:
+            fe_batch = self.sess_fe.get_inputs()[0].shape[0]
+            self.fe_batchable = not isinstance(fe_batch, int) and not self.active_dml
+        except:
+            self.fe_batchable = False
+        self.fe_max_batch = 32          # 单次前端推理的最大块数，限制峰值内存
+
+        # 后端 Mask 优先使用可广播的 (B, 1, 1, T)，模型不接受时退回 (B, 1, T, T)
+        self._compact_mask = True
+        self._mask_cache = {}
+
         # 预热处理
         if self.dml_pad_to > 0 and self.active_dml:
             if self.verbose: print(f"--- [Encoder] 正在预热 (固定形状: {self.dml_pad_to}s)... ---")
@@ -180,30 +192,29 @@ class QwenAudioEncoder:
         if self.verbose: print("--- [Encoder] 预热完成 ---")
 
     def _run_frontend(self, mel: np.ndarray) -> np.ndarray:
-        """前端推理流水线：Pad -> Chunk Loop -> Concat -> Slice"""
+        """前端推理流水线：Pad -> 分块（沿 batch 维堆叠，合批推理）-> Concat -> Slice"""
         T = mel.shape[1]
+        chunk_size = 100
         
         # 1. 必须 Pad 到 100 的倍数
-        pad_len = (100 - (T % 100)) % 100
+        pad_len = (chunk_size - (T % chunk_size)) % chunk_size
         if pad_len > 0:
             mel = np.pad(mel, ((0,0), (0, pad_len)), mode='constant')
         
-        # 增加 batch 维 -> (1, 128, T_padded)
-        mel_input = mel[np.newaxis, ...]
+        # (128, N*100) -> (N, 128, 100)，每块为一条 batch
+        num_chunks = mel.shape[1] // chunk_size
+        chunks = np.ascontiguousarray(mel.reshape(mel.shape[0], num_chunks, chunk_size).transpose(1, 0, 2))
         
-        num_chunks = mel_input.shape[2] // 100
-        fe_outputs = []
-        chunk_size = 100
-        
-        # 2. 循环推理 (Atomic Inference)
-        for i in range(num_chunks):
-            start = i * chunk_size
-            chunk = mel_input[:, :, start : start + chunk_size]
-            out = self.sess_fe.run(None, {"chunk_mel": chunk})[0] # (1, 13, 896/1024)
-            fe_outputs.append(out)
+        # 2. 推理：可合批时每次最多 fe_max_batch 块，否则逐块
+        step = self.fe_max_batch if self.fe_batchable else 1
+        fe_outputs = [
+            self.sess_fe.run(None, {"chunk_mel": chunks[i : i + step]})[0]      # (n, 13, 896/1024)
+            for i in range(0, num_chunks, step)
+        ]
             
-        # 3. 拼接结果 -> (1, N_frames, D)
-        hidden_states = np.concatenate(fe_outputs, axis=1)
+        # 3. 拼接结果 -> (1, N*13, D)
+        out = fe_outputs[0] if len(fe_outputs) == 1 else np.concatenate(fe_outputs, axis=0)
+        hidden_states = out.reshape(1, -1, out.shape[-1])
         
         # 4. 有效长度切片 (关键: 去除 Padding 带来的尾部垃圾帧)
         t_out = get_feat_extract_output_lengths(T)
@@ -211,29 +222,47 @@ class QwenAudioEncoder:
         
         return hidden_states
 
+    def _attention_mask(self, batch: int, total_len: int, seq_len: int, compact: bool) -> np.ndarray:
+        """加性 Mask：前 seq_len 为 0 (关注)，之后为 -10000.0 (屏蔽)，按形状缓存"""
+        key = (batch, total_len, seq_len, compact)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            if len(self._mask_cache) >= 16: self._mask_cache.clear()
+            q_len = 1 if compact else total_len
+            mask = np.zeros((batch, 1, q_len, total_len), dtype=self.input_dtype)
+            mask[:, :, :, seq_len:] = -10000.0
+            self._mask_cache[key] = mask
+        return mask
+
     def _run_backend(self, hidden_states: np.ndarray) -> np.ndarray:
         """后端推理流水线：Mask -> Transformer (支持固定形状 Padding)"""
         batch, seq_len, dim = hidden_states.shape
         
         # 1. 形状检查与 Padding (仅在 DML 开启时执行)
         if self.active_dml and seq_len < self.h_target_len:
-            pad_width = self.h_target_len - seq_len
             # 对 hidden_states 进行零填充 -> (Batch, T_fixed, D)
-            hidden_input = np.pad(hidden_states, ((0,0), (0, pad_width), (0,0)), mode='constant')
-            
-            # 构造 Mask：前 seq_len 为 0 (关注)，后 pad_width 为 -10000.0 (屏蔽)
-            # 维度需要广播到 (Batch, 1, T_fixed, T_fixed)
-            mask = np.zeros((batch, 1, self.h_target_len, self.h_target_len), dtype=self.input_dtype)
-            mask[:, :, :, seq_len:] = -10000.0
+            hidden_input = np.pad(hidden_states, ((0,0), (0, self.h_target_len - seq_len), (0,0)), mode='constant')
         else:
             hidden_input = hidden_states
-            mask = np.zeros((batch, 1, seq_len, seq_len), dtype=self.input_dtype)
+        total_len = hidden_input.shape[1]
         
         # 2. 执行推理
-        audio_embd = self.sess_be.run(None, {
-            "hidden_states": hidden_input,
-            "attention_mask": mask
-        })[0]
+        # Mask 只作用于 Key 维，以 (B, 1, 1, T) 在注意力分数上广播，无需构造 (B, 1, T, T)
+        audio_embd = None
+        if self._compact_mask:
+            try:
+                audio_embd = self.sess_be.run(None, {
+                    "hidden_states": hidden_input,
+                    "attention_mask": self._attention_mask(batch, total_len, seq_len, True)
+                })[0]
+            except Exception as e:
+                if self.verbose: print(f"--- [Encoder] 后端不接受广播 Mask，改用完整 Mask ({e}) ---")
+                self._compact_mask = False
+        if audio_embd is None:
+            audio_embd = self.sess_be.run(None, {
+                "hidden_states": hidden_input,
+                "attention_mask": self._attention_mask(batch, total_len, seq_len, False)
+            })[0]
         
         # 3. 截断输出 -> (Batch, seq_len, D)
         if audio_embd.shape[1] > seq_len:
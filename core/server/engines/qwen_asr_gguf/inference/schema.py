@@ -36,6 +36,7 @@ class DecodeResult:
     n_prefill: int = 0       # 预填充 token 数
     n_generate: int = 0      # 生成 token 数
     is_aborted: bool = False # 是否因重复或其他原因熔断中断
+    n_retries: int = 0       # 熔断后回退重试的次数
 
 @dataclass(frozen=True)
 class ForcedAlignItem:
@@ -87,6 +88,8 @@ class ASREngineConfig:
     n_ctx: int = 2048           # 对于 ASR Decoder，每秒音频+文字，约占 20 个 token
     chunk_size: float = 40.0    # 每个片段 40s，对应 800 个 token
     memory_num: int = 1         # 记忆一个片段，转录一个片段，对应 1600 个 token
+    pipeline_depth: int = 2     # 长音频转录时编码预取 / 对齐积压的片段数，0 表示顺序执行
+    batch_size: int = 1         # 服务端合批解码的最大片段数（LLM 上下文的解码序列数），1 表示不合批
     verbose: bool = True
     enable_aligner: bool = False
     align_config: Optional[AlignerConfig] = None
@@ -53,18 +53,60 @@ class SenseVoiceEngine(BaseASREngine):
         if stream.audio_data is None:
             return
 
-        # 语言映射：统一代码 → SenseVoice lid ('auto', 'zh', 'en', 'ja', 'ko', 'yue')
-        lid = get_language(ENGINE_SENSEVOICE, language) if language else None
         res = self.engine.recognize(
             stream.audio_data,
-            lid=lid or "auto",
+            lid=self._lid(language),
             itn=itn
         )
+        self._apply(stream, res)
+
+        # 各阶段耗时（秒），多片拼接的结果不带耗时统计（total 为 0）
+        if res and res.timings.total:
+            stream.result.performance = {'encode': res.timings.encoder, 'ctc': res.timings.decoder}
+
+    @property
+    def max_batch_size(self) -> int:
+        """模型 batch 维为动态轴时按配置合批，否则逐条推理"""
+        return self.config.batch_size if self.engine.encoder.batchable else 1
 
-        # 更新结果
+    def decode_streams(
+        self,
+        streams: List[SenseVoiceStream],
+        contexts: Optional[List[Optional[str]]] = None,
+        languages: Optional[List[Optional[str]]] = None,
+        itn: bool = True,
+        **kwargs
+    ):
+        """
+        合批解码多个识别流：所有流的切片补齐后一起过 Encoder / CTC，再按流拆分结果
+        """
+        languages = languages or [None] * len(streams)
+        pairs = [(s, lang) for s, lang in zip(streams, languages) if s.audio_data is not None]
+        if not pairs:
+            return
+        streams = [s for s, _ in pairs]
+        results, timings = self.engine.recognize_batch(
+            [s.audio_data for s in streams],
+            lids=[self._lid(lang) for _, lang in pairs],
+            itn=itn,
+            max_batch=self.max_batch_size,
+        )
+        for stream, res in zip(streams, results):
+            self._apply(stream, res)
+            stream.result.performance = {'encode': timings.encoder, 'ctc': timings.decoder}
+
+    @staticmethod
+    def _lid(language: Optional[str]) -> str:
+        """语言映射：统一代码 → SenseVoice lid ('auto', 'zh', 'en', 'ja', 'ko', 'yue')"""
+        lid = get_language(ENGINE_SENSEVOICE, language) if language else None
+        return lid or "auto"
+
+    @staticmethod
+    def _apply(stream: SenseVoiceStream, res):
+        """更新结果：将内部 RecognitionResult 转换为 tokens 和 timestamps 以兼容 server_recognize"""
+        if res is None:
+            return
         stream.result.text = res.text
-        
-        # 将内部 RecognitionResult 转换为 tokens 和 timestamps 以兼容 server_recognize
         stream.result.tokens = [r.text for r in res.results]
         stream.result.timestamps = [r.start for r in res.results]
 
@@ -68,14 +68,29 @@ class SenseVoiceDecoder:
         """
         # 1. 唯一的一次推理调用
         topk_log_probs, topk_indices = self.forward(enc_out)
-        
+        return self._parse(topk_log_probs[0], topk_indices[0], sp, prompt_len, T_valid, blank_id)
+
+    def decode_batch(self, enc_out, sp, T_valids, top_k=20, prompt_len=4, blank_id=0):
+        """
+        [合批接口] 对合批 Encoder 输出做一次 CTC Head 推理，按各条有效长度拆分
+        返回: 每条一个 (greedy_results, radar_indices, radar_probs, top1_indices)
+        """
+        topk_log_probs, topk_indices = self.forward(enc_out)
+        return [
+            self._parse(topk_log_probs[b], topk_indices[b], sp, prompt_len, T_valid, blank_id)
+            for b, T_valid in enumerate(T_valids)
+        ]
+
+    @staticmethod
+    def _parse(topk_log_probs, topk_indices, sp, prompt_len=4, T_valid=None, blank_id=0):
+        """解析单条 (T_plus_4, K) 的 Top-K 输出"""
         # 确定有效范围 (跳过 Prompt 区域)
         start = prompt_len
-        end = (T_valid + prompt_len) if T_valid is not None else topk_indices.shape[1]
+        end = (T_valid + prompt_len) if T_valid is not None else topk_indices.shape[0]
         
         # --- A. 提取雷达所需 Top-K 空间 ---
-        radar_indices = topk_indices[0, start:end, :].astype(np.int32)
-        radar_probs = np.exp(topk_log_probs[0, start:end, :].astype(np.float32))
+        radar_indices = topk_indices[start:end, :].astype(np.int32)
+        radar_probs = np.exp(topk_log_probs[start:end, :].astype(np.float32))
         top1_indices = radar_indices[:, 0]
         
         # --- B. 构造 Greedy 结果 (基于 Top-1) ---
@@ -53,7 +53,11 @@ class SenseVoiceEncoder:
         in_type = self.session.get_inputs()[0].type
         self.input_dtype = np.float16 if 'float16' in in_type else np.float32
 
-        # 5. DML 策略设置 (仅在 DML 模式下生效)
+        # 5. 合批能力：导出时 batch 维为动态轴才能合批（固定为 1 的旧模型只能逐条推理）
+        batch_dim = self.session.get_inputs()[0].shape[0]
+        self.batchable = not (isinstance(batch_dim, int) and batch_dim == 1)
+
+        # 6. DML 策略设置 (仅在 DML 模式下生效)
         self.use_dml = (self.onnx_provider.lower() == "dml")
         self.fixed_len = int(dml_pad_to * 17) # 1s ≈ 17帧 LFR
         if self.use_dml and isinstance(dml_pad_to, int) and dml_pad_to > 0:
@@ -128,3 +132,28 @@ class SenseVoiceEncoder:
                 "prompt_ids": prompt_ids
             })[0]
             return enc_out
+
+    def forward_batch(self, lfr_feats, lids, itn=True):
+        """
+        合批执行 Encoder 推理：各条特征补齐到同一长度（复读末帧），mask 标记有效帧
+        返回: enc_out (B, T_max+4, 512)，第 b 条的有效输出为 [:, :4 + T_b]
+        """
+        lengths = [f.shape[0] for f in lfr_feats]
+        T_target = max(lengths)
+        if self.use_dml:
+            T_target = max(T_target, self.fixed_len)
+
+        B = len(lfr_feats)
+        feat = np.empty((B, T_target, lfr_feats[0].shape[1]), dtype=self.input_dtype)
+        mask = np.zeros((B, T_target), dtype=self.input_dtype)
+        for b, (f, n) in enumerate(zip(lfr_feats, lengths)):
+            feat[b, :n] = f
+            feat[b, n:] = f[-1]
+            mask[b, :n] = 1.0
+
+        prompt_ids = np.concatenate([self.construct_prompt(lid=lid, itn=itn) for lid in lids], axis=0)
+        return self.session.run(None, {
+            "speech_feat": feat,
+            "mask": mask,
+            "prompt_ids": prompt_ids
+        })[0]
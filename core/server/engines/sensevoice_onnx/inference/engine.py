@@ -74,35 +74,75 @@ class SenseVoiceInference:
         # 1. 提取全量特征
         lfr_feat = self.frontend.extract(audio_data)
         
-        # 2. 计算分段 (按 LFR 帧切分)
-        # 1s ≈ 16.6 帧, 这里使用更精确的 1s = 100/6 帧
-        chunk_frames = int(chunk_size * 100 / 6)
-        overlap_frames = int(overlap * 100 / 6)
-        stride = max(1, chunk_frames - overlap_frames)
-        
+        # 2. 按 LFR 帧切分并逐片识别
         all_results = []
-        for start in range(0, len(lfr_feat), stride):
-            end = min(start + chunk_frames, len(lfr_feat))
+        for start, end in self._chunk_spans(len(lfr_feat), chunk_size, overlap):
             chunk_lfr = lfr_feat[start:end]
             
             # 执行单段识别 (从 config 同步 Top-K)
             offset_sec = (start * 6 * 0.01) # 1帧 = 0.06s
             res = self._recognize_lfr(chunk_lfr, lid=lid, itn=itn, offset_sec=offset_sec, top_k=self.config.top_k)
             all_results.append(res)
-            
-            # 如果已经到达末尾，跳出
-            if end == len(lfr_feat):
-                break
                 
         # 3. 结果流式拼接 (基于 SequenceMatcher)
         # 如果只有一片结果，_merge_results 会直接返回原对象，保留完整耗时统计。
         return self._merge_results(all_results, overlap)
 
+    def recognize_batch(self, audios: List[np.ndarray], lids: List[str], itn=True, chunk_size=40, overlap=5, max_batch=8):
+        """
+        合批识别多段音频。
+        - 各段按 recognize 的规则切片，所有切片按长度排序后每 max_batch 片合成一次 Encoder / CTC 推理，
+          再按段拼接，结果与逐段 recognize 一致。
+        返回: (各段 TranscriptionResult（空音频为 None）, 整批 Timings)
+        """
+        timings = Timings()
+        t_start = time.perf_counter()
+
+        # 1. 提取特征并切片：(段序号, 片序号, 特征, 时间偏移, 语言)
+        t0 = time.perf_counter()
+        feats = [self.frontend.extract(audio) for audio in audios]
+        timings.frontend = time.perf_counter() - t0
+        chunks = []
+        for i, (lfr_feat, lid) in enumerate(zip(feats, lids)):
+            for j, (start, end) in enumerate(self._chunk_spans(len(lfr_feat), chunk_size, overlap)):
+                chunks.append((i, j, lfr_feat[start:end], start * 6 * 0.01, lid))
+
+        # 2. 长度相近的切片同批，减少补齐
+        chunks.sort(key=lambda c: len(c[2]))
+        parts = [{} for _ in audios]
+        for k in range(0, len(chunks), max_batch):
+            group = chunks[k:k + max_batch]
+            results = self._recognize_lfr_batch(
+                [c[2] for c in group], [c[4] for c in group], itn, [c[3] for c in group], self.config.top_k, timings
+            )
+            for (i, j, *_), res in zip(group, results):
+                parts[i][j] = res
+
+        # 3. 按段拼接
+        merged = [self._merge_results([p[j] for j in sorted(p)], overlap) for p in parts]
+        timings.total = time.perf_counter() - t_start
+        return merged, timings
+
     def transcribe(self, audio_file: str, lid="auto", itn=True, chunk_size=40, overlap=5, start_second=None, duration=None):
         """运行完整转录流水线 (从文件加载音频)"""
         audio = load_audio(audio_file, start_second=start_second, duration=duration)
         return self.recognize(audio, lid=lid, itn=itn, chunk_size=chunk_size, overlap=overlap)
 
+    @staticmethod
+    def _chunk_spans(n_frames: int, chunk_size=40, overlap=5):
+        """按 LFR 帧切分，返回 [(start, end), ...]。1s ≈ 16.6 帧, 这里使用更精确的 1s = 100/6 帧"""
+        chunk_frames = int(chunk_size * 100 / 6)
+        overlap_frames = int(overlap * 100 / 6)
+        stride = max(1, chunk_frames - overlap_frames)
+        
+        spans = []
+        for start in range(0, n_frames, stride):
+            end = min(start + chunk_frames, n_frames)
+            spans.append((start, end))
+            # 如果已经到达末尾，跳出
+            if end == n_frames:
+                break
+        return spans
 
     def _recognize_lfr(self, lfr_feat: np.ndarray, lid="auto", itn=True, offset_sec=0.0, top_k=10):
         """
@@ -124,12 +164,44 @@ class SenseVoiceInference:
         )
         t_decoder = time.perf_counter() - t0
         
-        # 3. 热词扫描 (即便热词为空，扫描方法内部也会极速跳过)
+        # 3. 热词扫描与结果整合
+        res = self._integrate(greedy_results, topk_indices, topk_probs, offset_sec, top_k)
+        t_total = time.perf_counter() - t_start
+        res.timings.encoder, res.timings.decoder, res.timings.total = t_encoder, t_decoder, t_total
+        return res
+
+    def _recognize_lfr_batch(self, lfr_feats: List[np.ndarray], lids: List[str], itn, offsets: List[float], top_k, timings: Timings):
+        """
+        [合批的底层识别逻辑]
+        一次 Encoder / CTC 推理处理多片 LFR 特征，阶段耗时累加到 timings。
+        """
+        # 1. 编码器推理
+        t0 = time.perf_counter()
+        enc_out = self.encoder.forward_batch(lfr_feats, lids, itn=itn)
+        timings.encoder += time.perf_counter() - t0
+
+        # 2. 解码器推理
+        t0 = time.perf_counter()
+        decoded = self.decoder.decode_batch(enc_out, self.sp, [f.shape[0] for f in lfr_feats], top_k=top_k)
+        timings.decoder += time.perf_counter() - t0
+
+        # 3. 逐片热词扫描与结果整合
+        results = []
+        for (greedy_results, topk_indices, topk_probs, _), offset_sec in zip(decoded, offsets):
+            res = self._integrate(greedy_results, topk_indices, topk_probs, offset_sec, top_k)
+            timings.radar += res.timings.radar
+            timings.integrate += res.timings.integrate
+            results.append(res)
+        return results
+
+    def _integrate(self, greedy_results, topk_indices, topk_probs, offset_sec, top_k) -> TranscriptionResult:
+        """热词扫描 + 结果整合，输出带有全局时间偏移的结果"""
+        # 1. 热词扫描 (即便热词为空，扫描方法内部也会极速跳过)
         t0 = time.perf_counter()
         detected_hotwords = self.radar.scan(topk_indices, topk_probs, top_k=top_k)
         t_radar = time.perf_counter() - t0
         
-        # 4. 整合结果
+        # 2. 整合结果
         t0 = time.perf_counter()
         integrated_list = ResultIntegrator.integrate(greedy_results, detected_hotwords)
         t_integrate = time.perf_counter() - t0
@@ -141,14 +213,12 @@ class SenseVoiceInference:
                 start=round(item["start"] + offset_sec, 3), 
                 is_hotword=item.get("is_hotword", False)
             ))
-            
-        t_total = time.perf_counter() - t_start
         
         return TranscriptionResult(
             text="".join([r.text for r in recognition_results]),
             results=recognition_results,
             hotwords=[h["text"] for h in detected_hotwords],
-            timings=Timings(frontend=0, encoder=t_encoder, decoder=t_decoder, radar=t_radar, integrate=t_integrate, total=t_total)
+            timings=Timings(frontend=0, radar=t_radar, integrate=t_integrate)
         )
 
     def _merge_results(self, results_list: List[TranscriptionResult], overlap_sec: float):
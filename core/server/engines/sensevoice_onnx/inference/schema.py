@@ -114,6 +114,7 @@ class ASREngineConfig:
         top_k: 热词搜索 Top-K 深度
         itn: 是否启用反向文本规范化
         dml_pad_to: DML 填充时长 (秒)
+        batch_size: 合批推理时单次 Encoder 调用的最大切片数 (1 表示不合批)
     """
     encoder_path: str
     decoder_path: str
@@ -123,6 +124,7 @@ class ASREngineConfig:
     top_k: int = 10
     itn: bool = True
     dml_pad_to: int = 30
+    batch_size: int = 1
 
 
 # ==================== 导出列表 ====================
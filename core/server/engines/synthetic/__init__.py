@@ -0,0 +1,9 @@
+# coding: utf-8
+"""
+synthetic: 不依赖模型文件的合成识别引擎。
+
+按可配置的 token 速率与耗时曲线，从音频内容确定性地生成 token 与时间戳，
+用于在没有模型的机器上测量模型之外的开销（分段、IPC、拼接、格式化、发送），
+见 scripts/_bench_pipeline.py。
+"""
+from .. import logger  # noqa: F401
@@ -0,0 +1,178 @@
+# coding: utf-8
+"""
+合成识别引擎
+
+不加载任何模型：每秒音频按 tokens_per_second 在固定网格上产出 token，
+token 由网格点处的采样值决定（同一段音频无论落在哪个分片里都得到相同 token，
+因此重叠去重与拼接的行为和真实引擎一致），耗时按「固定 + 每秒音频」曲线 sleep 模拟；
+合批解码时整批只计一次固定耗时。
+单段解码传入 on_partial 时模拟逐 Token 生成：固定耗时之后，其余耗时均摊到各 token 上逐个推送。
+continuous 模式模拟 LLM 连续批处理：每步为所有活跃的流各产出一个 token，流完成即交付，空位接纳新的流。
+"""
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from ..base import BaseASREngine, RecognitionStream, EngineCapabilities
+
+
+@dataclass
+class SyntheticConfig:
+    """合成引擎配置。字段名须与 config_server.SyntheticArgs 公开属性一致。"""
+    tokens_per_second: float = 4.0          # 每秒音频产出的 token 数
+    vocabulary: str = '甲乙丙丁戊己庚辛壬癸子丑寅卯辰巳午未申酉戌亥'  # token 字表
+    silence_threshold: float = 0.0          # 网格点采样绝对值不超过此值时视为静音，不产出 token
+    latency_base: float = 0.02              # 每次解码的固定耗时（秒）
+    latency_per_second: float = 0.005       # 每秒音频的额外耗时（秒）
+    latency_jitter: float = 0.0             # 耗时随机抖动比例，0.1 表示 ±10%
+    timestamps: bool = True                 # 是否声明自带时间戳（否则流水线会挂载对齐器）
+    seed: int = 0                           # 抖动随机种子
+    batch_size: int = 1                     # decode_streams 合批上限，一批只计一次固定耗时
+    continuous: bool = False                # 合批时模拟连续批处理（解码中途接纳新的流）
+
+
+class SyntheticStream(RecognitionStream):
+    """合成识别流：缓存整段音频"""
+    def __init__(self, sample_rate: int = 16000):
+        super().__init__(sample_rate)
+        self.audio_data: Optional[np.ndarray] = None
+
+    def accept_waveform(self, sample_rate: int, audio: np.ndarray):
+        self.sample_rate = sample_rate
+        self.audio_data = np.asarray(audio, dtype=np.float32)
+
+
+class SyntheticEngine(BaseASREngine):
+    """确定性合成识别引擎"""
+
+    def __init__(self, config: SyntheticConfig):
+        super().__init__(config)
+        self._rng = random.Random(config.seed)
+
+    @property
+    def capabilities(self) -> List[EngineCapabilities]:
+        caps = [EngineCapabilities.ASR, EngineCapabilities.PUNC]
+        if self.config.timestamps:
+            caps.append(EngineCapabilities.TIMESTAMPS)
+        return caps
+
+    def create_stream(self, hotwords: Optional[str] = None) -> SyntheticStream:
+        return SyntheticStream()
+
+    def latency(self, duration: float) -> float:
+        """解码一段 duration 秒音频的模拟耗时"""
+        cfg = self.config
+        t = cfg.latency_base + cfg.latency_per_second * duration
+        if cfg.latency_jitter:
+            t *= 1 + self._rng.uniform(-cfg.latency_jitter, cfg.latency_jitter)
+        return max(t, 0.0)
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int = 16000):
+        """按网格从采样值确定性地生成 (tokens, timestamps)"""
+        cfg = self.config
+        n_grid = int(len(audio) / sample_rate * cfg.tokens_per_second)
+        if not n_grid:
+            return [], []
+        times = np.arange(n_grid) / cfg.tokens_per_second
+        points = audio[(times * sample_rate).astype(np.int64)]
+        voiced = np.abs(points) > cfg.silence_threshold
+        codes = points.view(np.uint32) % len(cfg.vocabulary)
+        tokens = [cfg.vocabulary[c] for c in codes[voiced]]
+        return tokens, [round(float(t), 3) for t in times[voiced]]
+
+    @property
+    def max_batch_size(self) -> int:
+        return self.config.batch_size
+
+    @property
+    def continuous_batching(self) -> bool:
+        return self.config.continuous and self.config.batch_size > 1
+
+    def decode_stream(self, stream: SyntheticStream, context: Optional[str] = None,
+                      on_partial: Optional[Callable[[int, str], None]] = None, **kwargs):
+        if on_partial is None or stream.audio_data is None:
+            self.decode_streams([stream])
+            return
+        t0 = time.perf_counter()
+        tokens, timestamps = self.transcribe(stream.audio_data, stream.sample_rate)
+        total = self.latency(len(stream.audio_data) / stream.sample_rate)
+        base = min(self.config.latency_base, total)
+        text = ''
+        for i, token in enumerate(tokens):
+            remain = t0 + base + (total - base) * (i + 1) / len(tokens) - time.perf_counter()
+            if remain > 0:
+                time.sleep(remain)
+            on_partial(len(text), token)
+            text += token
+        stream.result.text = text
+        stream.result.tokens = tokens
+        stream.result.timestamps = timestamps
+        remain = t0 + total - time.perf_counter()
+        if remain > 0:
+            time.sleep(remain)
+
+    def decode_streams(self, streams: List[SyntheticStream], contexts=None, languages=None,
+                       admit=None, on_done=None, on_partial=None, **kwargs):
+        if self.continuous_batching and on_done:
+            self._decode_continuous(list(streams), admit, on_done, on_partial)
+            return
+        streams = [s for s in streams if s.audio_data is not None]
+        if not streams:
+            return
+        t0 = time.perf_counter()
+        for stream in streams:
+            tokens, timestamps = self.transcribe(stream.audio_data, stream.sample_rate)
+            stream.result.text = ''.join(tokens)
+            stream.result.tokens = tokens
+            stream.result.timestamps = timestamps
+
+        duration = sum(len(s.audio_data) / s.sample_rate for s in streams)
+        remain = self.latency(duration) - (time.perf_counter() - t0)
+        if remain > 0:
+            time.sleep(remain)
+
+    def _decode_continuous(self, streams: List[SyntheticStream], admit, on_done, on_partial):
+        """
+        连续批处理模拟：新接纳的流先计一次固定耗时（预填充），之后每步为所有活跃的流各产出一个 token，
+        每步耗时为一个 token 对应的音频耗时，与活跃流数无关
+        """
+        cfg = self.config
+        step = cfg.latency_per_second / cfg.tokens_per_second
+        active = {}             # 流下标 -> (tokens, timestamps)
+        n_started = 0
+        while True:
+            while len(active) < cfg.batch_size:
+                if n_started == len(streams):
+                    item = admit() if admit else None
+                    if item is None:
+                        break
+                    streams.append(item[0])
+                i, n_started = n_started, n_started + 1
+                stream = streams[i]
+                if stream.audio_data is None:
+                    on_done(i)
+                    continue
+                time.sleep(self.latency(0))
+                active[i] = self.transcribe(stream.audio_data, stream.sample_rate)
+            if not active:
+                return
+            time.sleep(step)
+            for i in list(active):
+                tokens, timestamps = active[i]
+                result = streams[i].result
+                n = len(result.tokens)
+                if n < len(tokens):
+                    if on_partial:
+                        on_partial(i, len(result.text), tokens[n])
+                    result.text += tokens[n]
+                    result.tokens.append(tokens[n])
+                    continue
+                result.timestamps = timestamps
+                del active[i]
+                on_done(i)
+
+    def cleanup(self):
+        pass
@@ -14,6 +14,7 @@ from .utils import (
     tokens_to_text,
     remove_trailing_punctuation
 )
+from .delta import common_prefix_len, make_delta, merge_delta
 
 __all__ = [
     'merge_by_text',
@@ -21,4 +22,7 @@ __all__ = [
     'process_tokens_safely',
     'tokens_to_text',
     'remove_trailing_punctuation',
+    'common_prefix_len',
+    'make_delta',
+    'merge_delta',
 ]
@@ -0,0 +1,98 @@
+# coding: utf-8
+"""
+增量结果算法
+
+拼接只改动累积结果的尾部，因此相邻两次结果之间只需传输
+「从第几个 token / 字符起被替换」以及替换后的新尾部。
+"""
+
+from dataclasses import replace
+from typing import Sequence
+
+from core.server.schema import Result
+from .utils import tokens_to_text
+
+
+def common_prefix_len(a: Sequence, b: Sequence) -> int:
+    """
+    求两个序列（list 或 str）的公共前缀长度
+
+    常见情形是 a 整体为 b 的前缀（纯追加），一次切片比较即可命中；
+    否则用切片比较二分定位，比较都在 C 层完成。
+    """
+    n = min(len(a), len(b))
+    if a[:n] == b[:n]:
+        return n
+    lo, hi = 0, n - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def make_delta(result: Result, prev_text: str, prev_tokens: list, prev_timestamps: list,
+               revision: int) -> Result:
+    """
+    以 (prev_text, prev_tokens, prev_timestamps) 为上一修订，生成 result 的增量结果
+
+    Args:
+        result: 当前累积结果（不会被修改）
+        revision: 当前修订号，增量结果基于 revision - 1
+    """
+    token_base = min(common_prefix_len(prev_tokens, result.tokens),
+                     common_prefix_len(prev_timestamps, result.timestamps))
+    text_base = common_prefix_len(prev_text, result.text)
+    return replace(
+        result,
+        text=result.text[text_base:],
+        text_accu='',
+        tokens=result.tokens[token_base:],
+        timestamps=result.timestamps[token_base:],
+        revision=revision,
+        base_revision=revision - 1,
+        token_base=token_base,
+        text_base=text_base,
+    )
+
+
+def merge_delta(older: Result, newer: Result) -> Result:
+    """
+    合并同一任务的两条结果，返回与依次应用二者等价的一条结果
+
+    - newer 为完整结果：直接取 newer
+    - older 为完整结果：把 newer 应用到 older 上，得到完整结果
+    - 二者皆为增量：合并为一条基于 older.base_revision 的增量
+    """
+    if newer.token_base < 0:
+        return newer
+
+    if older.token_base < 0:
+        tokens = older.tokens[:newer.token_base] + newer.tokens
+        return replace(
+            newer,
+            text=older.text[:newer.text_base] + newer.text,
+            text_accu=tokens_to_text(tokens),
+            tokens=tokens,
+            timestamps=older.timestamps[:newer.token_base] + newer.timestamps,
+            base_revision=0,
+            token_base=-1,
+            text_base=-1,
+        )
+
+    # older: S0[:b1] + t1；newer: (S0[:b1] + t1)[:b2] + t2
+    token_base = min(older.token_base, newer.token_base)
+    keep = newer.token_base - token_base
+    text_base = min(older.text_base, newer.text_base)
+    keep_text = newer.text_base - text_base
+    return replace(
+        newer,
+        text=older.text[:keep_text] + newer.text,
+        tokens=older.tokens[:keep] + newer.tokens,
+        timestamps=older.timestamps[:keep] + newer.timestamps,
+        base_revision=older.base_revision,
+        token_base=token_base,
+        text_base=text_base,
+    )
@@ -48,6 +48,9 @@ def merge_tokens_by_sequence_matcher(
         return new_tokens, new_global_timestamps
     if not new_tokens:
         return prev_tokens, prev_timestamps
+    if overlap <= 0:
+        # 无重叠（按停顿切分）：首尾相连即可
+        return prev_tokens + new_tokens, prev_timestamps + new_global_timestamps
 
     # 1. 提取 prev 尾部和 new 头部的文本（基于 overlap 动态确定范围）
     #    重叠区域的字符数估计：overlap 秒 × 约 5 字/秒
@@ -0,0 +1,293 @@
+# coding: utf-8
+"""
+运行指标模块
+
+识别进程侧：WorkerMetrics 记录各阶段耗时直方图、各引擎 RTF、各优先级类别的排队时间、
+对齐器加载/卸载次数，按 ServerConfig.metrics_interval 把累计快照（纯 dict，可跨进程 pickle）发到指标队列。
+
+主进程侧：MetricsExporter 后台收取各识别进程的最新快照，连同路由队列深度、
+连接数等主进程指标，以 Prometheus 文本格式在本机 HTTP 端口 /metrics 上暴露。
+不依赖 prometheus_client。
+"""
+
+import bisect
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from . import logger
+
+# 阶段耗时桶（秒）与 RTF 桶
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RTF_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0)
+
+PREFIX = 'capswriter'
+
+
+class Histogram:
+    """固定桶直方图，counts[i] 为落入第 i 个桶（最后一个为 +Inf）的次数（非累计）"""
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        return {'buckets': self.buckets, 'counts': list(self.counts), 'sum': self.sum, 'count': self.count}
+
+
+def rss_bytes() -> int:
+    """当前进程常驻内存：优先 psutil，其次 Linux /proc，都不可用时返回 0"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class WorkerMetrics:
+    """
+    识别进程内的指标累计器
+
+    由 TaskPipeline、ManagedAlignerProxy 等直接写入（单线程，无需加锁），
+    由 TaskHandler 定期取快照发往主进程。
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Histogram] = {}
+        self.rtf: Dict[str, Histogram] = {}
+        self.queue_wait: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+
+    def observe_stage(self, stage: str, seconds: float):
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = Histogram(STAGE_BUCKETS)
+        hist.observe(seconds)
+
+    def observe_rtf(self, engine: str, rtf: float):
+        hist = self.rtf.get(engine)
+        if hist is None:
+            hist = self.rtf[engine] = Histogram(RTF_BUCKETS)
+        hist.observe(rtf)
+
+    def observe_queue_wait(self, priority_class: str, seconds: float):
+        hist = self.queue_wait.get(priority_class)
+        if hist is None:
+            hist = self.queue_wait[priority_class] = Histogram(STAGE_BUCKETS)
+        hist.observe(seconds)
+
+    def inc(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, stage: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_stage(stage, time.perf_counter() - t)
+
+    def snapshot(self, sessions: int = 0, buffered: Optional[Dict[str, int]] = None) -> dict:
+        """累计快照：进程号、各直方图、计数器，以及调用方提供的会话数与各类别缓冲任务数"""
+        return {
+            'pid': os.getpid(),
+            'stages': {k: h.snapshot() for k, h in self.stages.items()},
+            'rtf': {k: h.snapshot() for k, h in self.rtf.items()},
+            'queue_wait': {k: h.snapshot() for k, h in self.queue_wait.items()},
+            'counters': dict(self.counters),
+            'sessions': sessions,
+            'buffered': dict(buffered or {}),
+            'rss': rss_bytes(),
+        }
+
+
+# 识别进程内的全局实例
+worker_metrics = WorkerMetrics()
+
+
+# ---------------------------------------------------------------------------
+# Prometheus 文本格式
+# ---------------------------------------------------------------------------
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ''
+    body = ','.join(f'{k}="{str(v)}"' for k, v in labels.items())
+    return '{' + body + '}'
+
+
+def _fmt(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    """按指标名聚合输出，保证每个指标的 HELP/TYPE 只出现一次"""
+
+    def __init__(self):
+        self._metrics: Dict[str, tuple] = {}
+
+    def add(self, name: str, kind: str, help_text: str, labels: dict, value):
+        entry = self._metrics.setdefault(name, (kind, help_text, []))
+        entry[2].append((labels, value))
+
+    def render(self) -> str:
+        lines = []
+        for name, (kind, help_text, samples) in self._metrics.items():
+            full = f'{PREFIX}_{name}'
+            lines.append(f'# HELP {full} {help_text}')
+            lines.append(f'# TYPE {full} {kind}')
+            for labels, value in samples:
+                if kind == 'histogram':
+                    lines.extend(_histogram_lines(full, labels, value))
+                else:
+                    lines.append(f'{full}{_labels(**labels)} {_fmt(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _histogram_lines(name: str, labels: dict, hist: dict) -> List[str]:
+    lines, cumulative = [], 0
+    for bound, n in zip(list(hist['buckets']) + [float('inf')], hist['counts']):
+        cumulative += n
+        lines.append(f'{name}_bucket{_labels(**labels, le=_fmt(float(bound)))} {cumulative}')
+    lines.append(f'{name}_sum{_labels(**labels)} {_fmt(float(hist["sum"]))}')
+    lines.append(f'{name}_count{_labels(**labels)} {hist["count"]}')
+    return lines
+
+
+def render_metrics(workers: Dict[int, dict], queue_in: List[int], queue_out: int, sockets: int) -> str:
+    """
+    生成 Prometheus 文本
+
+    Args:
+        workers: 识别进程序号 -> 最新快照（WorkerMetrics.snapshot）
+        queue_in: 各识别进程任务队列深度
+        queue_out: 结果队列深度
+        sockets: 当前 WebSocket 连接数
+    """
+    w = _Writer()
+    for i, depth in enumerate(queue_in):
+        w.add('queue_in_depth', 'gauge', '识别进程任务队列积压', {'worker': i}, depth)
+    w.add('queue_out_depth', 'gauge', '结果队列积压', {}, queue_out)
+    w.add('connected_sockets', 'gauge', 'WebSocket 连接数', {}, sockets)
+
+    for i, snap in sorted(workers.items()):
+        worker = {'worker': i}
+        w.add('active_sessions', 'gauge', '识别进程内的活跃会话数', worker, snap['sessions'])
+        for cls, n in sorted(snap['buffered'].items()):
+            w.add('buffered_tasks', 'gauge', '识别进程缓冲区中各类别待处理的片段数',
+                  {**worker, 'class': cls}, n)
+        w.add('worker_rss_bytes', 'gauge', '识别进程常驻内存', worker, snap['rss'])
+        for stage, hist in sorted(snap['stages'].items()):
+            w.add('stage_seconds', 'histogram', '识别各阶段耗时（秒）', {**worker, 'stage': stage}, hist)
+        for engine, hist in sorted(snap['rtf'].items()):
+            w.add('rtf', 'histogram', '识别实时率（引擎耗时 / 音频时长）', {**worker, 'engine': engine}, hist)
+        for cls, hist in sorted(snap['queue_wait'].items()):
+            w.add('queue_wait_seconds', 'histogram', '片段从提交到开始识别的排队时间（秒）',
+                  {**worker, 'class': cls}, hist)
+        for name, value in sorted(snap['counters'].items()):
+            w.add(f'{name}_total', 'counter', f'{name} 累计次数', worker, value)
+    return w.render()
+
+
+# ---------------------------------------------------------------------------
+# 主进程：HTTP 导出
+# ---------------------------------------------------------------------------
+
+class MetricsExporter:
+    """
+    主进程指标导出器
+
+    一个后台线程持续收取识别进程快照（只保留每个进程最新一份），
+    一个 ThreadingHTTPServer 线程响应 /metrics 抓取。
+    """
+
+    def __init__(self, state, addr: str = '127.0.0.1', port: int = 0):
+        self.state = state
+        self.addr = addr
+        self.port = port
+        self._latest: Dict[int, dict] = {}       # pid -> 快照
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._collector: Optional[threading.Thread] = None
+
+    def _collect(self):
+        while True:
+            try:
+                snap = self.state.queue_metrics.get(timeout=1)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return
+            if snap is None:
+                return
+            with self._lock:
+                self._latest[snap['pid']] = snap
+
+    def render(self) -> str:
+        state = self.state
+        pids = [p.pid for p in state.recognize_processes]
+        with self._lock:
+            workers = {pids.index(pid): snap for pid, snap in self._latest.items() if pid in pids}
+        router = state.router
+        try:
+            queue_out = state.queue_out.qsize()
+        except NotImplementedError:
+            queue_out = 0
+        return render_metrics(workers, router.depths() if router else [], queue_out, len(state.sockets))
+
+    def start(self):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((self.addr, self.port), Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        threading.Thread(target=self._httpd.serve_forever, name='MetricsHTTP', daemon=True).start()
+
+        if self.state.queue_metrics is not None:
+            self._collector = threading.Thread(target=self._collect, name='MetricsCollector', daemon=True)
+            self._collector.start()
+        logger.info(f"指标服务已启动: http://{self.addr}:{self.port}/metrics")
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._collector is not None:
+            self.state.queue_metrics.put(None)
+            self._collector.join(timeout=1)
+            self._collector = None
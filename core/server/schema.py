@@ -28,6 +28,11 @@ class Task:
         time_start: 录音/音频开始时间戳
         time_submit: 任务提交时间戳
         samplerate: 采样率，默认 16000 Hz
+        shm_offset: 音频在共享内存区中的偏移，-1 表示音频随 data 内联传输
+        shm_length: 音频在共享内存区中的字节数
+        delta: 客户端是否请求增量结果
+        partial: 客户端是否请求逐 Token 的临时结果
+        deadline: 期望最晚开始识别的时间戳，0 表示不设截止时间（识别进程调度用）
     """
     type: str
     data: bytes
@@ -42,6 +47,11 @@ class Task:
     language: str = 'auto'
     samplerate: int = 16000
     command: str = ''           # 特殊命令，如 'gpu_boost' / 'gpu_unboost'
+    shm_offset: int = -1        # 共享内存传输描述符（见 core.server.audio_arena）
+    shm_length: int = 0
+    delta: bool = False         # 非最终结果以增量形式返回
+    partial: bool = False       # 推理过程中推送临时结果（Partial）
+    deadline: float = 0.0       # 调度截止时间（time.time() 时间戳），0 表示无
 
 
 @dataclass
@@ -66,6 +76,9 @@ class Result:
         timestamps: 字级时间戳列表（秒）
         
         is_final: 是否已完成所有片段识别
+
+        revision / base_revision / token_base / text_base:
+            增量结果字段，含义同 core.protocol.RecognitionMessage；token_base = -1 表示完整结果
     """
     task_id: str
     socket_id: str
@@ -86,6 +99,35 @@ class Result:
     
     is_final: bool = False
 
+    # 增量结果
+    revision: int = 0
+    base_revision: int = 0
+    token_base: int = -1
+    text_base: int = -1
+
+@dataclass
+class Partial:
+    """
+    进行中片段的临时结果增量
+
+    识别进程在引擎逐 Token 生成时经 queue_out 推送，
+    ws_send 按 task_id 累积为片段的临时全文后以 PartialMessage 发出，
+    因此同一任务同时只有一个片段推送临时结果（见 TaskPipeline._process_continuous）。
+
+    Attributes:
+        task_id: 任务唯一标识
+        socket_id: WebSocket 连接标识
+        text_base: 片段临时文本从该下标起被替换为 text（0 表示新片段开始或整体重写）
+        text: 替换内容
+        time_submit: 片段提交时间戳
+    """
+    task_id: str
+    socket_id: str
+    text_base: int
+    text: str
+    time_submit: float = 0.0
+
+
 @dataclass
 class RecognitionSession:
     """
@@ -95,4 +137,5 @@ class RecognitionSession:
     """
     task_id: str
     result: Result
+    revision: int = 0           # 已发出的结果修订号（增量模式）
     # 未来可在此扩展会话级状态，如 N-best 假设、中间特征缓存等
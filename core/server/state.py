@@ -6,18 +6,20 @@
 """
 
 from __future__ import annotations
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from multiprocessing import Queue, Process
-from multiprocessing.managers import ListProxy
-from typing import TYPE_CHECKING, Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
 
 import websockets
 from rich.console import Console
 
 from core.server.schema import Result, RecognitionSession
+from core.server.audio_arena import AudioArena
 
 if TYPE_CHECKING:
     from .app import CapsWriterServer
+    from .worker.router import TaskRouter
 
 # Rich console 用于控制台输出（服务端统一使用此实例）
 console = Console(highlight=False)
@@ -30,25 +32,32 @@ class ServerState:
     
     存储服务端主进程运行时的共享状态：
     - sockets: WebSocket 连接字典，以 socket_id 为键
-    - sockets_id: 跨进程的 socket ID 列表（由 Manager 创建）
-    - queue_in: 任务输入队列（主进程 -> 识别进程）
-    - queue_out: 结果输出队列（识别进程 -> 主进程）
-    - recognize_process: 识别子进程句柄
+    - router: 任务路由器，持有各识别进程的任务输入队列与连接控制队列（主进程 -> 识别进程）
+    - queue_out: 结果输出队列（各识别进程 -> 主进程，共用一个）
+    - recognize_processes: 识别子进程句柄列表
+    - audio_arena: 共享内存音频区（未开启 shm_transport 时为 None）
+    - queue_metrics: 指标快照队列（各识别进程 -> 主进程，未开启指标导出时为 None）
     """
     app: Optional[CapsWriterServer] = None
 
     # WebSocket 连接池
     sockets: Dict[str, websockets.WebSocketServerProtocol] = field(default_factory=dict)
     
-    # 跨进程共享的 socket ID 列表（需要用 Manager().list() 初始化）
-    sockets_id: Optional[ListProxy] = None
-    
-    # 消息队列
-    queue_in: Queue = field(default_factory=Queue)
+    # 任务路由：每个识别进程一个任务队列和一个连接控制队列，
+    # 连接/断开时广播 ('connect' | 'disconnect', socket_id)，识别进程据此维护本地连接表
+    router: Optional[TaskRouter] = None
+
+    # 结果队列
     queue_out: Queue = field(default_factory=Queue)
 
     # 识别子进程
-    recognize_process: Optional[Process] = None
+    recognize_processes: List[Process] = field(default_factory=list)
+
+    # 共享内存音频区
+    audio_arena: Optional[AudioArena] = None
+
+    # 指标快照队列
+    queue_metrics: Optional[Queue] = None
 
 
 
@@ -59,9 +68,16 @@ class WorkerState:
     
     存储识别 Worker 进程运行时的状态：
     - sessions: 活跃识别会话，以 task_id 为键
+    - sockets: 活跃客户端 socket_id（由连接控制消息维护）
+    - closed_sockets: 最近断开的 socket_id，用于识别断连客户端仍在队列中的任务
     """
     # 识别会话集
     sessions: Dict[str, RecognitionSession] = field(default_factory=dict)
+
+    # 本地连接表
+    sockets: Set[str] = field(default_factory=set)
+    closed_sockets: OrderedDict = field(default_factory=OrderedDict)
+    max_closed_sockets: int = 1024
     
     # GPU 加速状态
     gpu_boosted: bool = False       # 当前是否已执行 GPU 加速
@@ -74,11 +90,23 @@ class WorkerState:
             self.sessions[task_id] = RecognitionSession(task_id=task_id, result=result)
         return self.sessions[task_id]
     
-    def cleanup_sessions(self, sockets_id: ListProxy) -> int:
-        """清理已断开连接的客户端 session"""
+    def connect_socket(self, socket_id: str) -> None:
+        """登记新连接"""
+        self.sockets.add(socket_id)
+
+    def disconnect_socket(self, socket_id: str) -> None:
+        """登记断开的连接（socket_id 不会复用，保留最近若干个即可）"""
+        self.sockets.discard(socket_id)
+        self.closed_sockets[socket_id] = None
+        while len(self.closed_sockets) > self.max_closed_sockets:
+            self.closed_sockets.popitem(last=False)
+
+    def cleanup_sessions(self, socket_ids: List[str]) -> int:
+        """清理指定已断开连接的客户端 session"""
+        socket_ids = set(socket_ids)
         stale_ids = [
             sid for sid, session in list(self.sessions.items())
-            if session.result.socket_id not in sockets_id
+            if session.result.socket_id in socket_ids
         ]
         for sid in stale_ids:
             self.sessions.pop(sid, None)
@@ -6,13 +6,15 @@
 """
 
 from multiprocessing import Queue
-from multiprocessing.managers import ListProxy
+from typing import Optional
+from ..audio_arena import AudioArena
 from .. import logger
 from .worker import RecognizerWorker
 
-def start_worker(queue_in: Queue, queue_out: Queue, sockets_id: ListProxy, stdin_fn: int):
+def start_worker(queue_in: Queue, queue_out: Queue, queue_ctl: Queue, stdin_fn: int,
+                 audio_arena: Optional[AudioArena] = None, queue_metrics: Optional[Queue] = None):
     """识别子进程启动入口"""
-    worker = RecognizerWorker(queue_in, queue_out, sockets_id, stdin_fn)
+    worker = RecognizerWorker(queue_in, queue_out, queue_ctl, stdin_fn, audio_arena, queue_metrics)
     worker.run()
 
 __all__ = ['RecognizerWorker', 'start_worker']
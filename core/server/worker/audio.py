@@ -9,33 +9,44 @@
 import numpy as np
 from typing import Optional
 from core.server.schema import Task, Result
+from core.server.connection.vad import frame_features
 
 
-def process_audio_task(task: Task, result: Result) -> Optional[np.ndarray]:
+def task_samples(task: Task) -> Optional[np.ndarray]:
     """
-    处理音频片段任务并更新结果中的时长信息
-    
-    Args:
-        task: 识别任务对象
-        result: 识别结果对象
-        
+    将任务的音频字节转换为采样数组
+
     Returns:
-        samples: 转换后的 numpy 数组 (float32)，空音频时返回 None
+        samples: numpy 数组 (float32)，空音频或极短音频时返回 None
     """
-    # 1. 转换字节流为 float32 采样数组
     samples = np.frombuffer(task.data, dtype=np.float32)
 
     # 空音频防御：少于 1600 采样点（约 0.1s @16kHz）直接跳过
     if len(samples) < 1600:
         return None
+    return samples
+
+
+def is_silent(samples: np.ndarray, threshold_db: float) -> bool:
+    """ 整段静音：最响的一帧（30ms）能量仍低于 threshold_db（dBFS） """
+    energy, _ = frame_features(samples)
+    return len(energy) == 0 or float(energy.max()) < threshold_db
+
+
+def task_duration(task: Task) -> float:
+    """ 片段音频时长（秒），不读取音频本身（共享内存传输时按描述符长度计算） """
+    nbytes = task.shm_length if task.shm_offset >= 0 else len(task.data)
+    return nbytes / 4 / task.samplerate
 
-    # 2. 计算此片段的时长贡献（秒）
-    # 公式：片段时长 - 重叠部分。如果是最终片段，重叠部分也计入总时长。
+
+def accumulate_duration(task: Task, result: Result, samples: np.ndarray) -> None:
+    """
+    把片段的时长贡献累加到结果中
+
+    公式：片段时长 - 重叠部分。如果是最终片段，重叠部分也计入总时长。
+    """
     duration = len(samples) / task.samplerate
-    
-    # 更新累积时长
     result.duration += duration - task.overlap
     if task.is_final:
         result.duration += task.overlap
-        
-    return samples
+
@@ -71,6 +71,10 @@ def check_model() -> None:
                 f'[green4]qwen_asr_mlx 使用 HF repo id [cyan]{model_ref}[/cyan]，首次运行需联网下载权重',
                 end='\n\n')
         return
+    elif model_type == 'synthetic':
+        # 合成引擎不需要模型文件
+        logger.info("使用合成引擎 (synthetic)，跳过模型文件检查")
+        return
     else:
         error_msg = f"不支持的模型类型: {Config.model_type}"
         logger.error(error_msg)
@@ -83,6 +87,7 @@ def check_model() -> None:
     - 'paraformer'
     - 'qwen_asr'
     - 'qwen_asr_mlx'  (仅 Apple Silicon)
+    - 'synthetic'     (合成引擎，仅用于基准测试)
 
         ''', style='bright_red')
         input('按回车退出')
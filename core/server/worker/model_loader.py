@@ -37,12 +37,14 @@ class ModelLoader:
         2. 扫描引擎能力 (Capabilities)
         3. 自适应挂载缺失能力的插件 (Punc, Aligner)
         """
-        # 1. 延迟导入通用库
-        with console.status("载入模块中...", spinner="bouncingBall", spinner_style="yellow"):
-            import sherpa_onnx
+        model_type = Config.model_type.lower()
+
+        # 1. 延迟导入通用库（合成引擎不依赖）
+        if model_type != 'synthetic':
+            with console.status("载入模块中...", spinner="bouncingBall", spinner_style="yellow"):
+                import sherpa_onnx
         
         t1 = time.time()
-        model_type = Config.model_type.lower()
         logger.info(f"Loader 开始初始化语音系统 (引擎: {model_type})")
 
         try:
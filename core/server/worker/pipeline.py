@@ -7,15 +7,22 @@
 2. text_accu (精确拼接): 基于时间戳去重，用于字幕生成
 """
 
+import copy
 import re
 import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
 from core.server.state import WorkerState, console
-from core.server.schema import Task, Result
+from core.server.metrics import worker_metrics
+from core.server.schema import Task, Result, Partial, RecognitionSession
 from core.server.formatter import TextFormatter
 from config_server import ServerConfig as Config
 from core.tools.token_sync import sync_tokens_from_text
-from core.server.engines.base import EngineCapabilities
-from .audio import process_audio_task
+from core.server.engines.base import EngineCapabilities, RecognitionStream, RecognitionResult
+from .audio import task_samples, accumulate_duration, is_silent
 from . import logger
 
 # 导入拆分后的算法子包
@@ -24,148 +31,366 @@ from core.server.merger import (
     merge_tokens_by_sequence_matcher,
     process_tokens_safely,
     tokens_to_text,
+    make_delta,
 )
 
 
+@dataclass
+class _Segment:
+    """ 流水线中的一个片段：预处理 → 推理 → 拼接 之间传递的状态 """
+    task: Task
+    session: RecognitionSession
+    is_first_segment: bool
+    samples: Optional[np.ndarray]
+    stream: Optional[RecognitionStream] = None
+    silent: bool = False            # 整段静音：跳过推理，按空结果拼接
+    decoded: bool = False           # 连续批处理：推理已完成，等待按 session 顺序拼接
+    result: Optional[Result] = None
+    sink: Optional[Callable[[int, str], None]] = None   # 临时结果回调（见 _partial_sink）
+
+
 class TaskPipeline:
     """
     语音识别处理流水线
     
     统筹核心 ASR 引擎、标点模型和对齐器插件的协作。
     基于任务源（mic/file）和引擎能力（Capabilities）自适应调整流水线深度。
+
+    on_partial: 临时结果的出口（通常为 queue_out.put）。片段请求了临时结果且单独推理时，
+    引擎逐 Token 生成的文本经它推送（不支持的引擎忽略 on_partial 参数）。
     """
 
-    def __init__(self, recognizer, punc_model=None, aligner=None, state: WorkerState = None):
+    def __init__(self, recognizer, punc_model=None, aligner=None, state: WorkerState = None,
+                 on_partial: Optional[Callable[[Partial], None]] = None):
         self.recognizer = recognizer
         self.punc_model = punc_model
         self.aligner = aligner
         self.formatter = TextFormatter(punc_model)
         self.state = state or WorkerState()
+        self.on_partial = on_partial
 
-    def _process_simple_merge(self, result: Result, stream_result_text: str) -> None:
-        """ 处理简单文本拼接（主要输出，用于语音输入） """
+    def _process_simple_merge(self, result: Result, stream_result_text: str, overlap: float) -> None:
+        """ 处理简单文本拼接（主要输出，用于语音输入）；片段无重叠时直接首尾相连 """
         try:
             segment_text = stream_result_text.replace('@@', '').strip()
             segment_text = re.sub(r'\s+', ' ', segment_text)
             
             prev_len = len(result.text)
-            result.text = merge_by_text(result.text, segment_text)
+            if overlap > 0:
+                result.text = merge_by_text(result.text, segment_text)
+            elif result.text and segment_text:
+                # 英文单词跨切点时补空格
+                sep = ' ' if (result.text[-1].isascii() and result.text[-1].isalnum()
+                              and segment_text[0].isascii() and segment_text[0].isalnum()) else ''
+                result.text += sep + segment_text
+            else:
+                result.text += segment_text
             added_chars = len(result.text) - prev_len
             
             logger.debug(f"简单拼接: +{added_chars} 字符, 片段={len(segment_text)}, 总={len(result.text)}")
         except Exception as e:
             logger.warning(f"简单文本拼接失败: {e}")
 
+    def _observe_asr(self, elapsed: float, duration: float, performance: dict) -> None:
+        """ 记录引擎耗时、RTF 及引擎上报的内部阶段耗时（encode / ctc / llm_decode 等） """
+        worker_metrics.observe_stage('asr', elapsed)
+        if duration > 0:
+            worker_metrics.observe_rtf(Config.model_type, elapsed / duration)
+        for stage, seconds in (performance or {}).items():
+            worker_metrics.observe_stage(stage, seconds)
+
+    def _outgoing(self, task: Task, session, prev: tuple) -> Result:
+        """ 非最终结果的出口：增量模式下只返回相对上一修订的变化 """
+        if not task.delta:
+            return copy.copy(session.result)     # 快照：后续片段会继续更新 session.result
+        session.revision += 1
+        return make_delta(session.result, *prev, revision=session.revision)
+
     def process(self, task: Task) -> Result:
         """
         处理单个音频任务片段并返回识别结果
         """
+        return self.process_batch([task])[0]
+
+    def process_batch(self, tasks: List[Task], admit: Optional[Callable[[], Optional[Task]]] = None,
+                      on_result: Optional[Callable[[Task, Optional[Result]], None]] = None
+                      ) -> List[Optional[Result]]:
+        """
+        处理一批音频任务片段，按顺序返回各自的识别结果
+
+        各片段先预处理，再经一次 decode_streams 合批推理，最后按原顺序逐个拼接，
+        因此同一 session 的多个片段也可以同批（拼接仍严格按片段顺序进行）。
+        预处理或推理出错时整批抛出（尚未改动任何 session，可逐个重试）；
+        多个片段中某个拼接出错时，其余片段已并入 session，只丢弃该片段的结果（返回 None）。
+
+        引擎支持连续批处理且传入 admit 时，推理中途由 admit() 取得的片段也加入本批（追加在 tasks 之后），
+        每个片段推理完成即拼接，见 _process_continuous。
+        on_result(task, result) 在每个片段拼接完成时调用（出错为 None）。
+        """
+        continuous = admit is not None and self.recognizer.continuous_batching
         try:
-            logger.info(f"任务 {task.task_id[:8]}, 语言={task.language}, 类型={task.type}")
-            is_first_segment = task.task_id not in self.state.sessions
-            session = self.state.get_session(task.task_id, task.socket_id, task.type)
-            result = session.result
-
-            # GPU 加速活跃时间更新（只要有任务进来就刷新）
-            if Config.gpu_boost_enabled and self.state.gpu_boosted:
-                self.state.gpu_last_active = time.time()
-
-            # 2. 预处理音频并获取采样点
-            samples = process_audio_task(task, result)
-
-            # 空音频或极短音频，跳过推理直接返回
-            if samples is None:
-                result.time_start, result.time_submit = task.time_start, task.time_submit
-                result.time_complete = time.time()
-                result.is_final = task.is_final
-                return result
-
-            # 3. 执行识别推理
-            stream = self.recognizer.create_stream()
-            stream.accept_waveform(task.samplerate, samples)
-            self.recognizer.decode_stream(stream, context=task.context, language=task.language)
-
-            # 更新基础时序
-            result.time_start, result.time_submit = task.time_start, task.time_submit
-            result.time_complete = time.time()
+            segments = [self._prepare(task) for task in tasks]
+            if not continuous:
+                self._decode([seg for seg in segments if self._needs_decode(seg)])
+        except Exception as e:
+            logger.error(f"推理管线错误: {e}", exc_info=True)
+            raise
+        if continuous:
+            return self._process_continuous(segments, admit, on_result)
+        results = []
+        for seg in segments:
+            results.append(self._finish_safely(seg, raises=len(segments) == 1))
+            if on_result:
+                on_result(seg.task, results[-1])
+        return results
 
-            # 4. 路径 A: 简单文本拼接 (主要用于实时回显)
-            asr_raw_text = stream.result.text
-            logger.info(f'模型输出：{asr_raw_text}')
-            console.print(f'\033[0G  模型输出：[cyan]{asr_raw_text}', soft_wrap=True)
-            self._process_simple_merge(result, asr_raw_text)
-
-            # 5. 路径 B: 对齐增强 (仅针对文件任务)
-            # 门控：仅在“文件任务”且“引擎不支持时间戳”时，才调用外部 Aligner
-            caps = self.recognizer.capabilities
-            if (task.type == 'file'
-                and EngineCapabilities.TIMESTAMPS not in caps 
-                and self.aligner 
-                and stream.result.text.strip()):
-                
-                logger.debug(f"🚩 [Pipeline] 正在对文件分片执行对齐补齐...")
-                align_res = self.aligner.align(audio=samples, text=stream.result.text, language=task.language, offset_sec=0.0)
-                if align_res and align_res.items:
-                    stream.result.tokens = [it.text for it in align_res.items]
-                    stream.result.timestamps = [it.start_time for it in align_res.items]
-
-
-            # 6. 精确 Token 级拼接 (即便没有对齐器，原生支持时间戳的模型也会走这里)
-            new_tokens = process_tokens_safely(stream.result.tokens)
-            new_timestamps = list(stream.result.timestamps)
-            
-            result.tokens, result.timestamps = merge_tokens_by_sequence_matcher(
-                prev_tokens=result.tokens,
-                prev_timestamps=result.timestamps,
-                new_tokens=new_tokens,
-                new_timestamps=new_timestamps,
-                offset=task.offset,
-                overlap=task.overlap,
-                is_first_segment=is_first_segment
+    def _process_continuous(self, segments: List['_Segment'], admit: Callable[[], Optional[Task]],
+                            on_result: Optional[Callable[[Task, Optional[Result]], None]]) -> List[Optional[Result]]:
+        """
+        连续批处理：一次 decode_streams 中，引擎有空位时经 admit() 接纳新的片段，
+        每个片段推理完成后立即拼接并交付，不等待整批结束。
+        同一 session 的片段仍按顺序拼接：前面的片段未完成时，后面已推理完的片段先等待。
+        临时结果按 task_id 累积，因此只推送 session 中最早未交付的片段的临时结果，
+        此前的片段尚未交付时开始推理的片段不推送（其识别结果到达时会作废临时结果）。
+        推理出错时抛出，此前已交付的片段不受影响（调用方只需重试其余片段）。
+        """
+        waiting = {}            # task_id -> 该 session 尚未拼接的片段（按顺序）
+        decoding = []           # 送入引擎的片段，下标即引擎中流的下标
+
+        def add(seg: '_Segment'):
+            waiting.setdefault(seg.task.task_id, []).append(seg)
+
+        def ready(seg: '_Segment'):
+            # 片段推理完成：按 session 顺序拼接所有已就绪的片段
+            seg.decoded = True
+            pending = waiting[seg.task.task_id]
+            while pending and pending[0].decoded:
+                head = pending.pop(0)
+                head.result = self._finish_safely(head, raises=False)
+                if on_result:
+                    on_result(head.task, head.result)
+
+        def open_stream(seg: '_Segment'):
+            self._open_stream(seg)
+            if waiting[seg.task.task_id][0] is seg:
+                seg.sink = self._partial_sink(seg.task)
+            decoding.append(seg)
+
+        def admit_stream():
+            while True:
+                task = admit()
+                if task is None:
+                    return None
+                seg = self._prepare(task)
+                segments.append(seg)
+                add(seg)
+                if self._needs_decode(seg):
+                    open_stream(seg)
+                    return seg.stream, task.context, task.language
+                ready(seg)
+
+        def on_partial(i: int, text_base: int, text: str):
+            if decoding[i].sink:
+                decoding[i].sink(text_base, text)
+
+        for seg in list(segments):
+            add(seg)
+        for seg in list(segments):
+            if self._needs_decode(seg):
+                open_stream(seg)
+            else:
+                ready(seg)
+
+        if decoding:
+            t_asr = time.perf_counter()
+            try:
+                self.recognizer.decode_streams(
+                    [seg.stream for seg in decoding],
+                    contexts=[seg.task.context for seg in decoding],
+                    languages=[seg.task.language for seg in decoding],
+                    admit=admit_stream, on_done=lambda i: ready(decoding[i]), on_partial=on_partial,
+                )
+            except Exception as e:
+                logger.error(f"推理管线错误: {e}", exc_info=True)
+                raise
+            duration = sum(len(seg.samples) / seg.task.samplerate for seg in decoding)
+            self._observe_asr(time.perf_counter() - t_asr, duration, decoding[0].stream.result.performance)
+            worker_metrics.inc('decode_calls')
+            worker_metrics.inc('decoded_segments', len(decoding))
+        return [seg.result for seg in segments]
+
+    def _finish_safely(self, seg: '_Segment', raises: bool) -> Optional[Result]:
+        """ 拼接一个片段；出错时记录异常，raises 为 False 时返回 None """
+        try:
+            return self._finish(seg)
+        except Exception as e:
+            logger.error(f"推理管线错误: {e}", exc_info=True)
+            if raises:
+                raise
+            return None
+
+    @staticmethod
+    def _needs_decode(seg: '_Segment') -> bool:
+        return seg.samples is not None and not seg.silent
+
+    def _prepare(self, task: Task) -> '_Segment':
+        """ 预处理：取得 session 与采样点 """
+        logger.info(f"任务 {task.task_id[:8]}, 语言={task.language}, 类型={task.type}")
+        is_first_segment = task.task_id not in self.state.sessions
+        session = self.state.get_session(task.task_id, task.socket_id, task.type)
+
+        # GPU 加速活跃时间更新（只要有任务进来就刷新）
+        if Config.gpu_boost_enabled and self.state.gpu_boosted:
+            self.state.gpu_last_active = time.time()
+
+        samples = task_samples(task)
+        silent = (samples is not None and Config.silence_skip
+                  and is_silent(samples, Config.silence_threshold_db))
+        if silent:
+            logger.debug(f"静音片段，跳过识别: {task.task_id[:8]}, 时长={len(samples) / task.samplerate:.2f}s")
+            worker_metrics.inc('silent_segments')
+        return _Segment(task, session, is_first_segment, samples, silent=silent)
+
+    def _partial_sink(self, task: Task) -> Optional[Callable[[int, str], None]]:
+        """ 引擎的临时结果回调 (text_base, text)：包装为 Partial 推送；片段未请求时返回 None """
+        if not (task.partial and self.on_partial):
+            return None
+
+        def emit(text_base: int, text: str):
+            self.on_partial(Partial(task.task_id, task.socket_id, text_base, text, task.time_submit))
+            worker_metrics.inc('partials')
+        return emit
+
+    def _decode(self, segments: List['_Segment']) -> None:
+        """ 识别推理：单个片段走 decode_stream（可推送临时结果），多个片段合批走 decode_streams """
+        if not segments:
+            return
+        for seg in segments:
+            self._open_stream(seg)
+
+        t_asr = time.perf_counter()
+        if len(segments) == 1:
+            task = segments[0].task
+            self.recognizer.decode_stream(segments[0].stream, context=task.context, language=task.language,
+                                          on_partial=self._partial_sink(task))
+        else:
+            self.recognizer.decode_streams(
+                [seg.stream for seg in segments],
+                contexts=[seg.task.context for seg in segments],
+                languages=[seg.task.language for seg in segments],
             )
-            
-            # 7. 生成精确文本结果 (text_accu)
-            result.text_accu = tokens_to_text(result.tokens)
+        duration = sum(len(seg.samples) / seg.task.samplerate for seg in segments)
+        self._observe_asr(time.perf_counter() - t_asr, duration, segments[0].stream.result.performance)
+        worker_metrics.inc('decode_calls')
+        worker_metrics.inc('decoded_segments', len(segments))
+
+    def _open_stream(self, seg: '_Segment') -> None:
+        """ 为片段创建识别流并送入音频 """
+        seg.stream = self.recognizer.create_stream()
+        seg.stream.accept_waveform(seg.task.samplerate, seg.samples)
+
+    def _finish(self, seg: '_Segment') -> Result:
+        """ 拼接与格式化：把一个已推理的片段并入 session 结果 """
+        task, session, samples = seg.task, seg.session, seg.samples
+        # 静音片段没有推理结果，按空结果走完拼接与收尾（时长照常累计）
+        seg_result = seg.stream.result if seg.stream else RecognitionResult()
+        is_first_segment = seg.is_first_segment
+        result = session.result
+        prev = (result.text, result.tokens, result.timestamps)
 
-            # 8. 最终阶段处理 (任务结束时的格式化)
+        # 空音频或极短音频，跳过推理直接返回
+        if samples is None:
+            result.time_start, result.time_submit = task.time_start, task.time_submit
+            result.time_complete = time.time()
+            result.is_final = task.is_final
             if not task.is_final:
-                return result
+                return self._outgoing(task, session, prev)
+            return result
 
-            # 任务结束清理与最终格式化
-            raw_text = result.text
-            result.text = self.formatter.format(result.text)
-            result.text_accu = self.formatter.format(result.text_accu)
-            console.print(f'  片段拼接：[purple]{raw_text}', soft_wrap=True)
-            console.print(f'  格式化后：[green]{result.text}\n', soft_wrap=True)
+        accumulate_duration(task, result, samples)
 
-            logger.debug(f'格式调整：{raw_text} --> {result.text}')
+        # 更新基础时序
+        result.time_start, result.time_submit = task.time_start, task.time_submit
+        result.time_complete = time.time()
 
-            # 将格式化引入的标点同步回 token 序列
-            if result.tokens and result.text_accu:
-                result.tokens, result.timestamps = sync_tokens_from_text(
-                    result.tokens, result.timestamps, result.text_accu
-                )
-            
-            # 如果依然没有 tokens (麦克风跳过了对齐)，则用 text 回退
-            if not result.tokens and result.text:
-                result.text_accu = result.text
-                chars = list(result.text_accu.replace(' ', ''))
-                if chars and result.duration > 0:
-                    t_per_char = result.duration / len(chars)
-                    result.tokens, result.timestamps = chars, [i * t_per_char for i in range(len(chars))]
-            
-            result.is_final = True
+        # 4. 路径 A: 简单文本拼接 (主要用于实时回显)
+        asr_raw_text = seg_result.text
+        logger.info(f'模型输出：{asr_raw_text}')
+        console.print(f'\033[0G  模型输出：[cyan]{asr_raw_text}', soft_wrap=True)
+        t_merge = time.perf_counter()
+        self._process_simple_merge(result, asr_raw_text, task.overlap)
+        t_merge = time.perf_counter() - t_merge
+
+        # 5. 路径 B: 对齐增强 (仅针对文件任务)
+        # 门控：仅在“文件任务”且“引擎不支持时间戳”时，才调用外部 Aligner
+        caps = self.recognizer.capabilities
+        if (task.type == 'file'
+            and EngineCapabilities.TIMESTAMPS not in caps 
+            and self.aligner 
+            and seg_result.text.strip()):
             
-            # 打印统计
-            process_time = result.time_complete - task.time_submit
-            rtf = process_time / result.duration if result.duration > 0 else 0
-            logger.info(f"任务完成: {task.task_id[:8]}, 时长={result.duration:.2f}s, 耗时={process_time:.3f}s, RTF={rtf:.3f}")
+            logger.debug(f"🚩 [Pipeline] 正在对文件分片执行对齐补齐...")
+            with worker_metrics.timer('align'):
+                align_res = self.aligner.align(audio=samples, text=seg_result.text, language=task.language, offset_sec=0.0)
+            if align_res and align_res.items:
+                seg_result.tokens = [it.text for it in align_res.items]
+                seg_result.timestamps = [it.start_time for it in align_res.items]
 
-            return result
 
-        except Exception as e:
-            logger.error(f"推理管线错误: {e}", exc_info=True)
-            raise
+        # 6. 精确 Token 级拼接 (即便没有对齐器，原生支持时间戳的模型也会走这里)
+        t = time.perf_counter()
+        new_tokens = process_tokens_safely(seg_result.tokens)
+        new_timestamps = list(seg_result.timestamps)
+        
+        result.tokens, result.timestamps = merge_tokens_by_sequence_matcher(
+            prev_tokens=result.tokens,
+            prev_timestamps=result.timestamps,
+            new_tokens=new_tokens,
+            new_timestamps=new_timestamps,
+            offset=task.offset,
+            overlap=task.overlap,
+            is_first_segment=is_first_segment
+        )
+        
+        # 7. 生成精确文本结果 (text_accu)
+        result.text_accu = tokens_to_text(result.tokens)
+        worker_metrics.observe_stage('merge', t_merge + time.perf_counter() - t)
 
+        # 8. 最终阶段处理 (任务结束时的格式化)
+        if not task.is_final:
+            return self._outgoing(task, session, prev)
 
+        # 任务结束清理与最终格式化
+        t_format = time.perf_counter()
+        raw_text = result.text
+        result.text = self.formatter.format(result.text)
+        result.text_accu = self.formatter.format(result.text_accu)
+        console.print(f'  片段拼接：[purple]{raw_text}', soft_wrap=True)
+        console.print(f'  格式化后：[green]{result.text}\n', soft_wrap=True)
+
+        logger.debug(f'格式调整：{raw_text} --> {result.text}')
+
+        # 将格式化引入的标点同步回 token 序列
+        if result.tokens and result.text_accu:
+            result.tokens, result.timestamps = sync_tokens_from_text(
+                result.tokens, result.timestamps, result.text_accu
+            )
+        
+        # 如果依然没有 tokens (麦克风跳过了对齐)，则用 text 回退
+        if not result.tokens and result.text:
+            result.text_accu = result.text
+            chars = list(result.text_accu.replace(' ', ''))
+            if chars and result.duration > 0:
+                t_per_char = result.duration / len(chars)
+                result.tokens, result.timestamps = chars, [i * t_per_char for i in range(len(chars))]
+        worker_metrics.observe_stage('format', time.perf_counter() - t_format)
+        
+        result.is_final = True
+        result.revision = session.revision + 1
+        
+        # 打印统计
+        process_time = result.time_complete - task.time_submit
+        rtf = process_time / result.duration if result.duration > 0 else 0
+        logger.info(f"任务完成: {task.task_id[:8]}, 时长={result.duration:.2f}s, 耗时={process_time:.3f}s, RTF={rtf:.3f}")
 
+        return result
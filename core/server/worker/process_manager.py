@@ -2,16 +2,19 @@
 """
 识别子进程管理器 (ProcessManager)
 
-负责维护单机识别进程的生命周期，包括启动、模型加载监控、异常退出捕获。
+负责维护识别进程池的生命周期，包括启动、模型加载监控、异常退出捕获。
 """
 from __future__ import annotations
 import sys
 import os
 import queue
-from multiprocessing import Process, Manager
+from multiprocessing import Process, Queue
 from typing import TYPE_CHECKING
+from config_server import ServerConfig as Config
 from ..state import console
+from ..audio_arena import AudioArena
 from . import start_worker
+from .router import TaskRouter
 from .check_model import check_model
 from . import logger
 if TYPE_CHECKING:
@@ -25,16 +28,16 @@ class ProcessManager:
     由 CapsWriterServer 调用，专注于进程层级的控制。
     """
     def __init__(self, app: CapsWriterServer):
-        self._process = None
+        self._processes = []
         self.app = app
         self.is_alive = False
 
     def start(self):
         """
-        启动识别子进程并等待模型加载完成
+        启动识别子进程（共 Config.num_workers 个）并等待模型全部加载完成
         
         Returns:
-            Process: 启动成功的子进程对象
+            List[Process]: 启动成功的子进程对象
         """
         # 防连续触发
         if self.is_alive: return
@@ -44,47 +47,63 @@ class ProcessManager:
         check_model()
 
         # 2. 初始化共享资源
-        # 使用 Manager 管理共享列表，用于追踪活动连接
         state = self.app.state
-        state.sockets_id = Manager().list()
+        state.router = TaskRouter(Config.num_workers)
+
+        # 共享内存音频区（可选）：片段经共享内存交给子进程，队列只传描述符
+        if Config.shm_transport:
+            state.audio_arena = AudioArena.create(Config.shm_arena_mb)
+            logger.info(f"已开启共享内存音频传输 ({Config.shm_arena_mb} MB, {state.audio_arena.n_slots} 槽位)")
+
+        # 指标快照队列（可选）：识别进程定期上报，由主进程 MetricsExporter 收取
+        if Config.metrics_port:
+            state.queue_metrics = Queue()
         
         # 获取标准输入文件描述符，用于 Windows 下的信号传递补丁
         stdin_fn = sys.stdin.fileno()
         
-        # 3. 创建并启动进程
-        self._process = Process(
-            target=start_worker,
-            args=(state.queue_in,
-                  state.queue_out,
-                  state.sockets_id, 
-                  stdin_fn),
-            daemon=True
-        )
-        self._process.start()
-        
+        # 3. 创建并启动进程（各自独占任务队列与控制队列，共用结果队列）
+        router = state.router
+        for i in range(router.num_workers):
+            process = Process(
+                target=start_worker,
+                args=(router.queues_in[i],
+                      state.queue_out,
+                      router.queues_ctl[i],
+                      stdin_fn,
+                      state.audio_arena,
+                      state.queue_metrics),
+                name=f'RecognizerWorker-{i}',
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+            logger.info(f"识别子进程 {i} 已拉起 (PID: {process.pid})")
+
         # 存入状态以便其他模块引用
-        state.recognize_process = self._process
-        logger.info(f"识别子进程已拉起 (PID: {self._process.pid})")
+        state.recognize_processes = self._processes
 
         # 4. 等待模型加载完成 (轮询方式)
         self._wait_for_models()
         
-        return self._process
+        return self._processes
 
     def _wait_for_models(self):
-        """轮询队列直到收到模型加载成功 (True) 或发生错误"""
+        """轮询队列直到收到每个子进程的模型加载成功 (True) 或发生错误"""
         logger.info("正在等待子进程加载模型...")
-        
-        while self.is_alive:
+
+        loaded = 0
+        while self.is_alive and loaded < len(self._processes):
             try:
                 # 阻塞最多 100ms
                 status = self.app.state.queue_out.get(timeout=0.1)
                 if status is True:
-                    # 收到 True 说明模型加载成功
-                    break
+                    # 收到 True 说明一个子进程模型加载成功
+                    loaded += 1
             except (queue.Empty, OSError):
-                if self._process and not self._process.is_alive():
-                    self._handle_unexpected_exit()
+                dead = next((p for p in self._processes if not p.is_alive()), None)
+                if dead is not None:
+                    self._handle_unexpected_exit(dead)
                     return
                 continue
             
@@ -93,11 +112,11 @@ class ProcessManager:
         console.rule('[green3]开始服务')
         console.line()
 
-    def _handle_unexpected_exit(self):
+    def _handle_unexpected_exit(self, process: Process):
         """处理子进程加载模型时的意外退出"""
-        exit_code = self._process.exitcode
+        exit_code = process.exitcode
         if exit_code != 0:
-            logger.error(f"识别子进程意外退出! ExitCode: {exit_code}")
+            logger.error(f"识别子进程 {process.name} 意外退出! ExitCode: {exit_code}")
             logger.error("这通常是由于模型损坏、底层库冲突或系统资源不足导致的。")
         
         # 请求主系统同步退出
@@ -110,15 +129,22 @@ class ProcessManager:
         if not self.is_alive: return
         self.is_alive = False
 
-        if self._process and self._process.is_alive():
-            logger.info(f"正在终止识别子进程 (PID: {self._process.pid})...")
+        alive = [p for p in self._processes if p.is_alive()]
+        if alive:
+            logger.info(f"正在终止识别子进程 (PID: {', '.join(str(p.pid) for p in alive)})...")
             # 发送 None 任务通知优雅退出 (作为兜底)
-
-            self.app.state.queue_in.put(None)
+            self.app.state.router.stop()
             
             # 如果 2 秒内没退，则强制 kill
-            self._process.join(timeout=2)
-            if self._process.is_alive():
-                logger.debug("子进程未响应优雅退出，执行强制终止")
-                self._process.terminate()
+            for process in alive:
+                process.join(timeout=2)
+                if process.is_alive():
+                    logger.debug(f"子进程 {process.name} 未响应优雅退出，执行强制终止")
+                    process.terminate()
+
+        # 子进程退出后再销毁共享内存音频区
+        state = self.app.state
+        if state.audio_arena is not None:
+            state.audio_arena.close()
+            state.audio_arena = None
             
\ No newline at end of file
@@ -0,0 +1,109 @@
+# coding: utf-8
+"""
+任务路由模块
+
+主进程侧把任务分发给多个识别进程：
+- 同一 task_id 的所有片段固定交给同一个识别进程，拼接状态（WorkerState.sessions）只在本进程内
+- 新会话交给当前负载最轻的识别进程（队列积压优先，其次活跃会话数）
+- GPU 加速命令交给其所属会话的识别进程：该进程刷新 GPU 活跃时间，并负责闲置后取消加速
+- 连接控制消息广播给所有识别进程
+"""
+
+from multiprocessing import Queue
+from typing import Dict, List, Set
+
+from core.server.schema import Task
+from . import logger
+
+
+class TaskRouter:
+    """
+    多识别进程任务路由器
+
+    每个识别进程独占一对 queue_in / queue_ctl，结果仍统一汇入 queue_out。
+    仅在主进程的事件循环线程中调用，无需加锁。
+    """
+
+    def __init__(self, num_workers: int = 1):
+        self.num_workers = max(int(num_workers), 1)
+        self.queues_in: List[Queue] = [Queue() for _ in range(self.num_workers)]
+        self.queues_ctl: List[Queue] = [Queue() for _ in range(self.num_workers)]
+
+        self._task_worker: Dict[str, int] = {}          # task_id -> 识别进程序号
+        self._socket_tasks: Dict[str, Set[str]] = {}    # socket_id -> 未结束的 task_id
+        self._sessions: List[int] = [0] * self.num_workers  # 各识别进程的活跃会话数
+
+    def _depth(self, index: int) -> int:
+        """识别进程的队列积压（macOS 不支持 qsize，按 0 计，退化为按会话数均衡）"""
+        try:
+            return self.queues_in[index].qsize()
+        except NotImplementedError:
+            return 0
+
+    def depths(self) -> List[int]:
+        """各识别进程的队列积压"""
+        return [self._depth(i) for i in range(self.num_workers)]
+
+    def _pick(self) -> int:
+        """为新会话挑选负载最轻的识别进程"""
+        if self.num_workers == 1:
+            return 0
+        return min(range(self.num_workers), key=lambda i: (self._depth(i), self._sessions[i]))
+
+    def _unpin(self, task_id: str) -> None:
+        index = self._task_worker.pop(task_id, None)
+        if index is not None:
+            self._sessions[index] -= 1
+
+    def worker_of(self, task_id: str) -> int:
+        """查询 task_id 绑定的识别进程序号，未绑定返回 -1"""
+        return self._task_worker.get(task_id, -1)
+
+    def _bind(self, task_id: str, socket_id: str) -> int:
+        """返回会话绑定的识别进程序号，未绑定时挑选并绑定"""
+        index = self._task_worker.get(task_id)
+        if index is None:
+            index = self._pick()
+            self._task_worker[task_id] = index
+            self._sessions[index] += 1
+            self._socket_tasks.setdefault(socket_id, set()).add(task_id)
+            if self.num_workers > 1:
+                logger.debug(f"会话 {task_id[:8]} 分配到识别进程 {index}")
+        return index
+
+    def command(self, task: Task, task_id: str) -> None:
+        """
+        把命令任务（GPU 加速）交给 task_id 会话所在的识别进程（尚未绑定时先绑定）
+
+        闲置取消加速按本进程的识别活跃时间判断，命令若落到别的识别进程，
+        那里看不到该会话的识别活动，会在识别进行中取消加速
+        """
+        self.queues_in[self._bind(task_id, task.socket_id)].put(task)
+
+    def put(self, task: Task) -> None:
+        """按会话亲和性分发任务"""
+        index = self._bind(task.task_id, task.socket_id)
+        self.queues_in[index].put(task)
+
+        if task.is_final:
+            self._unpin(task.task_id)
+            tasks = self._socket_tasks.get(task.socket_id)
+            if tasks is not None:
+                tasks.discard(task.task_id)
+
+    def connect(self, socket_id: str) -> None:
+        """广播连接消息"""
+        for q in self.queues_ctl:
+            q.put(('connect', socket_id))
+
+    def disconnect(self, socket_id: str) -> None:
+        """广播断开消息，并解除该连接未结束会话的绑定"""
+        for task_id in self._socket_tasks.pop(socket_id, ()):
+            self._unpin(task_id)
+        for q in self.queues_ctl:
+            q.put(('disconnect', socket_id))
+
+    def stop(self) -> None:
+        """通知所有识别进程优雅退出"""
+        for q in self.queues_in:
+            q.put(None)
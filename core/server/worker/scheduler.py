@@ -0,0 +1,135 @@
+# coding: utf-8
+"""
+识别任务调度器
+
+取代原先「总是先处理最近活跃的 session」的缓冲区，按以下规则决定下一个处理的片段：
+
+1. 已超过截止时间（Task.deadline）的片段最先处理，截止时间最早者优先
+2. 否则按优先级类别：命令 > 麦克风（交互）> 文件（批量）
+3. 同一类别内，带截止时间的按截止时间最早优先，否则各 session 轮转（每次一个片段）
+
+同一 session 内始终保持 FIFO。调度只发生在两个片段之间，正在识别的片段不会被打断，
+因此麦克风片段最多等待一个文件片段的识别时间。
+"""
+
+import time
+from collections import OrderedDict, deque
+from typing import Collection, Dict, Optional
+
+from ..metrics import worker_metrics
+from ..schema import Task
+from ..state import WorkerState
+from . import logger
+
+# 优先级类别（数值越小越优先），未知类型按批量处理
+PRIORITY = {'cmd': 0, 'mic': 1, 'file': 2}
+BATCH = 'file'
+
+
+class TaskScheduler:
+    """按优先级类别 + 截止时间 + session 轮转出队的任务缓冲区"""
+
+    def __init__(self, state: WorkerState):
+        self.state = state
+        # 类别 -> (task_id -> 片段队列)，按优先级排序
+        self._classes: Dict[str, OrderedDict] = OrderedDict(
+            (cls, OrderedDict()) for cls in sorted(PRIORITY, key=PRIORITY.get)
+        )
+
+    @staticmethod
+    def priority_class(task: Task) -> str:
+        return task.type if task.type in PRIORITY else BATCH
+
+    def enqueue(self, task: Task):
+        """将任务放入对应 session 的队列尾部。首次遇到新 task_id 时预创建 session。"""
+        sessions = self._classes[self.priority_class(task)]
+        tid = task.task_id
+        if tid not in sessions:
+            sessions[tid] = deque()
+            self.state.get_session(tid, task.socket_id, task.type)
+        sessions[tid].append(task)
+
+    def _select(self, now: float, only: Optional[str] = None, skip: Collection[str] = ()):
+        """返回 (类别, task_id)，没有待处理任务时返回 None。only 限定只在该类别中选择，跳过 skip 中的 session。"""
+        classes = [(only, self._classes[only])] if only else list(self._classes.items())
+        if skip:
+            classes = [(cls, OrderedDict((tid, buf) for tid, buf in sessions.items() if tid not in skip))
+                       for cls, sessions in classes]
+
+        # 1. 超时片段：跨类别按截止时间最早优先
+        overdue = None
+        for cls, sessions in classes:
+            for tid, buf in sessions.items():
+                deadline = buf[0].deadline
+                if deadline and deadline <= now and (overdue is None or deadline < overdue[0]):
+                    overdue = (deadline, cls, tid)
+        if overdue is not None:
+            return overdue[1:]
+
+        # 2. 最高优先级的非空类别
+        for cls, sessions in classes:
+            if not sessions:
+                continue
+            # 3. 类内：截止时间最早者优先，否则取轮转队首
+            timed = [(buf[0].deadline, tid) for tid, buf in sessions.items() if buf[0].deadline]
+            if timed:
+                return cls, min(timed)[1]
+            return cls, next(iter(sessions))
+        return None
+
+    def pop(self, priority_class: Optional[str] = None, skip: Collection[str] = ()) -> Optional[Task]:
+        """
+        取出下一个应处理的任务并记录其排队时间。没有待处理任务时返回 None。
+        指定 priority_class 时只从该类别中取（合批时凑同类片段），skip 中的 session 不参与选择。
+        """
+        now = time.time()
+        selected = self._select(now, priority_class, skip)
+        if selected is None:
+            return None
+
+        cls, tid = selected
+        sessions = self._classes[cls]
+        buf = sessions[tid]
+        task = buf.popleft()
+        if buf:
+            sessions.move_to_end(tid)       # 轮转：本 session 排到同类末尾
+        else:
+            del sessions[tid]
+
+        if task.time_submit:
+            worker_metrics.observe_queue_wait(cls, max(now - task.time_submit, 0.0))
+        if task.deadline and task.deadline < now:
+            worker_metrics.inc(f'{cls}_deadline_misses')
+            logger.debug(f"片段超过截止时间 {now - task.deadline:.3f}s: {tid[:8]} ({cls})")
+        return task
+
+    def pop_audio(self, skip: Collection[str] = ()) -> Optional[Task]:
+        """取出下一个音频片段（命令留在缓冲区），供连续批处理在解码中途接纳；skip 为仍有片段在识别中的 session"""
+        for cls in self._classes:
+            if cls != 'cmd':
+                task = self.pop(cls, skip)
+                if task is not None:
+                    return task
+        return None
+
+    def cleanup_tasks(self) -> list:
+        """清理已断开连接的 session 的缓冲任务，返回被丢弃的任务。"""
+        dropped = []
+        for sessions in self._classes.values():
+            for tid in list(sessions):
+                if tid not in self.state.sessions:
+                    logger.debug(f"清理断开连接的 session: {tid[:8]}")
+                    dropped.extend(sessions.pop(tid))
+        return dropped
+
+    def sizes(self) -> Dict[str, int]:
+        """各类别待处理的任务数（固定包含所有类别，不按 session 区分）"""
+        return {cls: sum(len(buf) for buf in sessions.values()) for cls, sessions in self._classes.items()}
+
+    @property
+    def has_commands(self) -> bool:
+        return bool(self._classes['cmd'])
+
+    @property
+    def is_empty(self) -> bool:
+        return not any(self._classes.values())
@@ -4,79 +4,50 @@
 
 负责监听任务队列、执行识别流水线并将结果返回主进程。
 
-公平调度：从不同客户端（socket）轮转取任务处理，防止文件转录淹没队列。
-同 socket 内保持 FIFO 顺序，跨 socket 间轮转调度。
+优先级调度：麦克风片段优先于文件片段，同类 session 间轮转，支持截止时间（见 scheduler.py）。
+同 session 内保持 FIFO 顺序。
 """
 
-from collections import OrderedDict, deque
 from multiprocessing import Queue
-from multiprocessing.managers import ListProxy
 import queue
+import time
+from typing import Optional
+from config_server import ServerConfig as Config
 from .pipeline import TaskPipeline
+from .scheduler import TaskScheduler, BATCH
+from .audio import task_duration
+from ..audio_arena import AudioArena
+from ..metrics import worker_metrics
 from ..state import WorkerState
 from .gpu_boost import GpuBoostManager
 from . import logger
 
 
-class TaskBuffer:
-    """按 task_id 分组缓冲，支持跨 session 轮转出队。"""
-    def __init__(self, state: WorkerState):
-        self.state = state
-        self._buffers: OrderedDict[str, deque] = OrderedDict()
-
-    def enqueue(self, task):
-        """将任务放入对应 task_id 的缓冲尾部（同 session 内 FIFO）。
-        首次遇到新 task_id 时预创建 session。"""
-        tid = task.task_id
-        if tid not in self._buffers:
-            self._buffers[tid] = deque()
-            self.state.get_session(tid, task.socket_id, task.type)
-        self._buffers[tid].append(task)
-
-    def pop(self):
-        """取出最新 session 的下一个任务。没有待处理任务时返回 None。"""
-        if not self._buffers:
-            return None
-
-        tid, buf = next(reversed(self._buffers.items()))
-        task = buf.popleft()
-
-        if not buf:
-            del self._buffers[tid]
-
-        return task
-
-    def cleanup_tasks(self):
-        """清理已断开连接的 session 的缓冲任务。"""
-        for tid in list(self._buffers):
-            if tid not in self.state.sessions:
-                logger.debug(f"清理断开连接的 session: {tid[:8]}")
-                del self._buffers[tid]
-
-    @property
-    def is_empty(self) -> bool:
-        return len(self._buffers) == 0
-
-
 class TaskHandler:
     """
     任务处理器
 
     协调输入输出队列与识别引擎之间的任务流。
-    支持跨 socket 公平轮转调度。
+    按优先级类别与截止时间调度缓冲的任务。
     """
-    def __init__(self, queue_in: Queue, queue_out: Queue, sockets_id: ListProxy, state: WorkerState):
+    def __init__(self, queue_in: Queue, queue_out: Queue, queue_ctl: Optional[Queue], state: WorkerState,
+                 audio_arena: Optional[AudioArena] = None, queue_metrics: Optional[Queue] = None):
         self.queue_in = queue_in
         self.queue_out = queue_out
-        self.sockets_id = sockets_id
+        self.queue_ctl = queue_ctl
         self.state = state
+        self.audio_arena = audio_arena
+        self.queue_metrics = queue_metrics
+        self._metrics_time = 0.0
+        self._stopping = False
+        self.decode_rate = 0.0          # 实测识别耗时 / 音频时长（滑动平均），用于限制合批大小
 
         self.recognizer = None
         self.punc_model = None
         self.aligner = None
         self.pipeline = None
 
-        self.buffer = TaskBuffer(state)
+        self.scheduler = TaskScheduler(state)
         self.gpu_boost = GpuBoostManager(state)
 
     def set_engine(self, recognizer, punc_model=None, aligner=None):
@@ -84,42 +55,123 @@ class TaskHandler:
         self.recognizer = recognizer
         self.punc_model = punc_model
         self.aligner = aligner
-        self.pipeline = TaskPipeline(recognizer, punc_model, aligner, self.state)
+        self.pipeline = TaskPipeline(recognizer, punc_model, aligner, self.state, on_partial=self.queue_out.put)
 
     def drain_queue(self) -> bool:
-        """Drain 队列中所有任务到缓冲区。Returns: False = 退出信号。"""
+        """Drain 队列中所有任务到调度器。Returns: False = 退出信号。"""
+        self.sync_sockets()
         while True:
             # 获取任务
             try:
-                if self.buffer.is_empty:
+                if self.scheduler.is_empty:
                     task = self.queue_in.get(timeout=1)
                 else:
                     task = self.queue_in.get(timeout=0.02)
             except queue.Empty:
-                if self.buffer.is_empty:
+                if self.scheduler.is_empty:
+                    # 闲置时也处理断开消息，及时释放已关闭连接的 session
+                    self.sync_sockets()
                     self.cleanup_engines()
+                    self.publish_metrics()
                     continue
                 else:
                     return True
             except InterruptedError:
                 continue
             
-            # 判断退出信号
-            if task is None:
+            if not self.accept(task):
                 return False
 
-            # 跳过已断开连接客户端的任务
-            if task.socket_id not in self.sockets_id:
-                logger.debug(f"跳过断连客户端任务: {task.task_id[:8]}")
+    def accept(self, task) -> bool:
+        """接收一个出队的任务放入调度器。Returns: False = 退出信号。"""
+        if task is None:
+            self._stopping = True
+            return False
+
+        # 跳过已断开连接客户端的任务
+        if task.socket_id in self.state.closed_sockets:
+            logger.debug(f"跳过断连客户端任务: {task.task_id[:8]}")
+            self.release_audio(task)
+            return True
+
+        # 任务进入调度器
+        self.scheduler.enqueue(task)
+        return True
+
+    def collect_batch(self, first) -> list:
+        """
+        合批：以 first 为首，在 batch_window 时间窗内凑齐至多 max_batch_size 个同类片段，
+        调度器里不够时继续从任务队列收取。引擎不支持合批时直接返回 [first]。
+        批量类片段还按实测识别速度限制整批的预计耗时（batch_max_seconds），
+        使随后到达的麦克风片段最多等待这么久。
+        """
+        limit = self.recognizer.max_batch_size if self.recognizer else 1
+        batch = [first]
+        priority_class = self.scheduler.priority_class(first)
+        if limit > 1 and priority_class == BATCH and Config.batch_max_seconds and self.decode_rate:
+            expected = self.decode_rate * task_duration(first)
+            limit = min(limit, max(1, int(Config.batch_max_seconds / expected))) if expected else limit
+        if limit <= 1:
+            return batch
+
+        t_end = time.monotonic() + Config.batch_window
+        while len(batch) < limit:
+            task = self.scheduler.pop(priority_class)
+            if task is not None:
+                batch.append(task)
                 continue
+            remain = t_end - time.monotonic()
+            if remain <= 0 or self._stopping:
+                break
+            try:
+                self.accept(self.queue_in.get(timeout=remain))
+            except queue.Empty:
+                break
+        return batch
+
+    def sync_sockets(self):
+        """
+        非阻塞地读取连接控制消息，更新本地连接表，
+        并清理新断开 socket 的缓冲任务和 session。
+
+        控制消息与任务走不同队列，任务可能先于 connect 消息到达；
+        因此只丢弃明确已断开的 socket 的任务，未知 socket 一律放行。
+        """
+        if self.queue_ctl is None:
+            return
+        closed = []
+        while True:
+            try:
+                event, socket_id = self.queue_ctl.get_nowait()
+            except queue.Empty:
+                break
+            if event == 'connect':
+                self.state.connect_socket(socket_id)
+            elif event == 'disconnect':
+                self.state.disconnect_socket(socket_id)
+                closed.append(socket_id)
+        if not closed:
+            return
 
-            # 任务进入缓冲区
-            self.buffer.enqueue(task)
+        self.state.cleanup_sessions(closed)
+        for task in self.scheduler.cleanup_tasks():
+            self.release_audio(task)
 
-    def cleanup(self):
-        """清理断连 socket 的缓冲任务和 session。"""
-        self.state.cleanup_sessions(self.sockets_id)
-        self.buffer.cleanup_tasks()
+    def release_audio(self, task):
+        """归还任务占用的共享内存槽位（音频内联传输的任务无需处理）。"""
+        if task.shm_offset >= 0 and self.audio_arena is not None:
+            self.audio_arena.release(task.shm_offset, task.shm_length)
+            task.shm_offset = -1
+
+    def publish_metrics(self):
+        """按 metrics_interval 节流，向主进程上报一份指标快照（未开启指标导出时不做任何事）。"""
+        if self.queue_metrics is None:
+            return
+        now = time.monotonic()
+        if now - self._metrics_time < Config.metrics_interval:
+            return
+        self._metrics_time = now
+        self.queue_metrics.put(worker_metrics.snapshot(len(self.state.sessions), self.scheduler.sizes()))
 
     def cleanup_engines(self):
         """闲置资源清理：对齐器卸载 + GPU 加速取消。"""
@@ -131,23 +183,105 @@ class TaskHandler:
         """处理命令任务。"""
         self.gpu_boost.handle_command(task)
 
-    def handle_audio_task(self, task):
-        """处理音频识别任务。"""
-        result = self.pipeline.process(task)
+    def handle_audio_tasks(self, tasks):
+        """
+        处理一批音频识别任务（通常只有一个）。
+
+        引擎支持连续批处理时，识别中途新到达的音频片段也加入本批（见 _admitter），
+        每个片段完成即输出结果，不等待整批结束。
+        """
+        tasks = list(tasks)
+        emitted = set()         # 已输出结果的片段 (id)
+        admit = self._admitter(tasks, emitted) if self.recognizer and self.recognizer.continuous_batching else None
+        try:
+            # 共享内存传输：按描述符零拷贝取出音频，处理完毕后归还槽位
+            for task in tasks:
+                if task.shm_offset >= 0:
+                    task.data = self.audio_arena.view(task.shm_offset, task.shm_length)
+            t = time.perf_counter()
+            self._process(tasks, emitted, admit)
+            duration = sum(task_duration(task) for task in tasks)
+            if duration > 0:
+                rate = (time.perf_counter() - t) / duration
+                self.decode_rate = rate if not self.decode_rate else 0.7 * self.decode_rate + 0.3 * rate
+        finally:
+            for task in tasks:
+                self.release_audio(task)
+
+    def _emit(self, task, result):
+        """输出一个片段的结果并归还其音频槽位；最终片段输出后结束 session。"""
+        self.release_audio(task)
+        if result is None:
+            # 出错的片段没有结果；最终片段出错时同样结束其 session
+            if task.is_final:
+                self.state.sessions.pop(task.task_id, None)
+            return
         self.queue_out.put(result)
         if result.is_final:
             self.state.sessions.pop(task.task_id, None)
 
+    def _admitter(self, tasks: list, emitted: set):
+        """
+        连续批处理的接纳回调：非阻塞地收取新到达的任务与连接消息，按优先级取出一个音频片段追加到 tasks。
+        同一 session 的前一个片段尚未输出时不接纳其后续片段；有命令等待时停止接纳，
+        使本批尽快结束、命令得以执行。没有可接纳的片段或收到退出信号时返回 None。
+        """
+        def admit():
+            self.sync_sockets()
+            while not self._stopping:
+                try:
+                    task = self.queue_in.get_nowait()
+                except queue.Empty:
+                    break
+                self.accept(task)
+            if self._stopping or self.scheduler.has_commands:
+                return None
+            busy = {task.task_id for task in tasks if id(task) not in emitted}
+            task = self.scheduler.pop_audio(skip=busy)
+            if task is not None:
+                if task.shm_offset >= 0:
+                    task.data = self.audio_arena.view(task.shm_offset, task.shm_length)
+                tasks.append(task)
+            return task
+        return admit
+
+    def _process(self, tasks: list, emitted: set, admit=None):
+        """
+        识别一批片段，每个片段完成即输出，出错的片段结果为 None（异常已由流水线记录）。
+        合批识别出错时逐个重试尚未输出的片段，使异常只影响出错的片段，同批其他 session 照常收到结果。
+        emitted 记录已输出的片段 (id)，接纳回调据此判断 session 是否仍有片段在识别中。
+        """
+        def on_result(task, result):
+            emitted.add(id(task))
+            self._emit(task, result)
+
+        try:
+            self.pipeline.process_batch(tasks, admit=admit, on_result=on_result)
+            return
+        except Exception:
+            pending = [task for task in tasks if id(task) not in emitted]
+            if len(tasks) == 1:
+                for task in pending:
+                    self._emit(task, None)
+                return
+        logger.warning(f"合批识别出错，逐个重试 {len(pending)} 个片段")
+        for task in pending:
+            try:
+                result = self.pipeline.process_batch([task])[0]
+            except Exception:
+                result = None
+            self._emit(task, result)
+
     def loop(self):
-        """核心任务循环：drain 队列 → 清理断连 → 轮转执行一个。"""
-        logger.info("TaskHandler 开始工作循环 (公平调度)")
+        """核心任务循环：drain 队列 → 清理断连 → 按优先级执行一个（或合批执行一组同类片段）。"""
+        logger.info("TaskHandler 开始工作循环 (优先级调度)")
 
         while True:
             try:
                 if not self.drain_queue():
                     break
 
-                task = self.buffer.pop()
+                task = self.scheduler.pop()
                 if task is None:
                     continue
 
@@ -155,9 +289,12 @@ class TaskHandler:
                 if task.type == 'cmd':
                     self.handle_command_task(task)
                 else:
-                    self.handle_audio_task(task)
+                    self.handle_audio_tasks(self.collect_batch(task))
 
-                self.cleanup()
+                self.sync_sockets()
+                self.publish_metrics()
+                if self._stopping:
+                    break
             except InterruptedError:
                 continue
             except Exception as e:
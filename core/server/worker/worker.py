@@ -11,12 +11,13 @@ import sys
 import signal
 import atexit
 from multiprocessing import Queue
-from multiprocessing.managers import ListProxy
 from platform import system
+from typing import Optional
 
 from .model_loader import ModelLoader
 from .task_handler import TaskHandler
 from ..state import WorkerState
+from ..audio_arena import AudioArena
 from . import logger
 
 
@@ -26,13 +27,14 @@ class RecognizerWorker:
     
     统一调度模型加载器与任务处理器，负责识别进程的完整运行。
     """
-    def __init__(self, queue_in: Queue, queue_out: Queue, sockets_id: ListProxy, stdin_fn: int = None):
+    def __init__(self, queue_in: Queue, queue_out: Queue, queue_ctl: Queue, stdin_fn: int = None,
+                 audio_arena: Optional[AudioArena] = None, queue_metrics: Optional[Queue] = None):
         # 1. 初始化核心状态
         self.state = WorkerState()
         
         # 2. 初始化核心组件 (注入 state)
         self.loader = ModelLoader()
-        self.handler = TaskHandler(queue_in, queue_out, sockets_id, self.state)
+        self.handler = TaskHandler(queue_in, queue_out, queue_ctl, self.state, audio_arena, queue_metrics)
         
         # 3. 状态追踪
         self.stdin_fn = stdin_fn
@@ -113,6 +115,8 @@ class RecognizerWorker:
 
         logger.info("正在停止 Worker 并回收资源...")
         self.loader.cleanup()
+        if self.handler.audio_arena is not None:
+            self.handler.audio_arena.close()
         logger.info("Worker 资源已完成回收")
 
 
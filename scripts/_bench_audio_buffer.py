@@ -0,0 +1,85 @@
+# coding: utf-8
+"""
+ws_recv 音频缓冲微基准：bytes 拼接 vs AudioRingBuffer。
+
+模拟文件转录上行：按 1 分钟/块连续追加（与 FileTranscriber 一致），
+每次追加后按 seg_duration / seg_overlap 切段并前移，直到收尾。
+只测缓冲区本身的追加、切段与前移，不含 base64 / 识别进程。
+
+用法：
+    python scripts/_bench_audio_buffer.py [总时长分钟,默认120] [段长秒,默认60] [重叠秒,默认4] [块长秒,默认60]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.constants import AudioFormat
+from core.server.connection.audio_buffer import AudioRingBuffer
+
+
+def run_bytes(chunks, seg_duration, seg_overlap):
+    """旧实现：cache.chunks += data / cache.chunks[stride_bytes:]"""
+    threshold = AudioFormat.seconds_to_bytes(seg_duration + seg_overlap * 2)
+    segment_bytes = AudioFormat.seconds_to_bytes(seg_duration + seg_overlap)
+    stride_bytes = AudioFormat.seconds_to_bytes(seg_duration)
+    chunks_buf = b''
+    segment, segments = b'', 0
+    for data in chunks:
+        chunks_buf += data
+        while len(chunks_buf) >= threshold:
+            segment = chunks_buf[:segment_bytes]
+            chunks_buf = chunks_buf[stride_bytes:]
+            segments += 1
+    final = chunks_buf
+    return segments + 1, len(segment) + len(final)
+
+
+def run_ring(chunks, seg_duration, seg_overlap):
+    """新实现：AudioRingBuffer.append / peek / advance"""
+    threshold = AudioFormat.seconds_to_bytes(seg_duration + seg_overlap * 2)
+    segment_bytes = AudioFormat.seconds_to_bytes(seg_duration + seg_overlap)
+    stride_bytes = AudioFormat.seconds_to_bytes(seg_duration)
+    buffer = AudioRingBuffer()
+    segment, segments = b'', 0
+    for data in chunks:
+        buffer.append(data)
+        while buffer.nbytes >= threshold:
+            segment = bytes(buffer.peek(segment_bytes))   # 与 ws_recv 一致：提交时复制一次
+            buffer.advance(stride_bytes)
+            segments += 1
+    final = bytes(buffer.peek())
+    return segments + 1, len(segment) + len(final)
+
+
+def bench(name, fn, chunks, seg_duration, seg_overlap):
+    tracemalloc.start()
+    t = time.perf_counter()
+    segments, check = fn(chunks, seg_duration, seg_overlap)
+    elapsed = time.perf_counter() - t
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"[bench] {name:<6} 耗时 {elapsed * 1000:8.1f} ms   片段 {segments:4d}   峰值内存 {peak / 2**20:7.1f} MiB")
+    return segments, check
+
+
+def main():
+    total_min = float(sys.argv[1]) if len(sys.argv) > 1 else 120.0
+    seg_duration = float(sys.argv[2]) if len(sys.argv) > 2 else 60.0
+    seg_overlap = float(sys.argv[3]) if len(sys.argv) > 3 else 4.0
+    chunk_sec = float(sys.argv[4]) if len(sys.argv) > 4 else 60.0
+
+    chunk = os.urandom(AudioFormat.seconds_to_bytes(chunk_sec))
+    chunks = [chunk] * int(total_min * 60 / chunk_sec)
+    print(f"[bench] 上行 {total_min:.0f} 分钟，{len(chunks)} 块 × {chunk_sec:.0f}s，"
+          f"段长 {seg_duration:.0f}s，重叠 {seg_overlap:.0f}s\n")
+
+    res_bytes = bench("bytes", run_bytes, chunks, seg_duration, seg_overlap)
+    res_ring = bench("ring", run_ring, chunks, seg_duration, seg_overlap)
+    assert res_bytes == res_ring, f"切段结果不一致: {res_bytes} != {res_ring}"
+
+
+if __name__ == '__main__':
+    main()
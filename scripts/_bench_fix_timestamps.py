@@ -0,0 +1,72 @@
+# coding: utf-8
+"""
+对齐器时间戳单调修复微基准：O(n²) DP vs 耐心排序 O(n log n)。
+
+模拟长文件片段的对齐输出：单调递增的时间戳中混入一定比例的离群点，
+对比两种最长非递减子序列实现的耗时，并校验选出的子序列一致。
+O(n²) 实现在 50k 点时需数分钟，默认只跑到 5k，加 --full 才跑全部。
+
+用法：
+    python scripts/_bench_fix_timestamps.py [--full] [离群比例,默认0.05]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.server.engines.force_aligner_gguf.inference.aligner import AlignerProcessor
+
+
+def reference_lis(data_list):
+    """旧实现：O(n²) DP"""
+    n = len(data_list)
+    dp, parent = [1] * n, [-1] * n
+    for i in range(1, n):
+        for j in range(i):
+            if data_list[j] <= data_list[i] and dp[j] + 1 > dp[i]:
+                dp[i] = dp[j] + 1; parent[i] = j
+    max_idx = dp.index(max(dp))
+    lis_indices, idx = [], max_idx
+    while idx != -1: lis_indices.append(idx); idx = parent[idx]
+    lis_indices.reverse()
+    return lis_indices
+
+
+def make_timestamps(n, outlier_ratio, rng):
+    """单调递增（每个 token 约 80ms）+ 离群点"""
+    ts = [i * 80 + rng.randint(0, 40) for i in range(n)]
+    for _ in range(int(n * outlier_ratio)):
+        ts[rng.randrange(n)] = rng.randint(0, n * 80)
+    return ts
+
+
+def bench(name, fn, data):
+    t = time.perf_counter()
+    res = fn(data)
+    elapsed = time.perf_counter() - t
+    print(f"[bench]   {name:<8} 耗时 {elapsed * 1000:10.1f} ms   子序列长度 {len(res)}")
+    return res
+
+
+def main():
+    full = '--full' in sys.argv
+    args = [a for a in sys.argv[1:] if a != '--full']
+    outlier_ratio = float(args[0]) if args else 0.05
+    rng = random.Random(0)
+
+    for n in (500, 5_000, 50_000):
+        data = make_timestamps(n, outlier_ratio, rng)
+        print(f"[bench] {n} 个时间戳，离群比例 {outlier_ratio:.0%}")
+        res_new = bench("patience", AlignerProcessor.longest_non_decreasing, data)
+        if n <= 5_000 or full:
+            res_old = bench("dp", reference_lis, data)
+            assert res_old == res_new, "子序列不一致"
+        else:
+            print(f"[bench]   dp       跳过（加 --full 运行）")
+        print()
+
+
+if __name__ == '__main__':
+    main()
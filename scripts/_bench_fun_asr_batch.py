@@ -0,0 +1,87 @@
+# coding: utf-8
+"""
+Fun-ASR-Nano 多序列合批解码基准：并发 N 路片段，逐段 decode_stream 与合批 decode_streams 的吞吐对比。
+
+合批模式下 N 个片段各自编码、CTC 后，在同一 LLM 上下文的 N 个序列中同步生成（每步一次前向），
+报告音频秒数 / 墙钟秒数（越大越好）、LLM 生成 tokens/s 与加速比，
+并核对两种模式的文本是否一致（均以温度 0 贪婪解码）。
+
+需要 Fun-ASR-Nano-GGUF 模型文件与 16k 单声道音频；多个音频轮流分给各路。
+
+用法：
+    python scripts/_bench_fun_asr_batch.py 音频1.wav [音频2.wav ...] [--streams 1,2,4,8] [--rounds 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_server import FunASRNanoGGUFArgs
+from core.server.engines.factory import EngineFactory
+
+SAMPLE_RATE = 16000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Fun-ASR-Nano 多序列合批解码基准')
+    parser.add_argument('audio', nargs='+', help='16k 单声道音频文件')
+    parser.add_argument('--streams', default='1,2,4,8', help='并发路数列表')
+    parser.add_argument('--rounds', type=int, default=2, help='每种配置重复次数，取最快一次')
+    return parser.parse_args()
+
+
+def load(path: str):
+    import soundfile as sf
+    audio, sr = sf.read(path, dtype='float32')
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sr != SAMPLE_RATE:
+        sys.exit(f'{path}: 需要 {SAMPLE_RATE}Hz 音频，实际 {sr}Hz')
+    return audio
+
+
+def run(pipeline, clips, batched: bool):
+    streams = []
+    for clip in clips:
+        stream = pipeline.create_stream()
+        stream.accept_waveform(SAMPLE_RATE, clip)
+        streams.append(stream)
+    t = time.perf_counter()
+    if batched:
+        results = pipeline.decode_streams(streams, temperature=0.0)
+    else:
+        results = [pipeline.decode_stream(s, verbose=False, temperature=0.0) for s in streams]
+    return time.perf_counter() - t, results
+
+
+def main():
+    args = parse_args()
+    counts = [int(x) for x in args.streams.split(',')]
+    if not os.path.exists(FunASRNanoGGUFArgs.decoder_gguf_path):
+        sys.exit(f'未找到 Fun-ASR-Nano 模型：{FunASRNanoGGUFArgs.decoder_gguf_path}')
+
+    FunASRNanoGGUFArgs.batch_size = max(counts)
+    FunASRNanoGGUFArgs.llm_bypass = False
+    FunASRNanoGGUFArgs.speculative = False
+    engine = EngineFactory.create_asr_engine('fun_asr_nano')
+    pipeline = engine.pipeline
+    audio = [load(p) for p in args.audio]
+    run(pipeline, audio[:1], batched=False)                     # 预热
+
+    print(f'{"路数":>4} {"逐段 s":>8} {"合批 s":>8} {"逐段 x实时":>10} {"合批 x实时":>10} '
+          f'{"合批 tok/s":>10} {"加速":>6}  文本一致')
+    for n in counts:
+        clips = [audio[i % len(audio)] for i in range(n)]
+        total = sum(len(c) for c in clips) / SAMPLE_RATE
+        seq = min((run(pipeline, clips, False) for _ in range(args.rounds)), key=lambda r: r[0])
+        bat = min((run(pipeline, clips, True) for _ in range(args.rounds)), key=lambda r: r[0])
+        n_gen = sum(r.n_gen for r in bat[1])
+        same = [r.text for r in seq[1]] == [r.text for r in bat[1]]
+        print(f'{n:>4} {seq[0]:>8.2f} {bat[0]:>8.2f} {total / seq[0]:>10.1f} {total / bat[0]:>10.1f} '
+              f'{n_gen / bat[0]:>10.1f} {seq[0] / bat[0]:>6.2f}  {"是" if same else "否"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# coding: utf-8
+"""
+Fun-ASR-Nano LLM 解码基准：逐 Token 生成、投机解码（CTC 草稿）与置信度跳过 LLM 的耗时对比。
+
+对每个音频分别以三种模式识别，报告 LLM 阶段耗时（prepare + inject + generate）、
+生成速度（tokens/s）、草稿接受率、跳过 LLM 的比例，并核对投机解码与逐 Token 生成的文本是否一致
+（两者都以温度 0 贪婪解码，以排除采样随机性）。
+
+需要 Fun-ASR-Nano-GGUF 模型文件与 16k 单声道音频（短句听写最能体现差异）。
+
+用法：
+    python scripts/_bench_fun_asr_llm.py 音频1.wav [音频2.wav ...] [--draft-max 8] [--rounds 2]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_server import FunASRNanoGGUFArgs
+from core.server.engines.factory import EngineFactory
+
+SAMPLE_RATE = 16000
+MODES = ('sequential', 'speculative', 'bypass')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Fun-ASR-Nano LLM 解码基准')
+    parser.add_argument('audio', nargs='+', help='16k 单声道音频文件')
+    parser.add_argument('--draft-max', type=int, default=8, help='每次验证的最大草稿 Token 数')
+    parser.add_argument('--rounds', type=int, default=2, help='每种模式重复次数，取最快一次')
+    return parser.parse_args()
+
+
+def load(path: str) -> np.ndarray:
+    import soundfile as sf
+    audio, sr = sf.read(path, dtype='float32')
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sr != SAMPLE_RATE:
+        sys.exit(f'{path}: 需要 {SAMPLE_RATE}Hz 音频，实际 {sr}Hz')
+    return audio
+
+
+def run(engine, audio: np.ndarray, mode: str):
+    config = engine.models.config
+    config.speculative = mode == 'speculative'
+    config.llm_bypass = mode == 'bypass'
+    stream = engine.pipeline.create_stream()
+    stream.accept_waveform(SAMPLE_RATE, audio)
+    return engine.pipeline.decode_stream(stream, verbose=False, temperature=0.0)
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(FunASRNanoGGUFArgs.decoder_gguf_path):
+        sys.exit(f'未找到 Fun-ASR-Nano 模型：{FunASRNanoGGUFArgs.decoder_gguf_path}')
+
+    FunASRNanoGGUFArgs.draft_max = args.draft_max
+    engine = EngineFactory.create_asr_engine('fun_asr_nano')
+    clips = [load(p) for p in args.audio]
+    run(engine, clips[0], 'sequential')                         # 预热
+
+    totals = {m: [0.0, 0, 0, 0, 0] for m in MODES}               # LLM 秒, 生成 token, 草稿, 接受, 跳过
+    same = 0
+    for clip in clips:
+        texts = {}
+        for mode in MODES:
+            res = min((run(engine, clip, mode) for _ in range(args.rounds)),
+                      key=lambda r: r.timings.prepare + r.timings.inject + r.timings.llm_generate)
+            t = res.timings
+            total = totals[mode]
+            total[0] += t.prepare + t.inject + t.llm_generate
+            total[1] += res.n_gen
+            total[2] += res.n_drafted
+            total[3] += res.n_accepted
+            total[4] += res.bypassed
+            texts[mode] = res.text
+        same += texts['sequential'] == texts['speculative']
+
+    print(f'{"模式":>12} {"LLM 总耗时 s":>12} {"tokens/s":>10} {"草稿接受率":>10} {"跳过 LLM":>8}')
+    for mode, (seconds, n_gen, drafted, accepted, bypassed) in totals.items():
+        rate = f'{accepted / drafted:.0%}' if drafted else '-'
+        tps = f'{n_gen / seconds:.1f}' if seconds > 0 else '-'
+        print(f'{mode:>12} {seconds:>12.3f} {tps:>10} {rate:>10} {bypassed:>4}/{len(clips)}')
+    print(f'投机解码与逐 Token 生成文本一致：{same}/{len(clips)}')
+
+
+if __name__ == '__main__':
+    main()
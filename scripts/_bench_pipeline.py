@@ -0,0 +1,267 @@
+# coding: utf-8
+"""
+服务端流水线基准：合成引擎 + 模拟客户端，测量模型之外的开销。
+
+在本进程内拉起真实的 ProcessManager（识别进程）与 SocketManager（WebSocket 服务），
+识别引擎换成 synthetic（不需要模型文件），再用模拟的麦克风、文件客户端并发连接，
+走完整的 ws_recv → queue_in → TaskHandler → TaskPipeline → queue_out → ws_send 路径。
+
+统计的分段耗时（均为 time.time()，同机各进程时钟一致）：
+    recv   : 客户端发出最终数据包 → ws_recv 提交最终片段（time_submit）
+    worker : 片段提交 → 识别进程完成（time_complete，含排队、引擎耗时、拼接与格式化）
+    send   : 识别完成 → 客户端收到结果（queue_out、ws_send、网络）
+    e2e    : 客户端发出最终数据包 → 收到最终结果（麦克风即松开按键到出字的延迟）
+    first  : 客户端发出最终数据包 → 收到其后第一条消息（临时结果或识别结果，--partial 时即首字延迟）
+引擎耗时由合成引擎的耗时曲线决定（CW_SYNTH_LATENCY_BASE / CW_SYNTH_LATENCY_PER_SEC），
+worker 减去它即为流水线自身开销。各阶段按来源（mic / file）分开统计。
+
+用法：
+    python scripts/_bench_pipeline.py [--mic N] [--mic-rounds N] [--mic-seconds S]
+                                      [--file N] [--file-seconds S] [--speed X]
+                                      [--workers N] [--batch N] [--continuous] [--vad] [--mic-eager] [--silence F] [--silence-skip]
+                                      [--json] [--no-delta] [--partial]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import sys
+import time
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='服务端流水线基准（合成引擎）')
+    parser.add_argument('--mic', type=int, default=4, help='并发麦克风客户端数')
+    parser.add_argument('--mic-rounds', type=int, default=5, help='每个麦克风客户端的说话次数')
+    parser.add_argument('--mic-seconds', type=float, default=5.0, help='每次说话时长（秒）')
+    parser.add_argument('--mic-chunk', type=float, default=0.1, help='麦克风数据包时长（秒）')
+    parser.add_argument('--file', type=int, default=2, help='并发文件客户端数')
+    parser.add_argument('--file-seconds', type=float, default=600.0, help='每个文件时长（秒）')
+    parser.add_argument('--speed', type=float, default=10.0, help='麦克风发送速度（实时倍数）')
+    parser.add_argument('--workers', type=int, default=1, help='识别进程数')
+    parser.add_argument('--batch', type=int, default=1, help='识别进程合批上限（CW_ASR_BATCH_SIZE）')
+    parser.add_argument('--continuous', action='store_true', help='合批时模拟连续批处理（CW_SYNTH_CONTINUOUS）')
+    parser.add_argument('--vad', action='store_true', help='文件任务按停顿切分（CW_FILE_VAD）')
+    parser.add_argument('--mic-eager', action='store_true', help='麦克风在停顿处提前切分（CW_MIC_EAGER）')
+    parser.add_argument('--silence', type=float, default=0.0, help='文件中静音（整分钟的空白）占比')
+    parser.add_argument('--silence-skip', action='store_true', help='静音片段跳过推理（CW_SILENCE_SKIP）')
+    parser.add_argument('--json', action='store_true', help='使用 base64 JSON 音频消息而非二进制帧')
+    parser.add_argument('--no-delta', action='store_true', help='文件客户端不请求增量结果')
+    parser.add_argument('--partial', action='store_true', help='麦克风客户端请求逐 Token 的临时结果')
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# 必须在导入配置之前设置：识别进程（spawn 平台）重新导入配置时同样生效
+os.environ['CW_MODEL_TYPE'] = 'synthetic'
+os.environ['CW_ADDR'] = '127.0.0.1'
+os.environ['CW_PORT'] = str(_free_port())
+os.environ['CW_NUM_WORKERS'] = str(args.workers)
+os.environ['CW_ASR_BATCH_SIZE'] = str(args.batch)
+os.environ['CW_SYNTH_CONTINUOUS'] = '1' if args.continuous else ''
+os.environ['CW_FILE_VAD'] = '1' if args.vad else ''
+os.environ['CW_MIC_EAGER'] = '1' if args.mic_eager else ''
+os.environ['CW_SILENCE_SKIP'] = '1' if args.silence_skip else ''
+
+import websockets
+
+from config_server import ServerConfig as Config, SyntheticArgs
+from config_client import ClientConfig
+from core.protocol import (AudioMessage, AudioFrame, RecognitionMessage, PartialMessage,
+                           AUDIO_FRAME_SUBPROTOCOL, parse_server_message)
+from core.server.state import ServerState, console
+from core.server.worker.process_manager import ProcessManager
+from core.server.connection.server_manager import SocketManager
+
+SAMPLE_RATE = 16000
+
+
+class BenchApp:
+    """CapsWriterServer 的最小替身：不切换目录、不注册信号、不开托盘"""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.state = ServerState(app=self)
+        self.process_manager = ProcessManager(self)
+        self.socket_manager = SocketManager(self)
+        self.is_alive = True
+
+    def stop(self):
+        if not self.is_alive: return
+        self.is_alive = False
+        self.state.queue_out.put(None)
+        self.socket_manager.stop()
+        self.process_manager.stop()
+
+
+class Stats:
+    def __init__(self):
+        self.stages = {f'{stage}/{source}': [] for stage in ('recv', 'worker', 'send', 'e2e', 'first')
+                       for source in ('mic', 'file')}
+        self.results = 0
+        self.partials = 0
+        self.audio_seconds = 0.0
+
+    def add(self, stage, source, value):
+        self.stages[f'{stage}/{source}'].append(value * 1000)
+
+
+def make_audio(seconds: float, seed: int) -> np.ndarray:
+    """确定性噪声音频（合成引擎按采样值生成 token），每 4~9 秒一个 0.5 秒停顿，模拟句间停顿"""
+    rng = np.random.default_rng(seed)
+    audio = rng.standard_normal(int(seconds * SAMPLE_RATE)) * 0.1
+    t = rng.uniform(4, 9)
+    while t < seconds:
+        s = int(t * SAMPLE_RATE)
+        audio[s:s + SAMPLE_RATE // 2] *= 0.01
+        t += rng.uniform(4, 9)
+    return audio.astype(np.float32)
+
+
+def add_dead_air(audio: np.ndarray, fraction: float) -> np.ndarray:
+    """按比例把若干整分钟替换为底噪（模拟会议录音中的长时间空白）"""
+    minute = 60 * SAMPLE_RATE
+    n = len(audio) // minute
+    for i in range(n):
+        if int((i + 1) * fraction) > int(i * fraction):
+            audio[i * minute:(i + 1) * minute] *= 1e-4
+    return audio
+
+
+async def run_client(uri, source, audio, chunk_sec, interval, seg_duration, seg_overlap, delta, partial, stats):
+    """模拟客户端：按块发送一段音频，收取结果直至最终结果"""
+    subprotocols = [] if args.json else [AUDIO_FRAME_SUBPROTOCOL]
+    async with websockets.connect(uri, subprotocols=subprotocols or None, max_size=None) as ws:
+        binary = ws.subprotocol == AUDIO_FRAME_SUBPROTOCOL
+        task_id = str(uuid.uuid1())
+        time_start = time.time()
+        fields = dict(task_id=task_id, source=source, time_start=time_start,
+                      seg_duration=seg_duration, seg_overlap=seg_overlap, delta=delta, partial=partial)
+
+        def build(pcm: bytes, is_final: bool):
+            if binary:
+                return AudioFrame(pcm=pcm, is_final=is_final, **fields).to_bytes()
+            return AudioMessage(data=base64.b64encode(pcm).decode(), is_final=is_final, **fields).to_json()
+
+        received = []           # 各消息的接收时间
+
+        async def receive():
+            transcript = RecognitionMessage(task_id=task_id, is_final=False, duration=0.0,
+                                            time_start=0.0, time_submit=0.0, time_complete=0.0, text='')
+            async for raw in ws:
+                t_recv = time.time()
+                received.append(t_recv)
+                msg = parse_server_message(json.loads(raw))
+                if isinstance(msg, PartialMessage):
+                    stats.partials += 1
+                    continue
+                transcript = transcript.apply(msg)
+                stats.results += 1
+                stats.add('worker', source, msg.time_complete - msg.time_submit)
+                stats.add('send', source, t_recv - msg.time_complete)
+                if msg.is_final:
+                    return msg, t_recv
+
+        receiver = asyncio.create_task(receive())
+        step = int(chunk_sec * SAMPLE_RATE)
+        for i in range(0, len(audio), step):
+            await ws.send(build(audio[i:i + step].tobytes(), False))
+            if interval:
+                await asyncio.sleep(interval)
+        t_final = time.time()
+        await ws.send(build(b'', True))
+        final, t_recv = await receiver
+        stats.add('recv', source, final.time_submit - t_final)
+        stats.add('e2e', source, t_recv - t_final)
+        stats.add('first', source, next(t for t in received if t >= t_final) - t_final)
+        stats.audio_seconds += len(audio) / SAMPLE_RATE
+
+
+async def run_clients(uri, stats):
+    async def mic_client(i):
+        for r in range(args.mic_rounds):
+            audio = make_audio(args.mic_seconds, seed=i * 1000 + r)
+            await run_client(uri, 'mic', audio, args.mic_chunk, args.mic_chunk / args.speed,
+                             ClientConfig.mic_seg_duration, ClientConfig.mic_seg_overlap, False,
+                             args.partial, stats)
+
+    async def file_client(i):
+        audio = add_dead_air(make_audio(args.file_seconds, seed=10**6 + i), args.silence)
+        await run_client(uri, 'file', audio, 60.0, 0,
+                         ClientConfig.file_seg_duration, ClientConfig.file_seg_overlap,
+                         not args.no_delta, False, stats)
+
+    await asyncio.gather(*[mic_client(i) for i in range(args.mic)],
+                         *[file_client(i) for i in range(args.file)])
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    """峰值常驻内存（Windows 无 resource 模块，返回 nan）"""
+    try:
+        import resource
+    except ImportError:
+        return float('nan')
+    rss = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == 'darwin' else rss / 1024
+
+
+def report(stats, wall):
+    print(f"\n[bench] 耗时 {wall:.2f}s，音频 {stats.audio_seconds:.0f}s，"
+          f"吞吐 {stats.audio_seconds / wall:.1f}x 实时，结果消息 {stats.results} 条（{stats.results / wall:.1f}/s），"
+          f"临时结果 {stats.partials} 条")
+    print(f"[bench] 引擎耗时曲线：{SyntheticArgs.latency_base}s + {SyntheticArgs.latency_per_second}s/秒音频"
+          f"（抖动 ±{SyntheticArgs.latency_jitter:.0%}），识别进程 {Config.num_workers} 个")
+    print(f"[bench] {'阶段':<12}{'样本':>6}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}  (ms)")
+    for stage, values in stats.stages.items():
+        if not values:
+            continue
+        p50, p90, p99 = np.percentile(values, [50, 90, 99])
+        print(f"[bench] {stage:<12}{len(values):>6}{p50:>10.1f}{p90:>10.1f}{p99:>10.1f}{max(values):>10.1f}")
+
+
+def main():
+    console.quiet = True        # 识别日志输出到控制台会干扰计时（fork 的子进程一并继承）
+    app = BenchApp()
+    app.process_manager.start()
+
+    uri = f"ws://{Config.addr}:{Config.port}"
+    server = app.loop.create_task(app.socket_manager.start())
+    stats = Stats()
+
+    async def bench():
+        # 等待服务就绪
+        for _ in range(100):
+            try:
+                async with websockets.connect(uri):
+                    break
+            except OSError:
+                await asyncio.sleep(0.05)
+        t = time.perf_counter()
+        await run_clients(uri, stats)
+        return time.perf_counter() - t
+
+    wall = app.loop.run_until_complete(bench())
+    app.stop()
+    app.loop.run_until_complete(server)
+
+    report(stats, wall)
+    print(f"[bench] 峰值内存：主进程 {peak_rss_mb():.0f} MiB，识别进程 {peak_rss_mb(children=True):.0f} MiB")
+
+
+if __name__ == '__main__':
+    main()
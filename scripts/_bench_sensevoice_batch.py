@@ -0,0 +1,107 @@
+# coding: utf-8
+"""
+SenseVoice 合批推理基准：并发 N 路文件片段，逐段 decode_stream 与合批 decode_streams 的吞吐对比。
+
+每路为一个文件任务片段（默认 68s，即 file_seg_duration + file_seg_overlap），
+逐段模式依次识别 N 个片段，合批模式以 batch_size=N 一次识别，报告
+音频秒数 / 墙钟秒数（越大越好）与加速比，并核对两种模式的文本是否一致。
+
+需要 SenseVoice 模型文件；不提供音频时使用带包络的噪声（只测吞吐，文本无意义）。
+导出的 Encoder 若为固定 batch=1，引擎会自动退回逐段识别，加速比约为 1。
+
+用法：
+    python scripts/_bench_sensevoice_batch.py [--audio 文件] [--streams 1,4,8,16]
+                                             [--seconds 68] [--rounds 2]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config_server import SenseVoiceArgs
+from core.server.engines.factory import EngineFactory
+
+SAMPLE_RATE = 16000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='SenseVoice 合批推理基准')
+    parser.add_argument('--audio', help='16k 单声道音频文件（可选）')
+    parser.add_argument('--streams', default='1,4,8,16', help='并发路数列表')
+    parser.add_argument('--seconds', type=float, default=68.0, help='每路片段时长（秒）')
+    parser.add_argument('--rounds', type=int, default=2, help='每种配置重复次数，取最快一次')
+    return parser.parse_args()
+
+
+def make_segments(n: int, seconds: float, audio: np.ndarray = None):
+    """从音频中错位截取 n 段；没有音频时生成带音节包络的噪声"""
+    length = int(seconds * SAMPLE_RATE)
+    rng = np.random.default_rng(0)
+    segments = []
+    for i in range(n):
+        if audio is not None:
+            start = (i * SAMPLE_RATE * 7) % max(len(audio) - length, 1)
+            seg = np.resize(audio[start:start + length], length)
+        else:
+            t = np.arange(length) / SAMPLE_RATE
+            envelope = 0.5 + 0.5 * np.sin(2 * np.pi * (3 + i * 0.1) * t)
+            seg = rng.standard_normal(length) * 0.05 * envelope
+        segments.append(seg.astype(np.float32))
+    return segments
+
+
+def run(engine, segments, batched: bool):
+    streams = []
+    for seg in segments:
+        stream = engine.create_stream()
+        stream.accept_waveform(SAMPLE_RATE, seg)
+        streams.append(stream)
+    t = time.perf_counter()
+    if batched:
+        engine.decode_streams(streams)
+    else:
+        for stream in streams:
+            engine.decode_stream(stream)
+    return time.perf_counter() - t, [s.result.text for s in streams]
+
+
+def main():
+    args = parse_args()
+    counts = [int(x) for x in args.streams.split(',')]
+
+    audio = None
+    if args.audio:
+        import soundfile as sf
+        audio, sr = sf.read(args.audio, dtype='float32')
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1)
+        if sr != SAMPLE_RATE:
+            sys.exit(f'需要 {SAMPLE_RATE}Hz 音频，实际 {sr}Hz')
+
+    if not os.path.exists(SenseVoiceArgs.encoder_path):
+        sys.exit(f'未找到 SenseVoice 模型：{SenseVoiceArgs.encoder_path}')
+
+    SenseVoiceArgs.batch_size = max(counts)
+    engine = EngineFactory.create_asr_engine('sensevoice')
+    if engine.max_batch_size == 1:
+        print('注意：Encoder 导出为固定 batch=1，合批模式将退回逐段识别')
+
+    run(engine, make_segments(1, 5.0, audio), batched=False)     # 预热
+
+    print(f'{"路数":>4} {"逐段 s":>8} {"合批 s":>8} {"逐段 x实时":>10} {"合批 x实时":>10} {"加速":>6}  文本一致')
+    for n in counts:
+        segments = make_segments(n, args.seconds, audio)
+        total = n * args.seconds
+        seq = min((run(engine, segments, False) for _ in range(args.rounds)), key=lambda r: r[0])
+        bat = min((run(engine, segments, True) for _ in range(args.rounds)), key=lambda r: r[0])
+        same = seq[1] == bat[1]
+        print(f'{n:>4} {seq[0]:>8.2f} {bat[0]:>8.2f} {total / seq[0]:>10.1f} {total / bat[0]:>10.1f} '
+              f'{seq[0] / bat[0]:>6.2f}  {"是" if same else "否"}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# coding: utf-8
+"""
+AudioArena 共享内存音频区测试。
+
+覆盖写入/读取/归还、空间不足回退、跨进程按描述符读取，
+以及 TaskHandler 在处理完或丢弃任务时归还槽位。
+"""
+import multiprocessing as mp
+import pickle
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from core.constants import AudioFormat
+from core.server.audio_arena import AudioArena
+from core.server.schema import Task
+
+
+@pytest.fixture
+def arena():
+    # 4 个 1 秒槽位
+    a = AudioArena.create(size_mb=4 * AudioFormat.BYTES_PER_SECOND / 2**20, slot_seconds=1.0)
+    yield a
+    a.close()
+
+
+def _audio(seconds, value=0.5):
+    return np.full(int(seconds * AudioFormat.SAMPLE_RATE), value, dtype=np.float32).tobytes()
+
+
+def test_write_view_release(arena):
+    data = _audio(1.5)
+    offset, length = arena.write(data)
+    assert length == len(data)
+    assert bytes(arena.view(offset, length)) == data
+    assert arena.free_slots == 2
+    arena.release(offset, length)
+    assert arena.free_slots == 4
+
+
+def test_full_arena_returns_none(arena):
+    assert arena.write(_audio(3.5)) is not None
+    assert arena.write(_audio(1.5)) is None     # 剩 0 个完整空位
+    assert arena.write(_audio(5.0)) is None     # 超过整个区域
+    assert arena.write(b'') is None
+
+
+def _child_read(arena, offset, length, out):
+    out.put(float(np.frombuffer(arena.view(offset, length), dtype=np.float32).sum()))
+    arena.release(offset, length)
+    arena.close()
+
+
+def test_cross_process_read_and_release(arena):
+    offset, length = arena.write(_audio(1.0, value=0.25))
+    assert isinstance(pickle.loads(pickle.dumps(arena)), AudioArena)
+    ctx = mp.get_context('spawn')
+    out = ctx.Queue()
+    p = ctx.Process(target=_child_read, args=(arena, offset, length, out))
+    p.start()
+    assert out.get(timeout=30) == pytest.approx(0.25 * AudioFormat.SAMPLE_RATE)
+    p.join(timeout=30)
+    assert arena.free_slots == 4
+
+
+def test_task_handler_releases_slots(arena):
+    from core.server.state import WorkerState
+    from core.server.worker.task_handler import TaskHandler
+
+    handler = TaskHandler(None, SimpleNamespace(put=lambda r: None), None, WorkerState(), arena)
+    seen = []
+    handler.pipeline = SimpleNamespace(
+        process_batch=lambda tasks, **kwargs: [seen.append(bytes(t.data)) or SimpleNamespace(is_final=False) for t in tasks])
+
+    data = _audio(2.0)
+    offset, length = arena.write(data)
+    task = Task(type='file', data=b'', offset=0, overlap=0, task_id='t', socket_id='s',
+                is_final=False, time_start=0, time_submit=0, shm_offset=offset, shm_length=length)
+    handler.handle_audio_tasks([task])
+    assert seen == [data]
+    assert arena.free_slots == 4
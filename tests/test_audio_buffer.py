@@ -0,0 +1,63 @@
+# coding: utf-8
+"""
+AudioRingBuffer 测试。
+
+以旧实现（bytes 拼接 + 切片）为参照，验证随机块长下切段结果逐字节一致，
+并覆盖扩容、搬移与不足一个采样点的残余字节。
+"""
+import random
+
+import numpy as np
+
+from core.server.connection.audio_buffer import AudioRingBuffer
+
+
+def test_append_peek_advance():
+    buf = AudioRingBuffer(capacity=8)
+    data = np.arange(6, dtype=np.float32)
+    buf.append(data.tobytes())
+    assert len(buf) == 6 and buf.nbytes == 24
+    np.testing.assert_array_equal(np.frombuffer(buf.peek(8), dtype=np.float32), [0, 1])
+    buf.advance(16)
+    np.testing.assert_array_equal(buf.samples(), [4, 5])
+
+
+def test_grows_and_compacts_without_losing_data():
+    buf = AudioRingBuffer(capacity=4)
+    expected = []
+    for i in range(50):
+        chunk = np.full(3, i, dtype=np.float32)
+        buf.append(chunk.tobytes())
+        expected.extend(chunk)
+        buf.advance(8)
+        expected = expected[2:]
+    np.testing.assert_array_equal(buf.samples(), expected)
+    assert buf.capacity < 50 * 3   # 有前移就会搬移复用，而不是无限增长
+
+
+def test_partial_sample_bytes_carried_over():
+    raw = np.arange(4, dtype=np.float32).tobytes()
+    buf = AudioRingBuffer()
+    buf.append(raw[:5])
+    assert len(buf) == 1
+    buf.append(raw[5:])
+    assert bytes(buf.peek()) == raw
+
+
+def test_matches_bytes_slicing():
+    rng = random.Random(0)
+    segment_bytes, stride_bytes, threshold = 4 * 170, 4 * 150, 4 * 190
+    old, old_segments = b'', []
+    buf, new_segments = AudioRingBuffer(capacity=16), []
+    for _ in range(300):
+        data = rng.randbytes(4 * rng.randint(0, 80))
+        old += data
+        while len(old) >= threshold:
+            old_segments.append(old[:segment_bytes])
+            old = old[stride_bytes:]
+        buf.append(data)
+        while buf.nbytes >= threshold:
+            new_segments.append(bytes(buf.peek(segment_bytes)))
+            buf.advance(stride_bytes)
+    assert new_segments == old_segments
+    assert bytes(buf.peek()) == old
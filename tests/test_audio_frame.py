@@ -0,0 +1,88 @@
+# coding: utf-8
+"""
+二进制音频帧协议测试。
+
+验证 AudioFrame 序列化往返、服务端 parse_message 对 JSON / 二进制两条路径
+解析出一致的 float32 音频、临时结果请求标志，以及子协议协商对旧客户端的兼容。
+"""
+import base64
+import json
+
+import numpy as np
+import pytest
+
+from core.protocol import (AudioMessage, AudioFrame, SampleFormat, AUDIO_FRAME_SUBPROTOCOL,
+                           PartialMessage, RecognitionMessage, parse_server_message)
+from core.server.connection.ws_recv import parse_message, select_subprotocol
+
+
+def _frame(**kwargs):
+    fields = dict(task_id="任务-1", source="file", pcm=b"", is_final=False,
+                  time_start=123.5, seg_duration=60.0, seg_overlap=4.0,
+                  context="热词：卡布斯", language="chinese")
+    fields.update(kwargs)
+    return AudioFrame(**fields)
+
+
+def test_roundtrip_preserves_fields():
+    pcm = np.arange(1600, dtype=np.float32).tobytes()
+    frame = _frame(pcm=pcm, is_final=True)
+    parsed = AudioFrame.from_bytes(frame.to_bytes())
+    assert parsed.task_id == frame.task_id
+    assert parsed.source == "file"
+    assert parsed.is_final is True
+    assert parsed.time_start == 123.5
+    assert (parsed.seg_duration, parsed.seg_overlap) == (60.0, 4.0)
+    assert parsed.context == frame.context
+    assert parsed.language == "chinese"
+    assert bytes(parsed.pcm) == pcm
+
+
+def test_mic_source_and_default_language():
+    parsed = AudioFrame.from_bytes(_frame(source="mic", language="").to_bytes())
+    assert parsed.source == "mic"
+    assert parsed.language == "auto"
+
+
+def test_partial_flag():
+    assert AudioFrame.from_bytes(_frame(partial=True, is_final=True).to_bytes()).partial is True
+    assert AudioFrame.from_bytes(_frame().to_bytes()).partial is False
+    msg = AudioMessage.from_dict({'task_id': 't', 'source': 'mic', 'data': '', 'is_final': False,
+                                  'time_start': 0.0, 'partial': True})
+    assert msg.partial is True
+
+
+def test_parse_server_message():
+    partial = parse_server_message(json.loads(PartialMessage(task_id="t", text="你好").to_json()))
+    assert isinstance(partial, PartialMessage) and partial.text == "你好"
+    result = parse_server_message({'task_id': 't', 'text': '你好。', 'is_final': True, 'duration': 1.0,
+                                   'time_start': 0.0, 'time_submit': 0.5, 'time_complete': 0.6})
+    assert isinstance(result, RecognitionMessage) and result.is_final
+
+
+def test_json_and_binary_decode_to_same_audio():
+    samples = np.linspace(-1, 1, 3200, dtype=np.float32)
+    msg = AudioMessage(task_id="t", source="mic", data=base64.b64encode(samples.tobytes()).decode(),
+                       is_final=False, time_start=0.0)
+    _, json_data = parse_message(json.dumps(msg.__dict__))
+    _, bin_data = parse_message(_frame(pcm=samples.tobytes()).to_bytes())
+    assert bytes(json_data) == bytes(bin_data)
+
+
+def test_int16_converted_to_float32():
+    pcm = np.array([0, 16384, -32768], dtype="<i2").tobytes()
+    _, data = parse_message(_frame(pcm=pcm, sample_format=SampleFormat.INT16).to_bytes())
+    np.testing.assert_allclose(np.frombuffer(data, dtype=np.float32), [0.0, 0.5, -1.0])
+
+
+@pytest.mark.parametrize("buf", [b"CWAF", b"XXXX" + bytes(64)])
+def test_malformed_frame_rejected(buf):
+    with pytest.raises(ValueError):
+        AudioFrame.from_bytes(buf)
+
+
+def test_select_subprotocol():
+    assert select_subprotocol(None, ["binary", AUDIO_FRAME_SUBPROTOCOL]) == AUDIO_FRAME_SUBPROTOCOL
+    # 旧客户端只提 'binary' 或不提：不选子协议，握手照常成功
+    assert select_subprotocol(None, ["binary"]) is None
+    assert select_subprotocol(None, []) is None
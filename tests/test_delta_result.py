@@ -0,0 +1,95 @@
+# coding: utf-8
+"""
+增量结果测试。
+
+模拟拼接过程中累积结果的「尾部替换 + 追加」演化，验证：
+服务端 make_delta 生成的增量经客户端 RecognitionMessage.apply 逐条重建后与完整结果一致，
+ws_send 对增量的合并（merge_delta）与逐条应用等价。
+"""
+import random
+from dataclasses import asdict
+
+import pytest
+
+from core.protocol import RecognitionMessage
+from core.server.schema import Result
+from core.server.merger import common_prefix_len, make_delta, merge_delta, tokens_to_text
+
+
+def _to_message(result: Result) -> RecognitionMessage:
+    fields = asdict(result)
+    for key in ('socket_id', 'type'):
+        fields.pop(key)
+    return RecognitionMessage(**fields)
+
+
+def _evolve(rng, steps=40):
+    """生成一串累积结果：每步砍掉尾部若干 token 再追加新 token"""
+    tokens, timestamps, text = [], [], ''
+    for step in range(steps):
+        cut = rng.randint(0, min(len(tokens), 5))
+        if cut:
+            tokens, timestamps = tokens[:-cut], timestamps[:-cut]
+            text = text[:-cut]
+        new = [rng.choice('甲乙丙丁，。') for _ in range(rng.randint(0, 12))]
+        base = timestamps[-1] if timestamps else 0.0
+        tokens = tokens + new
+        timestamps = timestamps + [base + 0.1 * (i + 1) for i in range(len(new))]
+        text = text + ''.join(new)
+        yield Result(task_id='t', socket_id='s', type='file', duration=float(step),
+                     text=text, text_accu=tokens_to_text(tokens),
+                     tokens=list(tokens), timestamps=list(timestamps))
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ([], [1], 0), ([1, 2], [1, 2, 3], 2), ([1, 2, 3], [1, 9], 1), ('你好世界', '你好呀', 2), ('abc', 'abc', 3),
+])
+def test_common_prefix_len(a, b, expected):
+    assert common_prefix_len(a, b) == expected
+
+
+def _deltas(seed):
+    prev, out = Result(task_id='t', socket_id='s', type='file'), []
+    for revision, result in enumerate(_evolve(random.Random(seed)), start=1):
+        out.append((result, make_delta(result, prev.text, prev.tokens, prev.timestamps, revision)))
+        prev = result
+    return out
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_client_rebuilds_from_deltas(seed):
+    transcript = RecognitionMessage(task_id='t', is_final=False, duration=0, time_start=0,
+                                    time_submit=0, time_complete=0, text='')
+    for full, delta in _deltas(seed):
+        assert len(delta.tokens) <= len(full.tokens)
+        transcript = transcript.apply(_to_message(delta))
+        assert transcript.tokens == full.tokens
+        assert transcript.timestamps == full.timestamps
+        assert transcript.text == full.text
+        assert transcript.text_accu == full.text_accu
+
+
+def test_gap_in_revisions_is_rejected():
+    (_, d1), (_, d2) = _deltas(0)[:2]
+    start = RecognitionMessage(task_id='t', is_final=False, duration=0, time_start=0,
+                               time_submit=0, time_complete=0, text='')
+    with pytest.raises(ValueError):
+        start.apply(_to_message(d2))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_merged_deltas_equal_sequential(seed):
+    pairs = _deltas(seed)
+    start = RecognitionMessage(task_id='t', is_final=False, duration=0, time_start=0,
+                               time_submit=0, time_complete=0, text='')
+    # 连续增量合并后一次应用
+    merged = pairs[0][1]
+    for _, delta in pairs[1:]:
+        merged = merge_delta(merged, delta)
+    rebuilt = start.apply(_to_message(merged))
+    assert rebuilt.tokens == pairs[-1][0].tokens
+    assert rebuilt.text == pairs[-1][0].text
+    # 完整结果 + 增量合并为完整结果
+    full = merge_delta(pairs[10][0], pairs[11][1])
+    assert full.token_base == -1
+    assert full.tokens == pairs[11][0].tokens and full.text_accu == pairs[11][0].text_accu
@@ -0,0 +1,66 @@
+# coding: utf-8
+"""
+GGUF Embedding 行缓存与 Fun-ASR-Nano Prompt 缓存测试。
+
+不加载模型：用 Q8_0 量化的随机表验证缓存的行与直接反量化一致、只反量化未缓存的行、按 LRU 淘汰；
+Prompt 按 (热词, 语言, 上下文) 缓存，命中时不再分词与查表。
+"""
+import numpy as np
+import pytest
+
+try:
+    from gguf.constants import GGMLQuantizationType
+    from gguf.quants import dequantize, quantize
+    from core.server.engines.fun_asr_gguf.inference import prompt_builder
+    from core.server.engines.llama.llama import LlamaEmbeddingTable
+except (ImportError, OSError) as e:
+    # 依赖 gguf 与 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"Fun-ASR-Nano GGUF 后端不可用: {e}", allow_module_level=True)
+
+Q8_0 = GGMLQuantizationType.Q8_0
+
+
+@pytest.fixture
+def raw():
+    rng = np.random.default_rng(0)
+    return quantize(rng.standard_normal((16, 64)).astype(np.float32), Q8_0)
+
+
+def test_rows_match_direct_dequantize(raw):
+    table = LlamaEmbeddingTable(raw, Q8_0)
+    ids = [3, 1, 3, 7]
+    expected = dequantize(raw[ids], Q8_0)
+    np.testing.assert_array_equal(table[ids], expected)
+    np.testing.assert_array_equal(table[ids], expected)
+    np.testing.assert_array_equal(table[5], dequantize(raw[5], Q8_0))
+    assert (table.misses, table.hits) == (4, 5)             # 3、1、7、5 各反量化一次
+    assert table[[]].shape[0] == 0
+
+
+def test_lru_eviction(raw):
+    table = LlamaEmbeddingTable(raw, Q8_0, max_cached_rows=2)
+    table[[1, 2]]
+    table[[1]]                                              # 1 变为最近使用
+    table[[3]]                                              # 淘汰 2
+    assert list(table._rows) == [1, 3]
+    table[[2]]
+    assert table.misses == 4
+
+
+def test_prompt_cache(monkeypatch, raw):
+    calls = []
+
+    def text_to_tokens(vocab, text):
+        calls.append(text)
+        return [len(text) % 16, 0]
+    monkeypatch.setattr(prompt_builder.llama, 'text_to_tokens', text_to_tokens)
+    builder = prompt_builder.PromptBuilder(None, LlamaEmbeddingTable(raw, Q8_0), max_cached=2)
+
+    first = builder.build_prompt(['热词'], '中文', None)
+    assert builder.build_prompt(['热词'], '中文', None) is first
+    assert len(calls) == 2                                  # 前缀 + 后缀只分词一次
+    assert not first[0].flags.writeable
+    builder.build_prompt(None, None, '上下文')
+    builder.build_prompt(None, None, None)                  # 淘汰最早的条目
+    builder.build_prompt(['热词'], '中文', None)
+    assert (builder.hits, builder.misses) == (1, 4)
@@ -0,0 +1,62 @@
+# coding: utf-8
+"""
+对齐器时间戳单调修复测试。
+
+以原 O(n²) DP 实现为基准，随机生成含重复值、局部乱序、整体倒序的时间戳序列，
+验证 O(n log n) 实现选出的子序列与修复结果完全一致。
+"""
+import random
+
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.force_aligner_gguf.inference.aligner import AlignerProcessor
+except (ImportError, OSError) as e:
+    # 依赖 onnxruntime 与 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"ForceAligner GGUF 后端不可用: {e}", allow_module_level=True)
+
+
+def reference_lis(data_list):
+    """原实现：O(n²) DP"""
+    n = len(data_list)
+    dp, parent = [1] * n, [-1] * n
+    for i in range(1, n):
+        for j in range(i):
+            if data_list[j] <= data_list[i] and dp[j] + 1 > dp[i]:
+                dp[i] = dp[j] + 1; parent[i] = j
+    max_idx = dp.index(max(dp))
+    lis_indices, idx = [], max_idx
+    while idx != -1: lis_indices.append(idx); idx = parent[idx]
+    lis_indices.reverse()
+    return lis_indices
+
+
+def _samples(rng):
+    for _ in range(300):
+        n = rng.randint(1, 120)
+        kind = rng.random()
+        if kind < 0.3:
+            yield [rng.randint(0, 10) for _ in range(n)]                 # 大量重复
+        elif kind < 0.6:
+            base = sorted(rng.randint(0, 2000) for _ in range(n))          # 单调 + 离群
+            for _ in range(rng.randint(0, n // 4 + 1)):
+                base[rng.randrange(n)] = rng.randint(0, 2000)
+            yield base
+        elif kind < 0.8:
+            yield [rng.randint(0, 2000) for _ in range(n)]                 # 完全随机
+        else:
+            yield list(range(n, 0, -1))                                    # 倒序
+
+
+def test_lis_matches_reference():
+    rng = random.Random(20260101)
+    for data in _samples(rng):
+        assert AlignerProcessor.longest_non_decreasing(data) == reference_lis(data), data
+
+
+def test_fix_timestamps_output():
+    processor = AlignerProcessor()
+    assert processor.fix_timestamps(np.array([], dtype=np.int64)) == []
+    assert processor.fix_timestamps(np.array([0, 10, 5, 20, 30])) == [0, 10, 10, 20, 30]
+    assert processor.fix_timestamps(np.array([0, 10, 90, 80, 70, 40, 50])) == [0, 10, 17, 25, 32, 40, 50]
@@ -0,0 +1,193 @@
+# coding: utf-8
+"""
+Fun-ASR-Nano 多序列连续批处理解码测试。
+
+不加载模型：假上下文按序列维护 KV，按各序列的目标 Token 序列给出预测，
+验证各序列输出与单独解码一致、每步只做一次前向、序列各自结束，
+熔断序列回退到退化之前（或重新预填充）加温重试，不影响其他序列，
+空出的序列在解码中途接纳新的 Prompt，以及前向出错时采样器仍被释放。
+"""
+import ctypes
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.fun_asr_gguf.inference import llm_decoder
+except (ImportError, OSError) as e:
+    # 依赖 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"Fun-ASR-Nano GGUF 后端不可用: {e}", allow_module_level=True)
+
+EOS = 99
+LOOP = 12                   # 低温时第 loop_seq 段生成 loop_after 个 Token 后陷入重复，触发熔断
+TARGETS = {0: [1, 2, 50], 1: [3, 4, 5, 6, 7, 50], 2: [8, 50], 3: [9, 10, 11, 50]}   # 按 Prompt 的标记（首个值）
+
+
+class FakeCtx:
+    def __init__(self):
+        self.kv = {}                # seq_id -> [(pos, token)]
+        self.tags = {}              # seq_id -> 预填充的 Prompt 标记
+        self.out = []               # 本次前向各输出行所属序列
+        self.forwards = []          # 每次前向的行数
+        self.loop_seq = None
+        self.loop_after = 0
+        self.fail_after = None      # 第几次前向起出错
+
+    def clear_kv_cache(self):
+        self.kv = {}
+
+    def remove_sequence(self, seq_id):
+        self.kv.pop(seq_id, None)
+        return True
+
+    def truncate_kv_cache(self, n_keep, seq_id=0):
+        del self.kv[seq_id][n_keep:]
+        return True
+
+    def decode(self, batch):
+        if self.fail_after is not None and len(self.forwards) >= self.fail_after:
+            return 1
+        self.forwards.append(len(batch.rows))
+        for token, pos, seq in batch.rows:
+            cells = self.kv.setdefault(seq, [])
+            assert pos == len(cells)            # 每个序列的位置各自连续
+            cells.append((pos, token))
+            if token is None and pos == 0:
+                self.tags[seq] = batch.tag
+        self.out = [seq for _, _, seq in batch.rows]
+        return 0
+
+    def predict(self, idx, temperature):
+        seq = self.out[idx]
+        generated = [t for _, t in self.kv[seq] if t is not None]
+        if self.tags[seq] == self.loop_seq and temperature < 0.5 and len(generated) >= self.loop_after:
+            return LOOP
+        target = TARGETS[self.tags[seq]]
+        assert generated == target[:len(generated)]
+        return target[len(generated)] if len(generated) < len(target) else EOS
+
+
+class FakeBatch:
+    def __init__(self, n_tokens, embd_dim=0, n_seq_max=1):
+        self.n_tokens_max = n_tokens
+        self.struct = SimpleNamespace()
+        self.rows = []
+
+    def set_embd(self, data, pos=0, seq_id=0):
+        self.rows = [(None, pos + i, seq_id) for i in range(len(data))]
+        self.tag = int(data[0, 0])
+        return self
+
+    def set_tokens(self, tokens, pos, seq_id=0):
+        self.rows = list(zip(tokens, pos, seq_id))
+        return self
+
+
+class FakeSampler:
+    live = 0                    # 尚未释放的采样器数
+
+    def __init__(self, temperature=0.3, **kwargs):
+        self.temperature = temperature
+        FakeSampler.live += 1
+
+    def sample(self, ctx, idx=-1):
+        return ctx.predict(idx, self.temperature)
+
+    def free(self):
+        FakeSampler.live -= 1
+
+
+class FakeStreamDecoder:
+    def __init__(self, vocab, reporter=None):
+        self.reporter = reporter
+        self.tokens, self.generated_text, self.tokens_generated = [], "", 0
+
+    def push(self, token_id):
+        piece = "，" if token_id >= 50 else chr(ord('a') + token_id)
+        self.tokens.append(piece)
+        self.generated_text += piece
+        self.tokens_generated += 1
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def decoder(monkeypatch):
+    for name, value in [('LlamaBatch', FakeBatch), ('LlamaSampler', FakeSampler),
+                        ('ASRStreamDecoder', FakeStreamDecoder), ('llama_token', ctypes.c_int32)]:
+        monkeypatch.setattr(llm_decoder.llama, name, value, raising=False)
+    monkeypatch.setattr(FakeSampler, 'live', 0)
+    models = SimpleNamespace(ctx=FakeCtx(), vocab=None, eos_token=EOS)
+    return llm_decoder.LLMDecoder(models)
+
+
+def _text(target):
+    return "".join("，" if t >= 50 else chr(ord('a') + t) for t in target)
+
+
+def test_sequences_finish_independently(decoder):
+    embds = [np.full((3 + i, 4), i, dtype=np.float32) for i in range(3)]
+    results = decoder.decode_batch(embds, n_predict=64)
+
+    assert [r.text for r in results] == [_text(TARGETS[i]) for i in range(3)]
+    assert [r.n_gen for r in results] == [3, 6, 2]
+    # 3 次预填充，之后每步一次前向，行数随序列结束递减
+    steps = decoder.models.ctx.forwards[3:]
+    assert steps == [3, 3, 2, 1, 1, 1]
+    assert decoder.models.ctx.kv == {}                      # 结束的序列已释放 KV
+
+
+def test_aborted_sequence_retries_alone(decoder):
+    decoder.models.ctx.loop_seq = 2
+    embds = [np.full((5, 4), i, dtype=np.float32) for i in range(4)]
+    results = decoder.decode_batch(embds, n_predict=64)
+
+    assert [r.text for r in results] == [_text(TARGETS[i]) for i in range(4)]
+    assert not any(r.is_aborted for r in results)
+    # 序列 2 从第一个 Token 起就重复，无可保留的内容：在 0.3、0.6 两个温度下各预填充一次
+    assert decoder.models.ctx.forwards.count(5) == 5
+    assert [r.n_retries for r in results] == [0, 0, 1, 0]
+
+
+def test_aborted_sequence_rolls_back(decoder):
+    ctx = decoder.models.ctx
+    ctx.loop_seq, ctx.loop_after = 1, 6
+    embds = [np.full((5, 4), i, dtype=np.float32) for i in range(3)]
+    results = decoder.decode_batch(embds, n_predict=64)
+
+    assert [r.text for r in results] == [_text(TARGETS[i]) for i in range(3)]
+    assert [r.n_retries for r in results] == [0, 1, 0]
+    # 序列 1 保留重复之前的 6 个 Token 继续解码，不重新预填充
+    assert ctx.forwards.count(5) == 3
+
+
+def test_n_predict_limit(decoder):
+    embds = [np.full((2, 4), i, dtype=np.float32) for i in range(2)]
+    results = decoder.decode_batch(embds, n_predict=2)
+    assert [r.n_gen for r in results] == [2, 2]
+    assert FakeSampler.live == 0
+
+
+def test_free_sequences_admit_new_prompts(decoder):
+    arrivals = [np.full((4, 4), i, dtype=np.float32) for i in (2, 3)]
+    done = []
+    results = decoder.decode_batch([np.full((3, 4), i, dtype=np.float32) for i in (0, 1)], n_predict=64, n_seq=2,
+                                   admit=lambda: arrivals.pop(0) if arrivals else None,
+                                   on_done=lambda i, res: done.append(i))
+
+    assert [r.text for r in results] == [_text(TARGETS[i]) for i in range(4)]
+    assert done == [0, 1, 2, 3]
+    # 第 0 段结束后其序列在第 1 段解码中途接纳第 2 段（预填充 4 行），之后与第 1 段共用每步前向
+    ctx = decoder.models.ctx
+    assert ctx.forwards == [3, 3, 2, 2, 2, 1, 4, 2, 2, 4, 1, 1, 1, 1]
+    assert ctx.kv == {} and FakeSampler.live == 0
+
+
+def test_samplers_freed_when_decode_fails(decoder):
+    decoder.models.ctx.fail_after = 4
+    embds = [np.full((3, 4), i, dtype=np.float32) for i in range(3)]
+    with pytest.raises(RuntimeError):
+        decoder.decode_batch(embds, n_predict=64)
+    assert FakeSampler.live == 0
@@ -0,0 +1,128 @@
+# coding: utf-8
+"""
+Fun-ASR-Nano CTC 置信度跳过 LLM 与合批识别测试。
+
+不加载模型：验证 CTC 置信度取 token 后验峰值与 blank 帧后验的最小值，
+流水线在置信度达标、无热词命中的短音频上直接采用 CTC 文本、其余情况照常走 LLM 解码，
+以及 decode_streams 只把需要 LLM 的片段交给多序列解码。
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.fun_asr_gguf.inference.ctc_decoder import Token, ctc_confidence, decode_ctc_indices
+    from core.server.engines.fun_asr_gguf.inference.pipeline import InferencePipeline
+    from core.server.engines.fun_asr_gguf.inference.schema import LLMDecodeResult, RecognitionStream
+except (ImportError, OSError) as e:
+    # 依赖 onnxruntime 与 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"Fun-ASR-Nano GGUF 后端不可用: {e}", allow_module_level=True)
+
+BLANK = 9
+ID2TOKEN = {0: '你', 1: '好', BLANK: '<blk>'}
+
+
+def test_confidence_and_token_scores():
+    indices = np.array([BLANK, 0, 0, BLANK, 1, BLANK])
+    probs = np.array([0.99, 0.7, 0.95, 0.98, 0.9, 0.6])
+    text, tokens, _ = decode_ctc_indices(indices, ID2TOKEN, probs)
+    assert text == '你好'
+    assert [t.score for t in tokens] == pytest.approx([0.95, 0.9])
+    assert ctc_confidence(indices, probs, BLANK) == pytest.approx(0.6)    # 末尾 blank 帧可能漏字
+    probs[-1] = 0.99
+    assert ctc_confidence(indices, probs, BLANK) == pytest.approx(0.9)
+    assert ctc_confidence(np.array([], dtype=int), np.array([]), BLANK) == 0.0
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = 0
+        self.batches = []
+
+    def decode(self, full_embd, n_input_tokens, n_predict, **kwargs):
+        self.calls += 1
+        return LLMDecodeResult(text='你好。', n_gen=3)
+
+    def decode_batch(self, embds, n_predict, admit=None, on_done=None, **kwargs):
+        self.batches.append(len(embds))
+        n = len(embds)
+        while admit and admit() is not None:      # 按到达顺序接纳（下标接在初始序列之后）
+            n += 1
+        for i in range(n):
+            on_done(i, LLMDecodeResult(text='你好。', n_gen=3))
+
+
+def _pipeline(confidence, hotwords=(), bypass=True):
+    ctc = [Token('你', 0.1, score=confidence), Token('好', 0.3, score=confidence)]
+    models = SimpleNamespace(
+        config=SimpleNamespace(enable_ctc=True, max_hotwords=10, ctc_topk=20, n_predict=64,
+                               llm_bypass=bypass, bypass_confidence=0.9, bypass_max_seconds=10.0,
+                               speculative=False, draft_max=8, batch_size=4),
+        encoder=SimpleNamespace(encode=lambda audio: (np.zeros((4, 8), dtype=np.float32), None)),
+        ctc_decoder=SimpleNamespace(decode=lambda *a, **k: (ctc, list(hotwords), {}, confidence)),
+        prompt_builder=SimpleNamespace(build_prompt=lambda *a: (
+            np.zeros((2, 8), dtype=np.float32), np.zeros((1, 8), dtype=np.float32), 2, 1, '')),
+    )
+    pipeline = InferencePipeline.__new__(InferencePipeline)
+    pipeline.models = models
+    pipeline.llm_decoder = FakeLLM()
+    return pipeline
+
+
+def _decode(pipeline, seconds=2.0):
+    stream = RecognitionStream()
+    stream.accept_waveform(16000, np.zeros(int(16000 * seconds), dtype=np.float32))
+    return stream, pipeline.decode_stream(stream, verbose=False)
+
+
+@pytest.mark.parametrize('confidence, hotwords, bypass, seconds, expect_bypass', [
+    (0.95, (), True, 2.0, True),
+    (0.80, (), True, 2.0, False),          # 置信度不足
+    (0.95, ('你好',), True, 2.0, False),    # 有热词命中
+    (0.95, (), True, 12.0, False),         # 音频过长
+    (0.95, (), False, 2.0, False),         # 未开启
+])
+def test_bypass_gate(confidence, hotwords, bypass, seconds, expect_bypass):
+    pipeline = _pipeline(confidence, hotwords, bypass)
+    stream, res = _decode(pipeline, seconds)
+    assert res.bypassed is expect_bypass
+    assert pipeline.llm_decoder.calls == (0 if expect_bypass else 1)
+    assert res.text == ('你好' if expect_bypass else '你好。')
+    assert stream.result.text == res.text
+    assert stream.result.timestamps                     # 跳过 LLM 时同样有时间戳
+
+
+def test_decode_streams_batches_llm_segments():
+    pipeline = _pipeline(0.95)
+    streams = []
+    for seconds in (2.0, 0.05, 12.0, 3.0):          # 跳过 LLM / 空音频 / 过长 / 跳过 LLM
+        stream = RecognitionStream()
+        stream.accept_waveform(16000, np.zeros(int(16000 * seconds), dtype=np.float32))
+        streams.append(stream)
+    results = pipeline.decode_streams(streams)
+    assert [r.text for r in results] == ['你好', '', '你好。', '你好']
+    assert pipeline.llm_decoder.calls == 1 and pipeline.llm_decoder.batches == []   # 只剩一段时走单序列
+
+    streams[0].accept_waveform(16000, np.zeros(16000 * 11, dtype=np.float32))
+    results = pipeline.decode_streams(streams)
+    assert [r.text for r in results] == ['你好。', '', '你好。', '你好']
+    assert pipeline.llm_decoder.batches == [2]
+    assert [s.result.text for s in streams] == ['你好。', '', '你好。', '你好']
+
+
+def test_decode_streams_admits_new_streams():
+    pipeline = _pipeline(0.95)
+
+    def stream(seconds):
+        s = RecognitionStream()
+        s.accept_waveform(16000, np.zeros(int(16000 * seconds), dtype=np.float32))
+        return s
+
+    arrivals = [(stream(2.0), None, None), (stream(12.0), None, None)]     # 跳过 LLM / 需要 LLM
+    done = []
+    results = pipeline.decode_streams([stream(12.0)], admit=lambda: arrivals.pop(0) if arrivals else None,
+                                      on_done=lambda i, res: done.append((i, res.text)))
+    assert [r.text for r in results] == ['你好。', '你好', '你好。']
+    assert done == [(1, '你好'), (0, '你好。'), (2, '你好。')]          # 跳过 LLM 的流接纳时即完成
+    assert pipeline.llm_decoder.batches == [1] and pipeline.llm_decoder.calls == 0
@@ -0,0 +1,162 @@
+# coding: utf-8
+"""
+Fun-ASR-Nano 熔断回退重试测试。
+
+不加载模型：假上下文在低温时生成若干正确 Token 后陷入重复，加温后按目标序列继续，
+并校验每次预测时 KV 中的内容。验证熔断后只回退退化部分、不重新注入 Prompt，
+KV 不支持部分删除时退回整体注入，重试次数用尽后仍标记熔断，以及临时结果随回退改写。
+"""
+import ctypes
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.fun_asr_gguf.inference import llm_decoder
+except (ImportError, OSError) as e:
+    # 依赖 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"Fun-ASR-Nano GGUF 后端不可用: {e}", allow_module_level=True)
+
+EOS = 99
+LOOP = 20
+N_INPUT = 5
+TARGET = [1, 2, 50, 3, 4, 5, 6, 51, 7, 8, 52]
+
+
+class FakeCtx:
+    def __init__(self, loop_after, loop_below=0.5, partial=True):
+        self.kv, self.out = [], []
+        self.loop_after, self.loop_below, self.partial = loop_after, loop_below, partial
+        self.injected = 0               # 注入的 Embedding 行数
+
+    def clear_kv_cache(self):
+        self.kv = []
+
+    def decode(self, batch):
+        assert batch.pos == len(self.kv)              # 位置紧接已有 KV
+        self.injected += batch.tokens.count(None)
+        self.kv += batch.tokens
+        self.out = list(range(batch.pos + 1, len(self.kv) + 1))
+        return 0
+
+    def decode_token(self, token_id):
+        return self.decode(FakeBatch(1).set_tokens([token_id], len(self.kv)))
+
+    def truncate_kv_cache(self, n_keep):
+        if not self.partial:
+            return False
+        del self.kv[n_keep:]
+        return True
+
+    def predict(self, idx, temperature):
+        generated = self.kv[N_INPUT:self.out[idx]]
+        assert None not in generated
+        if temperature < self.loop_below and len(generated) >= self.loop_after:
+            return LOOP
+        assert generated == TARGET[:len(generated)]
+        return TARGET[len(generated)] if len(generated) < len(TARGET) else EOS
+
+
+class FakeBatch:
+    def __init__(self, n_tokens, embd_dim=0, n_seq_max=1):
+        self.struct = SimpleNamespace()
+        self.tokens, self.pos = [], 0
+
+    def set_embd(self, data, pos=0, seq_id=0):
+        self.tokens, self.pos = [None] * len(data), pos
+        return self
+
+    def set_tokens(self, tokens, pos, seq_id=0):
+        self.tokens, self.pos = list(tokens), pos
+        return self
+
+
+class FakeSampler:
+    def __init__(self, temperature=0.3, **kwargs):
+        self.temperature = temperature
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def sample(self, ctx, idx=-1):
+        return ctx.predict(idx, self.temperature)
+
+
+class FakeStreamDecoder:
+    def __init__(self, vocab, reporter=None):
+        self.reporter = reporter
+        self.tokens, self.generated_text, self.tokens_generated = [], "", 0
+
+    def push(self, token_id):
+        piece = "，" if token_id >= 50 else chr(ord('a') + token_id)
+        self.tokens.append(piece)
+        self.generated_text += piece
+        self.tokens_generated += 1
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def decoder(monkeypatch):
+    for name, value in [('LlamaBatch', FakeBatch), ('LlamaSampler', FakeSampler),
+                        ('ASRStreamDecoder', FakeStreamDecoder), ('llama_token', ctypes.c_int32)]:
+        monkeypatch.setattr(llm_decoder.llama, name, value, raising=False)
+    return llm_decoder.LLMDecoder(SimpleNamespace(ctx=None, vocab=None, eos_token=EOS))
+
+
+def _run(decoder, ctx, max_tries=7, on_partial=None):
+    decoder.models.ctx = ctx
+    embd = np.zeros((N_INPUT, 4), dtype=np.float32)
+    return decoder.decode(embd, N_INPUT, 64, max_tries=max_tries, on_partial=on_partial)
+
+
+TEXT = "".join("，" if t >= 50 else chr(ord('a') + t) for t in TARGET)
+
+
+def test_rollback_keeps_prompt_and_prefix(decoder):
+    ctx = FakeCtx(loop_after=6)
+    res = _run(decoder, ctx)
+    assert res.text == TEXT and not res.is_aborted
+    assert res.n_retries == 1 and res.n_gen == len(TARGET)
+    assert ctx.injected == N_INPUT                      # Prompt 只注入一次
+
+
+def test_rollback_to_start_reinjects_last_row(decoder):
+    ctx = FakeCtx(loop_after=0)
+    res = _run(decoder, ctx)
+    assert res.text == TEXT and res.n_retries == 1
+    assert ctx.injected == N_INPUT + 1                  # 只重算 Prompt 最后一行的 Logits
+
+
+def test_fallback_without_partial_removal(decoder):
+    ctx = FakeCtx(loop_after=6, partial=False)
+    res = _run(decoder, ctx)
+    assert res.text == TEXT and res.n_retries == 1
+    assert ctx.injected == 2 * N_INPUT
+
+
+def test_gives_up_after_max_tries(decoder):
+    res = _run(decoder, FakeCtx(loop_after=3, loop_below=10.0), max_tries=3)
+    assert res.is_aborted and res.n_retries == 2
+    assert res.text.startswith("bc，")
+
+
+def test_partials_follow_rollback(decoder):
+    shown, history = "", []
+
+    def on_partial(text_base, text):
+        nonlocal shown
+        assert text_base <= len(shown)
+        shown = shown[:text_base] + text
+        history.append(shown)
+
+    res = _run(decoder, FakeCtx(loop_after=6), on_partial=on_partial)
+    assert shown == res.text == TEXT
+    loop = chr(ord('a') + LOOP)
+    assert any(loop in h for h in history)              # 退化内容曾推送给客户端
+    assert history.count(TEXT[:6]) == 2                 # 回退时截断到保留前缀，再从该处继续推送
@@ -0,0 +1,135 @@
+# coding: utf-8
+"""
+Fun-ASR-Nano 投机解码测试。
+
+不加载模型：假上下文按固定目标序列给出下一个 Token，并校验每次预测时 KV 中的内容与目标前缀一致，
+验证以 CTC 草稿投机解码的输出与逐 Token 生成相同、前向次数更少，且拒绝草稿后 KV 正确回退。
+"""
+import ctypes
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.fun_asr_gguf.inference import llm_decoder
+except (ImportError, OSError) as e:
+    # 依赖 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"Fun-ASR-Nano GGUF 后端不可用: {e}", allow_module_level=True)
+
+EOS = 99
+N_INPUT = 5
+# LLM 输出比 CTC 多了标点（50、51），且 CTC 把 6 识别成了 8
+TARGET = [1, 2, 50, 3, 4, 6, 7, 51]
+DRAFT = [1, 2, 3, 4, 8, 7]
+
+
+class FakeCtx:
+    def __init__(self):
+        self.kv, self.out, self.forwards = [], [], 0
+
+    def clear_kv_cache(self):
+        self.kv = []
+
+    def decode(self, batch):
+        if batch.pos is not None:
+            assert batch.pos == len(self.kv)          # 草稿位置紧接已有 KV
+        self.forwards += 1
+        start = len(self.kv)
+        self.kv += batch.tokens
+        self.out = list(range(start + 1, len(self.kv) + 1))
+        return 0
+
+    def decode_token(self, token_id):
+        return self.decode(FakeBatch(1).set_tokens([token_id], len(self.kv)))
+
+    def truncate_kv_cache(self, n_keep):
+        del self.kv[n_keep:]
+        return True
+
+    def predict(self, idx):
+        generated = self.kv[N_INPUT:self.out[idx]]
+        assert generated == TARGET[:len(generated)]
+        return TARGET[len(generated)] if len(generated) < len(TARGET) else EOS
+
+
+class FakeBatch:
+    def __init__(self, n_tokens, embd_dim=0, n_seq_max=1):
+        self.n_tokens_max = n_tokens
+        self.struct = SimpleNamespace()
+        self.tokens, self.pos = [], None
+
+    def set_embd(self, data, pos=0, seq_id=0):
+        self.tokens = [None] * len(data)
+        return self
+
+    def set_tokens(self, tokens, pos, seq_id=0):
+        self.tokens, self.pos = list(tokens), pos
+        return self
+
+
+class FakeSampler:
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def sample(self, ctx, idx=-1):
+        return ctx.predict(idx)
+
+
+class FakeStreamDecoder:
+    def __init__(self, vocab, reporter=None):
+        self.reporter = reporter
+        self.tokens, self.ids, self.generated_text, self.tokens_generated = [], [], "", 0
+
+    def push(self, token_id):
+        piece = "，" if token_id >= 50 else str(token_id)
+        self.ids.append(token_id)
+        self.tokens.append(piece)
+        self.generated_text += piece
+        self.tokens_generated += 1
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def decoder(monkeypatch):
+    for name, value in [('LlamaBatch', FakeBatch), ('LlamaSampler', FakeSampler),
+                        ('ASRStreamDecoder', FakeStreamDecoder), ('llama_token', ctypes.c_int32),
+                        ('text_to_tokens', lambda vocab, text: list(DRAFT))]:
+        monkeypatch.setattr(llm_decoder.llama, name, value, raising=False)
+    models = SimpleNamespace(ctx=FakeCtx(), vocab=None, eos_token=EOS)
+    return llm_decoder.LLMDecoder(models)
+
+
+def _run(decoder, draft_text, n_predict=64, draft_max=8):
+    embd = np.zeros((N_INPUT, 4), dtype=np.float32)
+    return decoder.decode(embd, N_INPUT, n_predict, draft_text=draft_text, draft_max=draft_max)
+
+
+def test_speculative_matches_sequential(decoder):
+    seq = _run(decoder, None)
+    seq_forwards = decoder.models.ctx.forwards
+    decoder.models.ctx.forwards = 0
+    spec = _run(decoder, "ctc")
+
+    assert spec.text == seq.text
+    assert spec.n_gen == seq.n_gen == len(TARGET)
+    assert seq.n_drafted == 0
+    # 接受 2 / 3, 4；草稿中的 8 被拒绝后 7 已无草稿可验证，回到逐 Token 生成
+    assert (spec.n_accepted, spec.n_drafted) == (3, 11)
+    assert decoder.models.ctx.forwards < seq_forwards
+
+
+@pytest.mark.parametrize('n_predict', [1, 3, 6])
+def test_speculative_respects_n_predict(decoder, n_predict):
+    seq = _run(decoder, None, n_predict=n_predict)
+    spec = _run(decoder, "ctc", n_predict=n_predict)
+    assert spec.text == seq.text
+    assert spec.n_gen == n_predict
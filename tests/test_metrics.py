@@ -0,0 +1,73 @@
+# coding: utf-8
+"""
+运行指标测试。
+
+验证直方图按 Prometheus 约定输出累计桶、识别进程快照的渲染，
+以及 MetricsExporter 收取快照并通过本机 HTTP 暴露。
+"""
+import queue
+import time
+import urllib.request
+from types import SimpleNamespace
+
+from core.server.metrics import Histogram, WorkerMetrics, MetricsExporter, render_metrics
+from core.server.worker.router import TaskRouter
+
+
+def _snapshot():
+    m = WorkerMetrics()
+    m.observe_stage('asr', 0.02)
+    m.observe_stage('asr', 0.3)
+    m.observe_stage('asr', 100)
+    m.observe_rtf('synthetic', 0.05)
+    m.inc('aligner_loads')
+    m.inc('aligner_loads')
+    return m.snapshot(sessions=2, buffered={'cmd': 0, 'mic': 3, 'file': 0})
+
+
+def test_histogram_buckets():
+    h = Histogram((0.1, 1.0))
+    for v in (0.05, 0.1, 0.5, 5):
+        h.observe(v)
+    assert h.counts == [2, 1, 1]        # le 语义：0.1 落入第一个桶
+    assert h.count == 4 and abs(h.sum - 5.65) < 1e-9
+
+
+def test_render_metrics():
+    text = render_metrics({0: _snapshot()}, queue_in=[5], queue_out=1, sockets=4)
+    lines = text.splitlines()
+    assert 'capswriter_queue_in_depth{worker="0"} 5' in lines
+    assert 'capswriter_queue_out_depth 1' in lines
+    assert 'capswriter_connected_sockets 4' in lines
+    assert 'capswriter_active_sessions{worker="0"} 2' in lines
+    assert 'capswriter_buffered_tasks{worker="0",class="mic"} 3' in lines
+    assert 'capswriter_buffered_tasks{worker="0",class="file"} 0' in lines
+    assert 'session=' not in text                       # 不按 session 生成序列
+    assert 'capswriter_aligner_loads_total{worker="0"} 2' in lines
+    assert 'capswriter_stage_seconds_bucket{worker="0",stage="asr",le="0.025"} 1' in lines
+    assert 'capswriter_stage_seconds_bucket{worker="0",stage="asr",le="+Inf"} 3' in lines
+    assert 'capswriter_stage_seconds_count{worker="0",stage="asr"} 3' in lines
+    assert 'capswriter_rtf_count{worker="0",engine="synthetic"} 1' in lines
+    assert lines.count('# TYPE capswriter_stage_seconds histogram') == 1
+
+
+def test_exporter_http():
+    snap = _snapshot()
+    state = SimpleNamespace(
+        queue_metrics=queue.Queue(), queue_out=queue.Queue(), sockets={'s1': None},
+        router=TaskRouter(1), recognize_processes=[SimpleNamespace(pid=snap['pid'])],
+    )
+    exporter = MetricsExporter(state, '127.0.0.1', 0)
+    exporter.start()
+    try:
+        state.queue_metrics.put(snap)
+        url = f'http://127.0.0.1:{exporter.port}/metrics'
+        for _ in range(50):
+            body = urllib.request.urlopen(url, timeout=2).read().decode()
+            if 'active_sessions' in body:
+                break
+            time.sleep(0.02)
+        assert 'capswriter_active_sessions{worker="0"} 2' in body
+        assert 'capswriter_connected_sockets 1' in body
+    finally:
+        exporter.stop()
@@ -0,0 +1,93 @@
+# coding: utf-8
+"""
+Paraformer 合批识别测试。
+
+不加载模型：用按音频内容确定输出的假 OfflineRecognizer 替换 sherpa-onnx 识别器，
+验证 decode_streams 只调用一次内核合批解码并带上全部内部流，
+且各流的文本、token、时间戳与逐段 decode_stream 完全一致。
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.paraformer_onnx.asr_engine import ParaformerConfig, ParaformerEngine
+except ImportError as e:
+    # 依赖 sherpa-onnx
+    pytest.skip(f"Paraformer 后端不可用: {e}", allow_module_level=True)
+
+PIECES = ['你', '好', 'hel@@', 'lo', 'a', 'b', '，', '世', '界']
+
+
+class FakeOfflineStream:
+    def __init__(self):
+        self.audio = None
+        self.result = None
+
+    def accept_waveform(self, sample_rate, audio):
+        assert sample_rate == 16000 and audio.dtype == np.float32
+        self.audio = audio
+
+
+class FakeOfflineRecognizer:
+    """按每 0.2 秒音频的能量挑选 token，输出只取决于该流自身的音频"""
+
+    def __init__(self):
+        self.single_calls = 0
+        self.batch_calls = []
+
+    def create_stream(self, hotwords=None):
+        return FakeOfflineStream()
+
+    def _recognize(self, stream):
+        frames = stream.audio[:len(stream.audio) // 3200 * 3200].reshape(-1, 3200)
+        ids = (np.abs(frames).mean(axis=1) * 1e4).astype(int) % len(PIECES)
+        tokens = [PIECES[i] for i in ids]
+        stream.result = SimpleNamespace(text=''.join(t.replace('@@', '') for t in tokens),
+                                        tokens=tokens, timestamps=[i * 0.2 for i in range(len(tokens))])
+
+    def decode_stream(self, stream):
+        self.single_calls += 1
+        self._recognize(stream)
+
+    def decode_streams(self, streams):
+        self.batch_calls.append(list(streams))
+        for stream in streams:
+            self._recognize(stream)
+
+
+def _engine():
+    engine = ParaformerEngine.__new__(ParaformerEngine)
+    engine.config = ParaformerConfig(paraformer='', tokens='', batch_size=4)
+    engine.recognizer = FakeOfflineRecognizer()
+    return engine
+
+
+def _streams(engine, audios):
+    streams = [engine.create_stream() for _ in audios]
+    for stream, audio in zip(streams, audios):
+        stream.accept_waveform(16000, audio)
+    return streams
+
+
+def test_batch_matches_sequential():
+    engine = _engine()
+    rng = np.random.default_rng(0)
+    audios = [(rng.standard_normal(int(s * 16000)) * 0.1).astype(np.float32) for s in (3, 0.6, 8, 5)]
+
+    expected = _streams(engine, audios)
+    for stream in expected:
+        engine.decode_stream(stream)
+    assert engine.recognizer.single_calls == len(audios)
+
+    streams = _streams(engine, audios)
+    engine.decode_streams(streams, contexts=[''] * len(audios), languages=['zh'] * len(audios))
+
+    assert engine.max_batch_size == 4
+    assert len(engine.recognizer.batch_calls) == 1
+    assert engine.recognizer.batch_calls[0] == [s.internal_stream for s in streams]
+    for res, exp in zip(streams, expected):
+        assert res.result.text == exp.result.text and res.result.text
+        assert res.result.tokens == exp.result.tokens
+        assert res.result.timestamps == exp.result.timestamps
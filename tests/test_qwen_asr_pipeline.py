@@ -0,0 +1,87 @@
+# coding: utf-8
+"""
+Qwen-ASR GGUF 长音频流水线测试。
+
+不加载模型：用假的 Encoder / Aligner / 解码替换模型调用，
+验证编码与对齐在辅助线程中与 LLM 解码重叠、结果按片段顺序重组，pipeline_depth=0 时顺序执行。
+"""
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.qwen_asr_gguf.inference.asr import QwenASREngine
+    from core.server.engines.qwen_asr_gguf.inference.schema import DecodeResult, ForcedAlignItem, ForcedAlignResult
+except (ImportError, OSError) as e:
+    # 依赖 onnxruntime / gguf 与 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"Qwen GGUF 后端不可用: {e}", allow_module_level=True)
+
+SR = 16000
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.started = []
+        self.lock = threading.Condition()
+
+    def encode(self, chunk):
+        with self.lock:
+            self.started.append(len(self.started))
+            self.lock.notify_all()
+        # 片段序号编码在特征里，供假解码还原
+        return np.full((2, 4), len(self.started) - 1, dtype=np.float32), 0.01
+
+    def wait_started(self, n, timeout):
+        with self.lock:
+            return self.lock.wait_for(lambda: len(self.started) >= n, timeout)
+
+
+class FakeAligner:
+    def __init__(self):
+        self.threads = set()
+
+    def align(self, audio, text, language=None, offset_sec=0.0):
+        self.threads.add(threading.current_thread().name)
+        return ForcedAlignResult(items=[ForcedAlignItem(text, offset_sec, offset_sec + 1)])
+
+
+def _engine(depth, chunks):
+    engine = QwenASREngine.__new__(QwenASREngine)
+    engine.config = SimpleNamespace(pipeline_depth=depth)
+    engine.verbose = False
+    engine.encoder = FakeEncoder()
+    engine.aligner = FakeAligner()
+    engine.overlapped = []
+
+    def safe_decode(full_embd, prefix_text, *args, **kwargs):
+        i = int(full_embd[-1, 0])
+        # 解码第 i 片时，后一片的编码是否已经开始
+        engine.overlapped.append(engine.encoder.wait_started(i + 2, timeout=1 if depth and i + 1 < chunks else 0.05))
+        return DecodeResult(text=f"<{i}>")
+
+    engine._build_prompt_embd = lambda audio_embd, *args: audio_embd
+    engine._prompt_prefix = lambda context: []
+    engine._safe_decode = safe_decode
+    return engine
+
+
+def test_pipeline_overlaps_and_keeps_order():
+    engine = _engine(depth=2, chunks=5)
+    res = engine.asr(np.zeros(SR * 9, dtype=np.float32), context=None, language=None,
+                     chunk_size_sec=2.0, memory_chunks=1)
+
+    assert res.text == "<0><1><2><3><4>"
+    assert [it.text for it in res.alignment.items] == ["<0>", "<1>", "<2>", "<3>", "<4>"]
+    assert [it.start_time for it in res.alignment.items] == [0.0, 2.0, 4.0, 6.0, 8.0]
+    assert engine.overlapped == [True, True, True, True, False]     # 最后一片之后无可预取
+    assert engine.aligner.threads and all(t.startswith('QwenAlign') for t in engine.aligner.threads)
+
+
+def test_depth_zero_is_sequential():
+    engine = _engine(depth=0, chunks=3)
+    res = engine.asr(np.zeros(SR * 5, dtype=np.float32), context=None, language=None,
+                     chunk_size_sec=2.0, memory_chunks=1)
+    assert res.text == "<0><1><2>"
+    assert engine.overlapped == [False, False, False]
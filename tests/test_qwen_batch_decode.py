@@ -0,0 +1,242 @@
+# coding: utf-8
+"""
+Qwen-ASR GGUF 多序列连续批处理解码测试。
+
+不加载模型：假上下文按序列维护 KV，按各片段 Prompt 的标记给出目标 Token 序列，
+验证各片段输出与目标一致、每步只做一次前向、常驻前缀只在序列 0 预填充一次并复制给各序列，
+熔断回退只影响出错的序列，空出的序列在解码中途接纳新片段（编码未完成时其他序列照常解码，
+编码在独立线程中进行），以及前向出错时采样器仍被释放。
+"""
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.qwen_asr_gguf.inference import asr
+    from core.server.engines.qwen_asr_gguf.inference.asr import QwenASREngine
+    from core.server.engines.qwen_asr_gguf.asr_engine import QwenASREngine as QwenAdapter, QwenASRStream
+except (ImportError, OSError) as e:
+    # 依赖 onnxruntime / gguf 与 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"Qwen GGUF 后端不可用: {e}", allow_module_level=True)
+
+EOS, IM_END, LOOP = 99, 98, 20
+PREFIX = 100                # 常驻前缀各行的标记
+N_PREFIX = 3
+TARGETS = {0: [1, 2, 3], 1: [4, 5, 6, 7, 8, 9, 10, 11], 2: [12, 13], 3: [14, 15, 16, 17]}
+
+
+class FakeCtx:
+    def __init__(self):
+        self.kv = {}                # seq_id -> [标记 (Embedding 行) 或 Token]
+        self.out = []               # 本次前向各输出行所属序列
+        self.forwards = []          # 每次前向的 (序列, 行数)
+        self.loop_tag = None        # 低温时该片段生成 loop_after 个 Token 后陷入重复
+        self.loop_after = 0
+        self.fail_after = None      # 第几次前向起出错
+        self.ptr = self
+
+    def remove_sequence(self, seq_id):
+        self.kv.pop(seq_id, None)
+        return True
+
+    def copy_sequence(self, src, dst):
+        self.kv[dst] = list(self.kv[src])
+
+    def truncate_kv_cache(self, n_keep, seq_id=0):
+        del self.kv[seq_id][n_keep:]
+        return True
+
+    def decode(self, batch):
+        if self.fail_after is not None and len(self.forwards) >= self.fail_after:
+            return 1
+        self.forwards.append((sorted({seq for _, _, seq in batch.rows}), len(batch.rows)))
+        for value, pos, seq in batch.rows:
+            cells = self.kv.setdefault(seq, [])
+            assert pos == len(cells)            # 每个序列的位置各自连续
+            cells.append(value)
+        self.out = [seq for _, _, seq in batch.rows]
+        return 0
+
+    def predict(self, idx, temperature):
+        cells = self.kv[self.out[idx]]
+        generated = [c for c in cells if isinstance(c, int)]
+        tag = [c for c in cells if isinstance(c, float)][-1]
+        if tag == self.loop_tag and temperature < 0.5 and len(generated) >= self.loop_after:
+            return LOOP
+        target = TARGETS[tag]
+        assert generated == target[:len(generated)]
+        return target[len(generated)] if len(generated) < len(target) else EOS
+
+
+class FakeBatch:
+    def __init__(self, n_tokens, embd_dim=0, n_seq_max=1):
+        self.n_tokens_max = n_tokens
+        self.rows = []
+
+    def set_embd(self, data, pos=0, seq_id=0):
+        self.rows = [(float(data[i, 0]), int(pos[i]), seq_id) for i in range(len(data))]
+        return self
+
+    def set_tokens(self, tokens, pos, seq_id=0):
+        pos = [pos + i for i in range(len(tokens))] if isinstance(pos, int) else pos
+        seq_id = [seq_id] * len(tokens) if isinstance(seq_id, int) else seq_id
+        self.rows = list(zip(tokens, pos, seq_id))
+        return self
+
+
+class FakeSampler:
+    live = 0                    # 尚未释放的采样器数
+
+    def __init__(self, temperature=0.4, seed=0):
+        self.temperature = temperature
+        FakeSampler.live += 1
+
+    def sample(self, ctx, idx=-1):
+        return ctx.predict(idx, self.temperature)
+
+    def free(self):
+        FakeSampler.live -= 1
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(asr.llama, 'LlamaSampler', FakeSampler, raising=False)
+    monkeypatch.setattr(asr.llama, 'LlamaBatch', FakeBatch, raising=False)
+    monkeypatch.setattr(FakeSampler, 'live', 0)
+    engine = QwenASREngine.__new__(QwenASREngine)
+    engine.config = SimpleNamespace(batch_size=2)
+    engine.model = SimpleNamespace(eos_token=EOS, n_embd=4, token_to_bytes=lambda t: chr(ord('a') + t).encode())
+    engine.ID_IM_END = IM_END
+    engine.ctx = FakeCtx()
+    engine._kv_prefix, engine._kv_reuse = None, True
+    engine._batch, engine._step_batch = None, None
+    return engine
+
+
+def _item(tag):
+    embd = np.concatenate([np.full((N_PREFIX, 4), PREFIX), np.full((2 + tag, 4), tag)]).astype(np.float32)
+    return embd, [7] * N_PREFIX
+
+
+def _text(tag):
+    return "".join(chr(ord('a') + t) for t in TARGETS[tag])
+
+
+def test_sequences_share_prefix_and_steps(engine):
+    results = engine._decode_batch([_item(i) for i in range(3)])
+
+    assert [r.text for r in results] == [_text(i) for i in range(3)]
+    assert not any(r.is_aborted or r.n_retries for r in results)
+    ctx = engine.ctx
+    # 前缀只在序列 0 预填充一次，各序列只预填充前缀之后的部分
+    assert ctx.forwards[0] == ([0], N_PREFIX)
+    assert [r.n_prefill for r in results] == [2, 3, 4]
+    # 逐步解码时两个序列共用一次前向
+    assert ctx.forwards[3:6] == [([1, 2], 2)] * 3
+    assert list(ctx.kv) == [0]                             # 结束的序列已释放，只留常驻前缀
+    assert FakeSampler.live == 0
+
+
+def test_rollback_affects_one_sequence(engine):
+    engine.ctx.loop_tag, engine.ctx.loop_after = 1, 2
+    results = engine._decode_batch([_item(i) for i in range(2)])
+
+    assert [r.text for r in results] == [_text(0), _text(1)]
+    assert [r.n_retries for r in results] == [0, 1]
+    # 回退不重新预填充：前缀与两段 Prompt 之后只有逐步解码（含重新前向最后一个保留 Token）
+    forwards = engine.ctx.forwards
+    assert [n for _, n in forwards[:3]] == [N_PREFIX, 2, 3]
+    assert all(n <= 2 for _, n in forwards[3:])
+    assert FakeSampler.live == 0
+
+
+def test_free_sequences_admit_new_segments(engine):
+    arrivals = [_item(2), _item(3)]
+    done, shown = [], {}
+
+    def on_partial(i, text_base, text):
+        shown[i] = shown.get(i, "")[:text_base] + text
+
+    results = engine._decode_batch([_item(0), _item(1)], admit=lambda wait: arrivals.pop(0) if arrivals else None,
+                                   on_done=lambda i, res: done.append(i), on_partial=on_partial)
+
+    assert [r.text for r in results] == [_text(i) for i in range(4)]
+    assert done == [0, 2, 1, 3]
+    assert shown == {i: _text(i) for i in range(4)}
+    # 片段 2 在片段 1 解码中途进入片段 0 空出的序列 1，之后与片段 1 共用每步前向
+    ctx = engine.ctx
+    k = ctx.forwards.index(([1], 4))
+    assert ([1, 2], 2) in ctx.forwards[k:]
+    assert list(ctx.kv) == [0] and FakeSampler.live == 0
+
+
+def test_decoding_continues_while_admission_encodes(engine):
+    # 片段 2 前两次询问时尚未编码完成：序列 1 继续解码，之后再接纳
+    calls = []
+
+    def admit(wait):
+        calls.append(wait)
+        if len(calls) <= 2:
+            return None
+        return _item(2) if len(calls) == 3 else None
+
+    results = engine._decode_batch([_item(0), _item(1)], admit=admit)
+
+    assert [r.text for r in results] == [_text(i) for i in range(3)]
+    assert calls[:3] == [False, False, False]               # 有活跃序列时不等待编码
+    forwards = engine.ctx.forwards
+    assert forwards.index(([1], 4)) > forwards.index(([2], 1))
+    assert list(engine.ctx.kv) == [0] and FakeSampler.live == 0
+
+
+def test_adapter_encodes_admitted_streams_off_decode_thread():
+    threads = []
+
+    def encode(audio):
+        threads.append(threading.current_thread().name)
+        return np.full((2 + int(audio[0]), 4), audio[0], dtype=np.float32), 0.0
+
+    def decode_batch(items, temperature, admit, on_done, on_partial):
+        # 假解码：轮询 admit(False) 直到接纳流编码完成，没有活跃序列后 admit(True) 等待剩下的
+        items = list(items)
+        for j in range(len(items)):
+            on_done(j, SimpleNamespace(text=str(j), t_prefill=0.0, t_generate=0.0))
+        for wait in [False] * 1000 + [True] * 3:
+            item = admit(wait)
+            if item is not None:
+                items.append(item)
+                on_done(len(items) - 1, SimpleNamespace(text=str(len(items) - 1), t_prefill=0.0, t_generate=0.0))
+        return items
+
+    adapter = QwenAdapter.__new__(QwenAdapter)
+    adapter.config = SimpleNamespace(batch_size=2, chunk_size=40)
+    adapter.engine = SimpleNamespace(
+        encoder=SimpleNamespace(encode=encode),
+        _build_prompt_embd=lambda audio_embd, prefix_text, context, language: audio_embd,
+        _prompt_prefix=lambda context: [],
+        _decode_batch=decode_batch,
+    )
+
+    def stream(tag):
+        s = QwenASRStream()
+        s.accept_waveform(16000, np.full(8, tag))
+        return s
+
+    arrivals = [(stream(1), None, None), (QwenASRStream(), None, None), (stream(2), None, None)]
+    streams, done = [stream(0)], []
+    adapter.decode_streams(streams, admit=lambda: arrivals.pop(0) if arrivals else None, on_done=done.append)
+
+    assert sorted(done) == [0, 1, 2, 3]
+    assert done[:2] == [0, 2]                               # 无音频的流接纳即完成
+    assert threads[0] == threading.current_thread().name    # 初始片段直接编码
+    assert threads[1:] == ['QwenEncode_0', 'QwenEncode_0']
+    assert not any(t.name.startswith('QwenEncode') for t in threading.enumerate())
+
+
+def test_samplers_freed_when_decode_fails(engine):
+    engine.ctx.fail_after = 4
+    with pytest.raises(RuntimeError):
+        engine._decode_batch([_item(i) for i in range(2)])
+    assert FakeSampler.live == 0
@@ -0,0 +1,136 @@
+# coding: utf-8
+"""
+Qwen-ASR GGUF 熔断回退重试测试。
+
+不加载模型：假 ctx 在低温时生成若干正确 Token 后陷入重复，加温后按目标序列继续，
+验证重复熔断后 KV 只回退到循环开始之前、不重新预填充，输出与直接生成一致，
+推送的临时结果随回退改写后与最终文本一致，回退丢弃的 Token 不占用生成上限，
+以及回退后重新前向失败时抛出异常。
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.qwen_asr_gguf.inference import asr
+    from core.server.engines.qwen_asr_gguf.inference.asr import QwenASREngine
+except (ImportError, OSError) as e:
+    # 依赖 onnxruntime / gguf 与 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"Qwen GGUF 后端不可用: {e}", allow_module_level=True)
+
+EOS, IM_END, LOOP = 99, 98, 20
+N_INPUT = 6
+TARGET = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+
+
+class FakeCtx:
+    def __init__(self, loop_after, loop_below=0.5, target=TARGET, fail_resume=False):
+        self.kv = []
+        self.loop_after, self.loop_below = loop_after, loop_below
+        self.target = target
+        self.fail_resume, self.failing = fail_resume, False
+        self.ptr = self
+
+    def clear_kv_cache(self):
+        self.kv = []
+
+    def truncate_kv_cache(self, n_keep, seq_id=0):
+        del self.kv[n_keep:]
+        self.failing = self.fail_resume
+        return True
+
+    def decode_token(self, token):
+        if self.failing:
+            return 1
+        self.kv.append(token)
+        return 0
+
+    def predict(self, temperature):
+        generated = self.kv[N_INPUT:]
+        assert None not in generated
+        if temperature < self.loop_below and len(generated) >= self.loop_after:
+            return LOOP
+        assert generated == self.target[:len(generated)]
+        return self.target[len(generated)] if len(generated) < len(self.target) else EOS
+
+
+class FakeSampler:
+    def __init__(self, temperature=0.4, seed=0):
+        self.temperature = temperature
+
+    def sample(self, ctx):
+        return ctx.predict(self.temperature)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    monkeypatch.setattr(asr.llama, 'LlamaSampler', FakeSampler, raising=False)
+    engine = QwenASREngine.__new__(QwenASREngine)
+    engine.model = SimpleNamespace(eos_token=EOS, token_to_bytes=lambda t: chr(ord('a') + t).encode())
+    engine.ID_IM_END = IM_END
+    engine._kv_prefix, engine._kv_reuse = None, True
+    engine.prefills = []
+
+    def prefill(embd, pos):
+        assert pos == len(engine.ctx.kv)
+        engine.prefills.append((pos, pos + len(embd)))
+        engine.ctx.kv += [None] * len(embd)
+    engine._prefill = prefill
+    return engine
+
+
+def _decode(engine, ctx, on_partial=None):
+    engine.ctx = ctx
+    embd = np.zeros((N_INPUT, 4), dtype=np.float32)
+    return engine._safe_decode(embd, "", rollback_num=5, is_last_chunk=True, temperature=0.4, streaming=False,
+                               on_partial=on_partial)
+
+
+TEXT = "".join(chr(ord('a') + t) for t in TARGET)
+
+
+def test_rollback_continues_without_prefill(engine):
+    res = _decode(engine, FakeCtx(loop_after=4))
+    assert res.text == TEXT and not res.is_aborted and res.n_retries == 1
+    assert engine.prefills == [(0, N_INPUT)]
+
+
+def test_rollback_to_start(engine):
+    res = _decode(engine, FakeCtx(loop_after=0))
+    assert res.text == TEXT and res.n_retries == 1
+    assert engine.prefills == [(0, N_INPUT), (N_INPUT - 1, N_INPUT)]      # 只重算 Prompt 最后一行
+
+
+def test_aborts_after_max_tries(engine):
+    res = _decode(engine, FakeCtx(loop_after=2, loop_below=10.0))
+    assert res.is_aborted and res.n_retries == 3
+    assert res.text.endswith("====解码有误，强制熔断====")
+
+
+def test_partials_follow_rollback(engine):
+    shown, history = "", []
+
+    def on_partial(text_base, text):
+        nonlocal shown
+        assert text_base <= len(shown)
+        shown = shown[:text_base] + text
+        history.append(shown)
+
+    res = _decode(engine, FakeCtx(loop_after=8), on_partial=on_partial)
+    assert res.n_retries == 1
+    assert shown == res.text == TEXT
+    assert any(chr(ord('a') + LOOP) in h for h in history)     # 稳定文本里出现过的重复内容被改写
+
+
+def test_rollback_does_not_consume_token_budget(engine):
+    # 保留 500 个 Token，加上回退丢弃的重复部分，总前向次数超过 512
+    target = [1 + i % 10 for i in range(500)]
+    res = _decode(engine, FakeCtx(loop_after=450, target=target))
+    assert res.n_retries == 1
+    assert res.text == "".join(chr(ord('a') + t) for t in target)
+
+
+def test_resume_failure_raises(engine):
+    with pytest.raises(RuntimeError):
+        _decode(engine, FakeCtx(loop_after=4, fail_resume=True))
@@ -0,0 +1,77 @@
+# coding: utf-8
+"""
+Qwen 音频编码器测试。
+
+不加载模型：用按块独立计算的假前端会话、记录 Mask 形状的假后端会话，
+验证前端合批推理与逐块推理结果一致，后端优先使用可广播的 Mask、模型不接受时退回完整 Mask。
+"""
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.qwen_asr_gguf.inference.encoder import QwenAudioEncoder
+except (ImportError, OSError) as e:
+    # 依赖 onnxruntime / gguf 与 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"Qwen GGUF 后端不可用: {e}", allow_module_level=True)
+
+
+class FakeFrontend:
+    def __init__(self):
+        self.batches = []
+
+    def run(self, _, feeds):
+        chunk = feeds["chunk_mel"]                          # (n, 128, 100)
+        self.batches.append(chunk.shape[0])
+        return [chunk[:, :4, :13].transpose(0, 2, 1) + chunk.sum(axis=(1, 2))[:, None, None]]
+
+
+class FakeBackend:
+    def __init__(self, accept_compact=True):
+        self.masks = []
+        self.accept_compact = accept_compact
+
+    def run(self, _, feeds):
+        hidden, mask = feeds["hidden_states"], feeds["attention_mask"]
+        if mask.shape[2] != hidden.shape[1] and not self.accept_compact:
+            raise ValueError("Got invalid dimensions for input: attention_mask")
+        self.masks.append(mask.shape)
+        return [hidden * 2]
+
+
+def _encoder(batchable, accept_compact=True):
+    enc = QwenAudioEncoder.__new__(QwenAudioEncoder)
+    enc.verbose = False
+    enc.active_dml = False
+    enc.input_dtype = np.float32
+    enc.fe_batchable, enc.fe_max_batch = batchable, 4
+    enc._compact_mask, enc._mask_cache = True, {}
+    enc.sess_fe = FakeFrontend()
+    enc.sess_be = FakeBackend(accept_compact)
+    return enc
+
+
+def test_batched_frontend_matches_loop():
+    mel = np.random.default_rng(0).standard_normal((128, 950)).astype(np.float32)
+    batched, looped = _encoder(True), _encoder(False)
+    a, b = batched._run_frontend(mel), looped._run_frontend(mel)
+
+    assert batched.sess_fe.batches == [4, 4, 2]
+    assert looped.sess_fe.batches == [1] * 10
+    assert a.shape == b.shape == (1, 124, 4)            # 9 个整块 * 13 + 尾块 50 帧 -> 7
+    np.testing.assert_array_equal(a, b)
+
+
+def test_backend_mask_compact_with_fallback():
+    hidden = np.ones((1, 30, 4), dtype=np.float32)
+    enc = _encoder(True)
+    enc._run_backend(hidden)
+    enc._run_backend(hidden)
+    assert enc.sess_be.masks == [(1, 1, 1, 30), (1, 1, 1, 30)]
+    assert len(enc._mask_cache) == 1
+
+    enc = _encoder(True, accept_compact=False)
+    out = enc._run_backend(hidden)
+    enc._run_backend(hidden)
+    assert enc.sess_be.masks == [(1, 1, 30, 30), (1, 1, 30, 30)]
+    assert not enc._compact_mask
+    np.testing.assert_array_equal(out, hidden * 2)
@@ -0,0 +1,61 @@
+# coding: utf-8
+"""
+Qwen-ASR GGUF 前缀 KV 缓存测试。
+
+不加载模型：用假的 ctx 记录 KV 操作、替换 _prefill 记录预填充区间，
+验证同一前缀只预填充一次、前缀变化或后端不支持部分删除时回退为整体清空。
+"""
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.qwen_asr_gguf.inference.asr import QwenASREngine
+except (ImportError, OSError) as e:
+    # 依赖 onnxruntime / gguf 与 llama.cpp 动态库（导入时即加载）
+    pytest.skip(f"Qwen GGUF 后端不可用: {e}", allow_module_level=True)
+
+
+class FakeCtx:
+    def __init__(self, can_truncate=True):
+        self.ops = []
+        self.can_truncate = can_truncate
+
+    def clear_kv_cache(self):
+        self.ops.append('clear')
+
+    def truncate_kv_cache(self, n_keep, seq_id=0):
+        self.ops.append(('truncate', n_keep))
+        return self.can_truncate
+
+
+def _engine(can_truncate=True):
+    engine = QwenASREngine.__new__(QwenASREngine)
+    engine.ctx = FakeCtx(can_truncate)
+    engine._kv_prefix, engine._kv_reuse = None, True
+    engine.prefills = []
+    engine._prefill = lambda embd, pos: engine.prefills.append((pos, pos + len(embd)))
+    return engine
+
+
+def test_prefix_is_prefilled_once():
+    engine = _engine()
+    embd = np.zeros((10, 4), dtype=np.float32)
+    assert engine._prefill_prompt(embd, [1, 2, 3]) == 10
+    assert engine._prefill_prompt(embd, [1, 2, 3]) == 7
+    assert engine._prefill_prompt(embd, [1, 2, 3]) == 7
+    assert engine.prefills == [(0, 3), (3, 10), (3, 10), (3, 10)]
+    assert engine.ctx.ops == ['clear', ('truncate', 3), ('truncate', 3)]
+
+    # 前缀变化（context 不同）时重建
+    assert engine._prefill_prompt(embd, [1, 2]) == 10
+    assert engine.prefills[-2:] == [(0, 2), (2, 10)]
+
+
+def test_falls_back_when_truncate_unsupported():
+    engine = _engine(can_truncate=False)
+    embd = np.zeros((10, 4), dtype=np.float32)
+    engine._prefill_prompt(embd, [1, 2, 3])
+    engine._prefill_prompt(embd, [1, 2, 3])
+    engine._prefill_prompt(embd, [1, 2, 3])
+    assert engine.ctx.ops == ['clear', ('truncate', 3), 'clear', 'clear']
+    assert engine.prefills[-1] == (0, 10)
@@ -0,0 +1,89 @@
+# coding: utf-8
+"""
+SenseVoice 合批推理测试。
+
+不加载模型：用按帧独立计算、遵守 mask 的假 Encoder / CTC 会话替换 ONNX 会话，
+验证合批识别（含长音频切片、不同长度补齐、跨批分组）与逐段识别结果完全一致。
+"""
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+try:
+    from core.server.engines.sensevoice_onnx.inference.engine import SenseVoiceInference
+    from core.server.engines.sensevoice_onnx.inference.encoder import SenseVoiceEncoder
+    from core.server.engines.sensevoice_onnx.inference.decoder import SenseVoiceDecoder
+    from core.server.engines.sensevoice_onnx.inference.audio import NumPyMelExtractor
+    from core.server.engines.sensevoice_onnx.inference.radar import HotwordRadar
+except ImportError as e:
+    # 依赖 onnxruntime / sentencepiece
+    pytest.skip(f"SenseVoice 后端不可用: {e}", allow_module_level=True)
+
+VOCAB = 8
+
+
+class FakeEncoderSession:
+    def __init__(self):
+        self.batches = []
+
+    def run(self, _, feeds):
+        feat, mask = feeds["speech_feat"], feeds["mask"]
+        self.batches.append(feat.shape[0])
+        B, T, _ = feat.shape
+        out = np.zeros((B, T + 4, VOCAB), dtype=np.float32)
+        out[:, 4:] = np.sin(feat[..., :VOCAB] * 7) * mask[..., None]
+        return [out]
+
+
+class FakeDecoderSession:
+    def run(self, _, feeds):
+        logits = feeds["enc_out"]
+        idx = np.argsort(-logits, axis=-1, kind='stable')[..., :4]
+        log_probs = np.take_along_axis(logits, idx, axis=-1) - np.log(np.exp(logits).sum(-1, keepdims=True))
+        return [log_probs, idx.astype(np.int32)]
+
+
+class FakeTokenizer:
+    def get_piece_size(self):
+        return VOCAB
+
+    def id_to_piece(self, i):
+        return chr(0x4e00 + int(i))
+
+
+def _engine():
+    engine = SenseVoiceInference.__new__(SenseVoiceInference)
+    engine.config = SimpleNamespace(top_k=4)
+    engine.frontend = NumPyMelExtractor()
+    engine.sp = FakeTokenizer()
+    engine.radar = HotwordRadar([], engine.sp)
+
+    engine.encoder = SenseVoiceEncoder.__new__(SenseVoiceEncoder)
+    engine.encoder.session = FakeEncoderSession()
+    engine.encoder.config = {}
+    engine.encoder.input_dtype = np.float32
+    engine.encoder.use_dml = False
+    engine.encoder.batchable = True
+
+    engine.decoder = SenseVoiceDecoder.__new__(SenseVoiceDecoder)
+    engine.decoder.session = FakeDecoderSession()
+    engine.decoder.input_dtype = np.float32
+    return engine
+
+
+def test_batch_matches_sequential():
+    engine = _engine()
+    rng = np.random.default_rng(0)
+    audios = [(rng.standard_normal(int(s * 16000)) * 0.1).astype(np.float32) for s in (50, 3, 12, 75)]
+
+    expected = [engine.recognize(a) for a in audios]
+    engine.encoder.session.batches.clear()
+    results, timings = engine.recognize_batch(audios, ['auto'] * len(audios), max_batch=3)
+
+    # 步长 35s：50s 切 2 片、75s 切 3 片，共 7 片，每批至多 3 片
+    assert engine.encoder.session.batches == [3, 3, 1]
+    assert timings.encoder > 0 and timings.decoder > 0
+    for res, exp in zip(results, expected):
+        assert res.text == exp.text and res.text
+        assert [r.start for r in res.results] == [r.start for r in exp.results]
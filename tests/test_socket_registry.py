@@ -0,0 +1,84 @@
+# coding: utf-8
+"""
+识别进程本地连接表测试。
+
+用 queue.Queue 代替 multiprocessing.Queue 推送 connect / disconnect 控制消息，
+验证断连 socket 的缓冲任务、session 被清理（识别进程闲置时同样及时清理），
+之后到达的任务被跳过，未知 socket 放行。
+"""
+import queue
+from types import SimpleNamespace
+
+from core.server.schema import Task
+from core.server.state import WorkerState
+from core.server.worker.task_handler import TaskHandler
+
+
+def _task(task_id, socket_id):
+    return Task(type='file', data=b'', offset=0, overlap=0, task_id=task_id, socket_id=socket_id,
+                is_final=False, time_start=0, time_submit=0)
+
+
+def _handler():
+    queue_in, queue_ctl = queue.Queue(), queue.Queue()
+    handler = TaskHandler(queue_in, SimpleNamespace(put=lambda r: None), queue_ctl, WorkerState())
+    return handler, queue_in, queue_ctl
+
+
+def test_disconnect_drops_buffered_tasks_and_sessions():
+    handler, queue_in, queue_ctl = _handler()
+    queue_ctl.put(('connect', 's1'))
+    queue_ctl.put(('connect', 's2'))
+    queue_in.put(_task('a', 's1'))
+    queue_in.put(_task('b', 's2'))
+    queue_in.put(None)
+    assert handler.drain_queue() is False
+    assert handler.state.sockets == {'s1', 's2'}
+    assert set(handler.state.sessions) == {'a', 'b'}
+
+    queue_ctl.put(('disconnect', 's1'))
+    handler.sync_sockets()
+    assert handler.state.sockets == {'s2'}
+    assert set(handler.state.sessions) == {'b'}
+    assert handler.scheduler.pop().task_id == 'b'
+    assert handler.scheduler.pop() is None
+
+
+def test_disconnect_handled_while_idle():
+    handler, _, queue_ctl = _handler()
+    queue_ctl.put(('connect', 's1'))
+    handler.state.get_session('a', 's1', 'mic')
+    events = iter([('disconnect', 's1'), None])
+
+    def get(timeout):
+        # 首次等待超时期间收到断开消息，之后退出
+        event = next(events)
+        if event is None:
+            return None
+        queue_ctl.put(event)
+        raise queue.Empty
+
+    handler.queue_in = SimpleNamespace(get=get)
+    assert handler.drain_queue() is False
+    assert not handler.state.sessions and not handler.state.sockets
+
+
+def test_tasks_of_closed_socket_are_skipped():
+    handler, queue_in, queue_ctl = _handler()
+    queue_ctl.put(('connect', 's1'))
+    queue_ctl.put(('disconnect', 's1'))
+    queue_in.put(_task('a', 's1'))
+    # 任务可能先于 connect 消息到达：未知 socket 放行
+    queue_in.put(_task('b', 'new'))
+    queue_in.put(None)
+    handler.drain_queue()
+    assert set(handler.state.sessions) == {'b'}
+
+
+def test_closed_sockets_is_bounded():
+    state = WorkerState(max_closed_sockets=3)
+    for i in range(10):
+        state.connect_socket(str(i))
+        state.disconnect_socket(str(i))
+    assert list(state.closed_sockets) == ['7', '8', '9']
+    assert not state.sockets
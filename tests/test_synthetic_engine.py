@@ -0,0 +1,232 @@
+# coding: utf-8
+"""
+合成引擎测试。
+
+验证 token 由音频内容确定（重叠分片得到相同 token）、静音不产出 token，
+经 TaskPipeline 分片拼接后与整段识别结果一致，请求临时结果时逐 token 推送，
+合批中某个片段出错时其余片段照常得到结果，
+连续批处理在解码中途接纳新到达的片段（同一 session 的前一片段输出后才接纳下一片段，
+有命令等待时停止接纳）、各 session 的结果仍按片段顺序输出，
+以及同一 session 的多个片段同时推理时只推送最早片段的临时结果。
+"""
+import queue
+from types import SimpleNamespace
+
+import numpy as np
+
+from config_server import ServerConfig as Config
+from core.server.engines.factory import EngineFactory
+from core.server.schema import Task
+from core.server.state import WorkerState
+from core.server.worker.pipeline import TaskPipeline
+from core.server.worker.task_handler import TaskHandler
+
+
+def _audio(seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * 16000)) * 0.1).astype(np.float32)
+
+
+def _engine():
+    engine = EngineFactory.create_asr_engine('synthetic')
+    engine.config.latency_base = engine.config.latency_per_second = 0.0
+    return engine
+
+
+def test_tokens_follow_audio_content():
+    engine = _engine()
+    audio = _audio(6)
+    tokens, timestamps = engine.transcribe(audio)
+    assert len(tokens) == 6 * engine.config.tokens_per_second
+    tail, _ = engine.transcribe(audio[2 * 16000:])
+    assert tail == tokens[-len(tail):]
+
+    silent = audio.copy()
+    silent[:3 * 16000] = 0
+    tokens, timestamps = engine.transcribe(silent)
+    assert len(tokens) == 3 * engine.config.tokens_per_second and timestamps[0] == 3.0
+
+
+def test_pipeline_merges_segments():
+    engine = _engine()
+    audio = _audio(20, seed=1)
+    pipeline = TaskPipeline(engine, state=WorkerState())
+    seg, overlap, offset = 8, 2, 0
+    result = None
+    while True:
+        start = int(offset * 16000)
+        is_final = start + (seg + 2 * overlap) * 16000 > len(audio)
+        end = len(audio) if is_final else start + (seg + overlap) * 16000
+        task = Task(type='file', data=audio[start:end].tobytes(), offset=offset, overlap=overlap,
+                    task_id='t', socket_id='s', is_final=is_final, time_start=0, time_submit=0)
+        result = pipeline.process(task)
+        if is_final:
+            break
+        offset += seg
+    assert result.tokens == engine.transcribe(audio)[0]
+
+
+def test_pipeline_skips_silent_segments(monkeypatch):
+    monkeypatch.setattr(Config, 'silence_skip', True)
+    engine = _engine()
+    audio = _audio(24, seed=2)
+    audio[8 * 16000:16 * 16000] *= 1e-4            # 中间 8 秒近乎静音（约 -80 dBFS）
+    decoded = []
+    decode_stream = engine.decode_stream
+    engine.decode_stream = lambda stream, **kw: (decoded.append(1), decode_stream(stream, **kw))
+
+    pipeline = TaskPipeline(engine, state=WorkerState())
+    for i in range(3):
+        task = Task(type='file', data=audio[i * 8 * 16000:(i + 1) * 8 * 16000].tobytes(), offset=i * 8,
+                    overlap=0, task_id='t', socket_id='s', is_final=i == 2, time_start=0, time_submit=0)
+        result = pipeline.process(task)
+
+    assert len(decoded) == 2
+    assert result.duration == 24
+    expected = [t for t, ts in zip(*engine.transcribe(audio)) if not 8 <= ts < 16]
+    assert result.tokens == expected
+
+
+def test_pipeline_pushes_partials():
+    engine = _engine()
+    audio = _audio(4, seed=3)
+    partials = []
+    pipeline = TaskPipeline(engine, state=WorkerState(), on_partial=partials.append)
+    for partial in (True, False):
+        task = Task(type='mic', data=audio.tobytes(), offset=0, overlap=0, task_id=f't{partial}',
+                    socket_id='s', is_final=True, time_start=0, time_submit=1.5, partial=partial)
+        result = pipeline.process(task)
+
+    # 只有请求了临时结果的任务逐 token 推送，增量依次拼成片段全文
+    assert {p.task_id for p in partials} == {'tTrue'}
+    assert len(partials) == len(engine.transcribe(audio)[0])
+    text = ''
+    for p in partials:
+        assert p.text_base == len(text) and p.time_submit == 1.5
+        text = text[:p.text_base] + p.text
+    assert text == ''.join(engine.transcribe(audio)[0]) == result.text
+
+
+def test_batch_error_isolated_to_segment():
+    engine = _engine()
+    decode_stream, decode_streams = engine.decode_stream, engine.decode_streams
+
+    def checked(context):
+        if context == 'bad':
+            raise RuntimeError('bad segment')
+
+    def single(stream, context=None, **kwargs):
+        checked(context)
+        return decode_stream(stream, context=context, **kwargs)
+
+    def batch(streams, contexts=None, **kwargs):
+        for context in contexts or ():
+            checked(context)
+        return decode_streams(streams, contexts=contexts, **kwargs)
+
+    engine.decode_stream, engine.decode_streams = single, batch
+    out = []
+    handler = TaskHandler(None, SimpleNamespace(put=out.append), None, WorkerState())
+    handler.set_engine(engine)
+    tasks = [Task(type='file', data=_audio(2, seed=i).tobytes(), offset=0, overlap=0, task_id=tid,
+                  socket_id='s', is_final=True, time_start=0, time_submit=0, context=context)
+             for i, (tid, context) in enumerate([('a', ''), ('b', 'bad'), ('c', '')])]
+    for task in tasks:
+        handler.scheduler.enqueue(task)
+    handler.handle_audio_tasks([handler.scheduler.pop() for _ in tasks])
+
+    # 出错片段没有结果，同批其他 session 照常完成；出错的最终片段同样结束 session
+    assert [(r.task_id, r.is_final) for r in out] == [('a', True), ('c', True)]
+    assert not handler.state.sessions
+
+
+def test_continuous_batching_admits_new_segments():
+    engine = _engine()
+    engine.config.batch_size, engine.config.continuous = 2, True
+    calls = []
+    decode_streams = engine.decode_streams
+    engine.decode_streams = lambda streams, **kwargs: (calls.append(len(streams)),
+                                                       decode_streams(streams, **kwargs))
+    audio = {'a': _audio(6, seed=4), 'b': _audio(2, seed=5), 'c': _audio(2, seed=6)}
+
+    def task(tid, start, end, is_final):
+        return Task(type='file', data=audio[tid][start * 16000:end * 16000].tobytes(), offset=start, overlap=0,
+                    task_id=tid, socket_id='s', is_final=is_final, time_start=0, time_submit=0)
+
+    # a 的第二个片段与 c 在解码中途到达：a 的第一个片段仍在识别，先接纳 c，a 的第二个片段等前一片段输出后再接纳
+    arrivals = [task('a', 5, 6, True), task('c', 0, 2, True)]
+
+    def get_nowait():
+        if not arrivals:
+            raise queue.Empty
+        return arrivals.pop(0)
+
+    out = []
+    handler = TaskHandler(SimpleNamespace(get_nowait=get_nowait), SimpleNamespace(put=out.append), None, WorkerState())
+    handler.set_engine(engine)
+    popped = []
+    pop_audio = handler.scheduler.pop_audio
+
+    def record(skip=()):
+        task = pop_audio(skip=skip)
+        popped.append((task and (task.task_id, task.offset), set(skip)))
+        return task
+    handler.scheduler.pop_audio = record
+    handler.handle_audio_tasks([task('a', 0, 5, False), task('b', 0, 2, True)])
+
+    assert calls == [2]                                     # 新到达的片段在同一次解码中完成
+    admitted = [(task, skip) for task, skip in popped if task]
+    assert admitted == [(('c', 0), {'a'}), (('a', 5), set())]
+    assert sorted((r.task_id, r.is_final) for r in out) == [('a', False), ('a', True), ('b', True), ('c', True)]
+    results = {tid: [r for r in out if r.task_id == tid] for tid in audio}
+    assert [r.is_final for r in results['a']] == [False, True]
+    for tid, data in audio.items():
+        assert results[tid][-1].tokens == engine.transcribe(data)[0]
+    assert not handler.state.sessions
+
+
+def test_continuous_admission_stops_for_commands():
+    engine = _engine()
+    engine.config.batch_size, engine.config.continuous = 2, True
+
+    def task(tid, type='file'):
+        return Task(type=type, data=_audio(2, seed=len(tid)).tobytes() if type != 'cmd' else b'', offset=0,
+                    overlap=0, task_id=tid, socket_id='s', is_final=True, time_start=0, time_submit=0)
+
+    arrivals = [task('cmd', type='cmd'), task('late')]
+
+    def get_nowait():
+        if not arrivals:
+            raise queue.Empty
+        return arrivals.pop(0)
+
+    out = []
+    handler = TaskHandler(SimpleNamespace(get_nowait=get_nowait), SimpleNamespace(put=out.append), None, WorkerState())
+    handler.set_engine(engine)
+    handler.handle_audio_tasks([task('a'), task('bb')])
+
+    # 命令到达后不再接纳新片段，本批结束即可执行命令
+    assert [r.task_id for r in out] == ['a', 'bb']
+    assert handler.scheduler.pop().task_id == 'cmd'
+    assert handler.scheduler.pop().task_id == 'late'
+
+
+def test_continuous_partials_from_one_segment_per_session():
+    engine = _engine()
+    engine.config.batch_size, engine.config.continuous = 4, True
+    audio = _audio(4, seed=7)
+    partials = []
+    pipeline = TaskPipeline(engine, state=WorkerState(), on_partial=partials.append)
+    tasks = [Task(type='mic', data=audio[start * 16000:end * 16000].tobytes(), offset=start, overlap=0,
+                  task_id='t', socket_id='s', is_final=end == 4, time_start=0, time_submit=0, partial=True)
+             for start, end in ((0, 3), (3, 4))]
+    results = pipeline.process_batch(tasks, admit=lambda: None)
+
+    # 两个片段同批推理，临时结果只来自第一个片段，不会与第二个片段的增量拼在一起
+    first = engine.transcribe(audio[:3 * 16000])[0]
+    assert len(partials) == len(first)
+    text = ''
+    for p in partials:
+        text = text[:p.text_base] + p.text
+    assert text == ''.join(first)
+    assert results[-1].tokens == engine.transcribe(audio)[0]
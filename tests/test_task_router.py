@@ -0,0 +1,60 @@
+# coding: utf-8
+"""
+多识别进程任务路由测试。
+
+验证同一 task_id 始终分给同一识别进程、新会话按负载均衡、
+最终片段与断开连接时解除绑定、GPU 加速命令随会话分发，以及控制消息广播。
+"""
+from core.server.schema import Task
+from core.server.worker.router import TaskRouter
+
+
+def _task(task_id, socket_id='s', is_final=False, type='file'):
+    return Task(type=type, data=b'', offset=0, overlap=0, task_id=task_id, socket_id=socket_id,
+                is_final=is_final, time_start=0, time_submit=0)
+
+
+def _drain(router, index):
+    items = []
+    while True:
+        try:
+            items.append(router.queues_in[index].get(timeout=0.2))
+        except Exception:
+            return items
+
+
+def test_session_affinity_and_balance():
+    router = TaskRouter(3)
+    for tid in 'abc':
+        router.put(_task(tid))
+    assert sorted(router.worker_of(t) for t in 'abc') == [0, 1, 2]
+
+    index = router.worker_of('a')
+    router.put(_task('a'))
+    router.put(_task('a', is_final=True))
+    assert router.worker_of('a') == -1
+    assert [t.task_id for t in _drain(router, index)] == ['a', 'a', 'a']
+
+
+def test_disconnect_unpins_and_broadcasts():
+    router = TaskRouter(2)
+    router.connect('s1')
+    router.put(_task('a', socket_id='s1'))
+    router.put(_task('b', socket_id='s2'))
+    router.disconnect('s1')
+    assert router.worker_of('a') == -1
+    assert router.worker_of('b') >= 0
+    for q in router.queues_ctl:
+        assert q.get(timeout=1) == ('connect', 's1')
+        assert q.get(timeout=1) == ('disconnect', 's1')
+
+
+def test_command_follows_session_and_stop_reaches_all():
+    router = TaskRouter(2)
+    router.put(_task('a'))
+    router.command(_task('gpu_boost', type='cmd'), 'b')        # 会话 b 尚无片段：先绑定
+    router.put(_task('b', is_final=True))
+    router.command(_task('gpu_boost', type='cmd'), 'a')
+    router.stop()
+    assert [(t and t.task_id) for t in _drain(router, 0)] == ['a', 'gpu_boost', None]
+    assert [(t and t.task_id) for t in _drain(router, 1)] == ['gpu_boost', 'b', None]
@@ -0,0 +1,81 @@
+# coding: utf-8
+"""
+识别任务调度器测试。
+
+验证麦克风片段优先于已排队的文件片段、同类 session 间轮转且 session 内 FIFO、
+截止时间最早者优先、超时的文件片段可越过麦克风片段、按类别记录排队时间，
+以及连续批处理接纳音频片段时跳过命令与指定的 session。
+"""
+import time
+
+from core.server.metrics import worker_metrics
+from core.server.schema import Task
+from core.server.state import WorkerState
+from core.server.worker.scheduler import TaskScheduler
+
+
+def _task(task_id, type='file', offset=0, deadline=0.0, time_submit=0):
+    return Task(type=type, data=b'', offset=offset, overlap=0, task_id=task_id, socket_id='s',
+                is_final=False, time_start=0, time_submit=time_submit, deadline=deadline)
+
+
+def _order(scheduler):
+    out = []
+    while (task := scheduler.pop()) is not None:
+        out.append((task.task_id, task.offset))
+    return out
+
+
+def test_mic_preempts_queued_file_segments():
+    scheduler = TaskScheduler(WorkerState())
+    for i in range(3):
+        scheduler.enqueue(_task('f', offset=i))
+    scheduler.enqueue(_task('m', type='mic'))
+    assert scheduler.pop().task_id == 'm'
+    assert _order(scheduler) == [('f', 0), ('f', 1), ('f', 2)]
+    assert scheduler.is_empty
+
+
+def test_sessions_round_robin_within_class():
+    scheduler = TaskScheduler(WorkerState())
+    for i in range(3):
+        scheduler.enqueue(_task('a', offset=i))
+    for i in range(2):
+        scheduler.enqueue(_task('b', offset=i))
+    assert scheduler.sizes() == {'cmd': 0, 'mic': 0, 'file': 5}
+    assert _order(scheduler) == [('a', 0), ('b', 0), ('a', 1), ('b', 1), ('a', 2)]
+
+
+def test_deadlines():
+    now = time.time()
+    scheduler = TaskScheduler(WorkerState())
+    scheduler.enqueue(_task('m1', type='mic', deadline=now + 20))
+    scheduler.enqueue(_task('m2', type='mic', deadline=now + 10))
+    assert scheduler.pop().task_id == 'm2'
+
+    # 超时的文件片段越过未超时的麦克风片段
+    scheduler.enqueue(_task('f', deadline=now - 1))
+    assert _order(scheduler) == [('f', 0), ('m1', 0)]
+
+
+def test_queue_wait_per_class():
+    scheduler = TaskScheduler(WorkerState())
+    before = worker_metrics.queue_wait['mic'].count if 'mic' in worker_metrics.queue_wait else 0
+    scheduler.enqueue(_task('m', type='mic', time_submit=time.time() - 0.5))
+    scheduler.pop()
+    hist = worker_metrics.queue_wait['mic']
+    assert hist.count == before + 1 and hist.sum >= 0.5
+
+
+def test_pop_audio_skips_commands_and_busy_sessions():
+    now = time.time()
+    scheduler = TaskScheduler(WorkerState())
+    scheduler.enqueue(_task('c', type='cmd'))
+    scheduler.enqueue(_task('a', type='mic', deadline=now - 1))     # 超时也不越过 skip
+    scheduler.enqueue(_task('b', offset=1))
+    assert scheduler.has_commands
+    assert scheduler.pop_audio(skip={'a'}).task_id == 'b'
+    assert scheduler.pop_audio(skip={'a'}) is None
+    assert scheduler.pop_audio().task_id == 'a'
+    assert scheduler.has_commands and scheduler.pop().task_id == 'c'
+    assert not scheduler.has_commands and scheduler.is_empty
@@ -0,0 +1,120 @@
+# coding: utf-8
+"""
+按停顿切分测试（文件 VAD 切分、麦克风提前切分）。
+
+用调幅噪声模拟语音、极低电平噪声模拟停顿，验证 VAD 在最长的停顿中点切开、
+无停顿时在 [最短, 最长] 区间内兜底，以及 ws_recv 切出的片段首尾相连、无重叠且覆盖全部音频。
+"""
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from config_server import ServerConfig as Config
+from core.protocol import AudioMessage
+from core.server.connection import ws_recv
+from core.server.connection.vad import find_pause_cut, find_last_pause
+from core.server.merger import merge_tokens_by_sequence_matcher
+
+SR = 16000
+
+
+def _speech(seconds: float, pauses=(), seed=0) -> np.ndarray:
+    """调幅噪声，pauses 为 (起点秒, 时长秒) 的停顿"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SR)
+    t = np.arange(n) / SR
+    audio = rng.standard_normal(n) * 0.2 * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t))
+    for start, length in pauses:
+        s, e = int(start * SR), int((start + length) * SR)
+        audio[s:e] = rng.standard_normal(e - s) * 0.001
+    return audio.astype(np.float32)
+
+
+def test_cuts_in_longest_pause():
+    audio = _speech(60, pauses=[(12, 0.6), (25, 0.8), (40, 0.4)])
+    cut = find_pause_cut(audio, 20 * SR, 60 * SR) / SR
+    assert 25.2 < cut < 25.6           # 12s 的停顿短于最短片段，40s 的停顿较短
+
+
+def test_fallback_without_pause():
+    audio = _speech(30, pauses=[(15, 0.1)])
+    cut = find_pause_cut(audio, 10 * SR, 30 * SR) / SR
+    assert 10 <= cut <= 30
+
+
+class FakeRouter:
+    def __init__(self):
+        self.tasks = []
+
+    def put(self, task):
+        self.tasks.append(task)
+
+
+def _send(audio, source, step=SR):
+    """按 step 个采样点一包发给 message_handler，最后发结束包，返回提交的任务"""
+    router = FakeRouter()
+    app = SimpleNamespace(state=SimpleNamespace(router=router, audio_arena=None))
+    websocket = SimpleNamespace(id='ws')
+    cache = ws_recv.AudioCache()
+
+    async def send():
+        for i in range(0, len(audio), step):
+            chunk = audio[i:i + step]
+            msg = AudioMessage(task_id='t', source=source, data='', is_final=False, time_start=0)
+            await ws_recv.message_handler(websocket, msg, chunk.tobytes(), cache, app)
+        msg = AudioMessage(task_id='t', source=source, data='', is_final=True, time_start=0)
+        await ws_recv.message_handler(websocket, msg, b'', cache, app)
+
+    asyncio.run(send())
+    return router.tasks
+
+
+def _check_contiguous(tasks, audio, pauses):
+    """片段无重叠、首尾相连覆盖全部音频，切点落在停顿中"""
+    assert all(t.overlap == 0 for t in tasks)
+    joined = np.concatenate([np.frombuffer(t.data, dtype=np.float32) for t in tasks])
+    np.testing.assert_array_equal(joined, audio)
+    ends = np.cumsum([len(t.data) / 4 / SR for t in tasks])
+    assert [t.offset for t in tasks[1:]] == list(ends[:-1])
+    for end, (start, length) in zip(ends[:-1], pauses):
+        assert start < end < start + length
+
+
+def test_ws_recv_vad_segments(monkeypatch):
+    monkeypatch.setattr(Config, 'file_vad', True)
+    monkeypatch.setattr(Config, 'vad_min_segment', 10.0)
+    monkeypatch.setattr(Config, 'vad_max_segment', 20.0)
+
+    pauses = [(14, 0.5), (31, 0.5), (47, 0.5)]
+    audio = _speech(65, pauses=pauses)
+    tasks = _send(audio, 'file')
+    assert [t.is_final for t in tasks] == [False, False, False, True]
+    _check_contiguous(tasks, audio, pauses)
+
+
+def test_find_last_pause():
+    audio = _speech(10, pauses=[(1, 0.5), (4, 0.5), (7, 0.2)])
+    assert 4.2 < find_last_pause(audio, 2 * SR) / SR < 4.3    # 1s 处早于最短片段，7s 处过短
+    assert find_last_pause(audio, 5 * SR) == 0
+
+
+def test_ws_recv_mic_eager(monkeypatch):
+    monkeypatch.setattr(Config, 'mic_eager', True)
+    monkeypatch.setattr(Config, 'mic_eager_min_segment', 2.0)
+
+    # 停顿出现后的下一个数据包即提交，松开按键时只剩最后一次停顿之后的音频
+    pauses = [(3, 0.5), (6.5, 0.5), (9, 0.4)]
+    audio = _speech(11, pauses=pauses)
+    tasks = _send(audio, 'mic', step=SR // 10)
+    assert [t.is_final for t in tasks] == [False, False, False, True]
+    _check_contiguous(tasks, audio, pauses)
+    assert len(tasks[-1].data) / 4 / SR < 2
+
+
+def test_merge_without_overlap_concatenates():
+    tokens, stamps = merge_tokens_by_sequence_matcher(
+        ['你', '好', '你', '好'], [0.0, 0.2, 0.4, 0.6], ['你', '好'], [0.1, 0.3], offset=20.0, overlap=0,
+    )
+    assert tokens == ['你', '好', '你', '好', '你', '好']
+    assert stamps == [0.0, 0.2, 0.4, 0.6, 20.1, 20.3]
@@ -0,0 +1,96 @@
+# coding: utf-8
+"""
+ws_send 结果分发测试。
+
+用线程安全的 queue.Queue 代替 multiprocessing.Queue，验证常驻读取线程的批量投递、
+同任务累积结果合并、按 socket_id 路由、临时结果的累积与作废（含连接断开时的清理），
+以及退出通知前的结果不丢失。
+"""
+import asyncio
+import json
+import queue
+from types import SimpleNamespace
+
+from core.server.schema import Result, Partial
+from core.server.connection.ws_send import coalesce, drop_partials, ws_send
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+def _result(task_id, socket_id, text, is_final=False):
+    return Result(task_id=task_id, socket_id=socket_id, type='file', text=text, is_final=is_final)
+
+
+def test_coalesce_keeps_latest_per_task():
+    batch = [_result('a', 's1', '1'), _result('b', 's2', 'x'), _result('a', 's1', '12', is_final=True)]
+    merged = coalesce(batch)
+    assert [(r.task_id, r.text, r.is_final) for r in merged] == [('b', 'x', False), ('a', '12', True)]
+
+
+def test_ws_send_routes_and_stops():
+    sockets = {'s1': FakeSocket(), 's2': FakeSocket()}
+    queue_out = queue.Queue()
+    app = SimpleNamespace(state=SimpleNamespace(sockets=sockets, queue_out=queue_out))
+
+    for i in range(1, 4):
+        queue_out.put(_result('a', 's1', 'x' * i))
+    queue_out.put(_result('b', 's2', 'hi', is_final=True))
+    queue_out.put(_result('c', 'gone', 'lost'))
+    queue_out.put(None)
+
+    asyncio.run(asyncio.wait_for(ws_send(app), timeout=10))
+
+    # 同一批次内 'a' 的三条累积结果只发最新一条；不存在的 socket 被跳过
+    assert [m['text'] for m in sockets['s1'].sent] == ['xxx']
+    assert [(m['text'], m['is_final']) for m in sockets['s2'].sent] == [('hi', True)]
+
+
+def test_coalesce_partials():
+    partials = {}
+    merged = coalesce([Partial('a', 's1', 0, '你'), Partial('a', 's1', 1, '好'), Partial('b', 's2', 0, 'x')],
+                      partials)
+    assert [(p.task_id, p.text) for p in merged] == [('a', '你好'), ('b', 'x')]
+
+    # 跨批次累积；回退改写尾部
+    merged = coalesce([Partial('a', 's1', 1, '们'), Partial('a', 's1', 2, '好')], partials)
+    assert [p.text for p in merged] == ['你们好']
+
+    # 片段完成：识别结果取代之前的临时结果，之后的临时结果属于下一个片段
+    merged = coalesce([Partial('a', 's1', 3, '啊'), _result('a', 's1', '你们好。'),
+                       Partial('a', 's1', 0, '再')], partials)
+    assert [(type(r).__name__, r.text) for r in merged] == [('Result', '你们好。'), ('Partial', '再')]
+    coalesce([_result('a', 's1', '你们好。再见', is_final=True)], partials)
+    assert {task_id: p.text for task_id, p in partials.items()} == {'b': 'x'}
+
+
+def test_drop_partials_of_closed_sockets():
+    partials = {}
+    coalesce([Partial('a', 's1', 0, '你'), Partial('b', 's2', 0, 'x'), Partial('c', 's2', 0, 'y')], partials)
+    # s2 断开：其任务不会再有识别结果，临时结果随之丢弃
+    drop_partials(partials, {'s1': FakeSocket()})
+    assert list(partials) == ['a']
+
+
+def test_ws_send_partial_messages():
+    sockets = {'s1': FakeSocket()}
+    queue_out = queue.Queue()
+    app = SimpleNamespace(state=SimpleNamespace(sockets=sockets, queue_out=queue_out))
+    queue_out.put(Partial('a', 's1', 0, '你好', time_submit=1.0))
+    queue_out.put(Partial('c', 'gone', 0, '丢弃'))
+    queue_out.put(_result('a', 's1', '你好。', is_final=True))
+    queue_out.put(None)
+
+    asyncio.run(asyncio.wait_for(ws_send(app), timeout=10))
+    assert [(m.get('partial', False), m['text']) for m in sockets['s1'].sent] == [(False, '你好。')]
+
+    sockets['s1'].sent.clear()
+    queue_out.put(Partial('a', 's1', 0, '你好', time_submit=1.0))
+    queue_out.put(None)
+    asyncio.run(asyncio.wait_for(ws_send(app), timeout=10))
+    assert sockets['s1'].sent == [{'task_id': 'a', 'text': '你好', 'time_submit': 1.0, 'partial': True}]